@@ -0,0 +1,77 @@
+"""Compare the direct-exec fast path with running the same commands through xonsh.
+
+Usage: python benchmarks/bench_direct_exec.py [--iterations N]
+
+CPU time covers the server process, reaped children (the direct path's
+programs) and the long-lived xonsh session, read from /proc on Linux.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import time
+
+from tree_climber_mcp.direct import parse_simple_pipeline
+from tree_climber_mcp.pool import ShellPool
+
+COMMANDS = ["ls -la", "git status --short", "cat pyproject.toml", "ls -la | wc -l"]
+
+
+def _proc_cpu(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0.0
+    # utime and stime, fields 14 and 15 of the full stat line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _cpu(shell_pid: int) -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime + _proc_cpu(shell_pid)
+
+
+async def _measure(run, iterations: int, shell_pid: int) -> tuple[list[float], float]:
+    latencies = []
+    cpu_before = _cpu(shell_pid)
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await run()
+        latencies.append(time.perf_counter() - started)
+    return latencies, (_cpu(shell_pid) - cpu_before) / iterations
+
+
+def _summary(latencies: list[float], cpu: float) -> str:
+    p50 = statistics.median(latencies) * 1000
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+    return f"p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  cpu {cpu * 1000:6.2f} ms/call"
+
+
+async def main(iterations: int) -> None:
+    pool = ShellPool(size=1)
+    await pool.flush_buffer()
+    shell_pid = pool.session()._xonsh_proc.pid
+    try:
+        for command in COMMANDS:
+            pipeline = parse_simple_pipeline(command)
+            # Warm both paths (and the session snapshot) before measuring
+            assert await pool.run_direct(pipeline) is not None, command
+            await pool.run_command(command)
+
+            pty = await _measure(lambda: pool.run_command(command), iterations, shell_pid)
+            direct = await _measure(lambda: pool.run_direct(pipeline), iterations, shell_pid)
+            print(command)
+            print(f"  pty    {_summary(*pty)}")
+            print(f"  direct {_summary(*direct)}")
+    finally:
+        await pool.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -0,0 +1,91 @@
+"""Compare list_directory and find_files walks served by the directory index with walks of the disk.
+
+Usage: python benchmarks/bench_directory_index.py [--files N] [--cold]
+
+Builds a tree of N files in directories of 100 and times building the
+index. Then it walks the first page of a recursive listing and of a *.py
+search from the disk, from the index twice (the first walk of a directory
+creates the entries that later walks reuse), and from the index after a
+file has been created, so the lookup first applies the queued inotify
+events and re-lists one directory. With --cold, the page, dentry and
+inode caches are dropped before every disk run (Linux, as root), which is
+where the index saves the most.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from tree_climber_mcp.config import FIND_FILES_MAX_LIMIT, LIST_DIRECTORY_MAX_LIMIT
+from tree_climber_mcp.dirindex import DirectoryIndex
+from tree_climber_mcp.dirwalk import find_entries, list_page
+
+PER_DIRECTORY = 100
+
+
+def build_tree(root: str, files: int) -> None:
+    for index in range(max(1, files // PER_DIRECTORY)):
+        directory = os.path.join(root, "src", f"pkg{index // 100:03d}", f"mod{index:05d}")
+        os.makedirs(directory)
+        for number in range(PER_DIRECTORY):
+            suffix = ".py" if number % 10 == 0 else ".txt"
+            open(os.path.join(directory, f"f{number:03d}{suffix}"), "w").close()
+
+
+def drop_caches() -> None:
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as file:
+        file.write("3\n")
+
+
+def _time(label: str, run, cold: bool = False) -> None:
+    if cold:
+        drop_caches()
+    started = time.perf_counter()
+    count = run()
+    print(f"  {label:28} {(time.perf_counter() - started) * 1000:9.1f} ms  {count:,} entries")
+
+
+def main(files: int, cold: bool) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench-directory-index-") as root:
+        build_tree(root, files)
+        print(f"{files:,} files")
+
+        index = DirectoryIndex(root)
+        started = time.perf_counter()
+        index.start()
+        while index.stats().state == "building":
+            time.sleep(0.01)
+        stats = index.stats()
+        print(
+            f"  index {stats.state} in {(time.perf_counter() - started) * 1000:.1f} ms, "
+            f"{stats.directories:,} directories, ~{stats.estimated_bytes / (1024 * 1024):.1f} MiB"
+        )
+        try:
+            walks = {
+                "list_directory depth 4": lambda scandir: len(
+                    list_page(root, depth=4, limit=LIST_DIRECTORY_MAX_LIMIT, scandir=scandir).entries
+                ),
+                "find_files *.py": lambda scandir: len(
+                    find_entries(root, "*.py", limit=FIND_FILES_MAX_LIMIT, scandir=scandir).entries
+                ),
+            }
+            for label, walk in walks.items():
+                print(label)
+                _time("disk", lambda: walk(os.scandir), cold)
+                _time("index", lambda: walk(index.scandir))
+                _time("index again", lambda: walk(index.scandir))
+                open(os.path.join(root, "src", "pkg000", "mod00000", "new.py"), "w").close()
+                _time("index after a change", lambda: walk(index.scandir))
+                os.unlink(os.path.join(root, "src", "pkg000", "mod00000", "new.py"))
+        finally:
+            index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000, help="Files in the generated tree.")
+    parser.add_argument("--cold", action="store_true", help="Drop the kernel caches before each disk run.")
+    args = parser.parse_args()
+    main(args.files, args.cold)
@@ -0,0 +1,58 @@
+"""Compare changing one line of a large file with edit_file against rewriting it with write_file.
+
+Usage: python benchmarks/bench_edit_file.py [--lines N]
+
+Writes a temporary file of N 80-byte lines, then changes one line near the
+top, the middle and the end, each in three ways: resending the whole file
+through an atomic write ("rewrite"), a same-length replacement ("replace")
+and a unified diff that inserts a line ("patch"). For each it reports the
+bytes an agent sends, the bytes written to the file, and the time taken.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from tree_climber_mcp.fileedit import edit_file
+from tree_climber_mcp.filewrite import write_atomic
+
+
+def _line(number: int) -> str:
+    return f"generated_value_{number:010d} = compute({number}, scale=1.0, offset=0.0)  # auto\n"
+
+
+def _measure(label: str, sent: int, run) -> None:
+    started = time.perf_counter()
+    written = run()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:8} sent {sent:>11,} B  wrote {written:>11,} B  {elapsed * 1000:8.2f} ms")
+
+
+def main(lines: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench-edit-file-") as directory:
+        path = os.path.join(directory, "generated.py")
+        with open(path, "w") as file:
+            file.writelines(_line(number) for number in range(1, lines + 1))
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB, {lines:,} lines")
+        for where, number in (("top", 10), ("middle", lines // 2), ("end", lines - 10)):
+            print(f"line {number:,} ({where})")
+            old = _line(number)
+            new = old.replace("scale=1.0", "scale=2.0")
+            with open(path) as file:
+                content = file.read().replace(old, new, 1)
+            _measure("rewrite", len(content.encode()), lambda: write_atomic(path, content).written)
+
+            edit = {"old_text": new, "new_text": old}
+            _measure("replace", len(str(edit)), lambda: edit_file(path, edits=[edit]).written)
+
+            patch = f"@@ -{number},1 +{number},2 @@\n {old}+{new}"
+            _measure("patch", len(patch), lambda: edit_file(path, patch=patch).written)
+            edit_file(path, patch=f"@@ -{number},2 +{number},1 @@\n {old}-{new}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=64_000, help="Lines in the generated file.")
+    args = parser.parse_args()
+    main(args.lines)
@@ -0,0 +1,97 @@
+"""Compare find_files' parallel walk with running `find` through the xonsh session.
+
+Usage: python benchmarks/bench_find_files.py [--files N] [--workers W] [--cold]
+
+Builds a tree of N files in directories of 1,000, one file in a hundred
+named *.py. A tenth of the files sit under node_modules/ and a tenth
+under build/, which .gitignore lists, as in a typical JS or Python
+checkout. Each run looks for *.py files. `find` goes through the pty and
+xonsh as an agent would run it, and `find -prune` skips the same
+directories as the default walk. With --cold, the page, dentry and inode
+caches are dropped before every run (Linux, as root), so directories are
+read from disk, which is where parallel scans pay off.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from tree_climber_mcp.config import FIND_FILES_MAX_LIMIT
+from tree_climber_mcp.dirwalk import find_entries
+from tree_climber_mcp.pool import ShellPool
+
+PER_DIRECTORY = 1000
+
+
+def build_tree(root: str, files: int) -> None:
+    os.mkdir(os.path.join(root, ".git"))
+    with open(os.path.join(root, ".gitignore"), "w") as file:
+        file.write("build/\n*.pyc\n")
+    directories = max(1, files // PER_DIRECTORY)
+    for index in range(directories):
+        # One tenth each under node_modules/ and build/
+        top = {0: "node_modules", 1: "build"}.get(index % 10, "src")
+        directory = os.path.join(root, top, f"pkg{index // 100:03d}", f"mod{index:05d}")
+        os.makedirs(directory)
+        for number in range(PER_DIRECTORY):
+            suffix = ".py" if number % 100 == 0 else ".txt"
+            open(os.path.join(directory, f"f{number:04d}{suffix}"), "w").close()
+
+
+def drop_caches() -> None:
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as file:
+        file.write("3\n")
+
+
+def _time(label: str, run, cold: bool) -> None:
+    if cold:
+        drop_caches()
+    started = time.perf_counter()
+    matches = run()
+    print(f"  {label:24} {(time.perf_counter() - started) * 1000:9.1f} ms  {matches:,} matches")
+
+
+async def main(files: int, workers: int, cold: bool) -> None:
+    pool = ShellPool(size=1, output_limit=256 * 1024 * 1024)
+    await pool.flush_buffer()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-find-", dir=os.getcwd()) as root:
+            build_tree(root, files)
+            print(f"{files:,} files")
+            # Warm the dentry cache so every run sees the same state
+            await pool.run_command(f"find {root} -type f | wc -l", cmd_timeout=600)
+
+            async def through_xonsh(label: str, command: str) -> None:
+                if cold:
+                    drop_caches()
+                started = time.perf_counter()
+                result = await pool.run_command(command, cmd_timeout=600)
+                elapsed = time.perf_counter() - started
+                matches = sum(1 for line in result.output.splitlines() if line.endswith(".py"))
+                print(f"  {label:24} {elapsed * 1000:9.1f} ms  {matches:,} matches")
+
+            await through_xonsh("find (xonsh)", f"find {root} -type f -name '*.py'")
+            await through_xonsh(
+                "find -prune (xonsh)",
+                f"find {root} '(' -name .git -o -name node_modules -o -name build ')' -prune -o -type f -name '*.py' -print",
+            )
+
+            limit = FIND_FILES_MAX_LIMIT * 100
+            _time("find_files, all", lambda: len(find_entries(root, "*.py", gitignore=False, limit=limit, workers=workers).entries), cold)
+            _time("find_files, 1 worker", lambda: len(find_entries(root, "*.py", limit=limit, workers=1).entries), cold)
+            _time("find_files", lambda: len(find_entries(root, "*.py", limit=limit, workers=workers).entries), cold)
+            _time("find_files, limit 1000", lambda: len(find_entries(root, "*.py", workers=workers).entries), cold)
+    finally:
+        await pool.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1_000_000, help="Files to create.")
+    parser.add_argument("--workers", type=int, default=8, help="find_files scan threads.")
+    parser.add_argument("--cold", action="store_true", help="Drop kernel caches before each run.")
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.workers, args.cold))
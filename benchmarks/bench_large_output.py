@@ -0,0 +1,56 @@
+"""Measure how the command path copes with very large output.
+
+Usage: python benchmarks/bench_large_output.py [--sizes MB ...] [--limit BYTES]
+
+Each size runs once through the xonsh pty and once through the direct-exec
+path. Throughput is output bytes per wall-clock second; peak RSS is the
+server process's high-water mark so far, so it only ever grows between rows.
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+
+from tree_climber_mcp.config import COMMAND_OUTPUT_LIMIT
+from tree_climber_mcp.direct import parse_simple_pipeline
+from tree_climber_mcp.pool import ShellPool
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _measure(label: str, run) -> None:
+    started = time.perf_counter()
+    result = await run()
+    elapsed = time.perf_counter() - started
+    assert result is not None and not result.timed_out, label
+    throughput = result.output_bytes / elapsed / 1e6
+    print(
+        f"  {label:6} {elapsed:7.2f} s  {throughput:7.1f} MB/s  "
+        f"kept {len(result.output) / 1e6:5.1f} MB  peak rss {_peak_rss_mb():7.1f} MB"
+    )
+
+
+async def main(sizes: list[int], limit: int) -> None:
+    pool = ShellPool(size=1, output_limit=limit)
+    await pool.flush_buffer()
+    try:
+        for size in sizes:
+            command = f"head -c {size * 1000000} /dev/urandom | base64 -w 99"
+            pipeline = parse_simple_pipeline(command)
+            print(f"{size} MB of random bytes as base64")
+            await _measure("pty", lambda: pool.run_command(command, 600))
+            await _measure("direct", lambda: pool.run_direct(pipeline, 600))
+    finally:
+        await pool.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--limit", type=int, default=COMMAND_OUTPUT_LIMIT)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.limit))
@@ -0,0 +1,57 @@
+"""Measure line-window reads of a large, growing log with and without the line index.
+
+Usage: python benchmarks/bench_line_index.py [--lines N] [--line L]
+
+Writes a temporary log of N 100-byte lines, then reads lines L..L+2 by
+scanning the file ("scan"), through a cold index cache ("build"), through the
+warm cache ("cached"), and after appending 1% more lines ("append"), where
+the cached index is extended over the new bytes instead of rebuilt.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from tree_climber_mcp.filewindow import read_window
+from tree_climber_mcp.lineindex import LineIndexCache
+
+LINE = b"x" * 99 + b"\n"
+
+
+def _write_lines(file, count: int) -> None:
+    block = LINE * 10_000
+    for _ in range(count // 10_000):
+        file.write(block)
+    file.write(LINE * (count % 10_000))
+    file.flush()
+
+
+def _measure(label: str, path: str, line: int, cache: LineIndexCache | None) -> None:
+    started = time.perf_counter()
+    window = read_window(path, start_line=line, end_line=line + 2, index_cache=cache)
+    elapsed = time.perf_counter() - started
+    assert window.first_line == line and window.text.count("\n") == 3, label
+    print(f"  {label:7} {elapsed * 1000:9.2f} ms  ({window.total_lines:,} lines)")
+
+
+def main(lines: int, line: int) -> None:
+    with tempfile.NamedTemporaryFile(prefix="bench-line-index-", suffix=".log") as file:
+        _write_lines(file, lines)
+        path = os.path.realpath(file.name)
+        print(f"{os.path.getsize(path) / 1e9:.2f} GB, reading line {line:,}")
+        cache = LineIndexCache()
+        _measure("scan", path, line, None)
+        _measure("build", path, line, cache)
+        _measure("cached", path, line, cache)
+        _write_lines(file, lines // 100)
+        _measure("append", path, line, cache)
+        _measure("cached", path, line, cache)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5_000_000, help="Lines in the generated log.")
+    parser.add_argument("--line", type=int, default=4_000_000, help="Line to jump to.")
+    args = parser.parse_args()
+    main(args.lines, args.line)
@@ -0,0 +1,65 @@
+"""Compare the old listdir-and-isdir listing with the scandir-based pager on a large directory.
+
+Usage: python benchmarks/bench_list_directory.py [--entries N] [--limit L]
+
+Creates N empty files and N/10 subdirectories in a temp directory. "listdir"
+is the previous implementation: `os.listdir`, an `os.path.isdir` stat per
+entry, and a sort of the full formatted listing. "page" is the first page
+of `list_page` with the given limit, and "all pages" walks every page.
+Each page rescans the directory, since the cursor is only a path, so
+walking every page costs about one scan per page.
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from tree_climber_mcp.dirwalk import list_page
+
+
+def listdir_listing(root: str) -> str:
+    items = []
+    for item in os.listdir(root):
+        items.append(f"{item}/" if os.path.isdir(os.path.join(root, item)) else item)
+    return "\n".join(sorted(items))
+
+
+def _time(label: str, run) -> None:
+    started = time.perf_counter()
+    detail = run()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {label:10} {elapsed * 1000:9.1f} ms  {detail}  (peak rss so far {peak:.0f} MB)")
+
+
+def main(entries: int, limit: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench-list-") as root:
+        for index in range(entries):
+            open(os.path.join(root, f"file-{index:07d}.txt"), "w").close()
+        for index in range(entries // 10):
+            os.mkdir(os.path.join(root, f"dir-{index:07d}"))
+        print(f"{entries + entries // 10:,} entries")
+        _time("listdir", lambda: f"{len(listdir_listing(root)) / 1e6:.1f} MB response")
+        _time("page", lambda: f"{len(list_page(root, limit=limit).entries)} entries")
+
+        def all_pages() -> str:
+            cursor, pages = None, 0
+            while True:
+                page = list_page(root, limit=limit, cursor=cursor)
+                pages += 1
+                if page.next_cursor is None:
+                    return f"{pages} pages"
+                cursor = page.next_cursor
+
+        if entries <= 50_000:
+            _time("all pages", all_pages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200_000, help="Files to create.")
+    parser.add_argument("--limit", type=int, default=1000, help="Page size.")
+    args = parser.parse_args()
+    main(args.entries, args.limit)
@@ -0,0 +1,83 @@
+"""Measure command validation throughput with the default rules and with 1,000 rules.
+
+Usage: python benchmarks/bench_policy.py [--seconds S]
+
+"loop" is the previous per-call `re.search` over every pattern string,
+"compiled" is CommandPolicy with its decision cache disabled, and "cached"
+is CommandPolicy as the server uses it, where repeated commands are free.
+Past 512 patterns the loop also thrashes `re`'s compile cache.
+"""
+
+import argparse
+import re
+import time
+
+from tree_climber_mcp.policy import CommandPolicy
+from tree_climber_mcp.security import BANNED_COMMAND_PATTERNS
+
+COMMANDS = [
+    "ls -la",
+    "git status --short",
+    "cat pyproject.toml",
+    "python -m pytest -q tests/test_shell.py",
+    "grep -rn 'def main' src | head -n 20",
+    "find . -name '*.py' -newer setup.cfg",
+    "docker compose logs --tail 200 api",
+    "curl -s https://example.com/api/v1/items?page=2",
+    "rm -rf build dist *.egg-info",
+    "sudo systemctl status nginx",
+]
+
+
+def synthetic_rules(count: int) -> list[str]:
+    """Rules shaped like the real ones: a tool name, whitespace, a flag or argument."""
+    rules = []
+    for index in range(count):
+        if index % 3 == 0:
+            rules.append(rf"tool{index:04d}\s+--(force|purge)")
+        elif index % 3 == 1:
+            rules.append(rf"svc{index:04d}.*\|\s*(sh|bash)")
+        else:
+            rules.append(rf"(alpha|beta){index:04d}\s+-x")
+    return rules
+
+
+def loop_check(patterns: list[str], command: str) -> bool:
+    normalized = " ".join(command.strip().split()).lower()
+    for pattern in patterns:
+        if re.search(pattern, normalized, re.IGNORECASE):
+            return False
+    return True
+
+
+def _rate(check, seconds: float) -> float:
+    checked = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        for command in COMMANDS:
+            check(command)
+        checked += len(COMMANDS)
+    return checked / elapsed
+
+
+def main(seconds: float) -> None:
+    default = list(BANNED_COMMAND_PATTERNS)
+    rule_sets = {
+        "40 rules": default + synthetic_rules(40 - len(default)),
+        "1000 rules": default + synthetic_rules(1000 - len(default)),
+    }
+    for name, patterns in rule_sets.items():
+        compiled = CommandPolicy(patterns, cache_size=0)
+        cached = CommandPolicy(patterns)
+        for command in COMMANDS:
+            assert compiled.is_permitted(command) == loop_check(patterns, command), command
+        print(name)
+        print(f"  loop     {_rate(lambda c: loop_check(patterns, c), seconds):12,.0f} commands/s")
+        print(f"  compiled {_rate(compiled.is_permitted, seconds):12,.0f} commands/s")
+        print(f"  cached   {_rate(cached.is_permitted, seconds):12,.0f} commands/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time spent on each measurement.")
+    main(parser.parse_args().seconds)
@@ -0,0 +1,53 @@
+"""Time policy checks on pathological command lines, old whole-string regexes against the policy.
+
+Usage: python benchmarks/bench_policy_pathological.py
+
+"regex" runs every pattern over the whole normalized command, as before
+the keyword prefilter and token rules existed. "policy" is CommandPolicy
+with the shipped patterns and token rules and its decision cache
+disabled, so every check does the full work. Patterns such as
+`curl.*|sh` run once from their word's first occurrence instead of from
+every occurrence.
+"""
+
+import re
+import time
+
+from tree_climber_mcp.policy import CommandPolicy
+from tree_climber_mcp.security import BANNED_COMMAND_PATTERNS, BANNED_COMMAND_RULES
+
+INPUTS = {
+    "1 MB python -c script": 'python -c "' + "print('curl example')\n" * 50000 + '"',
+    "100 KB heredoc": "cat <<EOF > notes.md\n" + "find / the wget docs\n" * 5000 + "EOF",
+    "20k words starting with curl": "echo " + "curl " * 20000,
+    "20k cp words": "echo " + "cp a b " * 20000,
+    "5000-stage pipeline": " | ".join(["grep -v x"] * 5000),
+}
+
+
+def regex_check(patterns: list[str], command: str) -> bool:
+    normalized = " ".join(command.strip().split()).lower()
+    return not any(re.search(pattern, normalized, re.IGNORECASE) for pattern in patterns)
+
+
+def _time(check, command: str) -> tuple[bool, float]:
+    started = time.perf_counter()
+    permitted = check(command)
+    return permitted, time.perf_counter() - started
+
+
+def main() -> None:
+    patterns = BANNED_COMMAND_PATTERNS
+    policy = CommandPolicy(BANNED_COMMAND_PATTERNS, BANNED_COMMAND_RULES, cache_size=0)
+    for name, command in INPUTS.items():
+        old, old_time = _time(lambda c: regex_check(patterns, c), command)
+        new, new_time = _time(policy.is_permitted, command)
+        assert old == new, name
+        print(
+            f"{name:30} {len(command) / 1024:7.0f} KiB  regex {old_time * 1000:9.1f} ms"
+            f"  policy {new_time * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare search_files with running `grep -rn` through the xonsh session.
+
+Usage: python benchmarks/bench_search_files.py [--files N] [--workers W]
+
+Builds N source-like text files of about 8 KiB, one line in a thousand
+containing the searched identifier, and one 64 MiB log. Both sides look
+for the same regex. "in-thread" searches in the calling thread and
+"processes" on W worker processes; the first run of each pays the
+workers' start-up, so the best of three runs is reported. Worker
+processes only help with more than one CPU.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from tree_climber_mcp.search import SearchPool, compile_pattern, search_tree
+
+PATTERN = r"frobnicate_\d+"
+WORDS = ["value", "result", "index", "return", "self", "config", "import", "path", "data", "error"]
+
+
+def build_tree(root: str, files: int) -> None:
+    generator = random.Random(0)
+
+    def line() -> str:
+        if generator.random() < 0.001:
+            return f"    frobnicate_{generator.randrange(1000)}(value)\n"
+        return "    " + " ".join(generator.choices(WORDS, k=8)) + "\n"
+
+    for index in range(files):
+        directory = os.path.join(root, "src", f"pkg{index // 200:03d}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"mod{index:05d}.py"), "w") as file:
+            file.write("".join(line() for _ in range(150)))
+    with open(os.path.join(root, "app.log"), "w") as file:
+        block = "".join(line() for _ in range(10_000))
+        for _ in range(64 * 1024 * 1024 // len(block)):
+            file.write(block)
+
+
+def _best(run) -> tuple[float, int]:
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        matches = run()
+        timings.append(time.perf_counter() - started)
+    return min(timings), matches
+
+
+async def main(files: int, workers: int) -> None:
+    from tree_climber_mcp.pool import ShellPool
+
+    pool = ShellPool(size=1, output_limit=256 * 1024 * 1024)
+    await pool.flush_buffer()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-search-", dir=os.getcwd()) as root:
+            build_tree(root, files)
+            print(f"{files:,} files and a 64 MiB log, {os.cpu_count()} CPUs")
+            regex = compile_pattern(PATTERN)
+            limit = 10**9
+
+            timings = []
+            for _ in range(3):
+                started = time.perf_counter()
+                result = await pool.run_command(f"grep -rnE 'frobnicate_[0-9]+' {root}", cmd_timeout=600)
+                timings.append(time.perf_counter() - started)
+            print(f"  {'grep -rn (xonsh)':18} {min(timings) * 1000:9.1f} ms  {len(result.output.splitlines()):,} matches")
+
+            for label, search_pool in (("in-thread", SearchPool(0)), ("processes", SearchPool(workers))):
+                try:
+                    elapsed, matches = _best(
+                        lambda: sum(
+                            len(file.matches)
+                            for file in search_tree(root, regex, limit=limit, max_per_file=limit, pool=search_pool).files
+                        )
+                    )
+                finally:
+                    search_pool.shutdown()
+                print(f"  {label:18} {elapsed * 1000:9.1f} ms  {matches:,} matches")
+
+            # The tool's defaults: 200 matches, 20 per file
+            elapsed, matches = _best(lambda: sum(len(file.matches) for file in search_tree(root, regex, pool=None).files))
+            print(f"  {'default limit':18} {elapsed * 1000:9.1f} ms  {matches:,} matches")
+    finally:
+        await pool.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20_000, help="Source files to create.")
+    parser.add_argument("--workers", type=int, default=4, help="search_files worker processes.")
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.workers))
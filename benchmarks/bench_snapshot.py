@@ -0,0 +1,93 @@
+"""Measure snapshot size and the cost of changes_since against a dict-based diff.
+
+Usage: python benchmarks/bench_snapshot.py [--files N] [--changes C]
+
+Builds a tree of N files in directories of 100, takes a snapshot, then
+touches, adds and removes C files each. It reports the snapshot's size
+next to that of a dict mapping each path to a (size, mtime_ns, inode)
+tuple, and times changes_since's merge-walk next to re-walking the tree
+into a second dict and comparing the two. Both are dominated by the lstat
+of every file; the merge-walk holds nothing but the changes.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from tree_climber_mcp.snapshot import _walk, changes_since, take_snapshot
+
+PER_DIRECTORY = 100
+
+
+def build_tree(root: str, files: int) -> list[str]:
+    paths = []
+    for index in range(max(1, files // PER_DIRECTORY)):
+        directory = os.path.join(root, "src", f"pkg{index // 100:03d}", f"mod{index:05d}")
+        os.makedirs(directory)
+        for number in range(PER_DIRECTORY):
+            path = os.path.join(directory, f"file_{number:03d}.py")
+            open(path, "w").close()
+            paths.append(path)
+    return paths
+
+
+def _dict_table(root: str) -> dict[str, tuple[int, int, int]]:
+    return {path: (stat.st_size, stat.st_mtime_ns, stat.st_ino) for path, stat in _walk(root, True, os.scandir, None)}
+
+
+def _dict_diff(old: dict, root: str) -> int:
+    new = _dict_table(root)
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    modified = [path for path in new.keys() & old.keys() if new[path] != old[path]]
+    return len(added) + len(removed) + len(modified)
+
+
+def _measure(label: str, run):
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    # Traced separately, as tracing slows the run it measures
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:28} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:7.1f} MB")
+    return result
+
+
+def main(files: int, changes: int) -> None:
+    with tempfile.TemporaryDirectory(prefix="bench-snapshot-") as root:
+        paths = build_tree(root, files)
+        print(f"{len(paths):,} files")
+
+        snapshot = _measure("snapshot", lambda: take_snapshot(1, root))
+        table = _measure("dict of tuples", lambda: _dict_table(root))
+        dict_bytes = sys.getsizeof(table) + sum(
+            sys.getsizeof(path) + sys.getsizeof(value) + sum(sys.getsizeof(field) for field in value)
+            for path, value in table.items()
+        )
+        print(f"  held: snapshot {snapshot.nbytes / 1e6:.1f} MB, dict {dict_bytes / 1e6:.1f} MB")
+
+        for path in paths[:changes]:
+            with open(path, "a") as file:
+                file.write("x")
+        for path in paths[changes : 2 * changes]:
+            os.unlink(path)
+        for number in range(changes):
+            open(os.path.join(os.path.dirname(paths[-1]), f"generated_{number}.py"), "w").close()
+
+        found = _measure("changes_since (merge-walk)", lambda: len(changes_since(snapshot)))
+        _measure("re-walk into dict and diff", lambda: _dict_diff(table, root))
+        print(f"  {found:,} changes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000, help="Files in the generated tree.")
+    parser.add_argument("--changes", type=int, default=100, help="Files touched, removed and added each.")
+    args = parser.parse_args()
+    main(args.files, args.changes)
@@ -4,6 +4,16 @@ import logging
 import os
 import sys
 
+from .config import (
+    COMMAND_OUTPUT_LIMIT,
+    DIRECTORY_INDEX_BUDGET,
+    FS_IO_TIMEOUT,
+    FS_IO_WORKERS,
+    JOB_SPILL_LIMIT,
+    SEARCH_WORKERS,
+    SHELL_MAX_WAITERS,
+    SHELL_POOL_SIZE,
+)
 from .server import TreeClimberServer
 
 
@@ -30,6 +40,66 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         "--filesystem-root",
         help="Restrict filesystem tools to this root instead of the shell working directory.",
     )
+    parser.add_argument(
+        "--filesystem-workers",
+        type=int,
+        default=FS_IO_WORKERS,
+        help="Threads shared by the filesystem tools for blocking file I/O.",
+    )
+    parser.add_argument(
+        "--filesystem-timeout",
+        type=float,
+        default=FS_IO_TIMEOUT,
+        help="Seconds a filesystem tool call may take before it fails with a timeout.",
+    )
+    parser.add_argument(
+        "--search-workers",
+        type=int,
+        default=SEARCH_WORKERS,
+        help="Worker processes for search_files (0 searches in the server process).",
+    )
+    parser.add_argument(
+        "--directory-index",
+        action="store_true",
+        help=(
+            "Index the filesystem root in memory and keep it current with inotify, so listings and searches "
+            "skip the disk walk. Without --filesystem-root the index covers the directory the server starts in."
+        ),
+    )
+    parser.add_argument(
+        "--directory-index-budget",
+        type=int,
+        default=DIRECTORY_INDEX_BUDGET,
+        help="Approximate bytes of memory the directory index may use before it is dropped.",
+    )
+    parser.add_argument(
+        "--shell-pool-size",
+        type=int,
+        default=SHELL_POOL_SIZE,
+        help="Number of pre-spawned xonsh sessions to keep for tool calls.",
+    )
+    parser.add_argument(
+        "--shell-max-waiters",
+        type=int,
+        default=SHELL_MAX_WAITERS,
+        help="Maximum commands queued behind a busy shell session before new ones are rejected.",
+    )
+    parser.add_argument(
+        "--job-spill-limit",
+        type=int,
+        default=JOB_SPILL_LIMIT,
+        help="Also keep up to this many bytes of each background job's output in a temp file (0 disables).",
+    )
+    parser.add_argument(
+        "--command-output-limit",
+        type=int,
+        default=COMMAND_OUTPUT_LIMIT,
+        help="Keep at most this many bytes of a command's output; the middle of longer output is dropped.",
+    )
+    parser.add_argument(
+        "--policy-file",
+        help="TOML or JSON file of extra banned-command rules, reloaded when it changes.",
+    )
     return parser.parse_args(argv)
 
 
@@ -46,6 +116,16 @@ async def main(argv: list[str] | None = None) -> None:
             logger,
             allow_all_paths=args.allow_all_paths,
             filesystem_root=filesystem_root,
+            shell_pool_size=args.shell_pool_size,
+            shell_max_waiters=args.shell_max_waiters,
+            job_spill_limit=args.job_spill_limit,
+            command_output_limit=args.command_output_limit,
+            policy_file=args.policy_file,
+            filesystem_workers=args.filesystem_workers,
+            filesystem_timeout=args.filesystem_timeout,
+            search_workers=args.search_workers,
+            directory_index=args.directory_index,
+            directory_index_budget=args.directory_index_budget,
         )
         await server.run()
     except KeyboardInterrupt:
@@ -0,0 +1,133 @@
+"""Bounded, linear-time capture of command output."""
+
+from .config import COMMAND_OUTPUT_LIMIT
+from .jobs import OutputRingBuffer
+
+
+class CappedOutput:
+    """Keep the start and the end of a byte stream within `limit` bytes.
+
+    The first half of the budget holds the head of the stream and the rest
+    a ring buffer with its most recent bytes, so a long build log keeps both
+    the command's preamble and the final errors. The tail ring is only
+    allocated once the head is full.
+    """
+
+    def __init__(self, limit: int = COMMAND_OUTPUT_LIMIT):
+        if limit < 1:
+            raise ValueError("Output limit must be at least 1 byte.")
+        self._head = bytearray()
+        self._head_limit = limit - limit // 2
+        self._tail_limit = limit // 2
+        self._tail: OutputRingBuffer | None = None
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        """Number of bytes written so far."""
+        return self._total
+
+    @property
+    def omitted(self) -> int:
+        """Number of bytes dropped between the head and the tail."""
+        kept = len(self._head) + (min(self._tail.total, self._tail_limit) if self._tail else 0)
+        return self._total - kept
+
+    def write(self, data: bytes) -> None:
+        self._total += len(data)
+        room = self._head_limit - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data and self._tail_limit:
+            if self._tail is None:
+                self._tail = OutputRingBuffer(self._tail_limit)
+            self._tail.write(data)
+
+    def render(self) -> str:
+        """Decode the kept bytes, noting where output was left out."""
+        head = self._head.decode("utf-8", errors="replace")
+        tail = ""
+        if self._tail is not None:
+            tail = self._tail.read(self._tail.start, self._tail_limit)[1].decode("utf-8", errors="replace")
+        if not self.omitted:
+            return head + tail
+        return f"{head}\n[... {self.omitted} bytes omitted ...]\n{tail}"
+
+
+class FrameReader:
+    """Incrementally split one framed exchange as it is read from the pty.
+
+    Text before the begin marker (the echoed input line) is dropped, output
+    up to the end marker goes into a `CappedOutput`, the status runs up to
+    the closing token and the prompt ends the exchange. Every chunk is
+    searched once, plus the few bytes a marker split across two reads
+    needs, so the cost stays linear in the size of the output.
+
+    Output is stored with the pty's CRLF translation undone and without
+    the newline that follows the begin marker, so its byte counts are
+    those of what the command printed.
+    """
+
+    BEGIN, OUTPUT, STATUS, PROMPT, DONE = range(5)
+
+    def __init__(self, token: str, prompt: str, limit: int = COMMAND_OUTPUT_LIMIT):
+        self._markers = (
+            f"<<tc:{token}:begin>>".encode(),
+            f"<<tc:{token}:end:".encode(),
+            f":{token}>>".encode(),
+            prompt.encode(),
+        )
+        self.phase = self.BEGIN
+        self.output = CappedOutput(limit)
+        self._status = bytearray()
+        self._pending = b""
+        self._output_started = False
+
+    @property
+    def done(self) -> bool:
+        return self.phase == self.DONE
+
+    @property
+    def status(self) -> str:
+        return self._status.decode("utf-8", errors="replace")
+
+    @property
+    def output_started(self) -> bool:
+        """Whether the newline after the begin marker has been consumed."""
+        return self._output_started
+
+    @property
+    def pending(self) -> bytes:
+        """Bytes read but not consumed: a possible partial marker, or what followed the prompt."""
+        return self._pending
+
+    def feed(self, data: bytes) -> None:
+        data = self._pending + data
+        while self.phase != self.DONE:
+            marker = self._markers[self.phase]
+            index = data.find(marker)
+            if index < 0:
+                # Hold back just enough to complete a marker split across reads
+                split = max(len(data) - len(marker) + 1, 0)
+                if self.phase == self.OUTPUT and data[split - 1 : split] == b"\r":
+                    # Possibly the first half of a CRLF; keep it to normalize the pair
+                    split -= 1
+                self._consume(data[:split])
+                data = data[split:]
+                break
+            self._consume(data[:index])
+            data = data[index + len(marker) :]
+            self.phase += 1
+        self._pending = data
+
+    def _consume(self, data: bytes) -> None:
+        if self.phase == self.OUTPUT:
+            data = data.replace(b"\r\n", b"\n")
+            if data and not self._output_started:
+                self._output_started = True
+                if data.startswith(b"\n"):
+                    data = data[1:]
+            self.output.write(data)
+        elif self.phase == self.STATUS:
+            self._status += data
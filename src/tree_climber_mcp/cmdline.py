@@ -0,0 +1,80 @@
+"""Split command lines into simple-command segments for policy checks."""
+
+import functools
+import re
+from dataclasses import dataclass
+
+from .config import POLICY_CACHE_SIZE, POLICY_CACHEABLE_LENGTH
+
+# Everything that starts a new simple command in bash or xonsh, including
+# substitutions and subprocess/Python mode switches. `|&` pipes stderr too.
+_TOKEN = re.compile(
+    r"""
+    (?P<space>[ \t\r\f\v]+)
+  | (?P<op>\|\||\|&|&&|\$\(|\$\[|!\[|!\(|@\(|[|;&\n()`\]])
+  | (?P<word>(?:
+        '[^']*'?
+      | "[^"\\]*(?:\\.[^"\\]*)*"?
+      | \\.?
+      | [^\s'"\\|;&()`\]]+
+    )+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_PIECE = re.compile(r"""'([^']*)'?|"([^"\\]*(?:\\.[^"\\]*)*)"?|\\(.?)|([^'"\\]+)""", re.DOTALL)
+_ESCAPE = re.compile(r"\\(.)", re.DOTALL)
+_QUOTING = re.compile(r"['\"\\]")
+_PIPES = frozenset({"|", "|&"})
+
+
+@dataclass(frozen=True)
+class Segment:
+    """One simple command; `piped` when a pipe joins it to the segment before."""
+
+    argv: tuple[str, ...]
+    piped: bool = False
+
+
+def _unquote(word: str) -> str:
+    if not _QUOTING.search(word):
+        return word
+    parts = []
+    for single, double, escaped, plain in _PIECE.findall(word):
+        parts.append(single or _ESCAPE.sub(r"\1", double) or escaped or plain)
+    return "".join(parts)
+
+
+def _split(command: str) -> tuple[Segment, ...]:
+    segments = []
+    words: list[str] = []
+    piped = False
+    for match in _TOKEN.finditer(command):
+        kind = match.lastgroup
+        if kind == "word":
+            words.append(_unquote(match.group()))
+        elif kind == "op":
+            if words:
+                segments.append(Segment(tuple(words), piped))
+                words, piped = [], False
+            # Several operators can sit between two commands, as in `$(a) | b`
+            piped = piped or match.group() in _PIPES
+    if words:
+        segments.append(Segment(tuple(words), piped))
+    return tuple(segments)
+
+
+_split_cached = functools.lru_cache(maxsize=POLICY_CACHE_SIZE)(_split)
+
+
+def split_command(command: str) -> tuple[Segment, ...]:
+    """Split a command into the simple commands it runs, in order.
+
+    Quotes and backslash escapes are removed from words, and `|`, `||`,
+    `&&`, `;`, `&`, newlines, parentheses, backticks and xonsh's `$(`, `$[`,
+    `![`, `!(` and `@(` all end a segment. This is deliberately lenient: it
+    never fails, and unbalanced quotes run to the end of the command.
+    Results are cached unless the command is very long.
+    """
+    if len(command) > POLICY_CACHEABLE_LENGTH:
+        return _split(command)
+    return _split_cached(command)
@@ -3,3 +3,53 @@ SERVER_VERSION = "0.1.0"
 
 SHELL_PROMPT = "##P##"
 COMMAND_TIMEOUT = 10
+RECOVERY_TIMEOUT = 2
+HEALTH_CHECK_INTERVAL = 30
+HEALTH_CHECK_TIMEOUT = 5
+COMMAND_OUTPUT_LIMIT = 4 * 1024 * 1024
+BATCH_MAX_COMMANDS = 32
+POLICY_CACHE_SIZE = 4096
+POLICY_CACHEABLE_LENGTH = 64 * 1024
+POLICY_RELOAD_INTERVAL = 2
+READ_FILE_WINDOW = 1024 * 1024
+FILE_SCAN_CHUNK = 1024 * 1024
+WRITE_CHUNK = 1024 * 1024
+EDIT_SUMMARY_HUNKS = 20
+READ_MANY_MAX_FILES = 64
+READ_MANY_BUDGET = 4 * 1024 * 1024
+READ_MANY_WORKERS = 8
+FS_IO_WORKERS = 16
+FS_IO_TIMEOUT = 30
+LIST_DIRECTORY_LIMIT = 1000
+LIST_DIRECTORY_MAX_LIMIT = 10000
+FIND_FILES_LIMIT = 1000
+FIND_FILES_MAX_LIMIT = 10000
+FIND_WORKERS = 8
+FIND_PRUNE = frozenset({".git", "node_modules"})
+DIRECTORY_INDEX_BUDGET = 256 * 1024 * 1024
+SEARCH_LIMIT = 200
+SEARCH_MAX_LIMIT = 2000
+SEARCH_MAX_PER_FILE = 20
+SEARCH_MAX_CONTEXT = 10
+SEARCH_LINE_WIDTH = 300
+SEARCH_WORKERS = 4
+SEARCH_BATCH_FILES = 32
+BINARY_SNIFF_BYTES = 8192
+LINE_INDEX_MIN_SIZE = 4 * 1024 * 1024
+LINE_INDEX_BLOCK = 64 * 1024
+LINE_INDEX_CACHE_BYTES = 16 * 1024 * 1024
+DIGEST_CACHE_SIZE = 4096
+SNAPSHOT_MAX_FILES = 1_000_000
+SNAPSHOT_CACHE_BYTES = 128 * 1024 * 1024
+CHANGES_LIMIT = 1000
+CHANGES_MAX_LIMIT = 10000
+
+SHELL_POOL_SIZE = 1
+SHELL_MAX_WAITERS = 8
+DEFAULT_SESSION_ID = "default"
+
+JOB_BUFFER_SIZE = 1024 * 1024
+JOB_SPILL_LIMIT = 0
+JOB_RETAIN_FINISHED = 32
+JOB_CANCEL_GRACE = 5
+JOB_OUTPUT_CHUNK = 64 * 1024
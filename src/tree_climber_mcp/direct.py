@@ -0,0 +1,165 @@
+"""Run plain external commands without going through the xonsh pty."""
+
+import asyncio
+import keyword
+import os
+import signal
+import time
+
+from .capture import CappedOutput
+from .config import COMMAND_OUTPUT_LIMIT
+
+# Unquoted characters that mean redirection, job control, grouping, globbing
+# or Python syntax to xonsh. `|` is handled separately as a pipe.
+_UNQUOTED_SPECIAL = frozenset(";&<>(){}[]*?#!")
+# Expanded or escaped by xonsh even inside quotes.
+_ALWAYS_SPECIAL = frozenset("$`\\\n\r")
+PIPE_READ_SIZE = 64 * 1024
+
+
+def parse_simple_pipeline(command: str) -> list[list[str]] | None:
+    """Split a command into argv lists if it is a plain pipeline of programs.
+
+    Returns None for anything xonsh could read differently from a plain
+    argv: variables, substitutions, redirects, globs, comments, `~`, string
+    prefixes, escapes, `&&`/`||`/`;` chains, assignments and empty pipeline
+    stages. The caller then falls back to the shell. Whether the program
+    names are aliases or Python names is up to the session to decide.
+    """
+    stages: list[list[str]] = []
+    words: list[str] = []
+    word: list[str] = []
+    in_word = closed_quote = False
+    quote = None
+    for char in command:
+        if char in _ALWAYS_SPECIAL:
+            return None
+        if quote is not None:
+            if char == quote:
+                quote, closed_quote = None, True
+            else:
+                word.append(char)
+            continue
+        if char in " \t|":
+            if in_word:
+                words.append("".join(word))
+                word, in_word, closed_quote = [], False, False
+            if char == "|":
+                if not _is_program_stage(words):
+                    return None
+                stages.append(words)
+                words = []
+        elif in_word and (closed_quote or char in "'\""):
+            # xonsh keeps quotes that touch other text: p"..", --opt="x", "a"b
+            return None
+        elif char in _UNQUOTED_SPECIAL or (char == "~" and not in_word):
+            return None
+        elif char in "'\"":
+            quote, in_word = char, True
+        else:
+            word.append(char)
+            in_word = True
+    if quote is not None:
+        return None
+    if in_word:
+        words.append("".join(word))
+    if not _is_program_stage(words):
+        return None
+    stages.append(words)
+    return stages
+
+
+def _is_program_stage(words: list[str]) -> bool:
+    # `FOO=bar cmd` and `import os` are Python to xonsh
+    return bool(words) and "=" not in words[0] and not keyword.iskeyword(words[0])
+
+
+class PipelineTimeout(asyncio.TimeoutError):
+    """A pipeline outlived its timeout; carries what it wrote before it was killed."""
+
+    def __init__(self, stdout: CappedOutput, stderr: CappedOutput, kill_duration: float):
+        super().__init__()
+        self.stdout = stdout
+        self.stderr = stderr
+        # Time taken to kill and reap every stage
+        self.kill_duration = kill_duration
+
+
+def _kill(processes: list[asyncio.subprocess.Process]) -> None:
+    for process in processes:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+async def _drain(stream: asyncio.StreamReader, output: CappedOutput) -> None:
+    while chunk := await stream.read(PIPE_READ_SIZE):
+        output.write(chunk)
+
+
+async def run_pipeline(
+    pipeline: list[list[str]],
+    cwd: str | None,
+    env: dict[str, str],
+    cmd_timeout: float,
+    limit: int = COMMAND_OUTPUT_LIMIT,
+) -> tuple[CappedOutput, CappedOutput, int]:
+    """Execute argv stages connected by pipes and return `(stdout, stderr, exit_code)`.
+
+    Every stage runs in its own process group so a timeout can kill the
+    whole pipeline before `PipelineTimeout` is raised with the output read
+    so far. The exit status is the last stage's, as in xonsh. Both streams
+    are read in chunks and kept within `limit` bytes each.
+    """
+    processes: list[asyncio.subprocess.Process] = []
+    read_fd = None
+    try:
+        for index, argv in enumerate(pipeline):
+            last = index == len(pipeline) - 1
+            next_read = write_fd = None
+            if not last:
+                next_read, write_fd = os.pipe()
+            try:
+                processes.append(
+                    await asyncio.create_subprocess_exec(
+                        *argv,
+                        cwd=cwd,
+                        env=env,
+                        stdin=asyncio.subprocess.DEVNULL if read_fd is None else read_fd,
+                        stdout=asyncio.subprocess.PIPE if last else write_fd,
+                        stderr=asyncio.subprocess.PIPE,
+                        start_new_session=True,
+                    )
+                )
+            finally:
+                # The children hold their own copies of the pipe ends
+                for fd in (read_fd, write_fd):
+                    if fd is not None:
+                        os.close(fd)
+                read_fd = next_read
+    except OSError:
+        if read_fd is not None:
+            os.close(read_fd)
+        _kill(processes)
+        raise
+
+    stdout, stderr = CappedOutput(limit), CappedOutput(limit)
+
+    async def collect() -> tuple[CappedOutput, CappedOutput, int]:
+        await asyncio.gather(
+            _drain(processes[-1].stdout, stdout),
+            *(_drain(process.stderr, stderr) for process in processes),
+        )
+        for process in processes:
+            await process.wait()
+        return stdout, stderr, processes[-1].returncode
+
+    try:
+        return await asyncio.wait_for(collect(), cmd_timeout)
+    except asyncio.TimeoutError:
+        killed = time.monotonic()
+        _kill(processes)
+        for process in processes:
+            await process.wait()
+        raise PipelineTimeout(stdout, stderr, time.monotonic() - killed) from None
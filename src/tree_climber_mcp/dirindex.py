@@ -0,0 +1,433 @@
+"""An in-memory index of a directory tree, kept current with inotify, that stands in for os.scandir."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from logging import Logger
+
+from .config import DIRECTORY_INDEX_BUDGET, FIND_PRUNE
+
+# inotify(7) constants
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_EXCL_UNLINK = 0x04000000
+_WATCH_MASK = (
+    _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE_SELF | _IN_MOVE_SELF
+    | _IN_ONLYDIR | _IN_DONT_FOLLOW | _IN_EXCL_UNLINK
+)
+_EVENT = struct.Struct("iIII")
+
+# Entry types, as DirEntry answers them without following links; a link's
+# target is looked up when asked for
+_DIR = 1
+_FILE = 2
+_LINK = 4
+
+# Rough CPython costs: a dict slot plus a str per entry, a dict and a watch per directory,
+# and an IndexedEntry with its path per entry of a cached listing
+_ENTRY_BYTES = 100
+_DIRECTORY_BYTES = 400
+_LISTED_BYTES = 150
+
+
+class _IndexFailed(Exception):
+    """The index cannot be kept; the message says why."""
+
+
+@dataclass(frozen=True)
+class IndexStats:
+    """What the index holds and how it has been used; `state` is building, ready, stale or disabled."""
+
+    state: str
+    reason: str | None
+    directories: int
+    entries: int
+    estimated_bytes: int
+    build_seconds: float | None
+    events: int
+    lookups: int
+    fallbacks: int
+
+
+class IndexedEntry:
+    """A directory entry served from the index, with the parts of os.DirEntry the walks use."""
+
+    __slots__ = ("name", "path", "_flags")
+
+    def __init__(self, name: str, path: str, flags: int):
+        self.name = name
+        self.path = path
+        self._flags = flags
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        if self._flags & _LINK:
+            return follow_symlinks and self._target_is(stat.S_ISDIR)
+        return bool(self._flags & _DIR)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        if self._flags & _LINK:
+            return follow_symlinks and self._target_is(stat.S_ISREG)
+        return bool(self._flags & _FILE)
+
+    def _target_is(self, test) -> bool:
+        # Resolved on every call, as the target may have changed since the link was indexed
+        try:
+            return test(os.stat(self.path).st_mode)
+        except OSError:
+            return False
+
+    def is_symlink(self) -> bool:
+        return bool(self._flags & _LINK)
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+
+class _Listing(tuple):
+    """Entries usable like the iterator os.scandir returns, shared by every lookup of one directory."""
+
+    def __enter__(self) -> "_Listing":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def _flags(entry: os.DirEntry) -> int | None:
+    try:
+        if entry.is_symlink():
+            # What a link points to can change without an event for the link
+            return _LINK
+        if entry.is_dir(follow_symlinks=False):
+            return _DIR
+        return _FILE if entry.is_file(follow_symlinks=False) else 0
+    except OSError:
+        return None
+
+
+def _path_flags(path: str) -> int | None:
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return None
+    if stat.S_ISLNK(info.st_mode):
+        return _LINK
+    if stat.S_ISDIR(info.st_mode):
+        return _DIR
+    return _FILE if stat.S_ISREG(info.st_mode) else 0
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1, libc.inotify_add_watch, libc.inotify_rm_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class DirectoryIndex:
+    """The names and types of everything under `root`, in memory.
+
+    `start` builds the tree in a background thread, watching each directory
+    with inotify before scanning it so that no change is missed, and then
+    applies events as they arrive. Before every lookup the pending events
+    are drained, so a lookup sees every change made before it. The
+    `FIND_PRUNE` directories are listed but their contents are not indexed.
+    A symlink is recorded as a link only; whether it leads to a file or a
+    directory is looked up when asked, since its target can be moved or
+    removed without any event for the link.
+
+    `scandir` answers from memory when it can and from disk otherwise:
+    while the tree is being built, for paths outside it, and for good if
+    the index is disabled because inotify is unavailable, the watch limit
+    is reached or the tree outgrows `budget` bytes. If the event queue
+    overflows the tree is rebuilt, from disk in the meantime.
+    """
+
+    def __init__(self, root: str, logger: Logger | None = None, budget: int = DIRECTORY_INDEX_BUDGET):
+        self.root = os.path.realpath(root)
+        self._logger = logger
+        self._budget = budget
+        self._lock = threading.Lock()
+        self._state = "building"
+        self._reason: str | None = None
+        # Directories relative to the root, "" for the root itself, each mapping names to type bits
+        self._nodes: dict[str, dict[str, int]] = {}
+        self._watches: dict[int, str] = {}
+        self._watch_of: dict[str, int] = {}
+        # The path each directory was last listed under and its entries, until the directory changes
+        self._listings: dict[str, tuple[str, _Listing]] = {}
+        self._bytes = 0
+        self._entries = 0
+        self._build_seconds: float | None = None
+        self._events = self._lookups = self._fallbacks = 0
+        self._libc = _load_libc()
+        self._fd = -1
+        self._closed = threading.Event()
+        self._rebuild = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tree-climber-index", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> IndexStats:
+        with self._lock:
+            return IndexStats(
+                self._state,
+                self._reason,
+                len(self._nodes),
+                self._entries,
+                self._bytes,
+                self._build_seconds,
+                self._events,
+                self._lookups,
+                self._fallbacks,
+            )
+
+    def scandir(self, path: str):
+        """List `path` like os.scandir, from memory if the index covers it."""
+        relative = os.path.relpath(path, self.root)
+        if relative == ".":
+            relative = ""
+        elif relative == ".." or relative.startswith("../") or os.path.isabs(relative):
+            return os.scandir(path)
+        relative = relative.replace(os.sep, "/")
+        with self._lock:
+            node = None
+            if self._state == "ready":
+                self._drain()
+                node = self._nodes.get(relative) if self._state == "ready" else None
+            if node is None:
+                self._fallbacks += 1
+                return os.scandir(path)
+            self._lookups += 1
+            cached = self._listings.get(relative)
+            if cached is not None and cached[0] == path:
+                return cached[1]
+            listing = _Listing(IndexedEntry(name, os.path.join(path, name), flags) for name, flags in node.items())
+            self._drop_listing(relative)
+            self._listings[relative] = (path, listing)
+            self._bytes += len(listing) * _LISTED_BYTES
+            return listing
+
+    # Everything below runs on the index thread, or under the lock
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            try:
+                self._build()
+            except _IndexFailed as exc:
+                with self._lock:
+                    self._disable(str(exc))
+                return
+            while not self._closed.is_set() and not self._rebuild.is_set():
+                try:
+                    ready, _, _ = select.select([self._fd], [], [], 0.5)
+                except (OSError, ValueError):
+                    return
+                if ready:
+                    with self._lock:
+                        self._drain()
+                        if self._state == "disabled":
+                            return
+            self._rebuild.clear()
+
+    def _build(self) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            self._state = "building"
+            if self._libc is None:
+                raise _IndexFailed("inotify is not available on this platform")
+            self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if self._fd < 0:
+                raise _IndexFailed(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        # Lookups ignore the tree until it is ready, so it is built without the lock
+        self._scan("")
+        if "" not in self._nodes:
+            raise _IndexFailed(f"cannot read {self.root}")
+        with self._lock:
+            self._state = "ready"
+            self._build_seconds = time.perf_counter() - started
+            self._drain()
+        if self._logger is not None:
+            stats = self.stats()
+            self._logger.info(
+                "Directory index of %s: %d directories, %d entries, ~%.1f MiB, built in %.2fs",
+                self.root,
+                stats.directories,
+                stats.entries,
+                stats.estimated_bytes / (1024 * 1024),
+                stats.build_seconds,
+            )
+
+    def _scan(self, relative: str) -> None:
+        """Watch and index the directory at `relative` and everything beneath it."""
+        pending = [relative]
+        while pending:
+            if self._closed.is_set():
+                raise _IndexFailed("closed")
+            relative = pending.pop()
+            directory = os.path.join(self.root, relative) if relative else self.root
+            watch = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if watch < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise _IndexFailed("the inotify watch limit (fs.inotify.max_user_watches) was reached")
+                # Gone or unreadable since it was listed; its parent's events will say
+                continue
+            node = {}
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        flags = _flags(entry)
+                        if flags is not None:
+                            node[entry.name] = flags
+            except OSError:
+                self._libc.inotify_rm_watch(self._fd, watch)
+                continue
+            self._drop_listing(relative)
+            self._nodes[relative] = node
+            self._watches[watch] = relative
+            self._watch_of[relative] = watch
+            self._entries += len(node)
+            self._bytes += _DIRECTORY_BYTES + sum(_ENTRY_BYTES + len(name) for name in node)
+            if self._bytes > self._budget:
+                raise _IndexFailed(f"the tree outgrew the {self._budget}-byte budget")
+            for name, flags in node.items():
+                if flags & _DIR and name not in FIND_PRUNE:
+                    pending.append(f"{relative}/{name}" if relative else name)
+
+    def _drain(self) -> None:
+        """Apply every queued event; a failure disables the index instead of raising."""
+        try:
+            while True:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    return
+                except OSError:
+                    self._stale("the inotify descriptor failed")
+                    return
+                offset = 0
+                while offset < len(data):
+                    watch, mask, _, length = _EVENT.unpack_from(data, offset)
+                    offset += _EVENT.size
+                    name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                    offset += length
+                    self._events += 1
+                    self._apply(watch, mask, name)
+                    if self._state != "ready":
+                        return
+        except _IndexFailed as exc:
+            self._disable(str(exc))
+
+    def _apply(self, watch: int, mask: int, name: str) -> None:
+        if mask & _IN_Q_OVERFLOW:
+            self._stale("the inotify event queue overflowed")
+            return
+        if mask & _IN_IGNORED:
+            relative = self._watches.pop(watch, None)
+            if relative is not None and self._watch_of.get(relative) == watch:
+                del self._watch_of[relative]
+            return
+        relative = self._watches.get(watch)
+        node = self._nodes.get(relative) if relative is not None else None
+        if node is None or not name:
+            # Events about a watched directory itself are also reported by its parent
+            return
+        child = f"{relative}/{name}" if relative else name
+        self._drop_listing(relative)
+        old = node.pop(name, None)
+        if old is not None:
+            self._entries -= 1
+            self._bytes -= _ENTRY_BYTES + len(name)
+            if old & _DIR:
+                self._forget(child)
+        if mask & (_IN_CREATE | _IN_MOVED_TO):
+            flags = _path_flags(os.path.join(self.root, child))
+            if flags is None:
+                return
+            node[name] = flags
+            self._entries += 1
+            self._bytes += _ENTRY_BYTES + len(name)
+            if flags & _DIR and name not in FIND_PRUNE:
+                self._scan(child)
+
+    def _forget(self, relative: str) -> None:
+        """Drop the directory at `relative` and everything beneath it."""
+        pending = [relative]
+        while pending:
+            relative = pending.pop()
+            self._drop_listing(relative)
+            node = self._nodes.pop(relative, None)
+            if node is None:
+                continue
+            watch = self._watch_of.pop(relative, None)
+            # The watch may have been handed to the directory's new path already
+            if watch is not None and self._watches.get(watch) == relative:
+                del self._watches[watch]
+                # A directory moved within the tree keeps its watch unless it is removed
+                self._libc.inotify_rm_watch(self._fd, watch)
+            self._entries -= len(node)
+            self._bytes -= _DIRECTORY_BYTES + sum(_ENTRY_BYTES + len(name) for name in node)
+            pending.extend(
+                f"{relative}/{name}" for name, flags in node.items() if flags & _DIR
+            )
+
+    def _drop_listing(self, relative: str) -> None:
+        cached = self._listings.pop(relative, None)
+        if cached is not None:
+            self._bytes -= len(cached[1]) * _LISTED_BYTES
+
+    def _stale(self, reason: str) -> None:
+        self._state = "stale"
+        self._reason = reason
+        self._rebuild.set()
+        if self._logger is not None:
+            self._logger.warning("Directory index is stale (%s); rebuilding it", reason)
+
+    def _disable(self, reason: str) -> None:
+        self._reset()
+        self._state = "disabled"
+        self._reason = reason
+        if self._logger is not None and reason != "closed":
+            self._logger.warning("Directory index disabled: %s; listings will read the disk", reason)
+
+    def _reset(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._nodes = {}
+        self._watches = {}
+        self._watch_of = {}
+        self._listings = {}
+        self._bytes = self._entries = 0
@@ -0,0 +1,359 @@
+"""Walk directory trees with os.scandir: sorted pages for listings, parallel walks for searches."""
+
+import bisect
+import fnmatch
+import os
+import re
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from .config import FIND_FILES_LIMIT, FIND_PRUNE, FIND_WORKERS, LIST_DIRECTORY_LIMIT
+from .gitignore import IgnoreRules, enclosing_rules, glob_to_regex, read_ignore_file
+
+# os.scandir, or a stand-in with the same interface such as DirectoryIndex.scandir
+Scandir = Callable[[str], Iterable[os.DirEntry]]
+
+
+@dataclass(frozen=True)
+class ListedEntry:
+    """One listed path, relative to the listed directory and joined with `/`."""
+
+    path: str
+    is_dir: bool
+    size: int | None = None
+    mtime: float | None = None
+
+
+@dataclass(frozen=True)
+class ListingPage:
+    """A page of entries; `next_cursor` is None on the last page."""
+
+    entries: list[ListedEntry]
+    next_cursor: str | None
+
+
+@dataclass(frozen=True)
+class FindResult:
+    """Matches in path order; `truncated` if the limit or time limit cut the walk short."""
+
+    entries: list[ListedEntry]
+    truncated: bool
+    timed_out: bool
+
+
+def compile_globs(patterns: Iterable[str]) -> re.Pattern | None:
+    """Compile shell globs into one regex matched against a single name."""
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _path_key(path: str) -> tuple[str, ...]:
+    # Compare by component, so a directory's children follow it directly
+    return tuple(part for part in path.split("/") if part)
+
+
+def list_page(
+    root: str,
+    depth: int = 1,
+    pattern: str | None = None,
+    exclude: Iterable[str] = (),
+    limit: int = LIST_DIRECTORY_LIMIT,
+    cursor: str | None = None,
+    details: bool = False,
+    scandir: Scandir = os.scandir,
+) -> ListingPage:
+    """List up to `limit` entries under `root` that sort after `cursor`.
+
+    Entries come from `os.scandir`, whose cached file type answers
+    is-it-a-directory without a stat per entry; `details` stats only the
+    entries on the page. Only the `limit + 1` smallest candidates are kept,
+    so memory is bounded by the page size however large the directory is,
+    and subtrees that sort entirely before the cursor or after a full page
+    are not descended. Symlinked directories are listed but not entered.
+
+    `pattern` is a glob an entry's name must match to be listed, and
+    `exclude` globs drop matching entries along with anything beneath them.
+    `scandir` lists one directory; the walks below take it too.
+    """
+    if type(depth) is not int or depth < 1:
+        raise ValueError("'depth' must be an integer of at least 1.")
+    if type(limit) is not int or limit < 1:
+        raise ValueError("'limit' must be an integer of at least 1.")
+    wanted = compile_globs([pattern]) if pattern else None
+    excluded = compile_globs(exclude)
+    after = _path_key(cursor) if cursor else ()
+
+    # Sorted (key, entry) pairs, at most limit + 1 of them
+    page: list[tuple[tuple[str, ...], os.DirEntry]] = []
+    pending = [(root, (), 1)]
+    while pending:
+        directory, prefix, level = pending.pop()
+        try:
+            with scandir(directory) as entries:
+                for entry in entries:
+                    if excluded is not None and excluded.match(entry.name):
+                        continue
+                    key = prefix + (entry.name,)
+                    full = len(page) > limit
+                    if full and key > page[-1][0]:
+                        # Everything beneath sorts after the key too
+                        continue
+                    if key > after and (wanted is None or wanted.match(entry.name)):
+                        bisect.insort(page, (key, entry), key=lambda item: item[0])
+                        if len(page) > limit + 1:
+                            page.pop()
+                    if level < depth and entry.is_dir(follow_symlinks=False):
+                        if key < after and after[: len(key)] != key:
+                            continue
+                        pending.append((entry.path, key, level + 1))
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            if directory == root:
+                raise
+
+    more = len(page) > limit
+    listed = []
+    for key, entry in page[:limit]:
+        is_dir = entry.is_dir()
+        size = mtime = None
+        if details:
+            try:
+                stat = entry.stat()
+            except OSError:
+                pass
+            else:
+                size = None if is_dir else stat.st_size
+                mtime = stat.st_mtime
+        listed.append(ListedEntry("/".join(key), is_dir, size, mtime))
+    return ListingPage(listed, listed[-1].path if more else None)
+
+
+@dataclass(frozen=True)
+class _FindQuery:
+    pattern: re.Pattern | None
+    match_path: bool
+    kind: str
+    min_size: int | None
+    max_size: int | None
+    modified_after: float | None
+    modified_before: float | None
+    max_depth: int | None
+    excluded: re.Pattern | None
+    gitignore: bool
+    details: bool
+    scandir: Scandir = os.scandir
+    follow_symlinks: bool = True
+
+    def scan(
+        self, root: str, relative: str, level: int, rules: IgnoreRules | None
+    ) -> tuple[list[ListedEntry], list[tuple[str, int, IgnoreRules | None]]]:
+        """Match one directory's entries and return them with the subdirectories to walk."""
+        directory = os.path.join(root, relative) if relative else root
+        try:
+            with self.scandir(directory) as scanned:
+                entries = list(scanned)
+        except OSError:
+            if not relative:
+                raise
+            return [], []
+        if self.gitignore:
+            # One failed open per directory beats a pass over every name
+            rules = read_ignore_file(directory, relative, rules)
+
+        # Locals, since this loop runs once per entry in the tree
+        name_filter = self.pattern.match if self.pattern is not None and not self.match_path else None
+        excluded = self.excluded.match if self.excluded is not None else None
+        descend = self.max_depth is None or level < self.max_depth
+        prune = FIND_PRUNE if self.gitignore else ()
+        matches, subdirectories = [], []
+        for entry in entries:
+            name = entry.name
+            try:
+                real_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            # Most files fail a name pattern; reject them before any path work
+            if not real_dir and name_filter is not None and not name_filter(name):
+                continue
+            if excluded is not None and excluded(name):
+                continue
+            if real_dir and name in prune:
+                continue
+            path = f"{relative}/{name}" if relative else name
+            if rules is not None and rules.ignored(path, real_dir):
+                continue
+            if real_dir and descend:
+                subdirectories.append((path, level + 1, rules))
+            found = self._match(entry, path)
+            if found is not None:
+                matches.append(found)
+        return matches, subdirectories
+
+    def _match(self, entry: os.DirEntry, path: str) -> ListedEntry | None:
+        # Cheapest tests first; only size, time and details need a stat
+        try:
+            is_dir = entry.is_dir()
+            if self.kind == "file" and not entry.is_file(follow_symlinks=self.follow_symlinks):
+                return None
+        except OSError:
+            return None
+        if self.kind == "directory" and not is_dir:
+            return None
+        if self.pattern is not None and not self.pattern.match(path if self.match_path else entry.name):
+            return None
+        sized = self.min_size is not None or self.max_size is not None
+        if sized and is_dir:
+            return None
+        if not (sized or self.modified_after is not None or self.modified_before is not None or self.details):
+            return ListedEntry(path, is_dir)
+        try:
+            stat = entry.stat()
+        except OSError:
+            return None
+        size = None if is_dir else stat.st_size
+        if self.min_size is not None and size < self.min_size:
+            return None
+        if self.max_size is not None and size > self.max_size:
+            return None
+        if self.modified_after is not None and stat.st_mtime <= self.modified_after:
+            return None
+        if self.modified_before is not None and stat.st_mtime >= self.modified_before:
+            return None
+        return ListedEntry(path, is_dir, size, stat.st_mtime)
+
+
+def _find_query(
+    pattern: str | None,
+    kind: str,
+    min_size: int | None,
+    max_size: int | None,
+    modified_after: float | None,
+    modified_before: float | None,
+    max_depth: int | None,
+    exclude: Iterable[str],
+    gitignore: bool,
+    details: bool,
+    scandir: Scandir = os.scandir,
+    follow_symlinks: bool = True,
+) -> _FindQuery:
+    if kind not in ("file", "directory", "any"):
+        raise ValueError("'type' must be 'file', 'directory' or 'any'.")
+    if max_depth is not None and (type(max_depth) is not int or max_depth < 1):
+        raise ValueError("'max_depth' must be an integer of at least 1.")
+    for name, value in (("min_size", min_size), ("max_size", max_size)):
+        if value is not None and (type(value) is not int or value < 0):
+            raise ValueError(f"'{name}' must be a non-negative integer.")
+    return _FindQuery(
+        re.compile(f"(?s:{glob_to_regex(pattern.strip('/'))})\\Z") if pattern else None,
+        bool(pattern) and "/" in pattern.strip("/"),
+        kind,
+        min_size,
+        max_size,
+        modified_after,
+        modified_before,
+        max_depth,
+        compile_globs(exclude),
+        gitignore,
+        details,
+        scandir,
+        follow_symlinks,
+    )
+
+
+def find_entries(
+    root: str,
+    pattern: str | None = None,
+    kind: str = "file",
+    min_size: int | None = None,
+    max_size: int | None = None,
+    modified_after: float | None = None,
+    modified_before: float | None = None,
+    max_depth: int | None = None,
+    exclude: Iterable[str] = (),
+    gitignore: bool = True,
+    details: bool = False,
+    limit: int = FIND_FILES_LIMIT,
+    workers: int = FIND_WORKERS,
+    time_limit: float | None = None,
+    scandir: Scandir = os.scandir,
+) -> FindResult:
+    """Find entries under `root` with up to `workers` threads scanning directories at once.
+
+    Every predicate is checked as entries are scanned, so nothing is
+    collected that will not be returned, and the walk stops as soon as
+    `limit + 1` matches prove there are more. Directories are handed out
+    breadth first, so shallow matches come before deep ones when the
+    limit is reached. `pattern` is a glob matched against the name, or
+    against the path below `root` if it contains a `/`.
+
+    With `gitignore`, the `FIND_PRUNE` directories, such as `.git` and
+    `node_modules`, and anything matched by the ignore files in scope are
+    skipped without being entered. Symlinked directories are not entered.
+    After `time_limit` seconds the walk stops and returns what it found.
+    """
+    if type(limit) is not int or limit < 1:
+        raise ValueError("'limit' must be an integer of at least 1.")
+    query = _find_query(
+        pattern, kind, min_size, max_size, modified_after, modified_before, max_depth, exclude, gitignore, details, scandir
+    )
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+
+    found: list[ListedEntry] = []
+    timed_out = False
+    pending = deque([("", 1, enclosing_rules(root) if gitignore else None)])
+    running = set()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tree-climber-find")
+    try:
+        while (pending or running) and len(found) <= limit:
+            # Enough queued work to keep every worker busy between wakeups
+            while pending and len(running) < 2 * workers:
+                running.add(pool.submit(query.scan, root, *pending.popleft()))
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+            done, running = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                matches, subdirectories = future.result()
+                found.extend(matches)
+                pending.extend(subdirectories)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    found.sort(key=lambda entry: _path_key(entry.path))
+    return FindResult(found[:limit], len(found) > limit or timed_out, timed_out)
+
+
+def walk_entries(
+    root: str,
+    pattern: str | None = None,
+    kind: str = "file",
+    max_size: int | None = None,
+    max_depth: int | None = None,
+    exclude: Iterable[str] = (),
+    gitignore: bool = True,
+    scandir: Scandir = os.scandir,
+    follow_symlinks: bool = True,
+) -> Iterator[ListedEntry]:
+    """Yield the entries `find_entries` would match, lazily and in one thread.
+
+    Directories are scanned one at a time, depth first, as the caller
+    consumes entries, so a caller that stops early never scans the rest
+    of the tree. Each directory's matches come sorted, before those of its
+    subdirectories. Without `follow_symlinks`, a symlink to a file is not
+    a file, so callers that open what they are given stay in the tree.
+    """
+    query = _find_query(
+        pattern, kind, None, max_size, None, None, max_depth, exclude, gitignore, False, scandir, follow_symlinks
+    )
+    pending = [("", 1, enclosing_rules(root) if gitignore else None)]
+    while pending:
+        matches, subdirectories = query.scan(root, *pending.pop())
+        matches.sort(key=lambda entry: entry.path)
+        yield from matches
+        subdirectories.sort(key=lambda item: item[0], reverse=True)
+        pending.extend(subdirectories)
@@ -0,0 +1,327 @@
+"""Apply exact-text replacements or a unified diff to a file in place."""
+
+import mmap
+import os
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from .config import LINE_INDEX_MIN_SIZE, WRITE_CHUNK
+from .lineindex import LINE_INDEX_CACHE, LineIndexCache, count_newlines, skip_lines
+
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+
+@dataclass(frozen=True)
+class Hunk:
+    """Where an edit landed, as in a unified diff header: `@@ -old_start,old_lines +new_start,new_lines @@`."""
+
+    old_start: int
+    old_lines: int
+    new_start: int
+    new_lines: int
+
+
+@dataclass(frozen=True)
+class EditResult:
+    """The hunks applied, bytes written, and the file's size and modification time afterwards."""
+
+    hunks: list[Hunk]
+    written: int
+    size: int
+    mtime_ns: int
+
+    @property
+    def added(self) -> int:
+        return sum(hunk.new_lines for hunk in self.hunks)
+
+    @property
+    def removed(self) -> int:
+        return sum(hunk.old_lines for hunk in self.hunks)
+
+
+@dataclass(frozen=True)
+class _Span:
+    start: int
+    end: int
+    new: bytes
+
+
+def parse_patch(patch: str) -> list[tuple[int, bytes, bytes]]:
+    """Return `(old_start, old, new)` for each hunk of a one-file unified diff.
+
+    File headers are optional and the line counts in hunk headers are not
+    checked, since a hunk's body already says what it removes and adds. An
+    empty body line counts as an empty context line.
+    """
+    hunks = []
+    lines = patch.split("\n")
+    while lines and lines[-1] == "":
+        lines.pop()
+    current = None
+    last = None
+    for number, line in enumerate(lines):
+        if line.startswith("@@"):
+            header = _HUNK_HEADER.match(line)
+            if header is None:
+                raise ValueError(f"Malformed hunk header: {line!r}.")
+            current = [int(header.group(1)), [], []]
+            hunks.append(current)
+            last = None
+        elif line.startswith("--- ") and number + 1 < len(lines) and lines[number + 1].startswith("+++ ") or line.startswith("diff "):
+            if hunks:
+                raise ValueError("The patch changes more than one file; send one patch per file.")
+            current = None
+        elif current is None:
+            # File headers and anything else before the first hunk
+            continue
+        elif line.startswith("\\"):
+            # "\ No newline at end of file" applies to the line before it
+            for side in ((1, 2) if last == " " else (1,) if last == "-" else (2,) if last == "+" else ()):
+                current[side][-1] = current[side][-1][:-1]
+        else:
+            kind, text = (line[0], line[1:]) if line else (" ", "")
+            if kind not in " -+":
+                raise ValueError(f"Unexpected line in hunk: {line!r}.")
+            if kind in " -":
+                current[1].append(text + "\n")
+            if kind in " +":
+                current[2].append(text + "\n")
+            last = kind
+    if not hunks:
+        raise ValueError("The patch has no hunks.")
+    return [(start, "".join(old).encode("utf-8"), "".join(new).encode("utf-8")) for start, old, new in hunks]
+
+
+class _Lines:
+    """Line numbers and offsets of one file, through the shared line index when it is large."""
+
+    def __init__(self, path: str, stat: os.stat_result, view, size: int, index_cache: LineIndexCache | None):
+        self._view = view
+        self._size = size
+        self._index = None
+        if index_cache is not None and size >= LINE_INDEX_MIN_SIZE:
+            self._index = index_cache.get(path, stat, view)
+
+    def start(self, line: int) -> int:
+        if self._index is not None:
+            return self._index.line_start(self._view, line)
+        return skip_lines(self._view, 0, line - 1, self._size)
+
+    def number(self, offset: int) -> int:
+        if self._index is not None:
+            return self._index.newlines_before(self._view, offset) + 1
+        return count_newlines(self._view, 0, offset) + 1
+
+
+def _replacement_spans(view, edits: Iterable[dict]) -> list[_Span]:
+    spans = []
+    for number, edit in enumerate(edits, start=1):
+        if not isinstance(edit, dict):
+            raise ValueError(f"Edit {number} must be an object with 'old_text' and 'new_text'.")
+        old_text, new_text = edit.get("old_text"), edit.get("new_text")
+        if not isinstance(old_text, str) or not old_text:
+            raise ValueError(f"Edit {number} needs a non-empty 'old_text'.")
+        if not isinstance(new_text, str):
+            raise ValueError(f"Edit {number} needs a 'new_text' string.")
+        old, new = old_text.encode("utf-8"), new_text.encode("utf-8")
+        found = []
+        position = view.find(old)
+        while position >= 0:
+            found.append(position)
+            position = view.find(old, position + len(old))
+        if not found:
+            raise ValueError(f"The 'old_text' of edit {number} was not found; the file may have changed.")
+        if len(found) > 1 and not edit.get("replace_all"):
+            raise ValueError(
+                f"The 'old_text' of edit {number} matches {len(found)} places; "
+                "add surrounding lines to make it unique or set 'replace_all'."
+            )
+        spans.extend(_Span(start, start + len(old), new) for start in found)
+    return spans
+
+
+def _at_line_start(view, position: int) -> bool:
+    return position == 0 or view[position - 1 : position] == b"\n"
+
+
+def _patch_spans(view, lines: _Lines, hunks: list[tuple[int, bytes, bytes]]) -> list[_Span]:
+    spans = []
+    for number, (old_start, old, new) in enumerate(hunks, start=1):
+        if not old:
+            # A pure insertion goes after line `old_start`, where it was made
+            start = lines.start(old_start + 1)
+            spans.append(_Span(start, start, new))
+            continue
+        expected = lines.start(max(old_start, 1))
+        if view[expected : expected + len(old)] != old:
+            # Like patch, accept the hunk where its lines moved to, nearest first
+            candidates = []
+            position = view.find(old)
+            while position >= 0:
+                if _at_line_start(view, position):
+                    candidates.append(position)
+                position = view.find(old, position + 1)
+            if not candidates:
+                raise ValueError(f"Hunk {number} does not match the file; its context or removed lines have changed.")
+            expected = min(candidates, key=lambda position: abs(position - expected))
+        spans.append(_Span(expected, expected + len(old), new))
+    return spans
+
+
+def _common_length(old: bytes, new: bytes, limit: int, from_end: bool) -> int:
+    # Bisect on slice comparisons, which run at memcmp speed
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        same = old[len(old) - middle :] == new[len(new) - middle :] if from_end else old[:middle] == new[:middle]
+        low, high = (middle, high) if same else (low, middle - 1)
+    return low
+
+
+def _trim(view, span: _Span) -> _Span:
+    """Narrow `span` to the whole lines it changes, leaving out unchanged context."""
+    old, new = view[span.start : span.end], span.new
+    limit = min(len(old), len(new))
+    head = _common_length(old, new, limit, from_end=False)
+    head = old.rfind(b"\n", 0, head) + 1
+    tail = _common_length(old, new, limit - head, from_end=True)
+
+    def at_line_start(data: bytes, cut: int) -> bool:
+        return cut == head or data[cut - 1 : cut] == b"\n"
+
+    if not (at_line_start(old, len(old) - tail) and at_line_start(new, len(new) - tail)):
+        # Keep the suffix from the last line start within it, where both sides agree
+        newline = old.find(b"\n", len(old) - tail, len(old))
+        tail = 0 if newline < 0 else len(old) - newline - 1
+    return _Span(span.start + head, span.end - tail, new[head : len(new) - tail])
+
+
+def _span_lines(data: bytes) -> int:
+    return data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+
+
+def _hunk_lines(view, size: int, span: _Span) -> tuple[int, int, int]:
+    """Return where the lines `span` touches start, and how many there are before and after it."""
+    line_start = view.rfind(b"\n", 0, span.start) + 1
+    head = view[line_start : span.start]
+    stop = span.end
+    if (head + span.new)[-1:] not in (b"", b"\n") or view[line_start:stop][-1:] not in (b"", b"\n"):
+        # The edit ends inside a line, which then counts as changed
+        newline = view.find(b"\n", stop)
+        stop = size if newline < 0 else newline + 1
+    return line_start, _span_lines(view[line_start:stop]), _span_lines(head + span.new + view[span.end : stop])
+
+
+def _by_line(view, size: int, spans: list[_Span]) -> list[_Span]:
+    """Join spans that touch the same line, as diff reports one hunk for them."""
+    joined = []
+    for span in spans:
+        if joined:
+            previous = joined[-1]
+            if _at_line_start(view, previous.end):
+                stop = previous.end
+            else:
+                newline = view.find(b"\n", previous.end)
+                stop = size if newline < 0 else newline + 1
+            if view.rfind(b"\n", 0, span.start) + 1 < stop:
+                gap = bytes(view[previous.end : span.start])
+                joined[-1] = _Span(previous.start, span.end, previous.new + gap + span.new)
+                continue
+        joined.append(span)
+    return joined
+
+
+def _write_all(fd: int, data, offset: int) -> int:
+    view = memoryview(data)
+    written = 0
+    for start in range(0, len(view), WRITE_CHUNK):
+        chunk = view[start : start + WRITE_CHUNK]
+        while chunk:
+            count = os.pwrite(fd, chunk, offset + written)
+            chunk = chunk[count:]
+            written += count
+    return written
+
+
+def edit_file(
+    path: str,
+    edits: list[dict] | None = None,
+    patch: str | None = None,
+    index_cache: LineIndexCache | None = LINE_INDEX_CACHE,
+) -> EditResult:
+    """Apply `edits` (`old_text`/`new_text`/`replace_all` dicts) or a unified diff to `path`.
+
+    Every edit is located against the current contents before anything is
+    written, and if any no longer matches the file is left alone. The file
+    is changed in place: edits that keep their length are written over the
+    old bytes, and otherwise only the file from the first edit onwards is
+    rewritten, so an edit near the end of a large file writes little. This
+    is not atomic, unlike `write_atomic`: a concurrent reader or a crash
+    mid-write can see some edits applied and not others.
+    """
+    if (edits is None) == (patch is None):
+        raise ValueError("Send either 'edits' or 'patch'.")
+    if edits is not None and (not isinstance(edits, list) or not edits):
+        raise ValueError("'edits' must be a non-empty list.")
+    hunks = parse_patch(patch) if patch is not None else None
+
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
+    try:
+        stat = os.fstat(fd)
+        size = stat.st_size
+        view = mmap.mmap(fd, size, access=mmap.ACCESS_READ) if size else b""
+        try:
+            lines = _Lines(path, stat, view, size, index_cache)
+            spans = _replacement_spans(view, edits) if hunks is None else _patch_spans(view, lines, hunks)
+            spans.sort(key=lambda span: (span.start, span.end))
+            for previous, span in zip(spans, spans[1:]):
+                if span.start < previous.end:
+                    raise ValueError("Two edits overlap; combine them into one.")
+            spans = [span for span in (_trim(view, span) for span in spans) if span.start < span.end or span.new]
+            if not spans:
+                return EditResult([], 0, size, stat.st_mtime_ns)
+
+            summary = []
+            shift = 0
+            for span in _by_line(view, size, spans):
+                line_start, old_lines, new_lines = _hunk_lines(view, size, span)
+                old_start = lines.number(line_start)
+                # As in diff, an empty side's start is the line before it
+                summary.append(
+                    Hunk(old_start - (not old_lines), old_lines, old_start + shift - (not new_lines), new_lines)
+                )
+                shift += new_lines - old_lines
+
+            if all(span.end - span.start == len(span.new) for span in spans):
+                tail = None
+            else:
+                # Whatever follows the first edit moves, up to the last if the
+                # edits cancel out; copy it before writing over it
+                stop = spans[-1].end if sum(len(span.new) - (span.end - span.start) for span in spans) == 0 else size
+                pieces = []
+                cursor = spans[0].start
+                for span in spans:
+                    pieces.append(view[cursor : span.start])
+                    pieces.append(span.new)
+                    cursor = span.end
+                pieces.append(view[cursor:stop])
+                tail = b"".join(pieces)
+        finally:
+            if isinstance(view, mmap.mmap):
+                view.close()
+
+        if tail is None:
+            written = sum(_write_all(fd, span.new, span.start) for span in spans)
+        else:
+            written = _write_all(fd, tail, spans[0].start)
+            new_size = spans[0].start + len(tail) + (size - stop)
+            if new_size < size:
+                os.ftruncate(fd, new_size)
+        os.fsync(fd)
+        result = os.fstat(fd)
+    finally:
+        os.close(fd)
+    if index_cache is not None:
+        index_cache.discard(path)
+    return EditResult(summary, written, result.st_size, result.st_mtime_ns)
@@ -0,0 +1,113 @@
+"""Read bounded byte or line windows of a file through a memory map."""
+
+import mmap
+import os
+from dataclasses import dataclass
+
+from .config import LINE_INDEX_MIN_SIZE, READ_FILE_WINDOW
+from .lineindex import LINE_INDEX_CACHE, LineIndexCache, count_newlines, skip_lines
+
+
+@dataclass(frozen=True)
+class FileWindow:
+    """A decoded slice of a file and where it sits in the whole file.
+
+    `start` and `end` are byte offsets of the slice, and `first_line` and
+    `last_line` the 1-based numbers of the lines it touches. `clipped` is
+    set when the requested window was cut short at the size limit.
+    """
+
+    text: str
+    start: int
+    end: int
+    size: int
+    first_line: int
+    last_line: int
+    total_lines: int
+    clipped: bool = False
+
+
+def _is_continuation(view, position: int, size: int) -> bool:
+    return position < size and view[position] & 0xC0 == 0x80
+
+
+def _check_position(name: str, value, minimum: int) -> None:
+    if value is not None and (type(value) is not int or value < minimum):
+        raise ValueError(f"'{name}' must be an integer of at least {minimum}.")
+
+
+def read_window(
+    path: str,
+    offset: int | None = None,
+    length: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    limit: int = READ_FILE_WINDOW,
+    index_cache: LineIndexCache | None = LINE_INDEX_CACHE,
+) -> FileWindow:
+    """Read at most `limit` bytes of a UTF-8 file by byte offset or by line range.
+
+    Byte windows are widened or narrowed to whole characters, and line
+    windows cut at the limit end after the last whole line that fits. Only
+    the window and one scan chunk are ever held in memory, whatever the
+    size of the file. Files of `LINE_INDEX_MIN_SIZE` bytes or more get a
+    cached line index, so only the first read of them scans the whole file;
+    smaller ones are scanned on every read.
+    """
+    _check_position("offset", offset, 0)
+    _check_position("length", length, 1)
+    _check_position("start_line", start_line, 1)
+    _check_position("end_line", end_line, 1)
+    by_line = start_line is not None or end_line is not None
+    if by_line and (offset is not None or length is not None):
+        raise ValueError("Use either 'offset'/'length' or 'start_line'/'end_line', not both.")
+    if start_line is not None and end_line is not None and end_line < start_line:
+        raise ValueError("'end_line' must not be before 'start_line'.")
+
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        size = stat.st_size
+        if size == 0:
+            return FileWindow("", 0, 0, 0, 1, 0, 0)
+        with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as view:
+            index = None
+            if index_cache is not None and size >= LINE_INDEX_MIN_SIZE:
+                index = index_cache.get(path, stat, view)
+            if by_line:
+                first = start_line or 1
+                if index is not None:
+                    start = index.line_start(view, first)
+                    wanted = size if end_line is None else index.line_start(view, end_line + 1)
+                else:
+                    start = skip_lines(view, 0, first - 1, size)
+                    wanted = size if end_line is None else skip_lines(view, start, end_line - first + 1, size)
+            else:
+                start = min(offset or 0, size)
+                wanted = size if length is None else min(start + length, size)
+            end = min(wanted, start + limit)
+            clipped = end < wanted
+            if clipped and by_line:
+                last_newline = view.rfind(b"\n", start, end)
+                if last_newline >= 0:
+                    end = last_newline + 1
+            if not by_line:
+                while start < end and _is_continuation(view, start, size):
+                    start += 1
+            while end > start and _is_continuation(view, end, size):
+                end -= 1
+            data = view[start:end]
+            newlines = data.count(b"\n")
+            if index is not None:
+                lines_before = index.newlines_before(view, start)
+                total_newlines = index.newlines
+            else:
+                lines_before = count_newlines(view, 0, start)
+                total_newlines = lines_before + newlines + count_newlines(view, end, size)
+            ends_with_newline = view[size - 1] == ord("\n")
+
+    first_line = lines_before + 1
+    last_line = first_line + newlines - (1 if data.endswith(b"\n") else 0) if data else lines_before
+    total_lines = total_newlines + (0 if ends_with_newline else 1)
+    return FileWindow(
+        data.decode("utf-8"), start, end, size, first_line, last_line, total_lines, clipped
+    )
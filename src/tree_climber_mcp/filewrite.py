@@ -0,0 +1,105 @@
+"""Write files atomically through a temp file, or in place by appending or at an offset."""
+
+import os
+import secrets
+import stat
+from dataclasses import dataclass
+
+from .config import WRITE_CHUNK
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    """Bytes written, and the file's size and modification time afterwards."""
+
+    written: int
+    size: int
+    mtime_ns: int
+
+
+def _write_chunks(fd: int, content: str, offset: int | None = None) -> int:
+    # Encode a chunk at a time, so a large string is never held twice
+    written = 0
+    for start in range(0, len(content), WRITE_CHUNK):
+        view = memoryview(content[start : start + WRITE_CHUNK].encode("utf-8"))
+        while view:
+            if offset is None:
+                count = os.write(fd, view)
+            else:
+                count = os.pwrite(fd, view, offset + written)
+            view = view[count:]
+            written += count
+    return written
+
+
+def _fsync_directory(directory: str) -> None:
+    """Persist a rename; not every platform can open a directory for this."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, content: str) -> WriteResult:
+    """Replace `path` with `content` so readers see the old file or the new one, never a mix.
+
+    The content goes to a temp file in the same directory, which is
+    fsynced and then renamed over `path`; a crash part-way leaves the
+    original untouched. An existing file's permission bits are kept.
+    """
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    temp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0), 0o666)
+    try:
+        try:
+            if mode is not None:
+                os.fchmod(fd, mode)
+            written = _write_chunks(fd, content)
+            os.fsync(fd)
+            result = os.fstat(fd)
+        finally:
+            os.close(fd)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+    return WriteResult(written, result.st_size, result.st_mtime_ns)
+
+
+def write_in_place(path: str, content: str, offset: int | None = None) -> WriteResult:
+    """Append `content` to `path`, or overwrite its bytes from `offset` on.
+
+    Only the new bytes are written, however large the file, but a reader
+    may see the write part-done. Writing at an offset never truncates, and
+    the offset may not lie past the end of the file.
+    """
+    if offset is not None and (type(offset) is not int or offset < 0):
+        raise ValueError("'offset' must be a non-negative integer.")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_CLOEXEC", 0)
+    fd = os.open(path, flags | (os.O_APPEND if offset is None else 0), 0o666)
+    try:
+        size = os.fstat(fd).st_size
+        if offset is not None and offset > size:
+            raise ValueError(f"'offset' {offset} is past the end of the file ({size} bytes).")
+        written = _write_chunks(fd, content, offset)
+        os.fsync(fd)
+        result = os.fstat(fd)
+    finally:
+        os.close(fd)
+    return WriteResult(written, result.st_size, result.st_mtime_ns)
@@ -0,0 +1,111 @@
+"""Fingerprint files by stat and content digest, with an LRU of digests."""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .config import DIGEST_CACHE_SIZE
+
+# Files changed this recently may change again within one mtime tick, unseen by stat
+_RACY_NS = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """What identifies a version of a file: its stat, and its content digest if taken."""
+
+    inode: int
+    size: int
+    mtime_ns: int
+    digest: str | None = None
+
+    @property
+    def tag(self) -> str:
+        """The fingerprint as one token, `inode-size-mtime` in hex with `-digest` if taken."""
+        tag = f"{self.inode:x}-{self.size:x}-{self.mtime_ns:x}"
+        return f"{tag}-{self.digest}" if self.digest else tag
+
+    @classmethod
+    def parse(cls, tag: str) -> "Fingerprint":
+        """Read back a `tag`; raises ValueError if it is not one."""
+        parts = tag.split("-") if isinstance(tag, str) else []
+        if len(parts) not in (3, 4) or (len(parts) == 4 and not parts[3]):
+            raise ValueError("'if_none_match' must be a fingerprint returned by an earlier read.")
+        try:
+            return cls(int(parts[0], 16), int(parts[1], 16), int(parts[2], 16), parts[3] if len(parts) == 4 else None)
+        except ValueError:
+            raise ValueError("'if_none_match' must be a fingerprint returned by an earlier read.") from None
+
+    def same_stat(self, other: "Fingerprint") -> bool:
+        return (self.inode, self.size, self.mtime_ns) == (other.inode, other.size, other.mtime_ns)
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb", buffering=0) as file:
+        return hashlib.file_digest(file, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+class DigestCache:
+    """Least recently used content digests, keyed by realpath and stat.
+
+    A digest is reused while the file's inode, size and mtime all match,
+    so checking an unchanged file never reads it again. Digests of files
+    modified within the last second are not kept, as a write in the same
+    mtime tick would leave the stat unchanged.
+    """
+
+    def __init__(self, size: int = DIGEST_CACHE_SIZE):
+        self._size = size
+        self._entries: OrderedDict[tuple[str, int, int, int], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def digest(self, path: str, stat: os.stat_result) -> str:
+        key = (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+                return digest
+        digest = _hash_file(path)
+        if time.time_ns() - stat.st_mtime_ns >= _RACY_NS and os.stat(path).st_mtime_ns == stat.st_mtime_ns:
+            with self._lock:
+                self._entries[key] = digest
+                while len(self._entries) > self._size:
+                    self._entries.popitem(last=False)
+        return digest
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+DIGEST_CACHE = DigestCache()
+
+
+def fingerprint(path: str, stat: os.stat_result, with_digest: bool = False, cache: DigestCache = DIGEST_CACHE) -> Fingerprint:
+    """Fingerprint `path` as of `stat`; the digest costs one read of the file unless cached."""
+    digest = cache.digest(path, stat) if with_digest else None
+    return Fingerprint(stat.st_ino, stat.st_size, stat.st_mtime_ns, digest)
+
+
+def unchanged_since(path: str, stat: os.stat_result, tag: str, cache: DigestCache = DIGEST_CACHE) -> Fingerprint | None:
+    """Return the file's current fingerprint if it still matches `tag`, else None.
+
+    An equal stat is enough. Otherwise a tag with a digest still matches
+    if the content hashes the same, as after a rewrite with the same bytes;
+    a file of another size is never hashed.
+    """
+    previous = Fingerprint.parse(tag)
+    current = fingerprint(path, stat)
+    if current.same_stat(previous):
+        return Fingerprint(current.inode, current.size, current.mtime_ns, previous.digest)
+    if previous.digest is None or current.size != previous.size:
+        return None
+    current = fingerprint(path, stat, with_digest=True, cache=cache)
+    return current if current.digest == previous.digest else None
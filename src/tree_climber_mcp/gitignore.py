@@ -0,0 +1,163 @@
+"""Match paths against .gitignore rules while walking a directory tree."""
+
+import os
+import re
+
+IGNORE_FILE = ".gitignore"
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob into a regex over `/`-separated paths.
+
+    `*` and `?` never match `/`. `**/` matches any number of leading
+    directories and a trailing `/**` everything beneath a directory.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == "*":
+            stop = i
+            while stop < n and pattern[stop] == "*":
+                stop += 1
+            at_component = i == 0 or pattern[i - 1] == "/"
+            if stop - i >= 2 and at_component and stop < n and pattern[stop] == "/":
+                out.append("(?:.*/)?")
+                stop += 1
+            elif stop - i >= 2 and at_component and stop == n:
+                out.append(".*")
+            else:
+                out.append("[^/]*")
+            i = stop
+        elif char == "?":
+            out.append("[^/]")
+            i += 1
+        elif char == "[":
+            stop = i + 1
+            if stop < n and pattern[stop] in "!^":
+                stop += 1
+            if stop < n and pattern[stop] == "]":
+                stop += 1
+            while stop < n and pattern[stop] != "]":
+                stop += 1
+            if stop >= n:
+                out.append("\\[")
+                i += 1
+                continue
+            members = pattern[i + 1 : stop].replace("\\", "\\\\")
+            if members[0] in "!^":
+                members = "^" + members[1:]
+            out.append(f"[{members}]")
+            i = stop + 1
+        elif char == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(char))
+            i += 1
+    return "".join(out)
+
+
+def parse_ignore_file(text: str) -> list[tuple[str, bool, bool]]:
+    """Return `(regex, negated, directories_only)` for each rule, in file order."""
+    rules = []
+    for line in text.splitlines():
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directories_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the rule to the file's directory
+        anchored = "/" in line
+        regex = glob_to_regex(line.lstrip("/"))
+        rules.append((regex if anchored else f"(?:.*/)?{regex}", negated, directories_only))
+    return rules
+
+
+class IgnoreRules:
+    """The ignore rules of one directory, chained to those of the directories above it.
+
+    Each file's rules are compiled into one alternation, last rule first,
+    so checking a path costs one regex match per ignore file in scope
+    whatever the number of rules. As in git, the last matching rule of the
+    deepest file decides, and a `!` rule re-includes a path.
+    """
+
+    def __init__(self, rules: list[tuple[str, bool, bool]], base: str = "", parent: "IgnoreRules | None" = None, lead: str = ""):
+        # Paths are relative to the walk root; `base` is this file's
+        # directory on that scale and `lead` the part above the root
+        self._strip = len(base) + 1 if base else 0
+        self._lead = lead
+        self._parent = parent
+        ordered = list(reversed(rules))
+        self._negated = [negated for _, negated, _ in ordered]
+        self._any = self._compile(ordered, with_dir_only=True)
+        self._files = self._compile(ordered, with_dir_only=False)
+
+    @staticmethod
+    def _compile(rules: list[tuple[str, bool, bool]], with_dir_only: bool) -> re.Pattern | None:
+        # Rules left out still take a group, so group numbers match `_negated`
+        branches = [f"({regex})\\Z" if with_dir_only or not dir_only else "(?!)()" for regex, _, dir_only in rules]
+        return re.compile("(?s:" + "|".join(branches) + ")") if branches else None
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        rules = self
+        while rules is not None:
+            regex = rules._any if is_dir else rules._files
+            if regex is not None:
+                match = regex.match(rules._lead + path[rules._strip :])
+                if match is not None:
+                    return not rules._negated[match.lastindex - 1]
+            rules = rules._parent
+        return False
+
+
+def _read_rules(path: str) -> list[tuple[str, bool, bool]]:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            return parse_ignore_file(file.read())
+    except OSError:
+        return []
+
+
+def read_ignore_file(directory: str, base: str, parent: IgnoreRules | None) -> IgnoreRules | None:
+    """Add the rules of `directory`'s ignore file, if it has one, to `parent`."""
+    rules = _read_rules(os.path.join(directory, IGNORE_FILE))
+    return IgnoreRules(rules, base, parent) if rules else parent
+
+
+def enclosing_rules(root: str) -> IgnoreRules | None:
+    """Collect the ignore rules that apply to `root` from its repository above it.
+
+    Walks up from `root` to the nearest directory containing `.git` and
+    chains the `.git/info/exclude` file and every ignore file on the way
+    down, not counting `root`'s own. Outside a repository there are none.
+    """
+    chain = [root]
+    while not os.path.exists(os.path.join(chain[-1], ".git")):
+        parent = os.path.dirname(chain[-1])
+        if parent == chain[-1]:
+            return None
+        chain.append(parent)
+    top = chain[-1]
+
+    rules = None
+    exclude = _read_rules(os.path.join(top, ".git", "info", "exclude"))
+    if exclude:
+        rules = IgnoreRules(exclude, lead=_lead(top, root))
+    for directory in reversed(chain[1:]):
+        own = _read_rules(os.path.join(directory, IGNORE_FILE))
+        if own:
+            rules = IgnoreRules(own, parent=rules, lead=_lead(directory, root))
+    return rules
+
+
+def _lead(directory: str, root: str) -> str:
+    relative = os.path.relpath(root, directory)
+    return "" if relative == "." else relative.replace(os.sep, "/") + "/"
@@ -0,0 +1,115 @@
+"""A shared thread pool for blocking filesystem calls, with timeouts and queue metrics."""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TypeVar
+
+from .config import FS_IO_TIMEOUT, FS_IO_WORKERS
+
+T = TypeVar("T")
+
+
+class IOTimeoutError(TimeoutError):
+    """Raised when a filesystem call does not finish within the executor's timeout."""
+
+
+@dataclass(frozen=True)
+class IOStats:
+    """A snapshot of the executor's load; `queued` calls wait for a free worker."""
+
+    workers: int
+    queued: int
+    running: int
+    completed: int
+    timed_out: int
+    peak_queued: int
+
+
+class IOExecutor:
+    """Run blocking filesystem calls on a bounded pool shared by every filesystem tool.
+
+    The event loop only awaits the result, so a slow mount or a large write
+    holds up one worker instead of every request on the server. A call
+    still waiting after `timeout` seconds fails with IOTimeoutError: if it
+    never started it is dropped, otherwise its thread runs on to completion
+    in the background, since a blocked system call cannot be interrupted.
+    """
+
+    def __init__(self, workers: int = FS_IO_WORKERS, timeout: float = FS_IO_TIMEOUT):
+        if workers < 1:
+            raise ValueError("The I/O executor needs at least 1 worker.")
+        if timeout <= 0:
+            raise ValueError("The I/O timeout must be positive.")
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tree-climber-io")
+        self._workers = workers
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._timed_out = 0
+        self._peak_queued = 0
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    def stats(self) -> IOStats:
+        with self._lock:
+            return IOStats(
+                self._workers,
+                self._queued,
+                self._running,
+                self._completed,
+                self._timed_out,
+                self._peak_queued,
+            )
+
+    def _call(self, func: Callable[..., T], args: tuple) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _drop(self, future) -> None:
+        # Only a call that has not started can be cancelled
+        if future.cancel():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func: Callable[..., T], *args, timeout: float | None = None) -> T:
+        """Run `func(*args)` on a worker thread and return its result."""
+        timeout = self._timeout if timeout is None else timeout
+        with self._lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        future = self._pool.submit(self._call, func, args)
+        waiter = asyncio.wrap_future(future)
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._drop(future)
+            raise
+        if not done:
+            self._drop(future)
+            # A late failure is nobody's to report
+            waiter.add_done_callback(lambda late: late.cancelled() or late.exception())
+            with self._lock:
+                self._timed_out += 1
+            raise IOTimeoutError(f"filesystem operation timed out after {timeout:g}s")
+        return waiter.result()
+
+    def shutdown(self) -> None:
+        """Drop queued calls and let running ones finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+IO_EXECUTOR = IOExecutor()
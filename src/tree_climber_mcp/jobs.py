@@ -0,0 +1,226 @@
+"""Run long commands as background jobs with bounded output capture."""
+
+import asyncio
+import os
+import signal
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from .config import JOB_BUFFER_SIZE, JOB_CANCEL_GRACE, JOB_RETAIN_FINISHED, JOB_SPILL_LIMIT
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class OutputRingBuffer:
+    """Keep the most recent `capacity` bytes of a stream, addressed by absolute offset.
+
+    Offsets count every byte ever written, so a reader can resume from the
+    offset it stopped at. When `spill_limit` is set, the first `spill_limit`
+    bytes are also appended to an anonymous temp file, which lets readers
+    recover output that has already rotated out of memory.
+    """
+
+    def __init__(self, capacity: int = JOB_BUFFER_SIZE, spill_limit: int = 0):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1 byte.")
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._total = 0
+        self._spill = tempfile.TemporaryFile(prefix="tree-climber-job-") if spill_limit else None
+        self._spill_limit = spill_limit
+        self._spilled = 0
+
+    @property
+    def total(self) -> int:
+        """Number of bytes written so far."""
+        return self._total
+
+    @property
+    def start(self) -> int:
+        """Oldest offset still held in memory."""
+        return max(self._total - self._capacity, 0)
+
+    @property
+    def spilled(self) -> int:
+        return self._spilled
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._spill is not None and self._spilled < self._spill_limit:
+            kept = data[: self._spill_limit - self._spilled]
+            self._spill.write(kept)
+            self._spilled += len(kept)
+
+        size = len(data)
+        if size > self._capacity:
+            # Only the tail can survive; skip ahead as if the rest wrapped out
+            self._total += size - self._capacity
+            data = data[-self._capacity :]
+            size = self._capacity
+        position = self._total % self._capacity
+        first = min(size, self._capacity - position)
+        self._buffer[position : position + first] = data[:first]
+        self._buffer[: size - first] = data[first:]
+        self._total += size
+
+    def _read_memory(self, offset: int, end: int) -> bytes:
+        start = offset % self._capacity
+        size = end - offset
+        if start + size <= self._capacity:
+            return bytes(self._buffer[start : start + size])
+        first = self._capacity - start
+        return bytes(self._buffer[start:]) + bytes(self._buffer[: size - first])
+
+    def read(self, offset: int, max_bytes: int) -> tuple[int, bytes]:
+        """Return `(actual_offset, data)` for up to `max_bytes` starting at `offset`.
+
+        The actual offset is later than requested when the bytes were dropped.
+        """
+        offset = min(max(offset, 0), self._total)
+        if offset < self.start:
+            if self._spill is not None and offset < self._spilled:
+                self._spill.flush()
+                self._spill.seek(offset)
+                return offset, self._spill.read(min(max_bytes, self._spilled - offset))
+            offset = self.start
+        return offset, self._read_memory(offset, min(offset + max_bytes, self._total))
+
+    def tail(self, lines: int, max_bytes: int) -> tuple[int, bytes]:
+        """Return `(offset, data)` for the last `lines` lines held in memory."""
+        start = max(self.start, self._total - max_bytes)
+        data = self._read_memory(start, self._total)
+        # Ignore the final newline so "last line" means the last complete line
+        position = len(data) - 1 if data.endswith(b"\n") else len(data)
+        for _ in range(lines):
+            position = data.rfind(b"\n", 0, position)
+            if position < 0:
+                return start, data
+        return start + position + 1, data[position + 1 :]
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+@dataclass
+class Job:
+    """A command running outside the interactive session."""
+
+    job_id: int
+    command: str
+    cwd: str
+    process: asyncio.subprocess.Process
+    output: OutputRingBuffer
+    started: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+    exit_code: int | None = None
+    cancelled: bool = False
+    reader: asyncio.Task | None = None
+
+    @property
+    def status(self) -> str:
+        if self.finished is None:
+            return "running"
+        return "cancelled" if self.cancelled else "exited"
+
+    @property
+    def runtime(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+
+class JobManager:
+    """Start, track and cancel background jobs.
+
+    Jobs run as `xonsh -c` children in their own process group so they can be
+    cancelled as a unit. Combined stdout/stderr is pumped into a ring buffer,
+    which keeps memory per job bounded no matter how long the job runs. Only
+    the most recent `retain_finished` finished jobs are kept.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = JOB_BUFFER_SIZE,
+        spill_limit: int = JOB_SPILL_LIMIT,
+        retain_finished: int = JOB_RETAIN_FINISHED,
+    ):
+        self._buffer_size = buffer_size
+        self._spill_limit = spill_limit
+        self._retain_finished = retain_finished
+        self._jobs: dict[int, Job] = {}
+        self._next_id = 1
+
+    async def start(self, command: str, cwd: str) -> Job:
+        process = await asyncio.create_subprocess_exec(
+            "xonsh",
+            "-c",
+            command,
+            cwd=cwd,
+            env=dict(os.environ, TERM="dumb"),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+        job = Job(
+            self._next_id,
+            command,
+            cwd,
+            process,
+            OutputRingBuffer(self._buffer_size, self._spill_limit),
+        )
+        self._next_id += 1
+        self._jobs[job.job_id] = job
+        job.reader = asyncio.create_task(self._pump(job))
+        self._evict_finished()
+        return job
+
+    async def _pump(self, job: Job) -> None:
+        while chunk := await job.process.stdout.read(READ_CHUNK_SIZE):
+            job.output.write(chunk)
+        job.exit_code = await job.process.wait()
+        job.finished = time.monotonic()
+
+    def _evict_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished is not None]
+        for job in finished[: max(len(finished) - self._retain_finished, 0)]:
+            job.output.close()
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: int) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    async def cancel(self, job_id: int, grace: float = JOB_CANCEL_GRACE) -> Job | None:
+        """Terminate a job's process group, escalating to SIGKILL after `grace` seconds."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished is not None:
+            return job
+        job.cancelled = True
+        self._signal(job, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(job.reader), grace)
+        except asyncio.TimeoutError:
+            self._signal(job, signal.SIGKILL)
+            await job.reader
+        return job
+
+    @staticmethod
+    def _signal(job: Job, signum: int) -> None:
+        try:
+            os.killpg(job.process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    async def cleanup(self) -> None:
+        """Cancel running jobs and release their buffers."""
+        await asyncio.gather(
+            *(self.cancel(job.job_id) for job in self._jobs.values() if job.finished is None)
+        )
+        for job in self._jobs.values():
+            job.output.close()
+        self._jobs.clear()
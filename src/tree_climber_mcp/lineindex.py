@@ -0,0 +1,172 @@
+"""Newline scanning over memory maps and a cache of per-file line-offset indexes."""
+
+import bisect
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+from .config import FILE_SCAN_CHUNK, LINE_INDEX_BLOCK, LINE_INDEX_CACHE_BYTES
+
+# Bytes kept from the end of an indexed file to tell an append from a rewrite
+_TAIL_SAMPLE = 64
+
+
+def release_pages(view, start: int, stop: int) -> None:
+    """Unmap scanned pages so resident memory tracks the chunk, not the file."""
+    if hasattr(mmap, "MADV_DONTNEED"):
+        start -= start % mmap.PAGESIZE
+        view.madvise(mmap.MADV_DONTNEED, start, stop - start)
+
+
+def count_newlines(view, start: int, stop: int) -> int:
+    count = 0
+    for chunk_start in range(start, stop, FILE_SCAN_CHUNK):
+        chunk_stop = min(chunk_start + FILE_SCAN_CHUNK, stop)
+        count += view[chunk_start:chunk_stop].count(b"\n")
+        release_pages(view, chunk_start, chunk_stop)
+    return count
+
+
+def skip_lines(view, position: int, count: int, size: int) -> int:
+    """Return the offset just past the `count`-th newline from `position`, or `size`."""
+    while count > 0 and position < size:
+        chunk = view[position : min(position + FILE_SCAN_CHUNK, size)]
+        found = chunk.count(b"\n")
+        release_pages(view, position, position + len(chunk))
+        if found < count:
+            count -= found
+            position += len(chunk)
+            continue
+        index = -1
+        for _ in range(count):
+            index = chunk.index(b"\n", index + 1)
+        return position + index + 1
+    return position if count == 0 else size
+
+
+class LineIndex:
+    """Newline counts at every `LINE_INDEX_BLOCK` boundary of a file.
+
+    `counts[i]` is the number of newlines before byte `i * LINE_INDEX_BLOCK`,
+    so a line or offset lookup is a bisect plus a scan of at most one block.
+    Blocks are counted with `bytes.count`, which runs at memory speed, and
+    the index costs eight bytes per block. Instances are never modified;
+    `extended` returns a new one, so readers in other threads are safe.
+    """
+
+    def __init__(self, counts: array, newlines: int, size: int, mtime_ns: int, tail: bytes):
+        self.counts = counts
+        self.newlines = newlines
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._tail = tail
+
+    @classmethod
+    def build(cls, view, size: int, mtime_ns: int) -> "LineIndex":
+        return cls._scan(view, array("q", [0]), size, mtime_ns)
+
+    @classmethod
+    def _scan(cls, view, counts: array, size: int, mtime_ns: int) -> "LineIndex":
+        position = (len(counts) - 1) * LINE_INDEX_BLOCK
+        total = counts[-1]
+        step = LINE_INDEX_BLOCK * max(1, FILE_SCAN_CHUNK // LINE_INDEX_BLOCK)
+        for chunk_start in range(position, size, step):
+            chunk_stop = min(chunk_start + step, size)
+            chunk = view[chunk_start:chunk_stop]
+            for block in range(0, len(chunk), LINE_INDEX_BLOCK):
+                total += chunk.count(b"\n", block, block + LINE_INDEX_BLOCK)
+                if chunk_start + block + LINE_INDEX_BLOCK <= size:
+                    counts.append(total)
+            release_pages(view, chunk_start, chunk_stop)
+        tail = view[max(0, size - _TAIL_SAMPLE) : size]
+        return cls(counts, total, size, mtime_ns, tail)
+
+    @property
+    def nbytes(self) -> int:
+        return self.counts.itemsize * len(self.counts) + len(self._tail)
+
+    def is_prefix_of(self, view, size: int) -> bool:
+        """Whether a file of `size` bytes looks like this one with data appended."""
+        return size > self.size and view[self.size - len(self._tail) : self.size] == self._tail
+
+    def extended(self, view, size: int, mtime_ns: int) -> "LineIndex":
+        """Index the bytes appended since this index was built."""
+        return self._scan(view, array("q", self.counts), size, mtime_ns)
+
+    def newlines_before(self, view, offset: int) -> int:
+        block = min(offset // LINE_INDEX_BLOCK, len(self.counts) - 1)
+        block_start = block * LINE_INDEX_BLOCK
+        return self.counts[block] + view[block_start:offset].count(b"\n")
+
+    def line_start(self, view, line: int) -> int:
+        """Return the offset where 1-based `line` begins, or the file size past the end."""
+        target = line - 1
+        if target <= 0:
+            return 0
+        if target > self.newlines:
+            return self.size
+        # The last block boundary with fewer than `target` newlines before it
+        block = bisect.bisect_left(self.counts, target) - 1
+        return skip_lines(view, block * LINE_INDEX_BLOCK, target - self.counts[block], self.size)
+
+
+class LineIndexCache:
+    """Least recently used line indexes, within a memory budget.
+
+    An index is reused while the file's realpath, inode, size and mtime all
+    match. When a file has only grown and its old last bytes are
+    unchanged, as with a log, the old index is extended over the new
+    bytes instead of rebuilt.
+    """
+
+    def __init__(self, budget: int = LINE_INDEX_CACHE_BYTES):
+        self._budget = budget
+        self._entries: OrderedDict[tuple[str, int], LineIndex] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str, stat: os.stat_result, view) -> LineIndex:
+        key = (path, stat.st_ino)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+        if index is not None and (index.size, index.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return index
+        if index is not None and index.is_prefix_of(view, stat.st_size):
+            index = index.extended(view, stat.st_size, stat.st_mtime_ns)
+        else:
+            index = LineIndex.build(view, stat.st_size, stat.st_mtime_ns)
+        self._store(key, index)
+        return index
+
+    def _store(self, key: tuple[str, int], index: LineIndex) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = index
+            self._bytes += index.nbytes
+            # The newest index stays even if it alone exceeds the budget
+            while self._bytes > self._budget and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def discard(self, path: str) -> None:
+        """Drop `path`'s indexes, after a write that may have moved its lines."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+LINE_INDEX_CACHE = LineIndexCache()
@@ -0,0 +1,149 @@
+"""Find literals that every match of a regular expression must contain.
+
+Both the command policy and content search use them to skip running a
+regex on text that cannot match.
+"""
+
+import re
+
+# Shortest literal worth returning
+MIN_LITERAL = 2
+_QUANTIFIER = re.compile(r"\{\d*(,\d*)?\}")
+
+_OCTAL = "01234567"
+# Digits taken by `\x`, `\u` and `\U` escapes
+_HEX_DIGITS = {"x": 2, "u": 4, "U": 8}
+
+
+def _escape_end(pattern: str, index: int) -> int:
+    """Return the index just past the escape whose backslash is at `index`.
+
+    Most escapes are two characters, but `\\xHH`, `\\uHHHH`, `\\UHHHHHHHH`,
+    `\\N{name}`, octal `\\0oo` or `\\ooo` and group references `\\NN` run on.
+    """
+    escaped = pattern[index + 1 : index + 2]
+    end = index + 2
+    if escaped in _HEX_DIGITS:
+        return min(end + _HEX_DIGITS[escaped], len(pattern))
+    if escaped == "N" and pattern.startswith("{", end):
+        close = pattern.find("}", end)
+        return len(pattern) if close < 0 else close + 1
+    if not escaped.isdigit():
+        return end
+    following = pattern[end : end + 2]
+    if escaped != "0" and escaped in _OCTAL and len(following) == 2 and all(char in _OCTAL for char in following):
+        return end + 2
+    digits, most = (_OCTAL, 2) if escaped == "0" else ("0123456789", 1)
+    while end < len(pattern) and most and pattern[end] in digits:
+        end += 1
+        most -= 1
+    return end
+
+
+def _skip(pattern: str, index: int) -> int:
+    """Return the index just past the class or group opening at `index`."""
+    depth = 0
+    in_class = False
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index = _escape_end(pattern, index)
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+                if depth == 0:
+                    return index + 1
+        elif char == "[":
+            in_class = True
+            # `]` right after `[` or `[^` is a literal member
+            if pattern.startswith("^", index + 1):
+                index += 1
+            if pattern.startswith("]", index + 1):
+                index += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return index
+
+
+def split_branches(pattern: str) -> list[str]:
+    """Split a pattern on its top-level `|`."""
+    branches = []
+    start = index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index = _escape_end(pattern, index)
+        elif char in "[(":
+            index = _skip(pattern, index)
+        else:
+            if char == "|":
+                branches.append(pattern[start:index])
+                start = index + 1
+            index += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def _longest_literal(branch: str, fold: bool = True) -> str:
+    """Return the longest run of characters every match of `branch` contains.
+
+    Anything that is not plainly a literal (groups, classes, escapes like
+    `\\s` or `\\x41`, non-ASCII characters that case-fold unpredictably)
+    ends a run, and an optional quantifier removes the character it applies
+    to. With `fold`, the run is lowercased for matching case-insensitively.
+    """
+    best = run = ""
+    index = 0
+    while index < len(branch):
+        char = branch[index]
+        literal = None
+        if char == "\\":
+            escaped = branch[index + 1 : index + 2]
+            if escaped.isascii() and escaped and not escaped.isalnum():
+                literal = escaped
+            # Letter and digit escapes, like `\s` or `\x41`, end the run
+            index = _escape_end(branch, index)
+        elif char in "[(":
+            index = _skip(branch, index)
+        elif char in "*?" or (char == "{" and _QUANTIFIER.match(branch, index)):
+            # The atom before may not occur at all
+            run = run[:-1]
+            index = _QUANTIFIER.match(branch, index).end() if char == "{" else index + 1
+        elif char in ".^$+" or not char.isascii():
+            index += 1
+        else:
+            literal = char
+            index += 1
+        if literal is None:
+            best = max(best, run, key=len)
+            run = ""
+        else:
+            run += literal
+    longest = max(best, run, key=len)
+    return longest.lower() if fold else longest
+
+
+def required_literals(pattern: str, fold: bool = True) -> list[str] | None:
+    """Literals one of which occurs in every match, or None if there is no usable set."""
+    literals = []
+    for branch in split_branches(pattern):
+        literal = _longest_literal(branch, fold)
+        if len(literal) >= MIN_LITERAL:
+            literals.append(literal)
+            continue
+        # A branch that is one plain group, like `(shutdown|reboot)`, needs one of its branches
+        if not branch.startswith("(") or _skip(branch, 0) != len(branch):
+            return None
+        if branch.startswith("(?") and not branch.startswith("(?:"):
+            return None
+        nested = required_literals(branch[3:-1] if branch.startswith("(?:") else branch[1:-1], fold)
+        if nested is None:
+            return None
+        literals.extend(nested)
+    return literals
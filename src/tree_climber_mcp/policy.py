@@ -0,0 +1,211 @@
+"""Compiled command policy: match commands against banned-command rules."""
+
+import functools
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from .cmdline import Segment, split_command
+from .config import POLICY_CACHE_SIZE, POLICY_CACHEABLE_LENGTH
+from .literals import MIN_LITERAL, required_literals as _required_literals, split_branches as _split_branches
+
+# Rules are looked up by the first two characters of their shortest required literal
+_MIN_KEYWORD = MIN_LITERAL
+# Commands that run the rest of their arguments as another command.
+_WRAPPERS = frozenset(
+    {"builtin", "command", "doas", "env", "exec", "nice", "nohup", "stdbuf", "sudo", "time", "timeout", "xargs"}
+)
+# Shells whose `-c` script is checked like a command of its own.
+_SHELLS = frozenset({"bash", "dash", "fish", "ksh", "sh", "xonsh", "zsh"})
+_MAX_SCRIPT_DEPTH = 4
+# Runs of blanks other than a lone space, which needs no rewriting
+_BLANKS = re.compile(r"[^\S\n\r]{2,}|[^\S \n\r]")
+_LINE_BREAK = re.compile(r" ?[\n\r]\s*")
+# A pattern that opens with a plain word and `.*`, like `curl.*\|\s*sh`
+_LEADING_WORD = re.compile(r"([a-z0-9_-]+)\.\*", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class PolicyDecision:
+    """Whether a command may run and, if not, the rule it matched."""
+
+    permitted: bool
+    rule: str | None = None
+
+
+@dataclass(frozen=True)
+class TokenRule:
+    """Ban a program by name, optionally only with certain arguments or downstream programs.
+
+    `args` is searched in the program's arguments joined by single spaces.
+    With `piped_into`, the program is only banned when a later segment of
+    the command that a pipe feeds runs one of those programs.
+    """
+
+    program: str
+    args: str | None = None
+    piped_into: tuple[str, ...] = ()
+
+    def __str__(self) -> str:
+        text = self.program
+        if self.args:
+            text += f" {self.args}"
+        if self.piped_into:
+            text += f" | {'|'.join(self.piped_into)}"
+        return text
+
+
+def normalize_command(command: str) -> str:
+    """Lowercase and collapse whitespace within lines, the form rules are matched against.
+
+    Line breaks are kept because they separate commands; regex rules see
+    them as spaces.
+    """
+    return _LINE_BREAK.sub("\n", _BLANKS.sub(" ", command.lower().strip()))
+
+
+def _programs(argv: tuple[str, ...]) -> Iterator[tuple[str, tuple[str, ...]]]:
+    """Yield `(name, args)` for each word of `argv` that may be the program it runs.
+
+    Leading `VAR=value` assignments are skipped. After a wrapper such as
+    `sudo` or `env`, whose options and their values are not parsed, every
+    later word is a candidate.
+    """
+    index = 0
+    while index < len(argv) - 1 and "=" in argv[index].lstrip("="):
+        index += 1
+    name = os.path.basename(argv[index])
+    yield name, argv[index + 1 :]
+    if name in _WRAPPERS:
+        for later in range(index + 1, len(argv)):
+            yield os.path.basename(argv[later]), argv[later + 1 :]
+
+
+class CommandPolicy:
+    """Decide whether commands match any of a fixed set of banned rules.
+
+    Token rules are checked first, against the simple commands that
+    `split_command` finds: each segment looks up its program name, so the
+    cost grows with the number of words rather than with regex
+    backtracking over the whole line. Shell `-c` scripts are split and
+    checked too.
+
+    Regex patterns are compiled once and matched against the whole
+    normalized command. A literal that each match of a pattern must
+    contain, such as `nmap` for `nmap\\s+`, is indexed by its first two
+    characters, so finding the patterns that could match takes one pass
+    over the command's character pairs however many there are. Only those
+    candidates run, in list order, so the reported rule is the first listed
+    one that matches. Patterns without such a literal, and any command with
+    non-ASCII text, fall back to running every candidate.
+
+    A pattern of one branch that opens with a word and `.*`, such as
+    `curl.*\\|\\s*sh`, matches somewhere if and only if it matches at the word's first
+    occurrence, as `.*` can span every later one. It is run once from
+    there rather than from each occurrence, which on a line repeating the
+    word would take time quadratic in its length.
+
+    Decisions are cached by normalized command.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str],
+        token_rules: Iterable[TokenRule] = (),
+        cache_size: int = POLICY_CACHE_SIZE,
+    ):
+        self._token_rules: dict[str, list[tuple[TokenRule, re.Pattern | None]]] = {}
+        for rule in token_rules:
+            args = re.compile(rule.args, re.IGNORECASE) if rule.args else None
+            self._token_rules.setdefault(rule.program.lower(), []).append((rule, args))
+        self._rules = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        self._leading_words: dict[int, str] = {}
+        self._unfiltered: set[int] = set()
+        self._keywords: dict[str, list[tuple[str, int]]] = {}
+        self._literal_count = 0
+        for index, rule in enumerate(self._rules):
+            leading = _LEADING_WORD.match(rule.pattern)
+            # Only a single branch is anchored by its leading word; `a.*x|b.*y` is not
+            if leading is not None and len(_split_branches(rule.pattern)) == 1:
+                self._leading_words[index] = leading.group(1).lower()
+            literals = _required_literals(rule.pattern)
+            if literals is None:
+                self._unfiltered.add(index)
+                continue
+            self._literal_count += len(literals)
+            for literal in literals:
+                self._keywords.setdefault(literal[:_MIN_KEYWORD], []).append((literal, index))
+        self._decide = functools.lru_cache(maxsize=cache_size)(self._evaluate)
+
+    @property
+    def patterns(self) -> list[str]:
+        return [rule.pattern for rule in self._rules]
+
+    def check(self, command: str) -> PolicyDecision:
+        normalized = normalize_command(command)
+        if len(normalized) > POLICY_CACHEABLE_LENGTH:
+            return self._evaluate(normalized)
+        return self._decide(normalized)
+
+    def is_permitted(self, command: str) -> bool:
+        return self.check(command).permitted
+
+    def _candidates(self, command: str) -> Iterable[int]:
+        if not command.isascii():
+            # IGNORECASE folds some non-ASCII letters onto ASCII ones, e.g. "ſ" onto "s"
+            return range(len(self._rules))
+        found = set(self._unfiltered)
+        if len(command) > 64 * self._literal_count:
+            # Searching a long command for each literal beats walking its pairs in Python
+            pairs = self._keywords.keys()
+        else:
+            pairs = {command[i : i + _MIN_KEYWORD] for i in range(len(command) - 1)}
+            pairs &= self._keywords.keys()
+        for pair in pairs:
+            for literal, index in self._keywords[pair]:
+                if literal in command:
+                    found.add(index)
+        return sorted(found)
+
+    def _match_segments(self, segments: tuple[Segment, ...], depth: int = 0) -> TokenRule | None:
+        for position, segment in enumerate(segments):
+            for name, args in _programs(segment.argv):
+                if name in _SHELLS and "-c" in args and depth < _MAX_SCRIPT_DEPTH:
+                    script_index = args.index("-c") + 1
+                    if script_index < len(args):
+                        nested = self._match_segments(split_command(args[script_index]), depth + 1)
+                        if nested is not None:
+                            return nested
+                for rule, pattern in self._token_rules.get(name, ()):
+                    if pattern is not None and not pattern.search(" ".join(args)):
+                        continue
+                    if rule.piped_into and not self._feeds_into(segments[position + 1 :], rule.piped_into):
+                        continue
+                    return rule
+        return None
+
+    @staticmethod
+    def _feeds_into(later: tuple[Segment, ...], programs: tuple[str, ...]) -> bool:
+        return any(
+            segment.piped and any(name in programs for name, _ in _programs(segment.argv))
+            for segment in later
+        )
+
+    def _evaluate(self, command: str) -> PolicyDecision:
+        if self._token_rules:
+            rule = self._match_segments(split_command(command))
+            if rule is not None:
+                return PolicyDecision(False, str(rule))
+        flat = command.replace("\n", " ")
+        ascii_only = flat.isascii()
+        for index in self._candidates(flat):
+            word = self._leading_words.get(index) if ascii_only else None
+            if word is None:
+                matched = self._rules[index].search(flat)
+            else:
+                start = flat.find(word)
+                matched = start >= 0 and self._rules[index].match(flat, start)
+            if matched:
+                return PolicyDecision(False, self._rules[index].pattern)
+        return PolicyDecision(True)
@@ -0,0 +1,168 @@
+"""Load the command policy from a TOML or JSON file and reload it when the file changes."""
+
+import asyncio
+import json
+import os
+import re
+import tomllib
+from logging import Logger
+
+from .config import POLICY_RELOAD_INTERVAL
+from .policy import CommandPolicy, PolicyDecision, TokenRule
+from .security import BANNED_COMMAND_PATTERNS, BANNED_COMMAND_RULES
+
+_KEYS = frozenset({"include_defaults", "patterns", "token_rules"})
+_TOKEN_RULE_KEYS = frozenset({"program", "args", "piped_into"})
+
+
+class PolicyFileError(ValueError):
+    """Raised when a policy file cannot be read or does not describe a valid policy."""
+
+
+def _string_list(value, where: str) -> list[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+        raise PolicyFileError(f"{where} must be a list of non-empty strings")
+    return value
+
+
+def _token_rule(entry, index: int) -> TokenRule:
+    where = f"token_rules[{index}]"
+    if not isinstance(entry, dict):
+        raise PolicyFileError(f"{where} must be a table")
+    unknown = entry.keys() - _TOKEN_RULE_KEYS
+    if unknown:
+        raise PolicyFileError(f"{where} has unknown keys: {', '.join(sorted(unknown))}")
+    program = entry.get("program")
+    if not isinstance(program, str) or not program:
+        raise PolicyFileError(f"{where}.program must be a non-empty string")
+    args = entry.get("args")
+    if args is not None and not isinstance(args, str):
+        raise PolicyFileError(f"{where}.args must be a string")
+    piped_into = _string_list(entry.get("piped_into", []), f"{where}.piped_into")
+    return TokenRule(program, args=args, piped_into=tuple(piped_into))
+
+
+def parse_policy(data) -> CommandPolicy:
+    """Build a policy from the decoded contents of a policy file.
+
+    `patterns` lists regex rules and `token_rules` lists tables with a
+    `program` and optional `args` and `piped_into`. The built-in rules are
+    listed first unless `include_defaults` is false.
+    """
+    if not isinstance(data, dict):
+        raise PolicyFileError("policy must be a table")
+    unknown = data.keys() - _KEYS
+    if unknown:
+        raise PolicyFileError(f"unknown keys: {', '.join(sorted(unknown))}")
+    include_defaults = data.get("include_defaults", True)
+    if not isinstance(include_defaults, bool):
+        raise PolicyFileError("include_defaults must be true or false")
+    patterns = _string_list(data.get("patterns", []), "patterns")
+    entries = data.get("token_rules", [])
+    if not isinstance(entries, list):
+        raise PolicyFileError("token_rules must be a list of tables")
+    token_rules = [_token_rule(entry, index) for index, entry in enumerate(entries)]
+    if include_defaults:
+        patterns = BANNED_COMMAND_PATTERNS + patterns
+        token_rules = BANNED_COMMAND_RULES + token_rules
+    try:
+        return CommandPolicy(patterns, token_rules)
+    except re.error as exc:
+        raise PolicyFileError(f"invalid regex {exc.pattern!r}: {exc}") from exc
+
+
+def load_policy_file(path: str) -> CommandPolicy:
+    """Read and compile a policy file; `.json` files are JSON, anything else TOML."""
+    try:
+        with open(path, "rb") as file:
+            raw = file.read()
+        if path.endswith(".json"):
+            data = json.loads(raw)
+        else:
+            data = tomllib.loads(raw.decode("utf-8"))
+        return parse_policy(data)
+    except PolicyFileError as exc:
+        raise PolicyFileError(f"{path}: {exc}") from exc
+    except (OSError, UnicodeDecodeError, ValueError) as exc:
+        # json and tomllib decode errors are ValueErrors
+        raise PolicyFileError(f"{path}: {exc}") from exc
+
+
+def _stamp(path: str) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class PolicyWatcher:
+    """Serve the policy in a file and swap in a new one when the file changes.
+
+    The file is loaded once up front, where any error is raised. After
+    `start`, its inode, size and mtime are polled every `interval` seconds;
+    on a change the file is read and compiled in a worker thread and the
+    new policy replaces the old one in a single assignment, so a check in
+    progress finishes against the policy it started with and shell
+    sessions are untouched. A file that fails to load, or disappears,
+    leaves the previous policy in force until the next change.
+    """
+
+    def __init__(self, path: str, logger: Logger, interval: float = POLICY_RELOAD_INTERVAL):
+        self._path = path
+        self._logger = logger
+        self._interval = interval
+        self._stamp = _stamp(path)
+        self._policy = load_policy_file(path)
+        self._monitor: asyncio.Task | None = None
+
+    @property
+    def policy(self) -> CommandPolicy:
+        return self._policy
+
+    def check(self, command: str) -> PolicyDecision:
+        return self._policy.check(command)
+
+    def is_permitted(self, command: str) -> bool:
+        return self._policy.is_permitted(command)
+
+    def start(self) -> None:
+        """Begin polling the file for changes."""
+        if self._monitor is None and self._interval > 0:
+            self._monitor = asyncio.create_task(self._watch())
+
+    async def reload(self) -> bool:
+        """Load the file again if it changed; return True if a new policy took effect."""
+        stamp = await asyncio.to_thread(_stamp, self._path)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        if stamp is None:
+            self._logger.warning("Policy file %s is missing; keeping the current policy", self._path)
+            return False
+        try:
+            policy = await asyncio.to_thread(load_policy_file, self._path)
+        except PolicyFileError as exc:
+            self._logger.error("Keeping the current policy, reload failed: %s", exc)
+            return False
+        self._policy = policy
+        self._logger.info("Reloaded command policy from %s", self._path)
+        return True
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.reload()
+            except OSError as exc:
+                self._logger.error("Could not check policy file %s: %s", self._path, exc)
+
+    async def cleanup(self) -> None:
+        """Stop polling the file."""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
@@ -0,0 +1,123 @@
+"""Pool of warm xonsh sessions shared by the MCP tools."""
+
+import asyncio
+
+from .config import (
+    COMMAND_OUTPUT_LIMIT,
+    COMMAND_TIMEOUT,
+    DEFAULT_SESSION_ID,
+    SHELL_MAX_WAITERS,
+    SHELL_POOL_SIZE,
+)
+from .shell import CommandResult, ShellManager
+from .supervisor import ShellSupervisor
+
+
+class ShellPoolBusyError(RuntimeError):
+    """Raised when a session already has the maximum number of queued callers."""
+
+
+class ShellPool:
+    """Hand out pre-spawned xonsh sessions with per-client affinity.
+
+    Each session id is pinned to one shell, so `cd` and environment changes
+    persist across calls with the same id. New ids get an unused shell while
+    one is available and otherwise share the least loaded one. Commands on
+    different shells run in parallel; commands on the same shell queue in
+    arrival order, up to `max_waiters` callers behind the running one.
+    A shared `ShellSupervisor` keeps one standby shell for whichever session
+    dies first. Each command keeps at most `output_limit` bytes of output.
+    """
+
+    def __init__(
+        self,
+        size: int = SHELL_POOL_SIZE,
+        max_waiters: int = SHELL_MAX_WAITERS,
+        output_limit: int = COMMAND_OUTPUT_LIMIT,
+    ):
+        if size < 1:
+            raise ValueError("Shell pool size must be at least 1.")
+        if max_waiters < 0:
+            raise ValueError("Shell pool max waiters cannot be negative.")
+        if output_limit < 1:
+            raise ValueError("Command output limit must be at least 1 byte.")
+        self._supervisor = ShellSupervisor()
+        self._sessions = [
+            ShellManager(standby_source=self._supervisor.take_standby, output_limit=output_limit)
+            for _ in range(size)
+        ]
+        self._max_waiters = max_waiters
+        self._affinity: dict[str, int] = {}
+        self._pending = [0] * size
+
+    @property
+    def size(self) -> int:
+        return len(self._sessions)
+
+    def _index_for(self, session_id: str | None) -> int:
+        key = session_id or DEFAULT_SESSION_ID
+        index = self._affinity.get(key)
+        if index is None:
+            bound = set(self._affinity.values())
+            unbound = [i for i in range(len(self._sessions)) if i not in bound]
+            candidates = unbound or range(len(self._sessions))
+            index = min(candidates, key=lambda i: self._pending[i])
+            self._affinity[key] = index
+        return index
+
+    def session(self, session_id: str | None = None) -> ShellManager:
+        """Return the shell pinned to `session_id`, assigning one if needed."""
+        return self._sessions[self._index_for(session_id)]
+
+    async def flush_buffer(self):
+        """Bootstrap every session in parallel so they are warm before first use."""
+        await asyncio.gather(*(shell.flush_buffer() for shell in self._sessions))
+        self._supervisor.start(self._sessions)
+
+    async def _dispatch(self, session_id: str | None, call):
+        index = self._index_for(session_id)
+        # One pending caller is the running command; the rest are waiting
+        if self._pending[index] > self._max_waiters:
+            raise ShellPoolBusyError(
+                f"Shell session '{session_id or DEFAULT_SESSION_ID}' is busy with "
+                f"{self._pending[index]} queued commands."
+            )
+        self._pending[index] += 1
+        try:
+            return await call(self._sessions[index])
+        finally:
+            self._pending[index] -= 1
+
+    async def run_command(
+        self,
+        command: str,
+        cmd_timeout: float = COMMAND_TIMEOUT,
+        session_id: str | None = None,
+    ) -> CommandResult:
+        """Run a command on the caller's session, queueing behind earlier commands."""
+        return await self._dispatch(session_id, lambda shell: shell.run_command(command, cmd_timeout))
+
+    async def run_direct(
+        self,
+        pipeline: list[list[str]],
+        cmd_timeout: float = COMMAND_TIMEOUT,
+        session_id: str | None = None,
+    ) -> CommandResult | None:
+        """Run a plain pipeline in the caller's session context without the pty.
+
+        Queues like `run_command`; returns None when the session declines it.
+        """
+        return await self._dispatch(session_id, lambda shell: shell.run_direct(pipeline, cmd_timeout))
+
+    async def get_pwd(self, session_id: str | None = None) -> str:
+        """Return the working directory of the caller's session."""
+        return await self.session(session_id).get_pwd()
+
+    async def get_real_pwd(self, session_id: str | None = None) -> str:
+        """Return the resolved working directory of the caller's session."""
+        return await self.session(session_id).get_real_pwd()
+
+    async def cleanup(self):
+        """Stop the supervisor and close every session."""
+        await self._supervisor.cleanup()
+        await asyncio.gather(*(shell.cleanup() for shell in self._sessions))
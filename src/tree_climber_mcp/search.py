@@ -0,0 +1,364 @@
+"""Search file contents line by line over memory maps, spread across worker processes."""
+
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+
+from .config import (
+    BINARY_SNIFF_BYTES,
+    FILE_SCAN_CHUNK,
+    SEARCH_BATCH_FILES,
+    SEARCH_LIMIT,
+    SEARCH_LINE_WIDTH,
+    SEARCH_MAX_PER_FILE,
+    SEARCH_WORKERS,
+)
+from .dirwalk import Scandir, walk_entries
+from .lineindex import count_newlines, release_pages
+from .literals import required_literals
+
+# Literal lines that fail the regex before a file is searched with the regex alone
+_LITERAL_MISSES = 16
+
+
+@dataclass(frozen=True)
+class SearchPattern:
+    """A compiled pattern and literals one of which every match contains, if known."""
+
+    regex: re.Pattern
+    literals: tuple[bytes, ...] = ()
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    """A matching line; `column` counts characters from 1 and `text` may be clipped."""
+
+    line: int
+    column: int
+    text: str
+    before: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class FileMatches:
+    """A file's matches in line order; `more` if it had more than the per-file cap."""
+
+    path: str
+    matches: list[SearchMatch]
+    more: bool = False
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Files with matches in walk order; `truncated` if the search stopped early."""
+
+    files: list[FileMatches]
+    files_searched: int
+    truncated: bool
+    timed_out: bool
+
+
+def compile_pattern(pattern: str, literal: bool = False, ignore_case: bool = False) -> SearchPattern:
+    """Compile `pattern` once, as a bytes regex run directly over file contents.
+
+    When every match must contain one of a few literals, as `robnicate_`
+    for `[Ff]robnicate_\\d+`, they are kept so that the search can jump
+    between lines holding them with `bytes.find`, which is several times
+    faster than the regex engine, and run the regex on those lines alone.
+    Raises ValueError for an empty pattern and re.error
+    for an invalid one.
+    """
+    if not pattern:
+        raise ValueError("'pattern' must not be empty.")
+    source = re.escape(pattern) if literal else pattern
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    regex = re.compile(source.encode("utf-8"), flags)
+    literals = None
+    # Inline flags such as (?i) would change what the literals match
+    if not ignore_case and "(?" not in source:
+        literals = [pattern] if literal else required_literals(pattern, fold=False)
+    return SearchPattern(regex, tuple(text.encode("utf-8") for text in literals or ()))
+
+
+def clip_line(text: str, column: int = 1, width: int = SEARCH_LINE_WIDTH) -> str:
+    """Cut `text` to `width` characters, keeping `column` in view."""
+    if len(text) <= width:
+        return text
+    start = max(0, min(column - 1 - width // 4, len(text) - width))
+    clipped = text[start : start + width]
+    return ("…" if start else "") + clipped + ("…" if start + width < len(text) else "")
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", "replace").rstrip("\r")
+
+
+def _context(view, line_start: int, line_end: int, size: int, count: int) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    before = []
+    cursor = line_start
+    while len(before) < count and cursor > 0:
+        previous = view.rfind(b"\n", 0, cursor - 1) + 1
+        before.append(clip_line(_decode(view[previous : cursor - 1])))
+        cursor = previous
+    after = []
+    cursor = line_end + 1
+    while len(after) < count and cursor < size:
+        end = view.find(b"\n", cursor)
+        end = size if end < 0 else end
+        after.append(clip_line(_decode(view[cursor:end])))
+        cursor = end + 1
+    return tuple(reversed(before)), tuple(after)
+
+
+def _line_bounds(view, position: int, offset: int, stop: int) -> tuple[int, int]:
+    """Return where the line holding `offset` starts and ends, newline included."""
+    end = view.find(b"\n", offset, stop)
+    return view.rfind(b"\n", position, offset) + 1 or position, stop if end < 0 else end + 1
+
+
+def _search_view(view, size: int, pattern: SearchPattern, max_matches: int, context: int) -> tuple[list[SearchMatch], bool]:
+    mapped = isinstance(view, mmap.mmap)
+    matches = []
+    line = 1
+    # Newlines before `counted` are already in `line`
+    counted = 0
+    # Lines that held a literal but did not match; too many and the literals are not selective
+    misses = 0
+    position = 0
+    while position < size:
+        # Search a chunk at a time, ending on a line boundary, and drop its pages after
+        stop = min(position + FILE_SCAN_CHUNK, size)
+        if stop < size:
+            newline = view.find(b"\n", stop - 1)
+            stop = size if newline < 0 else newline + 1
+        if pattern.literals and misses < _LITERAL_MISSES:
+            # Run the regex only on the next line holding a literal
+            hits = [found for literal in pattern.literals if (found := view.find(literal, position, stop)) >= 0]
+            match = None
+            if hits:
+                start, end = _line_bounds(view, position, min(hits), stop)
+                match = pattern.regex.search(view, start, end)
+                if match is None:
+                    misses += 1
+                    position = end
+                    continue
+        else:
+            match = pattern.regex.search(view, position, stop)
+            if match is not None and view.find(b"\n", match.start(), match.end() - 1) >= 0:
+                # Matches are line by line, as in grep; try again within the first line
+                start, end = _line_bounds(view, position, match.start(), stop)
+                match = pattern.regex.search(view, start, end)
+                if match is None:
+                    position = end
+                    continue
+        if match is None:
+            if mapped:
+                release_pages(view, position, stop)
+            position = stop
+            continue
+        if len(matches) == max_matches:
+            return matches, True
+        start = match.start()
+        line_start, line_end = _line_bounds(view, position, start, stop)
+        # Without its newline
+        line_end -= view[line_end - 1 : line_end] == b"\n"
+        line += count_newlines(view, counted, line_start) if mapped else view.count(b"\n", counted, line_start)
+        counted = line_start
+        column = len(view[line_start:start].decode("utf-8", "replace")) + 1
+        text = clip_line(_decode(view[line_start:line_end]), column)
+        before, after = _context(view, line_start, line_end, size, context) if context else ((), ())
+        matches.append(SearchMatch(line, column, text, before, after))
+        # One match per line, as grep reports them
+        position = line_end + 1
+    return matches, False
+
+
+def search_file(path: str, display: str, pattern: SearchPattern, max_matches: int = SEARCH_MAX_PER_FILE, context: int = 0) -> FileMatches | None:
+    """Search one file; None if it is empty, unreadable or looks binary.
+
+    A file is binary if its first `BINARY_SNIFF_BYTES` hold a NUL byte, as
+    git and grep decide, so binaries cost one small read. Files up to
+    `FILE_SCAN_CHUNK` are read whole, which costs less than setting up a
+    map; larger ones are searched through one, a chunk at a time.
+    """
+    try:
+        # A file swapped for a symlink since the walk is not followed either
+        with open(os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0)), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return None
+            if size <= FILE_SCAN_CHUNK:
+                data = file.read()
+                if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                    return None
+                matches, more = _search_view(data, len(data), pattern, max_matches, context)
+            else:
+                with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as view:
+                    if b"\0" in view[:BINARY_SNIFF_BYTES]:
+                        return None
+                    matches, more = _search_view(view, size, pattern, max_matches, context)
+    except (OSError, ValueError):
+        return None
+    return FileMatches(display, matches, more) if matches else None
+
+
+def search_batch(files: list[tuple[str, str]], pattern: SearchPattern, max_matches: int, context: int) -> list[FileMatches | None]:
+    """Search `(path, display)` pairs in order; the unit of work sent to a worker process."""
+    return [search_file(path, display, pattern, max_matches, context) for path, display in files]
+
+
+class SearchPool:
+    """Worker processes for content search, started on first use.
+
+    Regex matching holds the GIL, so threads would share one core; worker
+    processes let a large search use several. They are started through a
+    fork server, so they do not inherit the server's threads or event loop.
+    With no workers, every batch is searched in the calling thread.
+    """
+
+    def __init__(self, workers: int = SEARCH_WORKERS):
+        if workers < 0:
+            raise ValueError("The search pool cannot have a negative number of workers.")
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ProcessPoolExecutor | None:
+        if self.workers == 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+SEARCH_POOL = SearchPool()
+
+
+def _batches(root: str, paths: Iterable[str], size: int) -> Iterator[list[tuple[str, str]]]:
+    batch = []
+    for path in paths:
+        batch.append((os.path.join(root, path), path))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def search_tree(
+    root: str,
+    pattern: SearchPattern,
+    include: str | None = None,
+    exclude: Iterable[str] = (),
+    gitignore: bool = True,
+    max_depth: int | None = None,
+    limit: int = SEARCH_LIMIT,
+    max_per_file: int = SEARCH_MAX_PER_FILE,
+    context: int = 0,
+    pool: SearchPool | None = SEARCH_POOL,
+    time_limit: float | None = None,
+    scandir: Scandir = os.scandir,
+) -> SearchResult:
+    """Search the files under `root` that `walk_entries` yields, in its order.
+
+    Files are sent to the pool in batches of `SEARCH_BATCH_FILES`, with a
+    few batches in flight per worker, and results are collected in order.
+    The first batch is searched in the calling thread, so a search of a
+    few files never waits on a process. The search stops once `limit`
+    matches are found or `time_limit` seconds have passed.
+    """
+    if type(limit) is not int or limit < 1:
+        raise ValueError("'limit' must be an integer of at least 1.")
+    if type(max_per_file) is not int or max_per_file < 1:
+        raise ValueError("'max_per_file' must be an integer of at least 1.")
+    if type(context) is not int or context < 0:
+        raise ValueError("'context' must be a non-negative integer.")
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    paths = (
+        entry.path
+        # Symlinks are skipped, as by grep -r, since their targets may lie outside the trusted root
+        for entry in walk_entries(
+            root,
+            include,
+            "file",
+            max_depth=max_depth,
+            exclude=exclude,
+            gitignore=gitignore,
+            scandir=scandir,
+            follow_symlinks=False,
+        )
+    )
+    batches = _batches(root, paths, SEARCH_BATCH_FILES)
+
+    files: list[FileMatches] = []
+    total = searched = 0
+    truncated = timed_out = False
+
+    def collect(found: list[FileMatches | None]) -> None:
+        nonlocal total, searched, truncated
+        for index, entry in enumerate(found, start=1):
+            searched += 1
+            if entry is None:
+                continue
+            room = limit - total
+            if len(entry.matches) > room:
+                entry = FileMatches(entry.path, entry.matches[:room], entry.more)
+                truncated = True
+            files.append(entry)
+            total += len(entry.matches)
+            if total == limit:
+                truncated = truncated or index < len(found)
+                return
+
+    executor = pool.executor() if pool is not None else None
+    in_flight = deque()
+    first = next(batches, None)
+    if first is not None:
+        collect(search_batch(first, pattern, max_per_file, context))
+    try:
+        while total < limit:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                timed_out = True
+                break
+            if executor is None:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                collect(search_batch(batch, pattern, max_per_file, context))
+                continue
+            while len(in_flight) < 2 * pool.workers and (batch := next(batches, None)) is not None:
+                in_flight.append(executor.submit(search_batch, batch, pattern, max_per_file, context))
+            if not in_flight:
+                break
+            try:
+                collect(in_flight[0].result(timeout=remaining))
+            except FutureTimeoutError:
+                timed_out = True
+                break
+            in_flight.popleft()
+        if total == limit and not truncated:
+            # Stopped at the limit with files left unsearched
+            truncated = bool(in_flight) or next(batches, None) is not None
+    finally:
+        for future in in_flight:
+            future.cancel()
+    return SearchResult(files, searched, truncated or timed_out, timed_out)
@@ -1,3 +1,5 @@
+from .policy import CommandPolicy, PolicyDecision, TokenRule
+
 BANNED_COMMAND_PATTERNS = [
   # System destruction
   r"rm\s+-rf\s+/(\*|$)",  # rm -rf / or rm -rf /*
@@ -51,3 +53,39 @@ BANNED_COMMAND_PATTERNS = [
   # Information gathering
   r"dmidecode|lshw",  # hardware information gathering
 ]
+
+
+# Rules on a program's name, arguments or pipe edges, matched per simple
+# command. They are an extra check on top of the patterns above, which
+# also see commands inside quotes, such as in a Python `os.system("...")`.
+BANNED_COMMAND_RULES = [
+  # System destruction
+  TokenRule("find", args=r"^/.*-delete"),  # mass deletion from root
+
+  # Fork bombs and resource exhaustion
+  TokenRule("dd", args=r"if=/dev/zero .*of=/dev/mem"),  # memory bomb
+  TokenRule("dd", args=r"if=/dev/zero .*of=.*bs=.*count=\d{3,}"),  # large file creation
+
+  # Remote code execution
+  TokenRule("curl", piped_into=("sh", "bash")),  # download and execute
+  TokenRule("wget", piped_into=("sh", "bash")),  # download and execute
+
+  # Security compromise
+  TokenRule("ssh-keygen", args=r"-f"),  # SSH key generation
+  TokenRule("cp", args=r"\.ssh/authorized_keys"),  # SSH key installation
+
+  # Network attacks and scanning
+  TokenRule("socat", args=r"listen"),  # socket listening
+]
+
+COMMAND_POLICY = CommandPolicy(BANNED_COMMAND_PATTERNS, BANNED_COMMAND_RULES)
+
+
+def check_command(command: str) -> PolicyDecision:
+  """Return the policy decision for a command, with the banned pattern it matched."""
+  return COMMAND_POLICY.check(command)
+
+
+def is_command_permitted(command: str) -> bool:
+  """Return False when the normalized command matches a banned pattern."""
+  return COMMAND_POLICY.is_permitted(command)
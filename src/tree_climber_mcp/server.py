@@ -1,13 +1,43 @@
+import os
 from logging import Logger
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
-from .config import SERVER_NAME, SERVER_VERSION
-from .shell import ShellManager
-from .tools.command import CommandTool
-from .tools.filesystem import ListDirectoryTool, ReadFileTool, WriteFileTool
+from .config import (
+    COMMAND_OUTPUT_LIMIT,
+    DIRECTORY_INDEX_BUDGET,
+    FS_IO_TIMEOUT,
+    FS_IO_WORKERS,
+    JOB_SPILL_LIMIT,
+    SEARCH_WORKERS,
+    SERVER_NAME,
+    SERVER_VERSION,
+    SHELL_MAX_WAITERS,
+    SHELL_POOL_SIZE,
+)
+from .dirindex import DirectoryIndex
+from .io_executor import IOExecutor
+from .jobs import JobManager
+from .policy_file import PolicyWatcher
+from .pool import ShellPool
+from .search import SearchPool
+from .security import COMMAND_POLICY
+from .tools.command import BatchCommandTool, CommandTool
+from .tools.filesystem import (
+    ChangesSinceTool,
+    EditFileTool,
+    FindFilesTool,
+    ListDirectoryTool,
+    ReadFileTool,
+    ReadManyFilesTool,
+    SearchFilesTool,
+    SnapshotTool,
+    WriteFileTool,
+)
+from .tools.jobs import CancelJobTool, JobOutputTool, JobStatusTool, StartJobTool
+from .tools.status import ServerStatusTool
 
 class TreeClimberServer:
     """Create and run the MCP server with the registered tool set."""
@@ -17,6 +47,16 @@ class TreeClimberServer:
         logger: Logger,
         allow_all_paths: bool = False,
         filesystem_root: str | None = None,
+        shell_pool_size: int = SHELL_POOL_SIZE,
+        shell_max_waiters: int = SHELL_MAX_WAITERS,
+        job_spill_limit: int = JOB_SPILL_LIMIT,
+        command_output_limit: int = COMMAND_OUTPUT_LIMIT,
+        policy_file: str | None = None,
+        filesystem_workers: int = FS_IO_WORKERS,
+        filesystem_timeout: float = FS_IO_TIMEOUT,
+        search_workers: int = SEARCH_WORKERS,
+        directory_index: bool = False,
+        directory_index_budget: int = DIRECTORY_INDEX_BUDGET,
     ):
         if allow_all_paths and filesystem_root:
             raise ValueError(
@@ -24,31 +64,107 @@ class TreeClimberServer:
             )
         self._server = Server(SERVER_NAME)
         self._logger = logger
-        self._shell_manager = ShellManager()
+        self._shell_pool = ShellPool(shell_pool_size, shell_max_waiters, command_output_limit)
+        self._job_manager = JobManager(spill_limit=job_spill_limit)
+        self._io_executor = IOExecutor(filesystem_workers, filesystem_timeout)
+        self._search_pool = SearchPool(search_workers)
+        # Without a filesystem root the trusted root is the session's cwd, which
+        # moves with `cd`; the index stays on the directory the shell starts in,
+        # and walks outside it read the disk
+        self._directory_index = (
+            DirectoryIndex(filesystem_root or os.getcwd(), logger, directory_index_budget) if directory_index else None
+        )
+        self._policy_watcher = PolicyWatcher(policy_file, logger) if policy_file else None
+        policy = self._policy_watcher or COMMAND_POLICY
         self._tools = {}
 
-        self._register_tool(CommandTool(self._shell_manager))
+        self._register_tool(CommandTool(self._shell_pool, policy))
+        self._register_tool(BatchCommandTool(self._shell_pool, policy))
         self._register_tool(
             ReadFileTool(
-                self._shell_manager,
+                self._shell_pool,
                 allow_all_paths=allow_all_paths,
                 filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+            )
+        )
+        self._register_tool(
+            ReadManyFilesTool(
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
             )
         )
         self._register_tool(
             WriteFileTool(
-                self._shell_manager,
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+            )
+        )
+        self._register_tool(
+            EditFileTool(
+                self._shell_pool,
                 allow_all_paths=allow_all_paths,
                 filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
             )
         )
         self._register_tool(
             ListDirectoryTool(
-                self._shell_manager,
+                self._shell_pool,
                 allow_all_paths=allow_all_paths,
                 filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+                directory_index=self._directory_index,
             )
         )
+        self._register_tool(
+            FindFilesTool(
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+                directory_index=self._directory_index,
+            )
+        )
+        self._register_tool(
+            SearchFilesTool(
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+                search_pool=self._search_pool,
+                directory_index=self._directory_index,
+            )
+        )
+        self._register_tool(
+            SnapshotTool(
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+                directory_index=self._directory_index,
+            )
+        )
+        self._register_tool(
+            ChangesSinceTool(
+                self._shell_pool,
+                allow_all_paths=allow_all_paths,
+                filesystem_root=filesystem_root,
+                io_executor=self._io_executor,
+                directory_index=self._directory_index,
+            )
+        )
+        self._register_tool(StartJobTool(self._job_manager, self._shell_pool, policy))
+        self._register_tool(JobStatusTool(self._job_manager, self._shell_pool))
+        self._register_tool(JobOutputTool(self._job_manager, self._shell_pool))
+        self._register_tool(CancelJobTool(self._job_manager, self._shell_pool))
+        self._register_tool(
+            ServerStatusTool(self._shell_pool, io_executor=self._io_executor, directory_index=self._directory_index)
+        )
         self._register_handlers()
 
     def _register_tool(self, tool_instance) -> None:
@@ -56,8 +172,35 @@ class TreeClimberServer:
 
     async def _cleanup(self) -> None:
         self._logger.info("Cleaning up server resources...")
-        if self._shell_manager:
-            await self._shell_manager.cleanup()
+        if self._policy_watcher:
+            await self._policy_watcher.cleanup()
+        if self._job_manager:
+            await self._job_manager.cleanup()
+        if self._shell_pool:
+            await self._shell_pool.cleanup()
+        if self._io_executor:
+            stats = self._io_executor.stats()
+            self._logger.info(
+                "Filesystem I/O: %d calls, %d timed out, peak queue depth %d on %d workers",
+                stats.completed,
+                stats.timed_out,
+                stats.peak_queued,
+                stats.workers,
+            )
+            self._io_executor.shutdown()
+        if self._search_pool:
+            self._search_pool.shutdown()
+        if self._directory_index:
+            stats = self._directory_index.stats()
+            self._logger.info(
+                "Directory index: %s, %d directories, %d entries, %d lookups from memory, %d from disk",
+                stats.state,
+                stats.directories,
+                stats.entries,
+                stats.lookups,
+                stats.fallbacks,
+            )
+            self._directory_index.close()
 
     def _register_handlers(self) -> None:
         @self._server.list_tools()
@@ -74,7 +217,11 @@ class TreeClimberServer:
     async def run(self) -> None:
         self._logger.info("Starting Tree Climber MCP server...")
         try:
-            await self._shell_manager.flush_buffer()
+            await self._shell_pool.flush_buffer()
+            if self._policy_watcher:
+                self._policy_watcher.start()
+            if self._directory_index:
+                self._directory_index.start()
 
             self._logger.info("Setting up stdio server...")
             async with stdio_server() as (read_stream, write_stream):
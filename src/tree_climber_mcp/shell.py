@@ -1,55 +1,552 @@
 """Manage the xonsh subprocess used for tool execution."""
 
+import asyncio
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
 import pexpect
 
-from .config import COMMAND_TIMEOUT, SHELL_PROMPT
+from .capture import FrameReader
+from .config import (
+    COMMAND_OUTPUT_LIMIT,
+    COMMAND_TIMEOUT,
+    HEALTH_CHECK_TIMEOUT,
+    RECOVERY_TIMEOUT,
+    SHELL_PROMPT,
+)
+from .direct import PipelineTimeout, run_pipeline
+
+FRAME_HELPER = "__tree_climber_frame__"
+RESTORE_HELPER = "__tree_climber_restore__"
+SNAPSHOT_HELPER = "__tree_climber_snapshot__"
+SNAPSHOT_COMMAND = f"{SNAPSHOT_HELPER}()"
+# Describe the shell process itself or are owned by the bootstrap, not the session
+_REPLAY_SKIPPED_VARS = ("PWD", "OLDPWD", "SHLVL", "TERM", "_", "PROMPT", "COLOR_RESULTS")
+# Longer commands are handed over in a temp file; readline stalls on huge lines.
+INLINE_COMMAND_LIMIT = 4096
+PTY_READ_SIZE = 64 * 1024
+
+# Installed into the xonsh context once per session. Markers are assembled at
+# runtime so the echoed input line never contains a complete marker.
+_FRAME_HELPER_SOURCE = f'''
+def {FRAME_HELPER}(tok, cmd, path=None):
+    import os, sys
+    from xonsh.tools import print_exception
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            cmd = f.read()
+        os.unlink(path)
+    hist = __xonsh__.history
+    if hist is not None:
+        hist.last_cmd_rtn = None
+    print("<<tc:" + tok + ":begin>>", flush=True)
+    rtn = 0
+    try:
+        __xonsh__.execer.exec(cmd, mode="single", glbs=__xonsh__.ctx)
+        if hist is not None and hist.last_cmd_rtn is not None:
+            rtn = hist.last_cmd_rtn
+    except SystemExit as exc:
+        rtn = exc.code if isinstance(exc.code, int) else 1
+    except BaseException:
+        print_exception()
+        rtn = 1
+    sys.stderr.flush()
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        cwd = __xonsh__.env.get("PWD", "")
+    print("<<tc:" + tok + ":end:" + str(rtn) + ":" + cwd + ":" + tok + ">>", flush=True)
+
+def {RESTORE_HELPER}(cwd, env_json):
+    import json, os
+    from xonsh.dirstack import cd
+    if env_json is not None:
+        env = json.loads(env_json)
+        current = __xonsh__.env.detype()
+        for key in set(current) - set(env) - set({_REPLAY_SKIPPED_VARS!r}):
+            # Only drop the user's own variables, never xonsh's settings
+            if not __xonsh__.env.is_configurable(key):
+                __xonsh__.env.pop(key, None)
+        for key, value in env.items():
+            if key in {_REPLAY_SKIPPED_VARS!r} or current.get(key) == value:
+                continue
+            try:
+                __xonsh__.env[key] = value
+            except Exception:
+                pass
+    if cwd and os.path.isdir(cwd):
+        cd([cwd])
+
+def {SNAPSHOT_HELPER}():
+    import builtins, json
+    aliases = dict()
+    for name in __xonsh__.aliases:
+        value = __xonsh__.aliases[name]
+        plain = isinstance(value, list) and all(isinstance(arg, str) for arg in value)
+        aliases[name] = value if plain else None
+    names = sorted(set(__xonsh__.ctx) | set(dir(builtins)))
+    print(json.dumps(dict(env=__xonsh__.env.detype(), aliases=aliases, names=names)))
+'''
+
+
+def _remaining(deadline: float) -> float:
+    return max(deadline - time.monotonic(), 0)
+
+
+def _after_begin(text: str, token: str) -> str:
+    """Drop everything up to the begin marker if it had not been consumed yet."""
+    begin = f"<<tc:{token}:begin>>"
+    return text.partition(begin)[2] if begin in text else text
+
+
+def _clean_output(output: str, started: bool) -> str:
+    """Undo the pty's CRLF translation and, unless `started`, drop the newline after the begin marker."""
+    output = output.replace("\r\n", "\n")
+    if not started and output.startswith("\n"):
+        output = output[1:]
+    return output
+
+
+@dataclass
+class CommandResult:
+    """Output and status of one framed command.
+
+    When the command timed out or the shell exited, `recovery` records how
+    the session was brought back ("interrupted", "standby", "respawned",
+    "failed", or "killed" for direct commands) and `recovery_duration` how
+    long that took. `stderr` is only separate for commands run outside the
+    pty; through the shell it is interleaved with `output`. When output
+    exceeded the capture limit, `omitted_bytes` of the `output_bytes` the
+    command printed were left out of the middle.
+    """
+
+    output: str
+    exit_code: int | None
+    duration: float
+    timed_out: bool = False
+    recovery: str | None = None
+    recovery_duration: float | None = None
+    stderr: str | None = None
+    output_bytes: int | None = None
+    omitted_bytes: int = 0
+
 
 class ShellManager:
-    """Create and interact with a persistent xonsh shell session."""
+    """Create and interact with a persistent xonsh shell session.
+
+    Every command is wrapped in begin/end markers that carry a random
+    per-invocation token, so output is cut out of the pty stream exactly
+    instead of guessing from the prompt and the echoed command line. The end
+    marker also reports the session's working directory, which keeps a cached
+    working directory current without extra round trips; the shell can only
+    change directory while one of our framed commands is running.
+    Command output is read from the pty in chunks by the event loop, so a
+    long-running command never blocks it, and kept within `output_limit`
+    bytes. Exchanges are serialized with a lock because the session has a
+    single input stream.
+
+    When the shell dies, the session takes over a pre-bootstrapped process
+    from `standby_source` (see `ShellSupervisor`) or, without one, starts a
+    fresh shell. The tracked cwd and the last environment snapshot are then
+    replayed so the session picks up where it left off.
+    """
+
+    def __init__(
+        self,
+        standby_source: Callable[[], Awaitable["ShellManager | None"]] | None = None,
+        output_limit: int = COMMAND_OUTPUT_LIMIT,
+    ):
+        self._lock = asyncio.Lock()
+        self._ready = False
+        self._cwd: str | None = None
+        self._real_cwd: str | None = None
+        self._env: dict[str, str] | None = None
+        self._aliases: dict[str, list[str] | None] = {}
+        self._names: frozenset[str] = frozenset()
+        self._snapshot_stale = True
+        self._standby_source = standby_source
+        self._output_limit = output_limit
+        self._xonsh_proc = self._spawn()
 
-    def __init__(self):
-        self._xonsh_proc = pexpect.spawn("xonsh", encoding="utf-8")
-        self._xonsh_proc.delaybeforesend = 2
+    def _spawn(self) -> pexpect.spawn:
+        # TERM=dumb stops xonsh from writing title escapes into the output
+        env = dict(os.environ, TERM="dumb")
+        cwd = self._cwd if self._cwd and os.path.isdir(self._cwd) else None
+        proc = pexpect.spawn("xonsh", encoding="utf-8", env=env, cwd=cwd)
+        proc.delaybeforesend = None
+        return proc
+
+    async def _expect(self, pattern: str, timeout: float | None = -1) -> str:
+        """Wait for an exact string and return the text that preceded it."""
+        await self._xonsh_proc.expect_exact(pattern, timeout=timeout, async_=True)
+        return self._xonsh_proc.before
+
+    def _track_cwd(self, cwd: str | None) -> None:
+        if cwd != self._cwd:
+            self._cwd = cwd
+            self._real_cwd = os.path.realpath(cwd) if cwd else None
+
+    async def _bootstrap(self) -> None:
+        token = secrets.token_hex(8)
+        setup = (
+            f'$PROMPT = "{SHELL_PROMPT}"; $COLOR_RESULTS = False; '
+            f"exec({_FRAME_HELPER_SOURCE!r}, __xonsh__.ctx); "
+            f'print("<<tc:" + "{token}:ready:" + $PWD + ":{token}>>")'
+        )
+        self._xonsh_proc.sendline(setup)
+        await self._expect(f"<<tc:{token}:ready:")
+        self._track_cwd(await self._expect(f":{token}>>"))
+        await self._expect(SHELL_PROMPT)
+        self._ready = True
 
     async def flush_buffer(self):
-        """Set a predictable prompt and clear the shell buffer."""
-        set_prompt = f'$PROMPT = "{SHELL_PROMPT}"'
-        self._xonsh_proc.sendline(set_prompt)
-        self._xonsh_proc.expect_exact(SHELL_PROMPT)
-        while self._xonsh_proc.buffer != "":
-            self._xonsh_proc.expect_exact(SHELL_PROMPT)
+        """Set a predictable prompt, install the frame helper and clear the buffer."""
+        async with self._lock:
+            await self._bootstrap()
+
+    @staticmethod
+    def _frame(token: str, command: str) -> str:
+        line = f"{FRAME_HELPER}({token!r}, {command!r})"
+        if len(line) <= INLINE_COMMAND_LIMIT:
+            return line
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", prefix="tree-climber-", suffix=".xsh", delete=False
+        ) as f:
+            f.write(command)
+        return f"{FRAME_HELPER}({token!r}, None, {f.name!r})"
+
+    def _take_pexpect_buffer(self) -> bytes:
+        """Take over whatever pexpect read past its last match."""
+        pending = self._xonsh_proc.buffer
+        self._set_pexpect_buffer("")
+        return pending.encode()
+
+    def _set_pexpect_buffer(self, text: str) -> None:
+        self._xonsh_proc.buffer = text
+        # pexpect keeps a second copy of unmatched text to build `before` from
+        self._xonsh_proc._before = self._xonsh_proc.buffer_type()
+        self._xonsh_proc._before.write(text)
 
-    async def run_command(self, command: str, cmd_timeout: float = COMMAND_TIMEOUT) -> str:
-        """Run a command in xonsh and return its output."""
-        self._xonsh_proc.sendline(command)
+    async def _read_frame(self, reader: FrameReader, deadline: float) -> None:
+        """Feed the pty straight into `reader` until it has seen the whole exchange.
 
+        pexpect would keep everything it reads in ever-growing buffers, so
+        the exchange bypasses it. Unconsumed bytes are handed back to pexpect
+        for the recovery path. Raises pexpect's TIMEOUT and EOF like `_expect`.
+        """
+        loop = asyncio.get_running_loop()
+        fd = self._xonsh_proc.child_fd
+        done = loop.create_future()
+
+        def on_readable() -> None:
+            try:
+                data = os.read(fd, PTY_READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:
+                # EIO: the child closed its side of the pty
+                data = b""
+            if not data:
+                loop.remove_reader(fd)
+                if not done.done():
+                    done.set_exception(pexpect.exceptions.EOF("xonsh closed the pty."))
+                return
+            reader.feed(data)
+            if reader.done and not done.done():
+                loop.remove_reader(fd)
+                done.set_result(None)
+
+        reader.feed(self._take_pexpect_buffer())
+        if reader.done:
+            done.set_result(None)
+        else:
+            os.set_blocking(fd, False)
+            loop.add_reader(fd, on_readable)
         try:
-            self._xonsh_proc.expect_exact(SHELL_PROMPT, timeout=cmd_timeout)
+            await asyncio.wait((done,), timeout=_remaining(deadline))
+            if not done.done() and reader.phase == FrameReader.PROMPT:
+                # The command finished in time; only the prompt is outstanding
+                await asyncio.wait((done,), timeout=COMMAND_TIMEOUT)
+            if not done.done():
+                raise pexpect.exceptions.TIMEOUT("Timed out waiting for the end marker.")
+            done.result()
+        finally:
+            loop.remove_reader(fd)
+            self._set_pexpect_buffer(reader.pending.decode("utf-8", errors="replace"))
+
+    async def _exchange(self, reader: FrameReader, token: str, command: str, deadline: float) -> None:
+        """Send one framed command and read its exchange into `reader`."""
+        if not self._ready:
+            await self._bootstrap()
+        self._xonsh_proc.sendline(self._frame(token, command))
+        await self._read_frame(reader, deadline)
+
+    def _frame_result(self, reader: FrameReader, duration: float) -> CommandResult:
+        return CommandResult(
+            reader.output.render(),
+            self._finish_frame(reader.status),
+            duration,
+            output_bytes=reader.output.total,
+            omitted_bytes=reader.output.omitted,
+        )
+
+    async def _execute(self, command: str, cmd_timeout: float) -> CommandResult:
+        if not self._xonsh_proc.isalive():
+            # Died between commands; run this one on the replacement
+            await self._respawn()
+        token = secrets.token_hex(8)
+        reader = FrameReader(token, SHELL_PROMPT, self._output_limit)
+        started = time.monotonic()
+        try:
+            await self._exchange(reader, token, command, started + cmd_timeout)
         except pexpect.exceptions.TIMEOUT:
-            return "Timed out waiting for command to run..."
-        except pexpect.exceptions.EOF:
-            return "Unknown exception caused shell instance to close..."
+            return await self._recover(token, time.monotonic() - started, reader)
+        except (pexpect.exceptions.EOF, OSError):
+            duration = time.monotonic() - started
+            recovery_started = time.monotonic()
+            if reader.phase == FrameReader.PROMPT:
+                # The command itself ended the session, e.g. `exit`
+                result = self._frame_result(reader, duration)
+            else:
+                result = CommandResult(
+                    "Unknown exception caused shell instance to close...", None, duration
+                )
+            result.recovery = await self._respawn()
+            result.recovery_duration = time.monotonic() - recovery_started
+            return result
+        return self._frame_result(reader, time.monotonic() - started)
 
-        output = self._xonsh_proc.before
-        lines = output.splitlines(keepends=True)
-        if lines and lines[0].strip() == command.strip():
-            return "".join(lines[1:])
-        return output
+    def _finish_frame(self, status: str) -> int:
+        exit_code, cwd = status.split(":", 1)
+        self._track_cwd(cwd)
+        return int(exit_code)
 
-    async def get_pwd(self) -> str:
-        """Return the current working directory from the xonsh session."""
-        self._xonsh_proc.sendline("print($PWD)")
+    async def _recover(self, token: str, duration: float, reader: FrameReader) -> CommandResult:
+        """Interrupt a timed-out command and resynchronise on its end marker.
+
+        The frame helper turns the interrupt into a normal end marker, so the
+        stale output is consumed up to that marker and the next command starts
+        from a clean buffer. A shell that does not answer within
+        RECOVERY_TIMEOUT is replaced by a fresh one in the same directory.
+        The output captured before the timeout is kept in front of whatever
+        the command printed while being interrupted.
+        """
+        captured = reader.output
+        partial = captured.render()
+        recovery_started = time.monotonic()
+        try:
+            self._xonsh_proc.sendintr()
+            output = await self._expect(f"<<tc:{token}:end:", timeout=RECOVERY_TIMEOUT)
+            exit_code = self._finish_frame(
+                await self._expect(f":{token}>>", timeout=RECOVERY_TIMEOUT)
+            )
+            await self._expect(SHELL_PROMPT, timeout=RECOVERY_TIMEOUT)
+        except (pexpect.exceptions.TIMEOUT, pexpect.exceptions.EOF, OSError):
+            rest = _clean_output(_after_begin(self._xonsh_proc.before or "", token), reader.output_started)
+            return CommandResult(
+                partial + rest,
+                None,
+                duration,
+                timed_out=True,
+                recovery=await self._respawn(),
+                recovery_duration=time.monotonic() - recovery_started,
+                output_bytes=captured.total + len(rest.encode()),
+                omitted_bytes=captured.omitted,
+            )
+
+        rest = _clean_output(_after_begin(output, token), reader.output_started)
+        return CommandResult(
+            partial + rest,
+            exit_code,
+            duration,
+            timed_out=True,
+            recovery="interrupted",
+            recovery_duration=time.monotonic() - recovery_started,
+            output_bytes=captured.total + len(rest.encode()),
+            omitted_bytes=captured.omitted,
+        )
+
+    async def _respawn(self) -> str:
+        """Replace the xonsh process and replay the session state into it.
+
+        A warm standby is taken from `standby_source` when one is available;
+        otherwise a fresh shell is started in the tracked cwd. Returns
+        "standby", "respawned" or "failed".
+        """
+        cwd, env = self._cwd, self._env
+        if not self._xonsh_proc.isalive():
+            # Already gone, so ptyprocess' grace sleep before reaping is wasted
+            self._xonsh_proc.ptyproc.delayafterclose = 0
+        await asyncio.to_thread(self._xonsh_proc.close, force=True)
+        standby = await self._standby_source() if self._standby_source else None
         try:
-            self._xonsh_proc.expect_exact(SHELL_PROMPT, timeout=COMMAND_TIMEOUT)
-            output = self._xonsh_proc.before
-            for line in output.splitlines():
-                line = line.strip()
-                if line and "print($PWD)" not in line:
-                    return line
-            return ""
-        except Exception:
-            return ""
+            if standby is not None:
+                self._xonsh_proc, self._ready = standby._xonsh_proc, standby._ready
+                recovery = "standby"
+            else:
+                self._xonsh_proc = self._spawn()
+                self._ready = False
+                await self._bootstrap()
+                # Already started in the tracked cwd
+                cwd, recovery = None, "respawned"
+            await self._replay(cwd, env)
+        except (pexpect.exceptions.TIMEOUT, pexpect.exceptions.EOF, OSError):
+            self._ready = False
+            self._track_cwd(None)
+            return "failed"
+        return recovery
+
+    async def _replay(self, cwd: str | None, env: dict[str, str] | None) -> None:
+        """Restore a working directory and exported environment in the current shell."""
+        if cwd is None and env is None:
+            return
+        # JSON in a single string literal; xonsh's parser is slow on big dict literals
+        env_json = json.dumps(env) if env is not None else None
+        token = secrets.token_hex(8)
+        reader = FrameReader(token, SHELL_PROMPT, self._output_limit)
+        await self._exchange(
+            reader,
+            token,
+            f"{RESTORE_HELPER}({cwd!r}, {env_json!r})",
+            time.monotonic() + RECOVERY_TIMEOUT,
+        )
+        self._finish_frame(reader.status)
+
+    def is_alive(self) -> bool:
+        return self._xonsh_proc.isalive()
+
+    async def _refresh_snapshot(self) -> CommandResult:
+        """Capture the exported environment, alias table and Python names in scope."""
+        result = await self._execute(SNAPSHOT_COMMAND, HEALTH_CHECK_TIMEOUT)
+        if result.recovery is None and result.exit_code == 0:
+            try:
+                snapshot = json.loads(result.output)
+            except ValueError:
+                return result
+            self._env = snapshot["env"]
+            self._aliases = snapshot["aliases"]
+            self._names = frozenset(snapshot["names"])
+            self._snapshot_stale = False
+        return result
+
+    async def health_check(self) -> bool:
+        """Probe an idle session and replace its shell if it stopped answering.
+
+        The probe doubles as a refresh of the session snapshot whose
+        environment is replayed after a failover. Busy sessions are skipped,
+        since a running command notices a dead shell on its own. Returns
+        False when the shell had to be replaced.
+        """
+        if self._lock.locked():
+            return True
+        async with self._lock:
+            if not self._xonsh_proc.isalive():
+                await self._respawn()
+                return False
+            if self._snapshot_stale:
+                result = await self._refresh_snapshot()
+            else:
+                result = await self._execute("", HEALTH_CHECK_TIMEOUT)
+            return result.recovery is None
+
+    async def run_command(
+        self, command: str, cmd_timeout: float = COMMAND_TIMEOUT
+    ) -> CommandResult:
+        """Run a command in xonsh and return its output, exit status and duration."""
+        async with self._lock:
+            self._snapshot_stale = True
+            return await self._execute(command, cmd_timeout)
+
+    def _resolve_program(self, argv: list[str]) -> list[str] | None:
+        """Expand a plain alias and check the program is an executable xonsh would run."""
+        program = argv[0]
+        if program in self._names:
+            # A Python name in scope can flip the line into Python mode
+            return None
+        if program in self._aliases:
+            expansion = self._aliases[program]
+            if not expansion or (expansion[0] != program and expansion[0] in self._aliases):
+                return None
+            argv = expansion + argv[1:]
+        if "/" in argv[0]:
+            path = os.path.join(self._cwd or "", argv[0])
+            found = os.path.isfile(path) and os.access(path, os.X_OK)
+        else:
+            found = shutil.which(argv[0], path=self._env.get("PATH", "")) is not None
+        return argv if found else None
+
+    async def run_direct(
+        self, pipeline: list[list[str]], cmd_timeout: float = COMMAND_TIMEOUT
+    ) -> CommandResult | None:
+        """Run a plain pipeline outside the pty in the session's cwd and environment.
+
+        External programs cannot change the shell's state, so the session
+        snapshot stays valid afterwards. Returns None when xonsh would not
+        run the pipeline as plain programs (aliases to functions, Python
+        names, unknown commands); the caller should then use `run_command`.
+        """
+        async with self._lock:
+            if self._snapshot_stale:
+                await self._refresh_snapshot()
+                if self._snapshot_stale:
+                    return None
+            resolved = [self._resolve_program(argv) for argv in pipeline]
+            if None in resolved:
+                return None
+            started = time.monotonic()
+            try:
+                stdout, stderr, exit_code = await run_pipeline(
+                    resolved, self._cwd, self._env, cmd_timeout, self._output_limit
+                )
+            except PipelineTimeout as timeout:
+                return CommandResult(
+                    timeout.stdout.render(),
+                    None,
+                    time.monotonic() - started,
+                    timed_out=True,
+                    recovery="killed",
+                    recovery_duration=timeout.kill_duration,
+                    stderr=timeout.stderr.render(),
+                    output_bytes=timeout.stdout.total,
+                    omitted_bytes=timeout.stdout.omitted,
+                )
+            except OSError:
+                return None
+            return CommandResult(
+                stdout.render(),
+                exit_code,
+                time.monotonic() - started,
+                stderr=stderr.render(),
+                output_bytes=stdout.total,
+                omitted_bytes=stdout.omitted,
+            )
+
+    async def get_pwd(self) -> str:
+        """Return the current working directory of the xonsh session.
+
+        The cached value is returned without waiting for a running command;
+        the shell is only queried when nothing has been tracked yet.
+        """
+        if self._cwd is None:
+            async with self._lock:
+                if self._cwd is None:
+                    try:
+                        await self._execute("", COMMAND_TIMEOUT)
+                    except Exception:
+                        return ""
+        return self._cwd or ""
+
+    async def get_real_pwd(self) -> str:
+        """Return the working directory with symlinks resolved, cached alongside `get_pwd`."""
+        await self.get_pwd()
+        return self._real_cwd or ""
 
     async def cleanup(self):
         """Close the xonsh shell."""
-        self._xonsh_proc.close()
+        await asyncio.to_thread(self._xonsh_proc.close)
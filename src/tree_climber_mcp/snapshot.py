@@ -0,0 +1,271 @@
+"""Snapshots of the files under a directory and the changes made since one was taken."""
+
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from .config import FIND_PRUNE, SNAPSHOT_CACHE_BYTES, SNAPSHOT_MAX_FILES
+from .dirwalk import Scandir
+from .gitignore import enclosing_rules, read_ignore_file
+
+
+class Snapshot:
+    """The size, mtime and inode of every file under `root`, in path order.
+
+    Paths are stored encoded, back to back in one bytes object with an
+    array of end offsets, and the stat fields in parallel arrays: about
+    32 bytes per file plus its path, where a dict of tuples would take
+    several hundred. Instances are never modified.
+    """
+
+    def __init__(
+        self,
+        snapshot_id: int,
+        root: str,
+        gitignore: bool,
+        taken: float,
+        paths: bytes,
+        ends: array,
+        sizes: array,
+        mtimes: array,
+        inodes: array,
+    ):
+        self.snapshot_id = snapshot_id
+        self.root = root
+        self.gitignore = gitignore
+        self.taken = taken
+        self._paths = paths
+        self._ends = ends
+        self._sizes = sizes
+        self._mtimes = mtimes
+        self._inodes = inodes
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._paths) + sum(
+            column.itemsize * len(column) for column in (self._ends, self._sizes, self._mtimes, self._inodes)
+        )
+
+    def path(self, index: int) -> str:
+        start = self._ends[index - 1] if index else 0
+        return os.fsdecode(self._paths[start : self._ends[index]])
+
+    def stat(self, index: int) -> tuple[int, int, int]:
+        """Return the file's (size, mtime_ns, inode)."""
+        return self._sizes[index], self._mtimes[index], self._inodes[index]
+
+
+class _Table:
+    """Columns for a snapshot, appended to in path order."""
+
+    def __init__(self):
+        self.paths = bytearray()
+        self.ends = array("Q")
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.inodes = array("Q")
+
+    def append(self, path: str, stat: os.stat_result) -> None:
+        self.paths += os.fsencode(path)
+        self.ends.append(len(self.paths))
+        self.sizes.append(stat.st_size)
+        self.mtimes.append(stat.st_mtime_ns)
+        self.inodes.append(stat.st_ino)
+
+    def freeze(self, snapshot_id: int, root: str, gitignore: bool, taken: float) -> Snapshot:
+        return Snapshot(
+            snapshot_id, root, gitignore, taken, bytes(self.paths), self.ends, self.sizes, self.mtimes, self.inodes
+        )
+
+
+@dataclass
+class Changes:
+    """Paths added, removed and modified since a snapshot, each in path order."""
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    files: int = 0
+    # The snapshot of the current state, if one was asked for
+    snapshot: Snapshot | None = None
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+
+def _walk(root: str, gitignore: bool, scandir: Scandir, deadline: float | None) -> Iterator[tuple[str, os.stat_result]]:
+    """Yield every file and symlink under `root` with its lstat, ordered by path component.
+
+    Each directory's entries are visited in name order and a subdirectory
+    is walked as soon as it is reached, so `a/b` comes between `a` and
+    `a.txt`; both sides of a diff are produced this way. With `gitignore`,
+    the same paths are skipped as by `find_files`.
+    """
+
+    def scan(relative: str, rules):
+        directory = os.path.join(root, relative) if relative else root
+        try:
+            with scandir(directory) as scanned:
+                entries = sorted(scanned, key=lambda entry: entry.name)
+        except OSError:
+            if not relative:
+                raise
+            return iter(()), rules
+        if gitignore:
+            rules = read_ignore_file(directory, relative, rules)
+        return iter(entries), rules
+
+    stack = [("", *scan("", enclosing_rules(root) if gitignore else None))]
+    while stack:
+        relative, entries, rules = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError
+            continue
+        name = entry.name
+        path = f"{relative}/{name}" if relative else name
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if gitignore and ((is_dir and name in FIND_PRUNE) or (rules is not None and rules.ignored(path, is_dir))):
+            continue
+        if is_dir:
+            stack.append((path, *scan(path, rules)))
+            continue
+        try:
+            yield path, entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+
+
+def _too_slow(root: str) -> ValueError:
+    return ValueError(f"Walking '{root}' took too long; snapshot a smaller directory.")
+
+
+def take_snapshot(
+    snapshot_id: int,
+    root: str,
+    gitignore: bool = True,
+    scandir: Scandir = os.scandir,
+    limit: int = SNAPSHOT_MAX_FILES,
+    time_limit: float | None = None,
+) -> Snapshot:
+    """Record every file under `root`; raises ValueError past `limit` files or `time_limit` seconds."""
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    taken = time.time()
+    table = _Table()
+    try:
+        for path, stat in _walk(root, gitignore, scandir, deadline):
+            if len(table.ends) == limit:
+                raise ValueError(f"'{root}' holds more than {limit:,} files; snapshot a smaller directory.")
+            table.append(path, stat)
+    except TimeoutError:
+        raise _too_slow(root) from None
+    return table.freeze(snapshot_id, root, gitignore, taken)
+
+
+def _before(left: str, right: str) -> bool:
+    return left.split("/") < right.split("/")
+
+
+def changes_since(
+    snapshot: Snapshot,
+    scandir: Scandir = os.scandir,
+    renew: bool = False,
+    time_limit: float | None = None,
+) -> Changes:
+    """Compare the files under the snapshot's root with the snapshot.
+
+    The tree is walked once in the snapshot's order and merged against it
+    as it goes, so each file is looked up by advancing one index rather
+    than by a search, and nothing but the differences is collected. A file
+    is modified if its size, mtime or inode differs. With `renew`, a
+    snapshot of the current state, under the same id, is recorded in the
+    same walk.
+    """
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    changes = Changes()
+    table = _Table() if renew else None
+    taken = time.time()
+    index, count = 0, len(snapshot)
+    try:
+        for path, stat in _walk(snapshot.root, snapshot.gitignore, scandir, deadline):
+            changes.files += 1
+            if table is not None:
+                table.append(path, stat)
+            # Everything in the snapshot that sorts before this path is gone
+            while index < count:
+                old = snapshot.path(index)
+                if old == path or not _before(old, path):
+                    break
+                changes.removed.append(old)
+                index += 1
+            if index < count and old == path:
+                if snapshot.stat(index) != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+                    changes.modified.append(path)
+                index += 1
+            else:
+                changes.added.append(path)
+    except TimeoutError:
+        raise _too_slow(snapshot.root) from None
+    changes.removed.extend(snapshot.path(rest) for rest in range(index, count))
+    if table is not None:
+        changes.snapshot = table.freeze(snapshot.snapshot_id, snapshot.root, snapshot.gitignore, taken)
+    return changes
+
+
+class SnapshotStore:
+    """Least recently used snapshots, within a memory budget, numbered from 1."""
+
+    def __init__(self, budget: int = SNAPSHOT_CACHE_BYTES):
+        self._budget = budget
+        self._snapshots: OrderedDict[int, Snapshot] = OrderedDict()
+        self._bytes = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def next_id(self) -> int:
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            return snapshot_id
+
+    def get(self, snapshot_id: int) -> Snapshot | None:
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(snapshot_id)
+            return snapshot
+
+    def put(self, snapshot: Snapshot) -> None:
+        with self._lock:
+            old = self._snapshots.pop(snapshot.snapshot_id, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._snapshots[snapshot.snapshot_id] = snapshot
+            self._bytes += snapshot.nbytes
+            # The newest snapshot stays even if it alone exceeds the budget
+            while self._bytes > self._budget and len(self._snapshots) > 1:
+                _, evicted = self._snapshots.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._bytes = 0
+
+
+SNAPSHOT_STORE = SnapshotStore()
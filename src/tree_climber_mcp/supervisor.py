@@ -0,0 +1,91 @@
+"""Keep a warm standby xonsh process and health-check the live sessions."""
+
+import asyncio
+from collections.abc import Sequence
+
+import pexpect
+
+from .config import HEALTH_CHECK_INTERVAL
+from .shell import ShellManager
+
+
+class ShellSupervisor:
+    """Supervise a set of shell sessions and keep a bootstrapped spare ready.
+
+    Starting xonsh costs a noticeable fraction of a second before rc files
+    are even considered, so a dead session should not pay it on the request
+    path. Sessions hand `take_standby` to their constructor; when a shell dies
+    the session adopts the standby and the supervisor starts the next one in
+    the background. Every `interval` seconds idle sessions are probed, which
+    also refreshes the environment snapshot they replay after a failover.
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL):
+        self._interval = interval
+        self._sessions: Sequence[ShellManager] = ()
+        self._standby: ShellManager | None = None
+        self._refill: asyncio.Task | None = None
+        self._monitor: asyncio.Task | None = None
+
+    def start(self, sessions: Sequence[ShellManager]) -> None:
+        """Warm the first standby and begin periodic health checks."""
+        self._sessions = sessions
+        self._schedule_refill()
+        if self._monitor is None and self._interval > 0:
+            self._monitor = asyncio.create_task(self._monitor_sessions())
+
+    def _schedule_refill(self) -> None:
+        if self._standby is None and (self._refill is None or self._refill.done()):
+            self._refill = asyncio.create_task(self._spawn_standby())
+
+    async def _spawn_standby(self) -> None:
+        shell = ShellManager()
+        try:
+            await shell.flush_buffer()
+        except (pexpect.exceptions.TIMEOUT, pexpect.exceptions.EOF, OSError):
+            await shell.cleanup()
+            return
+        except asyncio.CancelledError:
+            await shell.cleanup()
+            raise
+        self._standby = shell
+
+    async def take_standby(self) -> ShellManager | None:
+        """Hand over the warm standby, or None if there is none to give.
+
+        A standby that is still bootstrapping is waited for, since it is
+        further along than a cold start would be.
+        """
+        if self._standby is None and self._refill is not None and not self._refill.done():
+            await asyncio.shield(self._refill)
+        standby, self._standby = self._standby, None
+        if standby is not None and not standby.is_alive():
+            await standby.cleanup()
+            standby = None
+        if self._refill is not None:
+            self._schedule_refill()
+        return standby
+
+    async def _monitor_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            for shell in self._sessions:
+                await shell.health_check()
+            if self._standby is not None and not self._standby.is_alive():
+                await self._standby.cleanup()
+                self._standby = None
+                self._schedule_refill()
+
+    async def cleanup(self) -> None:
+        """Stop health checks and close the standby."""
+        for task in (self._monitor, self._refill):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._monitor = self._refill = None
+        if self._standby is not None:
+            await self._standby.cleanup()
+            self._standby = None
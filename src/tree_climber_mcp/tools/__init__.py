@@ -1,9 +1,15 @@
 from .command import CommandTool
-from .filesystem import ListDirectoryTool, ReadFileTool, WriteFileTool
+from .filesystem import EditFileTool, ListDirectoryTool, ReadFileTool, WriteFileTool
+from .jobs import CancelJobTool, JobOutputTool, JobStatusTool, StartJobTool
 
 __all__ = [
+  "CancelJobTool",
   "CommandTool",
+  "EditFileTool",
+  "JobOutputTool",
+  "JobStatusTool",
   "ListDirectoryTool",
   "ReadFileTool",
+  "StartJobTool",
   "WriteFileTool",
 ]
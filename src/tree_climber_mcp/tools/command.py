@@ -1,15 +1,36 @@
-import re
-
 from mcp.types import TextContent, Tool
 
-from ..config import COMMAND_TIMEOUT
-from ..security import BANNED_COMMAND_PATTERNS
-from ..shell import ShellManager
+from ..config import BATCH_MAX_COMMANDS, COMMAND_TIMEOUT
+from ..direct import parse_simple_pipeline
+from ..policy import CommandPolicy, PolicyDecision
+from ..policy_file import PolicyWatcher
+from ..security import COMMAND_POLICY
+from ..pool import ShellPool, ShellPoolBusyError
+from ..shell import CommandResult
+
+RECOVERY_NOTES = {
+    "interrupted": "command interrupted and session resynchronised",
+    "respawned": "shell ignored the interrupt and was respawned",
+    "standby": "shell ignored the interrupt and was replaced by the warm standby",
+    "failed": "shell ignored the interrupt and could not be respawned",
+    "killed": "direct command killed",
+}
+FAILOVER_NOTES = {
+    "standby": "switched to the warm standby shell",
+    "respawned": "started a new shell",
+    "failed": "no replacement shell could be started",
+}
 
 class CommandTool:
-    """Validate and run shell commands through the managed xonsh session."""
+    """Validate and run shell commands through the managed xonsh session.
+
+    Plain pipelines of external programs skip the shell and are executed
+    directly in the session's cwd and environment, which saves xonsh's
+    parse and the pty round trip and keeps stderr separate. Everything else,
+    and anything the session cannot vouch for, goes through xonsh.
+    """
 
-    def __init__(self, shell_manager: ShellManager):
+    def __init__(self, shell_pool: ShellPool, policy: CommandPolicy | PolicyWatcher = COMMAND_POLICY):
         self._tool_obj = Tool(
             name="command_line_interface_tool",
             description="Runs a provided bash command in an xonsh shell instance.",
@@ -27,11 +48,16 @@ class CommandTool:
                         "minimum": 1,
                         "maximum": 60,
                     },
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional shell session key. Calls with the same key share the working directory and environment.",
+                    },
                 },
                 "required": ["bash_command"],
             },
         )
-        self._shell_manager = shell_manager
+        self._shell_pool = shell_pool
+        self._policy = policy
 
     def get_tool(self) -> Tool:
         return self._tool_obj
@@ -39,18 +65,154 @@ class CommandTool:
     async def call_tool(self, args: dict) -> list[TextContent]:
         cmd = args.get("bash_command")
         timeout = args.get("timeout", COMMAND_TIMEOUT)
+        session_id = args.get("session_id")
         if not cmd:
             return [TextContent(type="text", text="Error: bash_command parameter is required")]
 
-        if await self._is_command_permitted(cmd) is False:
-            return [TextContent(type="text", text=f"Error: {cmd} is a banned command.")]
+        decision = await self._check_command(cmd)
+        if not decision.permitted:
+            return [
+                TextContent(
+                    type="text", text=f"Error: {cmd} is a banned command (matched rule: {decision.rule})."
+                )
+            ]
+
+        try:
+            result = await self._run(cmd, timeout, session_id)
+        except ShellPoolBusyError as exc:
+            return [TextContent(type="text", text=f"Error: {exc}")]
+        return [TextContent(type="text", text=self._format_result(result))]
+
+    async def _run(self, cmd: str, timeout: float, session_id: str | None) -> CommandResult:
+        result = None
+        pipeline = parse_simple_pipeline(cmd)
+        if pipeline is not None:
+            result = await self._shell_pool.run_direct(pipeline, timeout, session_id=session_id)
+        if result is None:
+            result = await self._shell_pool.run_command(cmd, timeout, session_id=session_id)
+        return result
+
+    @staticmethod
+    def _format_result(result: CommandResult) -> str:
+        status = "unknown" if result.exit_code is None else result.exit_code
+        output = result.output
+        if result.stderr:
+            if output and not output.endswith("\n"):
+                output += "\n"
+            output += f"[stderr]\n{result.stderr}"
+        if output and not output.endswith("\n"):
+            output += "\n"
+        footer = f"exit status: {status}, duration: {result.duration:.3f}s"
+        if result.omitted_bytes:
+            footer += f"; output truncated, {result.omitted_bytes} of {result.output_bytes} bytes omitted"
+        if result.timed_out:
+            footer += (
+                f"; timed out, {RECOVERY_NOTES.get(result.recovery, 'not recovered')}"
+                f" in {result.recovery_duration or 0:.3f}s"
+            )
+        elif result.recovery:
+            footer += (
+                f"; shell exited, {FAILOVER_NOTES.get(result.recovery, 'not recovered')}"
+                f" in {result.recovery_duration or 0:.3f}s"
+            )
+        return f"{output}[{footer}]"
+
+    async def _check_command(self, command: str) -> PolicyDecision:
+        return self._policy.check(command)
+
+
+class BatchCommandTool(CommandTool):
+    """Run a list of commands one after another in the same session.
+
+    Every command is checked against the blocklist before the first one
+    runs, so a batch is either refused as a whole or started. Each command
+    takes the same direct or xonsh path as `command_line_interface_tool`
+    and gets its own result block with output, exit status and duration.
+    """
+
+    def __init__(self, shell_pool: ShellPool, policy: CommandPolicy | PolicyWatcher = COMMAND_POLICY):
+        super().__init__(shell_pool, policy)
+        self._tool_obj = Tool(
+            name="batch_command_line_interface_tool",
+            description=(
+                "Runs several bash commands sequentially in one xonsh session and "
+                "reports each command's output, exit status and duration. Use it for "
+                "runs of small commands like pwd, git status and ls."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "bash_commands": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 1,
+                        "maxItems": BATCH_MAX_COMMANDS,
+                        "description": "The commands to run, in order.",
+                    },
+                    "stop_on_failure": {
+                        "type": "boolean",
+                        "description": "Skip the remaining commands once one exits non-zero or times out (default: false).",
+                        "default": False,
+                    },
+                    "timeout": {
+                        "type": "number",
+                        "description": "Optional timeout in seconds for each command (default: 10)",
+                        "default": 10,
+                        "minimum": 1,
+                        "maximum": 60,
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional shell session key. Calls with the same key share the working directory and environment.",
+                    },
+                },
+                "required": ["bash_commands"],
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        cmds = args.get("bash_commands")
+        timeout = args.get("timeout", COMMAND_TIMEOUT)
+        session_id = args.get("session_id")
+        stop_on_failure = bool(args.get("stop_on_failure", False))
+        if not cmds or not isinstance(cmds, list):
+            return [TextContent(type="text", text="Error: bash_commands parameter is required")]
+        if len(cmds) > BATCH_MAX_COMMANDS:
+            return [
+                TextContent(
+                    type="text",
+                    text=f"Error: a batch can contain at most {BATCH_MAX_COMMANDS} commands.",
+                )
+            ]
+        if not all(isinstance(cmd, str) and cmd for cmd in cmds):
+            return [TextContent(type="text", text="Error: every batch entry must be a non-empty command.")]
 
-        output = await self._shell_manager.run_command(cmd, timeout)
-        return [TextContent(type="text", text=output)]
+        banned = []
+        for cmd in cmds:
+            decision = await self._check_command(cmd)
+            if not decision.permitted:
+                banned.append(f"{cmd} (matched rule: {decision.rule})")
+        if banned:
+            listed = ", ".join(banned)
+            return [TextContent(type="text", text=f"Error: banned commands, nothing was run: {listed}")]
 
-    async def _is_command_permitted(self, command: str) -> bool:
-        normalized_cmd = " ".join(command.strip().split()).lower()
-        for banned_cmd in BANNED_COMMAND_PATTERNS:
-            if re.search(banned_cmd, normalized_cmd, re.IGNORECASE):
-                return False
-        return True
+        contents = []
+        for index, cmd in enumerate(cmds, start=1):
+            heading = f"[{index}/{len(cmds)}] $ {cmd}\n"
+            try:
+                result = await self._run(cmd, timeout, session_id)
+            except ShellPoolBusyError as exc:
+                contents.append(TextContent(type="text", text=f"{heading}Error: {exc}"))
+                failed = True
+            else:
+                contents.append(TextContent(type="text", text=heading + self._format_result(result)))
+                failed = result.timed_out or result.exit_code != 0
+            if failed and stop_on_failure and index < len(cmds):
+                contents.append(
+                    TextContent(
+                        type="text",
+                        text=f"[stopped after command {index} failed; {len(cmds) - index} not run]",
+                    )
+                )
+                break
+        return contents
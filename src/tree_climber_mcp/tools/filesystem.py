@@ -1,43 +1,178 @@
+import asyncio
+import json
 import os
+import re
+import time
+from datetime import datetime
 from mcp.types import Tool, TextContent
 
-from ..shell import ShellManager
+from ..config import (
+    CHANGES_LIMIT,
+    CHANGES_MAX_LIMIT,
+    EDIT_SUMMARY_HUNKS,
+    FIND_FILES_LIMIT,
+    FIND_FILES_MAX_LIMIT,
+    LIST_DIRECTORY_LIMIT,
+    LIST_DIRECTORY_MAX_LIMIT,
+    READ_FILE_WINDOW,
+    READ_MANY_BUDGET,
+    READ_MANY_MAX_FILES,
+    READ_MANY_WORKERS,
+    SEARCH_LIMIT,
+    SEARCH_MAX_CONTEXT,
+    SEARCH_MAX_LIMIT,
+    SEARCH_MAX_PER_FILE,
+)
+from ..dirindex import DirectoryIndex
+from ..dirwalk import ListedEntry, Scandir, find_entries, list_page
+from ..fileedit import EditResult, edit_file
+from ..filewindow import FileWindow, read_window
+from ..filewrite import WriteResult, write_atomic, write_in_place
+from ..fingerprint import Fingerprint, fingerprint, unchanged_since
+from ..io_executor import IO_EXECUTOR, IOExecutor, IOTimeoutError
+from ..pool import ShellPool
+from ..search import SEARCH_POOL, SearchPool, SearchResult, compile_pattern, search_tree
+from ..snapshot import SNAPSHOT_STORE, Changes, SnapshotStore, changes_since, take_snapshot
+
+SESSION_ID_SCHEMA = {
+    "type": "string",
+    "description": "Optional shell session key. Relative paths resolve against that session's working directory."
+}
+
+RANGE_SCHEMA = {
+    "offset": {
+        "type": "integer",
+        "minimum": 0,
+        "description": "Byte offset to start reading at."
+    },
+    "length": {
+        "type": "integer",
+        "minimum": 1,
+        "description": "Number of bytes to read from 'offset'."
+    },
+    "start_line": {
+        "type": "integer",
+        "minimum": 1,
+        "description": "First line to read, counting from 1. Cannot be combined with 'offset' or 'length'."
+    },
+    "end_line": {
+        "type": "integer",
+        "minimum": 1,
+        "description": "Last line to read, inclusive."
+    }
+}
+
+CONDITIONAL_SCHEMA = {
+    "fingerprint": {
+        "type": "string",
+        "enum": ["stat", "digest"],
+        "description": "Add the file's fingerprint to the result: 'stat' (inode, size and mtime) or 'digest', which also hashes the content."
+    },
+    "if_none_match": {
+        "type": "string",
+        "description": "A fingerprint from an earlier read of the same range. If the file still matches it, only a short 'unchanged' note is returned."
+    }
+}
+
+# Short names for the range arguments, to mark a fingerprint with the window it was issued for
+_RANGE_KEYS = {"offset": "o", "length": "n", "start_line": "s", "end_line": "e"}
+
+def _range_scope(ranges: dict) -> str:
+    """The requested range as a suffix for fingerprints, empty for a read from the start."""
+    scope = "".join(f"{key}{ranges[name]}" for name, key in _RANGE_KEYS.items() if ranges.get(name) is not None)
+    return f"@{scope}" if scope else ""
+
+def format_entry(entry: ListedEntry, details: bool) -> str:
+    # Add type indicator (directory/)
+    name = f"{entry.path}/" if entry.is_dir else entry.path
+    if not details:
+        return name
+    size = "-" if entry.size is None else str(entry.size)
+    mtime = "-" if entry.mtime is None else time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.mtime))
+    return f"{size:>12}  {mtime}  {name}"
 
 class BaseFilesystemTool:
     def __init__(
         self,
-        shell_manager: ShellManager,
+        shell_pool: ShellPool,
         allow_all_paths: bool = False,
         filesystem_root: str | None = None,
+        io_executor: IOExecutor = IO_EXECUTOR,
+        directory_index: DirectoryIndex | None = None,
     ):
-        self._shell_manager = shell_manager
+        self._shell_pool = shell_pool
         self._allow_all_paths = allow_all_paths
         self._filesystem_root = filesystem_root
+        self._real_filesystem_root = (
+            os.path.realpath(filesystem_root) if filesystem_root else None
+        )
+        # Blocking filesystem calls run here, never on the event loop
+        self._io_executor = io_executor
+        # Directory walks list from memory where the index covers them
+        self._directory_index = directory_index
+
+    @property
+    def _scandir(self) -> Scandir:
+        return self._directory_index.scandir if self._directory_index is not None else os.scandir
 
-    async def _get_working_directory(self) -> str:
-        cwd = await self._shell_manager.get_pwd()
+    async def _get_working_directory(self, session_id: str | None = None) -> str:
+        """Return the session's resolved working directory from the shell's cache."""
+        cwd = await self._shell_pool.get_real_pwd(session_id)
         if not cwd:
-            return os.getcwd()
+            return os.path.realpath(os.getcwd())
         return cwd
 
-    async def _get_trusted_root(self) -> str:
-        if self._filesystem_root:
-            return os.path.realpath(self._filesystem_root)
-        return os.path.realpath(await self._get_working_directory())
+    async def _get_trusted_root(self, session_id: str | None = None) -> str:
+        if self._real_filesystem_root:
+            return self._real_filesystem_root
+        return await self._get_working_directory(session_id)
 
-    async def _resolve_path(self, path: str) -> str:
+    async def _resolve_path(self, path: str, session_id: str | None = None) -> str:
         """
-        Resolves the given path against the shell's current working directory and
+        Resolves the given path against the session's current working directory and
         rejects paths outside that working tree.
         """
-        working_directory = os.path.realpath(await self._get_working_directory())
+        return (await self._resolve_paths([path], session_id))[0]
+
+    async def _resolve_paths(
+        self, paths: list[str], session_id: str | None = None, strict: bool = True
+    ) -> list[str | PermissionError]:
+        """
+        Resolve several paths against one snapshot of the working directory.
+
+        With `strict`, the first path outside the working tree raises
+        PermissionError; otherwise its error takes its place in the result.
+        """
+        working_directory = await self._get_working_directory(session_id)
+        trusted_root = None if self._allow_all_paths else await self._get_trusted_root(session_id)
+        # realpath stats every component, which can block on a slow mount
+        resolved = await self._io_executor.run(self._confine_all, paths, working_directory, trusted_root)
+        if strict:
+            for target in resolved:
+                if isinstance(target, PermissionError):
+                    raise target
+        return resolved
+
+    @classmethod
+    def _confine_all(
+        cls, paths: list[str], working_directory: str, trusted_root: str | None
+    ) -> list[str | PermissionError]:
+        resolved = []
+        for path in paths:
+            try:
+                resolved.append(cls._confine(path, working_directory, trusted_root))
+            except PermissionError as exc:
+                resolved.append(exc)
+        return resolved
+
+    @staticmethod
+    def _confine(path: str, working_directory: str, trusted_root: str | None) -> str:
         candidate_path = path if os.path.isabs(path) else os.path.join(working_directory, path)
         target_path = os.path.realpath(candidate_path)
 
-        if self._allow_all_paths:
+        if trusted_root is None:
             return target_path
 
-        trusted_root = await self._get_trusted_root()
         try:
             if os.path.commonpath([trusted_root, target_path]) != trusted_root:
                 raise PermissionError(path)
@@ -46,27 +181,65 @@ class BaseFilesystemTool:
 
         return target_path
 
-    def _access_error(self, path: str) -> list[TextContent]:
+    def _access_message(self, path: str) -> str:
         scope = "allowed filesystem root" if self._filesystem_root else "current working directory"
-        return [
-            TextContent(
-                type="text",
-                text=f"Error: Access to '{path}' is outside the {scope}."
-            )
-        ]
+        return f"Error: Access to '{path}' is outside the {scope}."
+
+    def _access_error(self, path: str) -> list[TextContent]:
+        return [TextContent(type="text", text=self._access_message(path))]
+
+    @staticmethod
+    def _timeout_error(exc: IOTimeoutError) -> list[TextContent]:
+        return [TextContent(type="text", text=f"Error: {exc}.")]
 
 class ListDirectoryTool(BaseFilesystemTool):
     def get_tool(self) -> Tool:
         return Tool(
             name="list_directory",
-            description="Lists the files and subdirectories in the specified directory.",
+            description=(
+                "Lists the files and subdirectories in the specified directory, sorted by path, "
+                "optionally recursing and filtering. Long listings are paged; a full page ends "
+                "with the cursor for the next one."
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
                     "path": {
                         "type": "string",
                         "description": "The directory path to list. Defaults to current directory if omitted."
-                    }
+                    },
+                    "depth": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "default": 1,
+                        "description": "How many levels to list; 1 lists only the directory itself."
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Only list entries whose name matches this glob, e.g. '*.py'."
+                    },
+                    "exclude": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Globs for names to skip, along with everything beneath them, e.g. ['node_modules', '.git']."
+                    },
+                    "details": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Add size and modification time columns."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": LIST_DIRECTORY_MAX_LIMIT,
+                        "default": LIST_DIRECTORY_LIMIT,
+                        "description": "Maximum entries to return."
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Continue after this path, as given at the end of the previous page."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
                 }
             }
         )
@@ -74,41 +247,366 @@ class ListDirectoryTool(BaseFilesystemTool):
     async def call_tool(self, args: dict) -> list[TextContent]:
         path = args.get("path", ".")
         try:
-            target_path = await self._resolve_path(path)
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._list_directory, path, target_path, args)
         except PermissionError:
             return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
 
+    def _list_directory(self, path: str, target_path: str, options: dict) -> str:
         try:
             if not os.path.exists(target_path):
-                return [TextContent(type="text", text=f"Error: Directory '{path}' does not exist.")]
+                return f"Error: Directory '{path}' does not exist."
             if not os.path.isdir(target_path):
-                 return [TextContent(type="text", text=f"Error: '{path}' is not a directory.")]
-
-            items = os.listdir(target_path)
-            # Add type indicator (directory/)
-            formatted_items = []
-            for item in items:
-                if os.path.isdir(os.path.join(target_path, item)):
-                    formatted_items.append(f"{item}/")
-                else:
-                    formatted_items.append(item)
-            
-            return [TextContent(type="text", text="\n".join(sorted(formatted_items)))]
+                 return f"Error: '{path}' is not a directory."
+
+            limit = options.get("limit", LIST_DIRECTORY_LIMIT)
+            page = list_page(
+                target_path,
+                depth=options.get("depth", 1),
+                pattern=options.get("pattern"),
+                exclude=options.get("exclude") or (),
+                limit=min(limit, LIST_DIRECTORY_MAX_LIMIT) if type(limit) is int else limit,
+                cursor=options.get("cursor"),
+                details=bool(options.get("details")),
+                scandir=self._scandir,
+            )
+        except ValueError as e:
+            return f"Error: {str(e)}"
         except Exception as e:
-            return [TextContent(type="text", text=f"Error listing directory: {str(e)}")]
+            return f"Error listing directory: {str(e)}"
+
+        lines = [format_entry(entry, bool(options.get("details"))) for entry in page.entries]
+        if page.next_cursor is not None:
+            lines.append(f"[{len(page.entries)} entries shown; more follow, continue with cursor={json.dumps(page.next_cursor)}]")
+        return "\n".join(lines)
+
+class FindFilesTool(BaseFilesystemTool):
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="find_files",
+            description=(
+                "Finds files or directories under a directory by name, size and modification time. "
+                "Skips .git, node_modules and anything ignored by .gitignore unless told otherwise. "
+                "Returns matching paths relative to the searched directory."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The directory to search. Defaults to current directory if omitted."
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Glob the name must match, e.g. '*.py'. With a '/', it is matched against the path below 'path' instead, e.g. 'src/**/test_*.py'."
+                    },
+                    "type": {
+                        "type": "string",
+                        "enum": ["file", "directory", "any"],
+                        "default": "file",
+                        "description": "Kind of entry to return."
+                    },
+                    "min_size": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Only files of at least this many bytes."
+                    },
+                    "max_size": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Only files of at most this many bytes."
+                    },
+                    "modified_after": {
+                        "type": "string",
+                        "description": "Only entries modified after this ISO 8601 date or date-time, e.g. '2024-05-01T12:00'."
+                    },
+                    "modified_before": {
+                        "type": "string",
+                        "description": "Only entries modified before this ISO 8601 date or date-time."
+                    },
+                    "max_depth": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "How many levels to search; 1 searches only the directory itself."
+                    },
+                    "exclude": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Globs for names to skip, along with everything beneath them."
+                    },
+                    "include_ignored": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Also search .git, node_modules and paths ignored by .gitignore."
+                    },
+                    "details": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Add size and modification time columns."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": FIND_FILES_MAX_LIMIT,
+                        "default": FIND_FILES_LIMIT,
+                        "description": "Maximum matches to return."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
+                }
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        path = args.get("path", ".")
+        try:
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._find_files, path, target_path, args)
+        except PermissionError:
+            return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
+
+    @staticmethod
+    def _timestamp(options: dict, name: str) -> float | None:
+        value = options.get(name)
+        if value is None:
+            return None
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}' must be an ISO 8601 date or date-time.") from None
+
+    def _find_files(self, path: str, target_path: str, options: dict) -> str:
+        try:
+            if not os.path.exists(target_path):
+                return f"Error: Directory '{path}' does not exist."
+            if not os.path.isdir(target_path):
+                 return f"Error: '{path}' is not a directory."
+
+            limit = options.get("limit", FIND_FILES_LIMIT)
+            result = find_entries(
+                target_path,
+                pattern=options.get("pattern"),
+                kind=options.get("type", "file"),
+                min_size=options.get("min_size"),
+                max_size=options.get("max_size"),
+                modified_after=self._timestamp(options, "modified_after"),
+                modified_before=self._timestamp(options, "modified_before"),
+                max_depth=options.get("max_depth"),
+                exclude=options.get("exclude") or (),
+                gitignore=not options.get("include_ignored"),
+                details=bool(options.get("details")),
+                limit=min(limit, FIND_FILES_MAX_LIMIT) if type(limit) is int else limit,
+                # Leave time to return a partial result before the call times out
+                time_limit=0.8 * self._io_executor.timeout,
+                scandir=self._scandir,
+            )
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+            return f"Error finding files: {str(e)}"
+
+        lines = [format_entry(entry, bool(options.get("details"))) for entry in result.entries]
+        if result.timed_out:
+            lines.append(f"[{len(result.entries)} matches shown; time limit reached, search a smaller directory or narrow 'pattern']")
+        elif result.truncated:
+            lines.append(f"[{len(result.entries)} matches shown; more exist, narrow the search or raise 'limit']")
+        elif not lines:
+            return f"No matches under '{path}'."
+        return "\n".join(lines)
+
+class SearchFilesTool(BaseFilesystemTool):
+    """Search file contents, like `grep -rn`, without leaving the trusted root.
+
+    Files come from the same walk as find_files, so ignored paths are
+    skipped, and are searched in worker processes from `search_pool`.
+    """
+
+    def __init__(self, *args, search_pool: SearchPool = SEARCH_POOL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._search_pool = search_pool
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="search_files",
+            description=(
+                "Searches the contents of files under a directory for a regular expression, like "
+                "'grep -rn'. Reports 'path:line:column:text' for each matching line, skipping "
+                "binary files, .git, node_modules and anything ignored by .gitignore."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pattern": {
+                        "type": "string",
+                        "description": "Python regular expression to search for, matched within single lines."
+                    },
+                    "path": {
+                        "type": "string",
+                        "description": "The directory to search. Defaults to current directory if omitted."
+                    },
+                    "literal": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Treat 'pattern' as plain text rather than a regular expression."
+                    },
+                    "ignore_case": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Match ASCII letters regardless of case."
+                    },
+                    "include": {
+                        "type": "string",
+                        "description": "Only search files whose name matches this glob, e.g. '*.py', or whose path does if it contains a '/'."
+                    },
+                    "exclude": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Globs for names to skip, along with everything beneath them."
+                    },
+                    "include_ignored": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Also search .git, node_modules and paths ignored by .gitignore."
+                    },
+                    "max_depth": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "How many levels to search; 1 searches only the directory itself."
+                    },
+                    "context": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "maximum": SEARCH_MAX_CONTEXT,
+                        "default": 0,
+                        "description": "Lines of context to show before and after each match."
+                    },
+                    "max_per_file": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "default": SEARCH_MAX_PER_FILE,
+                        "description": "Maximum matching lines to report per file."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": SEARCH_MAX_LIMIT,
+                        "default": SEARCH_LIMIT,
+                        "description": "Maximum matching lines to report in total."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
+                },
+                "required": ["pattern"]
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        if not args.get("pattern"):
+            return [TextContent(type="text", text="Error: 'pattern' argument is required.")]
+        path = args.get("path", ".")
+        try:
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._search_files, path, target_path, args)
+        except PermissionError:
+            return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
+
+    def _search_files(self, path: str, target_path: str, options: dict) -> str:
+        try:
+            if not os.path.exists(target_path):
+                return f"Error: Directory '{path}' does not exist."
+            if not os.path.isdir(target_path):
+                 return f"Error: '{path}' is not a directory."
+
+            pattern = compile_pattern(options["pattern"], bool(options.get("literal")), bool(options.get("ignore_case")))
+            limit = options.get("limit", SEARCH_LIMIT)
+            context = options.get("context", 0)
+            result = search_tree(
+                target_path,
+                pattern,
+                include=options.get("include"),
+                exclude=options.get("exclude") or (),
+                gitignore=not options.get("include_ignored"),
+                max_depth=options.get("max_depth"),
+                limit=min(limit, SEARCH_MAX_LIMIT) if type(limit) is int else limit,
+                max_per_file=options.get("max_per_file", SEARCH_MAX_PER_FILE),
+                context=min(context, SEARCH_MAX_CONTEXT) if type(context) is int else context,
+                pool=self._search_pool,
+                # Leave time to return a partial result before the call times out
+                time_limit=0.8 * self._io_executor.timeout,
+                scandir=self._scandir,
+            )
+        except re.error as e:
+            return f"Error: invalid pattern: {str(e)}"
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+            return f"Error searching files: {str(e)}"
+
+        if not result.files and not result.truncated:
+            return f"No matches in {result.files_searched} files under '{path}'."
+        return self._format_result(result, options.get("max_per_file", SEARCH_MAX_PER_FILE))
+
+    @staticmethod
+    def _format_result(result: SearchResult, max_per_file: int) -> str:
+        lines = []
+        for file in result.files:
+            # Last line printed, so overlapping context is shown once
+            shown = 0
+            for index, match in enumerate(file.matches):
+                first = match.line - len(match.before)
+                if (match.before or match.after) and lines and (shown == 0 or first > shown + 1):
+                    lines.append("--")
+                for number, text in enumerate(match.before, start=first):
+                    if number > shown:
+                        lines.append(f"{file.path}-{number}-{text}")
+                lines.append(f"{file.path}:{match.line}:{match.column}:{match.text}")
+                shown = match.line
+                following = file.matches[index + 1].line if index + 1 < len(file.matches) else None
+                for number, text in enumerate(match.after, start=match.line + 1):
+                    if following is not None and number >= following:
+                        break
+                    lines.append(f"{file.path}-{number}-{text}")
+                    shown = number
+
+        total = sum(len(file.matches) for file in result.files)
+        summary = f"{total} matches in {len(result.files)} files"
+        if result.timed_out:
+            lines.append(f"[{summary}; time limit reached after {result.files_searched} files, narrow 'path' or 'include']")
+        elif result.truncated:
+            lines.append(f"[{summary}; limit reached, narrow the search or raise 'limit']")
+        capped = sum(1 for file in result.files if file.more)
+        if capped:
+            lines.append(f"[{capped} files had more than {max_per_file} matching lines; raise 'max_per_file' to see them]")
+        return "\n".join(lines)
 
 class ReadFileTool(BaseFilesystemTool):
     def get_tool(self) -> Tool:
         return Tool(
             name="read_file",
-            description="Reads the contents of a file.",
+            description=(
+                "Reads the contents of a file, or a window of it by byte offset or line range. "
+                f"At most {READ_FILE_WINDOW} bytes are returned per call; partial reads end "
+                "with the file's size and line count and where to continue. With 'fingerprint', "
+                "the result ends with a token to pass as 'if_none_match' on the next read, which "
+                "then returns only a short note if the file has not changed."
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
                     "path": {
                         "type": "string",
                         "description": "The path to the file to read."
-                    }
+                    },
+                    **RANGE_SCHEMA,
+                    **CONDITIONAL_SCHEMA,
+                    "session_id": SESSION_ID_SCHEMA
                 },
                 "required": ["path"]
             }
@@ -120,28 +618,171 @@ class ReadFileTool(BaseFilesystemTool):
              return [TextContent(type="text", text="Error: 'path' argument is required.")]
 
         try:
-            target_path = await self._resolve_path(path)
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._read_file, path, target_path, args)
         except PermissionError:
             return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
 
+    def _read_file(self, path: str, target_path: str, ranges: dict, limit: int = READ_FILE_WINDOW) -> str:
+        """Read a window of `target_path` as tool output; blocking, so run it on the I/O executor."""
+        mode = ranges.get("fingerprint")
+        tag = ranges.get("if_none_match")
+        if mode not in (None, "stat", "digest"):
+            return "Error: 'fingerprint' must be 'stat' or 'digest'."
+        scope = _range_scope(ranges)
+        tag_scope = ""
+        if isinstance(tag, str) and "@" in tag:
+            tag, tag_scope = tag.split("@", 1)
+            tag_scope = f"@{tag_scope}"
         try:
             if not os.path.exists(target_path):
-                 return [TextContent(type="text", text=f"Error: File '{path}' does not exist.")]
+                 return f"Error: File '{path}' does not exist."
             if not os.path.isfile(target_path):
-                 return [TextContent(type="text", text=f"Error: '{path}' is not a file.")]
+                 return f"Error: '{path}' is not a file."
+
+            # Taken before the read, so a change during it makes the next check fail rather than pass
+            stat = os.stat(target_path) if mode or tag is not None else None
+            if tag is not None:
+                # A fingerprint vouches only for the window it was issued with; another window is read
+                current = unchanged_since(target_path, stat, tag) if tag_scope == scope else None
+                if current is not None:
+                    return f"[unchanged; fingerprint {current.tag}{scope}]"
+                # Answer with the kind of fingerprint the caller sent
+                mode = mode or ("digest" if Fingerprint.parse(tag).digest else "stat")
 
-            with open(target_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            return [TextContent(type="text", text=content)]
+            window = read_window(
+                target_path,
+                offset=ranges.get("offset"),
+                length=ranges.get("length"),
+                start_line=ranges.get("start_line"),
+                end_line=ranges.get("end_line"),
+                limit=limit,
+            )
+            current = fingerprint(target_path, stat, with_digest=mode == "digest") if mode else None
+        except UnicodeDecodeError as e:
+            return f"Error reading file: {str(e)}"
+        except ValueError as e:
+            return f"Error: {str(e)}"
         except Exception as e:
-            return [TextContent(type="text", text=f"Error reading file: {str(e)}")]
+            return f"Error reading file: {str(e)}"
+
+        by_line = ranges.get("start_line") is not None or ranges.get("end_line") is not None
+        by_byte = ranges.get("offset") is not None or ranges.get("length") is not None
+        if not (by_line or by_byte or window.clipped or current):
+            return window.text
+        return self._format_window(window, by_line, current and f"{current.tag}{scope}")
+
+    @staticmethod
+    def _format_window(window: FileWindow, by_line: bool, tag: str | None = None) -> str:
+        text = window.text
+        if text and not text.endswith("\n"):
+            text += "\n"
+        footer = f"bytes {window.start}-{window.end} of {window.size}, "
+        if window.last_line >= window.first_line:
+            footer += f"lines {window.first_line}-{window.last_line} of {window.total_lines}"
+        else:
+            footer += f"no lines (file has {window.total_lines})"
+        if window.clipped:
+            if by_line and window.text.endswith("\n"):
+                resume = f"start_line={window.last_line + 1}"
+            elif by_line:
+                # The window ends inside a line longer than the limit; the rest of it starts here
+                resume = f"offset={window.end} (line {window.last_line} continues)"
+            else:
+                resume = f"offset={window.end}"
+            footer += f"; window limit reached, continue with {resume}"
+        if tag is not None:
+            footer += f"; fingerprint {tag}"
+        return f"{text}[{footer}]"
+
+class ReadManyFilesTool(ReadFileTool):
+    """Read several files in one call.
+
+    Paths are resolved against a single snapshot of the session's working
+    directory and the files are read in worker threads, at most
+    `READ_MANY_WORKERS` at a time. The byte budget is shared evenly, so
+    each file gets at most `READ_MANY_BUDGET / len(files)` bytes, and
+    larger files end with the usual note on where to continue.
+    """
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="read_many_files",
+            description=(
+                "Reads several files, or windows of them, in one call. Results are returned "
+                f"in order, one block per file, within a total of {READ_MANY_BUDGET} bytes."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "files": {
+                        "type": "array",
+                        "minItems": 1,
+                        "maxItems": READ_MANY_MAX_FILES,
+                        "items": {
+                            "anyOf": [
+                                {"type": "string"},
+                                {
+                                    "type": "object",
+                                    "properties": {"path": {"type": "string"}, **RANGE_SCHEMA, **CONDITIONAL_SCHEMA},
+                                    "required": ["path"]
+                                }
+                            ]
+                        },
+                        "description": "Paths to read, or objects with a 'path' and the same range and fingerprint arguments as read_file."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
+                },
+                "required": ["files"]
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        files = args.get("files")
+        if not files or not isinstance(files, list):
+            return [TextContent(type="text", text="Error: 'files' argument is required.")]
+        if len(files) > READ_MANY_MAX_FILES:
+            return [TextContent(type="text", text=f"Error: at most {READ_MANY_MAX_FILES} files can be read at once.")]
+        requests = [{"path": entry} if isinstance(entry, str) else entry for entry in files]
+        if not all(isinstance(request, dict) and isinstance(request.get("path"), str) and request["path"] for request in requests):
+            return [TextContent(type="text", text="Error: every entry needs a non-empty 'path'.")]
+
+        paths = [request["path"] for request in requests]
+        try:
+            targets = await self._resolve_paths(paths, args.get("session_id"), strict=False)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        limit = max(1, min(READ_FILE_WINDOW, READ_MANY_BUDGET // len(requests)))
+        # Leave room on the shared executor for other tools
+        workers = asyncio.Semaphore(READ_MANY_WORKERS)
+
+        async def read(path: str, target: str | PermissionError, request: dict) -> str:
+            if isinstance(target, PermissionError):
+                return self._access_message(path)
+            async with workers:
+                try:
+                    return await self._io_executor.run(self._read_file, path, target, request, limit)
+                except IOTimeoutError as exc:
+                    return f"Error: {exc}."
+
+        texts = await asyncio.gather(*(read(*entry) for entry in zip(paths, targets, requests)))
+        return [
+            TextContent(type="text", text=f"[{index}/{len(paths)}] {path}\n{text}")
+            for index, (path, text) in enumerate(zip(paths, texts), start=1)
+        ]
 
 class WriteFileTool(BaseFilesystemTool):
     def get_tool(self) -> Tool:
         return Tool(
             name="write_file",
-            description="Writes content to a file. Overwrites existing files.",
+            description=(
+                "Writes content to a file. By default the file is replaced atomically, so readers "
+                "never see a partial write; 'append' adds to the end and 'offset' overwrites bytes "
+                "in place. Reports the bytes written and the file's new size and modification time."
+            ),
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -152,7 +793,18 @@ class WriteFileTool(BaseFilesystemTool):
                     "content": {
                         "type": "string",
                         "description": "The content to write to the file."
-                    }
+                    },
+                    "append": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Add 'content' to the end of the file instead of replacing it."
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Overwrite the file's bytes from this offset on, without truncating it. Cannot be combined with 'append'."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
                 },
                 "required": ["path", "content"]
             }
@@ -166,19 +818,290 @@ class WriteFileTool(BaseFilesystemTool):
              return [TextContent(type="text", text="Error: 'path' argument is required.")]
         if content is None:
              return [TextContent(type="text", text="Error: 'content' argument is required.")]
+        if args.get("append") and args.get("offset") is not None:
+             return [TextContent(type="text", text="Error: 'append' cannot be combined with 'offset'.")]
+
+        try:
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._write_file, path, target_path, content, args)
+        except PermissionError:
+            return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
+
+    @staticmethod
+    def _write_file(path: str, target_path: str, content: str, options: dict | None = None) -> str:
+        options = options or {}
+        try:
+            if options.get("append"):
+                result = write_in_place(target_path, content)
+            elif options.get("offset") is not None:
+                result = write_in_place(target_path, content, options["offset"])
+            else:
+                result = write_atomic(target_path, content)
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+             return f"Error writing file: {str(e)}"
+        return WriteFileTool._describe(path, result)
+
+    @staticmethod
+    def _describe(path: str, result: WriteResult) -> str:
+        mtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result.mtime_ns / 1e9))
+        return (
+            f"Successfully wrote {result.written} bytes to '{path}'; "
+            f"it is now {result.size} bytes, modified {mtime}."
+        )
+
+
+class EditFileTool(BaseFilesystemTool):
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="edit_file",
+            description=(
+                "Changes part of a file without resending it. Takes either 'edits', exact-text "
+                "replacements, or 'patch', a unified diff for this one file. Edits are checked "
+                "against the current contents and rejected if they no longer match. Reports the "
+                "changed hunks and the file's new size and modification time. The file is "
+                "rewritten in place, not atomically: a reader during the edit, or a crash, can "
+                "see it partly changed. Use write_file for an atomic replacement."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The path to the file to edit."
+                    },
+                    "edits": {
+                        "type": "array",
+                        "description": "Replacements, each located in the file as it is now.",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "old_text": {
+                                    "type": "string",
+                                    "description": "Text to replace, matched exactly. Must occur once unless 'replace_all' is set."
+                                },
+                                "new_text": {
+                                    "type": "string",
+                                    "description": "The replacement text."
+                                },
+                                "replace_all": {
+                                    "type": "boolean",
+                                    "default": False,
+                                    "description": "Replace every occurrence of 'old_text'."
+                                }
+                            },
+                            "required": ["old_text", "new_text"]
+                        }
+                    },
+                    "patch": {
+                        "type": "string",
+                        "description": "A unified diff for this file, as produced by 'diff -u' or 'git diff'. Use instead of 'edits'."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
+                },
+                "required": ["path"]
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        path = args.get("path")
+        if not path:
+            return [TextContent(type="text", text="Error: 'path' argument is required.")]
+        if (args.get("edits") is None) == (args.get("patch") is None):
+            return [TextContent(type="text", text="Error: Send either 'edits' or 'patch'.")]
 
         try:
-            target_path = await self._resolve_path(path)
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._edit_file, path, target_path, args)
         except PermissionError:
             return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
 
+    @staticmethod
+    def _edit_file(path: str, target_path: str, args: dict) -> str:
+        if not os.path.exists(target_path):
+            return f"Error: File '{path}' does not exist."
+        if not os.path.isfile(target_path):
+            return f"Error: '{path}' is not a file."
         try:
-            # Ensure parent directory exists
-            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            result = edit_file(target_path, edits=args.get("edits"), patch=args.get("patch"))
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+            return f"Error editing file: {str(e)}"
+        return EditFileTool._summarize(path, result)
+
+    @staticmethod
+    def _summarize(path: str, result: EditResult) -> str:
+        if not result.hunks:
+            return f"No changes to '{path}'; the edits match its current contents."
+        mtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result.mtime_ns / 1e9))
+        count = len(result.hunks)
+        lines = [
+            f"Edited '{path}': {count} {'hunk' if count == 1 else 'hunks'}, +{result.added} -{result.removed} lines; "
+            f"wrote {result.written} bytes, it is now {result.size} bytes, modified {mtime}."
+        ]
+        for hunk in result.hunks[:EDIT_SUMMARY_HUNKS]:
+            lines.append(f"@@ -{hunk.old_start},{hunk.old_lines} +{hunk.new_start},{hunk.new_lines} @@")
+        if count > EDIT_SUMMARY_HUNKS:
+            lines.append(f"[{count - EDIT_SUMMARY_HUNKS} more hunks not shown]")
+        return "\n".join(lines)
+
+class SnapshotTool(BaseFilesystemTool):
+    """Records the files under a directory for `changes_since` to compare against."""
 
-            with open(target_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            return [TextContent(type="text", text=f"Successfully wrote to '{path}'.")]
+    def __init__(self, *args, snapshot_store: SnapshotStore = SNAPSHOT_STORE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._snapshot_store = snapshot_store
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="snapshot",
+            description=(
+                "Records the size, modification time and inode of every file under a directory, "
+                "the trusted root by default, and returns a snapshot id. Pass the id to "
+                "changes_since after running a build or generator to see which files it added, "
+                "removed or modified. Skips .git, node_modules and .gitignored paths unless told otherwise."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "The directory to record. Defaults to the trusted root."
+                    },
+                    "include_ignored": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Also record .git, node_modules and paths ignored by .gitignore."
+                    },
+                    "session_id": SESSION_ID_SCHEMA
+                }
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        path = args.get("path") or self._filesystem_root or "."
+        try:
+            target_path = await self._resolve_path(path, args.get("session_id"))
+            text = await self._io_executor.run(self._snapshot, path, target_path, args)
+        except PermissionError:
+            return self._access_error(path)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
+
+    def _snapshot(self, path: str, target_path: str, options: dict) -> str:
+        try:
+            if not os.path.isdir(target_path):
+                return f"Error: Directory '{path}' does not exist."
+            snapshot = take_snapshot(
+                self._snapshot_store.next_id(),
+                target_path,
+                gitignore=not options.get("include_ignored"),
+                scandir=self._scandir,
+                time_limit=0.8 * self._io_executor.timeout,
+            )
+        except ValueError as e:
+            return f"Error: {str(e)}"
+        except Exception as e:
+            return f"Error taking snapshot: {str(e)}"
+        self._snapshot_store.put(snapshot)
+        taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.taken))
+        return (
+            f"Snapshot {snapshot.snapshot_id} of '{path}': {len(snapshot):,} {'file' if len(snapshot) == 1 else 'files'} as of {taken}. "
+            f"Pass snapshot_id={snapshot.snapshot_id} to changes_since to see what has changed."
+        )
+
+class ChangesSinceTool(SnapshotTool):
+    """Reports what changed under a snapshot's directory, from the same store as `snapshot`."""
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="changes_since",
+            description=(
+                "Lists the files added (A), modified (M) and removed (D) under a snapshot's directory "
+                "since the snapshot was taken, with paths relative to that directory. A file is "
+                "modified if its size, modification time or inode changed."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "snapshot_id": {
+                        "type": "integer",
+                        "description": "The id returned by the snapshot tool."
+                    },
+                    "renew": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Also replace the snapshot with the current state, so the next call reports only later changes."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": CHANGES_MAX_LIMIT,
+                        "default": CHANGES_LIMIT,
+                        "description": "Maximum changed paths to list."
+                    }
+                },
+                "required": ["snapshot_id"]
+            }
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        snapshot_id = args.get("snapshot_id")
+        if type(snapshot_id) is not int:
+            return [TextContent(type="text", text="Error: 'snapshot_id' must be an id returned by the snapshot tool.")]
+        try:
+            text = await self._io_executor.run(self._changes_since, snapshot_id, args)
+        except IOTimeoutError as exc:
+            return self._timeout_error(exc)
+        return [TextContent(type="text", text=text)]
+
+    def _changes_since(self, snapshot_id: int, options: dict) -> str:
+        snapshot = self._snapshot_store.get(snapshot_id)
+        if snapshot is None:
+            return f"Error: Snapshot {snapshot_id} does not exist or has been evicted; take a new one."
+        limit = options.get("limit", CHANGES_LIMIT)
+        if type(limit) is not int or limit < 1:
+            return "Error: 'limit' must be an integer of at least 1."
+        try:
+            changes = changes_since(
+                snapshot,
+                scandir=self._scandir,
+                renew=bool(options.get("renew")),
+                time_limit=0.8 * self._io_executor.timeout,
+            )
+        except ValueError as e:
+            return f"Error: {str(e)}"
         except Exception as e:
-             return [TextContent(type="text", text=f"Error writing file: {str(e)}")]
+            return f"Error comparing with snapshot: {str(e)}"
+        if changes.snapshot is not None:
+            self._snapshot_store.put(changes.snapshot)
+        return self._format_changes(snapshot.snapshot_id, snapshot.root, snapshot.taken, changes, min(limit, CHANGES_MAX_LIMIT))
+
+    @staticmethod
+    def _format_changes(snapshot_id: int, root: str, taken: float, changes: Changes, limit: int) -> str:
+        since = f"snapshot {snapshot_id} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(taken))})"
+        renewed = f" Snapshot {snapshot_id} now records the current state." if changes.snapshot is not None else ""
+        if not changes:
+            return f"No changes under '{root}' since {since}.{renewed}"
+        lines = [
+            f"Changes under '{root}' since {since}: {len(changes.added)} added, "
+            f"{len(changes.modified)} modified, {len(changes.removed)} removed, "
+            f"{changes.files:,} files now.{renewed}"
+        ]
+        marked = [("A", path) for path in changes.added]
+        marked += [("M", path) for path in changes.modified]
+        marked += [("D", path) for path in changes.removed]
+        marked.sort(key=lambda item: item[1].split("/"))
+        lines.extend(f"{mark} {path}" for mark, path in marked[:limit])
+        if len(marked) > limit:
+            lines.append(f"[{len(marked) - limit} more changes not shown; raise 'limit' to see them]")
+        return "\n".join(lines)
@@ -0,0 +1,218 @@
+import os
+
+from mcp.types import TextContent, Tool
+
+from ..config import JOB_OUTPUT_CHUNK
+from ..jobs import Job, JobManager
+from ..policy import CommandPolicy
+from ..policy_file import PolicyWatcher
+from ..pool import ShellPool
+from ..security import COMMAND_POLICY
+
+JOB_ID_SCHEMA = {
+    "type": "integer",
+    "description": "The id returned by start_background_job.",
+}
+
+
+class BaseJobTool:
+    def __init__(self, job_manager: JobManager, shell_pool: ShellPool):
+        self._job_manager = job_manager
+        self._shell_pool = shell_pool
+
+    @staticmethod
+    def _job_id(args: dict) -> int | None:
+        job_id = args.get("job_id")
+        if isinstance(job_id, str) and job_id.strip().isdigit():
+            return int(job_id)
+        if isinstance(job_id, int) and not isinstance(job_id, bool):
+            return job_id
+        return None
+
+    def _get_job(self, args: dict) -> Job | None:
+        job_id = self._job_id(args)
+        if job_id is None:
+            return None
+        return self._job_manager.get(job_id)
+
+    def _missing_job(self, args: dict) -> list[TextContent]:
+        if args.get("job_id") is None:
+            return [TextContent(type="text", text="Error: 'job_id' argument is required.")]
+        if self._job_id(args) is None:
+            return [TextContent(type="text", text=f"Error: 'job_id' must be an integer, not {args['job_id']!r}.")]
+        return [TextContent(type="text", text=f"Error: Job {args['job_id']} does not exist.")]
+
+    @staticmethod
+    def _describe(job: Job) -> str:
+        if job.status == "running":
+            state = f"running for {job.runtime:.1f}s"
+        elif job.status == "cancelled":
+            state = f"cancelled after {job.runtime:.1f}s"
+        else:
+            state = f"exited with status {job.exit_code} after {job.runtime:.1f}s"
+        return (
+            f"Job {job.job_id} (pid {job.process.pid}): {state}, "
+            f"{job.output.total} bytes of output. Command: {job.command}"
+        )
+
+
+class StartJobTool(BaseJobTool):
+    def __init__(
+        self,
+        job_manager: JobManager,
+        shell_pool: ShellPool,
+        policy: CommandPolicy | PolicyWatcher = COMMAND_POLICY,
+    ):
+        super().__init__(job_manager, shell_pool)
+        self._policy = policy
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="start_background_job",
+            description=(
+                "Starts a bash command as a background job in the session's working "
+                "directory and returns a job id. Use this for builds, test suites and "
+                "servers that outlive the command_line_interface_tool timeout."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "bash_command": {
+                        "type": "string",
+                        "description": "The complete bash command to run in the background.",
+                    },
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional shell session key whose working directory the job starts in.",
+                    },
+                },
+                "required": ["bash_command"],
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        cmd = args.get("bash_command")
+        if not cmd:
+            return [TextContent(type="text", text="Error: bash_command parameter is required")]
+        decision = self._policy.check(cmd)
+        if not decision.permitted:
+            return [TextContent(type="text", text=f"Error: {cmd} is a banned command (matched rule: {decision.rule}).")]
+
+        cwd = await self._shell_pool.get_pwd(args.get("session_id")) or os.getcwd()
+        try:
+            job = await self._job_manager.start(cmd, cwd)
+        except OSError as e:
+            return [TextContent(type="text", text=f"Error starting job: {str(e)}")]
+        return [TextContent(type="text", text=f"Started job {job.job_id} (pid {job.process.pid}) in {cwd}.")]
+
+
+class JobStatusTool(BaseJobTool):
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="job_status",
+            description="Reports the status of a background job, or of all jobs when no id is given.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": JOB_ID_SCHEMA,
+                },
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        if args.get("job_id") is None:
+            jobs = self._job_manager.jobs()
+            if not jobs:
+                return [TextContent(type="text", text="No background jobs.")]
+            return [TextContent(type="text", text="\n".join(self._describe(job) for job in jobs))]
+
+        job = self._get_job(args)
+        if job is None:
+            return self._missing_job(args)
+        return [TextContent(type="text", text=self._describe(job))]
+
+
+class JobOutputTool(BaseJobTool):
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="job_output",
+            description=(
+                "Reads a background job's output from a byte offset, or its last lines. "
+                "The header reports the next offset to continue from."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": JOB_ID_SCHEMA,
+                    "offset": {
+                        "type": "integer",
+                        "description": "Byte offset to read from (default: 0).",
+                        "minimum": 0,
+                    },
+                    "tail_lines": {
+                        "type": "integer",
+                        "description": "Return the last N lines instead of reading from an offset.",
+                        "minimum": 1,
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": f"Maximum bytes to return (default: {JOB_OUTPUT_CHUNK}).",
+                        "minimum": 1,
+                    },
+                },
+                "required": ["job_id"],
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        job = self._get_job(args)
+        if job is None:
+            return self._missing_job(args)
+        for name, minimum in (("offset", 0), ("tail_lines", 0), ("max_bytes", 1)):
+            value = args.get(name)
+            if value is not None and (type(value) is not int or value < minimum):
+                return [TextContent(type="text", text=f"Error: '{name}' must be an integer of at least {minimum}.")]
+
+        max_bytes = args.get("max_bytes") or JOB_OUTPUT_CHUNK
+        dropped = 0
+        if args.get("tail_lines"):
+            offset, data = job.output.tail(args["tail_lines"], max_bytes)
+        else:
+            requested = args.get("offset") or 0
+            offset, data = job.output.read(requested, max_bytes)
+            dropped = max(offset - requested, 0)
+
+        next_offset = offset + len(data)
+        header = (
+            f"[job {job.job_id} {job.status}, bytes {offset}-{next_offset} of "
+            f"{job.output.total}, next offset {next_offset}]"
+        )
+        if dropped:
+            header += f"\n[{dropped} bytes before offset {offset} were dropped from the buffer]"
+        text = data.decode("utf-8", errors="replace")
+        return [TextContent(type="text", text=f"{header}\n{text}")]
+
+
+class CancelJobTool(BaseJobTool):
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="cancel_job",
+            description="Terminates a background job and its child processes.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": JOB_ID_SCHEMA,
+                },
+                "required": ["job_id"],
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        job = self._get_job(args)
+        if job is None:
+            return self._missing_job(args)
+        if job.status != "running":
+            return [TextContent(type="text", text=f"Job {job.job_id} already finished. {self._describe(job)}")]
+
+        await self._job_manager.cancel(job.job_id)
+        return [TextContent(type="text", text=self._describe(job))]
@@ -0,0 +1,72 @@
+import os
+
+from mcp.types import TextContent, Tool
+
+from ..dirindex import DirectoryIndex
+from ..io_executor import IO_EXECUTOR, IOExecutor
+from ..pool import ShellPool
+
+
+class ServerStatusTool:
+    def __init__(
+        self,
+        shell_pool: ShellPool,
+        io_executor: IOExecutor = IO_EXECUTOR,
+        directory_index: DirectoryIndex | None = None,
+    ):
+        self._shell_pool = shell_pool
+        self._io_executor = io_executor
+        self._directory_index = directory_index
+
+    def get_tool(self) -> Tool:
+        return Tool(
+            name="server_status",
+            description=(
+                "Reports the state of the server's shared resources: the filesystem I/O "
+                "workers' load and timeouts, and the directory index's state, size, and how "
+                "many lookups it answered from memory and from disk."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {
+                        "type": "string",
+                        "description": "Optional shell session key whose working directory is checked against the index.",
+                    },
+                },
+            },
+        )
+
+    async def call_tool(self, args: dict) -> list[TextContent]:
+        lines = [self._describe_io(), await self._describe_index(args.get("session_id"))]
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    def _describe_io(self) -> str:
+        stats = self._io_executor.stats()
+        return (
+            f"Filesystem I/O: {stats.running} of {stats.workers} workers busy, {stats.queued} calls queued "
+            f"(peak {stats.peak_queued}); {stats.completed:,} calls completed, {stats.timed_out:,} timed out "
+            f"(limit {self._io_executor.timeout:g}s)."
+        )
+
+    async def _describe_index(self, session_id: str | None) -> str:
+        index = self._directory_index
+        if index is None:
+            return "Directory index: off; start the server with --directory-index to enable it."
+        stats = index.stats()
+        if stats.state == "disabled":
+            return f"Directory index: disabled, {stats.reason}; walks read the disk."
+        text = (
+            f"Directory index: {stats.state}, root {index.root}, {stats.directories:,} directories, "
+            f"{stats.entries:,} entries, about {stats.estimated_bytes / (1024 * 1024):.1f} MiB"
+        )
+        if stats.build_seconds is not None:
+            text += f", built in {stats.build_seconds:.2f}s"
+        text += (
+            f"; {stats.lookups:,} lookups from memory, {stats.fallbacks:,} from disk, "
+            f"{stats.events:,} inotify events."
+        )
+        cwd = await self._shell_pool.get_real_pwd(session_id)
+        if cwd and os.path.commonpath([index.root, cwd]) != index.root:
+            text += f"\nThe working directory {cwd} is outside the index root, so walks there read the disk."
+        return text
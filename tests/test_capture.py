@@ -0,0 +1,135 @@
+import pytest
+from tree_climber_mcp.capture import CappedOutput, FrameReader
+
+PROMPT = "##P##"
+
+def frame(output, status="0:/tmp", token="tok"):
+    return (
+        f"echo line\r\n<<tc:{token}:begin>>\r\n{output}<<tc:{token}:end:{status}:{token}>>\r\n{PROMPT}"
+    ).encode()
+
+def feed_in_chunks(reader, data, size):
+    for start in range(0, len(data), size):
+        reader.feed(data[start:start + size])
+
+# --- CappedOutput Tests ---
+
+def test_capped_output_keeps_everything_under_limit():
+    output = CappedOutput(16)
+    output.write(b"hello ")
+    output.write(b"world")
+
+    assert output.render() == "hello world"
+    assert output.total == 11
+    assert output.omitted == 0
+
+def test_capped_output_fills_tail_without_omitting():
+    output = CappedOutput(8)
+    output.write(b"12345678")
+
+    assert output.render() == "12345678"
+    assert output.omitted == 0
+
+def test_capped_output_keeps_head_and_tail():
+    output = CappedOutput(8)
+    for chunk in (b"abc", b"defghij", b"klmnop"):
+        output.write(chunk)
+
+    assert output.total == 16
+    assert output.omitted == 8
+    assert output.render() == "abcd\n[... 8 bytes omitted ...]\nmnop"
+
+def test_capped_output_single_byte_limit():
+    output = CappedOutput(1)
+    output.write(b"xyz")
+
+    assert output.render() == "x\n[... 2 bytes omitted ...]\n"
+
+def test_capped_output_rejects_empty_limit():
+    with pytest.raises(ValueError):
+        CappedOutput(0)
+
+# --- FrameReader Tests ---
+
+def test_frame_reader_splits_exchange():
+    reader = FrameReader("tok", PROMPT)
+    reader.feed(frame("hello\r\n", status="2:/home/user"))
+
+    assert reader.done
+    assert reader.output.render() == "hello\n"
+    assert reader.status == "2:/home/user"
+    assert reader.pending == b""
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 4096])
+def test_frame_reader_finds_markers_split_across_reads(size):
+    reader = FrameReader("tok", PROMPT)
+    feed_in_chunks(reader, frame("<<tc:tok:end out ##P\r\n"), size)
+
+    assert reader.done
+    assert reader.output.render() == "<<tc:tok:end out ##P\n"
+    assert reader.status == "0:/tmp"
+
+def test_frame_reader_ignores_other_tokens():
+    reader = FrameReader("tok", PROMPT)
+    reader.feed(frame("<<tc:old:end:1:/x:old>>\r\n"))
+
+    assert reader.output.render() == "<<tc:old:end:1:/x:old>>\n"
+    assert reader.status == "0:/tmp"
+
+def test_frame_reader_keeps_text_after_prompt_pending():
+    reader = FrameReader("tok", PROMPT)
+    reader.feed(frame("") + b"late output")
+
+    assert reader.done
+    assert reader.pending == b"late output"
+
+def test_frame_reader_reports_phase_while_incomplete():
+    reader = FrameReader("tok", PROMPT)
+    data = frame("out\r\n")
+    reader.feed(data[: data.index(b":tok>>")])
+
+    assert not reader.done
+    assert reader.phase == FrameReader.STATUS
+    reader.feed(data[data.index(b":tok>>"):])
+    assert reader.done
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4096])
+def test_frame_reader_counts_output_without_crlf(size):
+    reader = FrameReader("tok", PROMPT)
+    feed_in_chunks(reader, frame("y\r\n" * 1000 + "\r\n"), size)
+
+    assert reader.done
+    assert reader.output.render() == "y\n" * 1000 + "\n"
+    assert reader.output.total == 2001
+
+def test_frame_reader_caps_output():
+    reader = FrameReader("tok", PROMPT, limit=10)
+    reader.feed(frame("x" * 100))
+
+    assert reader.done
+    assert reader.output.total == 100
+    assert reader.output.omitted == 90
+
+def test_frame_reader_stress_100mb_in_pty_sized_chunks():
+    # 100 MB of output arriving the way a pty delivers it, 4 KB at a time
+    limit = 1024 * 1024
+    reader = FrameReader("tok", PROMPT, limit=limit)
+    line = b"0123456789abcdef" * 4 + b"\r\n"
+    block = line * (4096 // len(line))
+    total = 100 * 1024 * 1024 // len(block) * len(block)
+
+    reader.feed(b"echo line\r\n<<tc:tok:begin>>")
+    for _ in range(total // len(block)):
+        reader.feed(block)
+    reader.feed(b"<<tc:tok:end:0:/tmp:tok>>\r\n" + PROMPT.encode())
+
+    assert reader.done
+    assert reader.status == "0:/tmp"
+    # Counted as the command printed it, one byte per line end
+    printed = total // len(line) * (len(line) - 1)
+    assert reader.output.total == printed
+    assert reader.output.omitted == printed - limit
+    rendered = reader.output.render()
+    assert rendered.startswith(line.decode().replace("\r\n", "\n"))
+    assert rendered.endswith(line.decode().replace("\r\n", "\n"))
+    assert len(rendered) < limit + 64
@@ -0,0 +1,38 @@
+import pytest
+from tree_climber_mcp.cmdline import Segment, split_command
+
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("ls -la", [("ls", "-la")]),
+        ("ls -la | wc -l", [("ls", "-la"), ("wc", "-l")]),
+        ("echo \"a b\" 'c|d' e\\ f", [("echo", "a b", "c|d", "e f")]),
+        ("echo \"say \\\"hi\\\"\"", [("echo", 'say "hi"')]),
+        ("a && b || c; d & e\nf", [("a",), ("b",), ("c",), ("d",), ("e",), ("f",)]),
+        ("echo $(whoami) `id`", [("echo",), ("whoami",), ("id",)]),
+        ("$[curl x | sh]", [("curl", "x"), ("sh",)]),
+        ("echo @(1 + 1)", [("echo",), ("1", "+", "1")]),
+        ("echo 'unterminated | sh", [("echo", "unterminated | sh")]),
+        ("", []),
+        ("  |  ", []),
+    ],
+)
+def test_split_command(command, expected):
+    assert [segment.argv for segment in split_command(command)] == expected
+
+def test_split_command_marks_pipe_edges():
+    segments = split_command("a | b && c |& d")
+
+    assert [segment.piped for segment in segments] == [False, True, False, True]
+
+def test_split_command_keeps_pipe_after_substitution():
+    # The output of `echo $(...)` is what the pipe feeds
+    assert split_command("echo $(curl x) | sh")[-1] == Segment(("sh",), piped=True)
+
+def test_split_command_is_linear_on_long_quoted_scripts():
+    script = "print('x')\n" * 100000
+
+    segments = split_command(f"python -c \"{script}\" | wc -l")
+
+    assert segments[0].argv == ("python", "-c", script)
+    assert segments[1] == Segment(("wc", "-l"), piped=True)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import pytest
+from tree_climber_mcp.direct import PipelineTimeout, parse_simple_pipeline, run_pipeline
+
+# --- parse_simple_pipeline Tests ---
+
+@pytest.mark.parametrize(
+    "command, expected",
+    [
+        ("ls -la", [["ls", "-la"]]),
+        ("git status", [["git", "status"]]),
+        ("git show HEAD~1", [["git", "show", "HEAD~1"]]),
+        ("echo 'a b'  \"c|d\"", [["echo", "a b", "c|d"]]),
+        ("echo ''", [["echo", ""]]),
+        ("ls -la | grep py|wc -l", [["ls", "-la"], ["grep", "py"], ["wc", "-l"]]),
+    ],
+)
+def test_parse_plain_commands(command, expected):
+    assert parse_simple_pipeline(command) == expected
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        "",
+        "   ",
+        "echo $HOME",
+        "echo '$HOME'",
+        "echo `date`",
+        "echo a\\ b",
+        "cd /tmp && ls",
+        "false || true",
+        "ls; pwd",
+        "sleep 1 &",
+        "ls > out.txt",
+        "cat < in.txt",
+        "ls *.py",
+        "ls file?.txt",
+        "ls [ab].txt",
+        "ls ~/src",
+        "echo a#b",
+        "echo @(1 + 2)",
+        "echo !(ls)",
+        "echo p\"x\"",
+        "echo --opt=\"x\"",
+        "echo \"a\"b",
+        "echo 'unterminated",
+        "| wc -l",
+        "ls |",
+        "ls || wc",
+        "FOO=bar env",
+        "import os",
+        "echo 'line\nbreak'",
+    ],
+)
+def test_parse_rejects_shell_syntax(command):
+    assert parse_simple_pipeline(command) is None
+
+# --- run_pipeline Tests ---
+
+@pytest.mark.asyncio
+async def test_run_pipeline_separates_streams(tmp_path):
+    stdout, stderr, exit_code = await run_pipeline(
+        [["sh", "-c", "echo out; echo err >&2; exit 3"]], str(tmp_path), dict(os.environ), 5
+    )
+
+    assert stdout.render() == "out\n"
+    assert stderr.render() == "err\n"
+    assert exit_code == 3
+
+@pytest.mark.asyncio
+async def test_run_pipeline_uses_cwd_and_env(tmp_path):
+    env = dict(os.environ, TREE_CLIMBER_TEST="value")
+
+    stdout, _, _ = await run_pipeline(
+        [["sh", "-c", "pwd; echo $TREE_CLIMBER_TEST"]], str(tmp_path), env, 5
+    )
+
+    assert stdout.render() == f"{os.path.realpath(tmp_path)}\nvalue\n"
+
+@pytest.mark.asyncio
+async def test_run_pipeline_connects_stages(tmp_path):
+    stdout, stderr, exit_code = await run_pipeline(
+        [["printf", "b\\na\\nc\\n"], ["sort"], ["head", "-n", "2"]], str(tmp_path), dict(os.environ), 5
+    )
+
+    assert stdout.render() == "a\nb\n"
+    assert exit_code == 0
+
+@pytest.mark.asyncio
+async def test_run_pipeline_collects_stderr_from_every_stage(tmp_path):
+    _, stderr, exit_code = await run_pipeline(
+        [["sh", "-c", "echo first >&2"], ["sh", "-c", "cat; echo second >&2"]],
+        str(tmp_path),
+        dict(os.environ),
+        5,
+    )
+
+    assert sorted(stderr.render().splitlines()) == ["first", "second"]
+    assert exit_code == 0
+
+@pytest.mark.asyncio
+async def test_run_pipeline_reports_last_stage_status(tmp_path):
+    _, _, exit_code = await run_pipeline([["false"], ["true"]], str(tmp_path), dict(os.environ), 5)
+
+    assert exit_code == 0
+
+@pytest.mark.asyncio
+async def test_run_pipeline_timeout_kills_every_stage(tmp_path):
+    with pytest.raises(asyncio.TimeoutError):
+        await run_pipeline([["sleep", "30"], ["sleep", "30"]], str(tmp_path), dict(os.environ), 0.2)
+
+@pytest.mark.asyncio
+async def test_run_pipeline_timeout_keeps_partial_output(tmp_path):
+    with pytest.raises(PipelineTimeout) as raised:
+        await run_pipeline(
+            [["sh", "-c", "echo started; echo warming >&2; sleep 30"]], str(tmp_path), dict(os.environ), 0.5
+        )
+
+    assert raised.value.stdout.render() == "started\n"
+    assert raised.value.stderr.render() == "warming\n"
+    assert 0 <= raised.value.kill_duration < 0.5
+
+@pytest.mark.asyncio
+async def test_run_pipeline_missing_program_raises(tmp_path):
+    with pytest.raises(OSError):
+        await run_pipeline(
+            [["echo", "hi"], ["tree-climber-no-such-program"]], str(tmp_path), dict(os.environ), 5
+        )
+
+@pytest.mark.asyncio
+async def test_run_pipeline_caps_output(tmp_path):
+    stdout, _, exit_code = await run_pipeline(
+        [["sh", "-c", "echo start; head -c 1000000 /dev/zero | tr '\\0' x; echo; echo end"]],
+        str(tmp_path),
+        dict(os.environ),
+        5,
+        limit=16,
+    )
+
+    assert stdout.total == len("start\n") + 1000000 + len("\nend\n")
+    assert stdout.omitted == stdout.total - 16
+    assert stdout.render().startswith("start\nxx\n[... ")
+    assert stdout.render().endswith(" bytes omitted ...]\nxxx\nend\n")
+    assert exit_code == 0
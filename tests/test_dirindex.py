@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.dirindex import DirectoryIndex
+from tree_climber_mcp.dirwalk import find_entries, list_page
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+
+def _wait(index, state="ready"):
+    deadline = time.monotonic() + 5
+    while index.stats().state != state:
+        assert time.monotonic() < deadline, index.stats()
+        time.sleep(0.01)
+    return index.stats()
+
+def _names(entries):
+    return sorted((entry.name, entry.is_dir(), entry.is_file(), entry.is_symlink()) for entry in entries)
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("x = 1\n")
+    (tmp_path / "src" / "main.py").write_text("import pkg\n")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "README.md").write_text("readme\n")
+    (tmp_path / "link").symlink_to("src")
+    return tmp_path
+
+@pytest.fixture
+def index(tree):
+    index = DirectoryIndex(str(tree))
+    index.start()
+    _wait(index)
+    yield index
+    index.close()
+
+def test_build_indexes_the_tree(index):
+    stats = index.stats()
+
+    # The root, src and src/pkg; node_modules is listed but not entered
+    assert (stats.directories, stats.entries) == (3, 7)
+    assert stats.estimated_bytes > 0 and stats.build_seconds is not None
+
+def test_scandir_answers_from_memory_like_the_disk(tree, index):
+    for path in (tree, tree / "src", tree / "src" / "pkg"):
+        with os.scandir(path) as entries:
+            expected = _names(entries)
+        with index.scandir(str(path)) as entries:
+            assert _names(entries) == expected
+
+    assert index.stats().lookups == 3
+
+def test_changes_are_seen_by_the_next_lookup(tree, index):
+    (tree / "src" / "new.py").write_text("")
+    (tree / "src" / "main.py").unlink()
+    (tree / "src" / "sub").mkdir()
+    (tree / "src" / "sub" / "deep.py").write_text("")
+    (tree / "src" / "pkg").rename(tree / "src" / "renamed")
+
+    assert sorted(entry.name for entry in index.scandir(str(tree / "src"))) == ["new.py", "renamed", "sub"]
+    assert [entry.name for entry in index.scandir(str(tree / "src" / "renamed"))] == ["mod.py"]
+    assert [entry.name for entry in index.scandir(str(tree / "src" / "sub"))] == ["deep.py"]
+    assert index.stats().fallbacks == 0
+
+    (tree / "src" / "renamed" / "later.py").write_text("")
+
+    assert sorted(entry.name for entry in index.scandir(str(tree / "src" / "renamed"))) == ["later.py", "mod.py"]
+
+def test_links_report_their_current_target(tree, index):
+    (tree / "target").mkdir()
+    (tree / "target" / "inner.py").write_text("")
+    (tree / "to_dir").symlink_to("target")
+    (tree / "to_file").symlink_to("README.md")
+    entries = {entry.name: entry for entry in index.scandir(str(tree))}
+    assert entries["to_dir"].is_dir() and not entries["to_dir"].is_dir(follow_symlinks=False)
+    assert entries["to_file"].is_file() and not entries["to_file"].is_file(follow_symlinks=False)
+
+    # Events for these arrive for the root, not for the links
+    (tree / "target" / "inner.py").unlink()
+    (tree / "target").rmdir()
+    (tree / "README.md").unlink()
+    (tree / "README.md").mkdir()
+
+    with os.scandir(tree) as disk:
+        expected = _names(disk)
+    assert _names(index.scandir(str(tree))) == expected
+    entries = {entry.name: entry for entry in index.scandir(str(tree))}
+    assert not entries["to_dir"].is_dir() and entries["to_dir"].is_symlink()
+    assert entries["to_file"].is_dir() and not entries["to_file"].is_file()
+    listed = {entry.path: entry.is_dir for entry in list_page(str(tree), scandir=index.scandir).entries}
+    assert (listed["to_dir"], listed["to_file"]) == (False, True)
+    assert [entry.path for entry in find_entries(str(tree), "to_*", kind="directory", scandir=index.scandir).entries] == [
+        "to_file"
+    ]
+
+def test_pruned_and_outside_paths_read_the_disk(tree, index, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "file").write_text("")
+
+    assert [entry.name for entry in index.scandir(str(tree / "node_modules"))] == ["dep"]
+    assert [entry.name for entry in index.scandir(str(outside))] == ["file"]
+    assert index.stats().fallbacks == 1
+
+def test_walks_give_the_same_results_from_the_index(tree, index):
+    assert list_page(str(tree), depth=3, scandir=index.scandir) == list_page(str(tree), depth=3)
+    assert find_entries(str(tree), "*.py", scandir=index.scandir) == find_entries(str(tree), "*.py")
+
+def test_budget_disables_the_index(tree):
+    index = DirectoryIndex(str(tree), budget=500)
+    index.start()
+
+    stats = _wait(index, "disabled")
+
+    assert "budget" in stats.reason
+    assert [entry.name for entry in index.scandir(str(tree / "src" / "pkg"))] == ["mod.py"]
+    index.close()
+
+def test_no_inotify_disables_the_index(tree):
+    with patch("tree_climber_mcp.dirindex._load_libc", return_value=None):
+        index = DirectoryIndex(str(tree))
+    index.start()
+
+    assert "not available" in _wait(index, "disabled").reason
+    index.close()
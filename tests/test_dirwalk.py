@@ -0,0 +1,127 @@
+import os
+
+import pytest
+from tree_climber_mcp.dirwalk import ListedEntry, find_entries, list_page
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in ["a/x.py", "a/y.txt", "a-b/z.py", "a/deep/er/most.py", "b.py", ".git/HEAD"]:
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(path)
+    return tmp_path
+
+def paths(page):
+    return [entry.path for entry in page.entries]
+
+def test_lists_one_level_by_default(tree):
+    page = list_page(str(tree))
+
+    assert paths(page) == [".git", "a", "a-b", "b.py"]
+    assert page.entries[1] == ListedEntry("a", True)
+    assert page.next_cursor is None
+
+def test_recursive_listing_keeps_children_after_their_directory(tree):
+    page = list_page(str(tree), depth=2, exclude=[".git"])
+
+    assert paths(page) == ["a", "a/deep", "a/x.py", "a/y.txt", "a-b", "a-b/z.py", "b.py"]
+
+def test_pattern_filters_names_but_still_descends(tree):
+    page = list_page(str(tree), depth=10, pattern="*.py")
+
+    assert paths(page) == ["a/deep/er/most.py", "a/x.py", "a-b/z.py", "b.py"]
+
+def test_pages_cover_the_listing_exactly_once(tree):
+    everything = paths(list_page(str(tree), depth=10))
+    seen, cursor = [], None
+    while True:
+        page = list_page(str(tree), depth=10, limit=3, cursor=cursor)
+        seen.extend(paths(page))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == everything
+    assert len(everything) == 11
+
+def test_details_stat_only_files_for_size(tree):
+    os.utime(tree / "b.py", (1, 1000))
+
+    page = list_page(str(tree), pattern="[ab]*", details=True)
+
+    assert page.entries[0].size is None
+    assert page.entries[-1] == ListedEntry("b.py", False, 4, 1000.0)
+
+def test_symlinked_directories_are_listed_but_not_entered(tree):
+    (tree / "loop").symlink_to(tree)
+
+    page = list_page(str(tree), depth=3, pattern="loop*")
+
+    assert page.entries == [ListedEntry("loop", True)]
+
+def test_missing_root_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list_page(str(tmp_path / "missing"))
+
+@pytest.fixture
+def repo(tmp_path):
+    for path in [
+        "src/app.py", "src/util.py", "src/gen/out.py", "tests/test_app.py", "README.md",
+        "node_modules/dep/index.js", ".git/HEAD", "build/lib/app.py", "logs/today.log",
+    ]:
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(path)
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n")
+    (tmp_path / "src" / ".gitignore").write_text("gen/\n")
+    return tmp_path
+
+def found(result):
+    return [entry.path for entry in result.entries]
+
+def test_find_skips_pruned_and_ignored_paths(repo):
+    result = find_entries(str(repo), workers=2)
+
+    assert found(result) == [".gitignore", "README.md", "src/.gitignore", "src/app.py", "src/util.py", "tests/test_app.py"]
+    assert not result.truncated
+
+def test_find_can_include_ignored_paths(repo):
+    result = find_entries(str(repo), pattern="*.py", gitignore=False)
+
+    assert found(result) == ["build/lib/app.py", "src/app.py", "src/gen/out.py", "src/util.py", "tests/test_app.py"]
+
+def test_find_matches_paths_when_the_pattern_has_a_slash(repo):
+    assert found(find_entries(str(repo), pattern="src/*.py")) == ["src/app.py", "src/util.py"]
+    assert found(find_entries(str(repo), pattern="**/test_*.py")) == ["tests/test_app.py"]
+
+def test_find_directories_with_depth(repo):
+    result = find_entries(str(repo), kind="directory", max_depth=1)
+
+    assert found(result) == ["logs", "src", "tests"]
+
+def test_find_filters_by_size_and_mtime(repo):
+    (repo / "src" / "big.py").write_text("x" * 100)
+    os.utime(repo / "src" / "app.py", (0, 0))
+
+    big = find_entries(str(repo), pattern="*.py", min_size=50)
+    old = find_entries(str(repo), pattern="*.py", modified_before=1000, details=True)
+
+    assert found(big) == ["src/big.py"]
+    assert old.entries == [ListedEntry("src/app.py", False, len("src/app.py"), 0.0)]
+
+def test_find_stops_past_the_limit(repo):
+    result = find_entries(str(repo), kind="any", limit=2)
+
+    assert len(result.entries) == 2
+    assert result.truncated and not result.timed_out
+
+def test_find_returns_partial_results_after_the_time_limit(repo):
+    result = find_entries(str(repo), time_limit=0)
+
+    assert result.truncated and result.timed_out
+
+def test_find_rejects_bad_arguments(repo):
+    with pytest.raises(ValueError, match="'type'"):
+        find_entries(str(repo), kind="socket")
+    with pytest.raises(ValueError, match="'min_size'"):
+        find_entries(str(repo), min_size=-1)
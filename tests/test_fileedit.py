@@ -0,0 +1,193 @@
+import os
+import re
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.fileedit import Hunk, edit_file, parse_patch
+from tree_climber_mcp.lineindex import LineIndexCache
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "app.py"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 11)))
+    return path
+
+def test_replacement_of_same_length_writes_only_the_edit(source):
+    result = edit_file(str(source), edits=[{"old_text": "line 5", "new_text": "LINE 5"}])
+
+    assert source.read_text().splitlines()[4] == "LINE 5"
+    assert result.hunks == [Hunk(5, 1, 5, 1)]
+    assert (result.written, result.size) == (6, source.stat().st_size)
+    assert result.mtime_ns == source.stat().st_mtime_ns
+
+def test_growing_edit_rewrites_from_the_edit_on(source):
+    before = source.read_bytes()
+
+    result = edit_file(str(source), edits=[{"old_text": "line 9\n", "new_text": "line 9\nline 9.5\n"}])
+
+    assert source.read_bytes() == before.replace(b"line 9\n", b"line 9\nline 9.5\n")
+    assert result.hunks == [Hunk(9, 0, 10, 1)]
+    # The inserted line and the one it pushed down
+    assert result.written == len(b"line 9.5\nline 10\n")
+
+def test_shrinking_edit_truncates(source):
+    edit_file(str(source), edits=[{"old_text": "line 2\nline 3\n", "new_text": ""}])
+
+    assert source.read_text().splitlines()[:3] == ["line 1", "line 4", "line 5"]
+    assert source.stat().st_size == len("".join(f"line {i}\n" for i in range(1, 11))) - 14
+
+def test_edits_that_cancel_out_leave_the_rest_alone(source):
+    result = edit_file(str(source), edits=[
+        {"old_text": "line 2", "new_text": "line 2!"},
+        {"old_text": "line 4", "new_text": "lin"},
+        {"old_text": "line 3", "new_text": "line 3!!"},
+    ])
+
+    assert source.read_text().splitlines()[1:4] == ["line 2!", "line 3!!", "lin"]
+    assert result.hunks == [Hunk(2, 1, 2, 1), Hunk(3, 1, 3, 1), Hunk(4, 1, 4, 1)]
+    # From the first change to the end of the last
+    assert result.written == len(b"line 2!\nline 3!!\nlin")
+
+def test_replace_all_and_ambiguous_edits(source):
+    with pytest.raises(ValueError, match="matches 2 places"):
+        edit_file(str(source), edits=[{"old_text": "line 1", "new_text": "x"}])
+
+    result = edit_file(str(source), edits=[{"old_text": "line 1", "new_text": "L1", "replace_all": True}])
+
+    assert source.read_text().splitlines()[0] == "L1"
+    assert source.read_text().splitlines()[9] == "L10"
+    assert len(result.hunks) == 2
+
+def test_replace_all_reports_one_hunk_per_changed_line(tmp_path):
+    path = tmp_path / "repeat.txt"
+    path.write_text("aaa\nbab\nccc\n")
+
+    result = edit_file(str(path), edits=[{"old_text": "a", "new_text": "x", "replace_all": True}])
+
+    assert path.read_text() == "xxx\nbxb\nccc\n"
+    assert result.hunks == [Hunk(1, 1, 1, 1), Hunk(2, 1, 2, 1)]
+    assert (result.added, result.removed) == (2, 2)
+
+def test_edits_on_one_line_share_a_hunk(tmp_path):
+    path = tmp_path / "one.txt"
+    path.write_text("first\nleft middle right\nlast\n")
+
+    result = edit_file(str(path), edits=[
+        {"old_text": "left", "new_text": "L\nL"},
+        {"old_text": "right", "new_text": "R"},
+    ])
+
+    assert path.read_text() == "first\nL\nL middle R\nlast\n"
+    assert result.hunks == [Hunk(2, 1, 2, 2)]
+
+@pytest.mark.parametrize("edits, message", [
+    ([{"old_text": "nope", "new_text": "x"}], "The 'old_text' of edit 1 was not found; the file may have changed."),
+    ([{"old_text": "", "new_text": "x"}], "Edit 1 needs a non-empty 'old_text'."),
+    ([{"old_text": "line 2"}], "Edit 1 needs a 'new_text' string."),
+    (["line 2"], "Edit 1 must be an object with 'old_text' and 'new_text'."),
+    ([{"old_text": "line 2\nline 3", "new_text": "a"}, {"old_text": "line 3", "new_text": "b"}], "Two edits overlap; combine them into one."),
+    ([], "'edits' must be a non-empty list."),
+])
+def test_bad_edits_leave_the_file_alone(source, edits, message):
+    before = source.read_bytes()
+
+    with pytest.raises(ValueError, match=re.escape(message)):
+        edit_file(str(source), edits=edits)
+
+    assert source.read_bytes() == before
+
+def test_one_of_edits_or_patch(source):
+    with pytest.raises(ValueError, match="either 'edits' or 'patch'"):
+        edit_file(str(source))
+
+def test_no_op_edit_writes_nothing(source):
+    mtime = source.stat().st_mtime_ns
+
+    result = edit_file(str(source), edits=[{"old_text": "line 3", "new_text": "line 3"}])
+
+    assert (result.hunks, result.written) == ([], 0)
+    assert source.stat().st_mtime_ns == mtime
+
+def test_parse_patch():
+    patch_text = (
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -2,2 +2,2 @@\n"
+        " line 2\n"
+        "-line 3\n"
+        "+LINE 3\n"
+        "@@ -10 +10,2 @@\n"
+        " line 10\n"
+        "+line 11\n"
+        "\\ No newline at end of file\n"
+    )
+
+    assert parse_patch(patch_text) == [
+        (2, b"line 2\nline 3\n", b"line 2\nLINE 3\n"),
+        (10, b"line 10\n", b"line 10\nline 11"),
+    ]
+
+@pytest.mark.parametrize("patch_text, message", [
+    ("just text\n", "The patch has no hunks."),
+    ("@@ bad @@\n", "Malformed hunk header"),
+    ("@@ -1 +1 @@\n*line 1\n", "Unexpected line in hunk"),
+    ("@@ -1 +1 @@\n-a\n+b\n--- a/other\n+++ b/other\n@@ -1 +1 @@\n-c\n+d\n", "more than one file"),
+])
+def test_parse_patch_errors(patch_text, message):
+    with pytest.raises(ValueError, match=message):
+        parse_patch(patch_text)
+
+def test_patch_applies_hunks(source):
+    result = edit_file(str(source), patch=(
+        "@@ -2,3 +2,3 @@\n"
+        " line 2\n"
+        "-line 3\n"
+        "+LINE 3\n"
+        " line 4\n"
+        "@@ -8,0 +9,1 @@\n"
+        "+inserted\n"
+    ))
+
+    lines = source.read_text().splitlines()
+    assert lines[1:4] == ["line 2", "LINE 3", "line 4"]
+    assert lines[8:10] == ["inserted", "line 9"]
+    assert result.hunks == [Hunk(3, 1, 3, 1), Hunk(8, 0, 9, 1)]
+    assert (result.added, result.removed) == (2, 1)
+
+def test_patch_finds_moved_hunk_nearest_first(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("new\nx\nend\nx\nmid\nx\nend\n")
+
+    # Made against line 5 before "new" was added above; its lines match at 2 and 6
+    edit_file(str(path), patch="@@ -5,2 +5,2 @@\n x\n-end\n+END\n")
+
+    assert path.read_text() == "new\nx\nend\nx\nmid\nx\nEND\n"
+
+def test_stale_patch_is_rejected(source):
+    before = source.read_bytes()
+
+    with pytest.raises(ValueError, match="Hunk 1 does not match the file"):
+        edit_file(str(source), patch="@@ -3 +3 @@\n-line three\n+line 3\n")
+
+    assert source.read_bytes() == before
+
+def test_patch_on_indexed_file_refreshes_the_index(tmp_path):
+    path = tmp_path / "big.log"
+    path.write_text("".join(f"entry {i}\n" for i in range(1, 2001)))
+    cache = LineIndexCache()
+
+    with patch("tree_climber_mcp.fileedit.LINE_INDEX_MIN_SIZE", 1):
+        result = edit_file(str(path), patch="@@ -1500 +1500,2 @@\n-entry 1500\n+entry 1500a\n+entry 1500b\n", index_cache=cache)
+
+    assert result.hunks == [Hunk(1500, 1, 1500, 2)]
+    assert path.read_text().splitlines()[1499:1502] == ["entry 1500a", "entry 1500b", "entry 1501"]
+    assert len(cache) == 0
+
+def test_empty_file_takes_an_insertion(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+
+    edit_file(str(path), patch="--- /dev/null\n+++ b/empty.txt\n@@ -0,0 +1,2 @@\n+a\n+b\n")
+
+    assert path.read_text() == "a\nb\n"
+    assert os.listdir(tmp_path) == ["empty.txt"]
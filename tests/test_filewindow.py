@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.filewindow import FileWindow, read_window
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"entry {i}\n" for i in range(1, 1001)) + "partial")
+    return path
+
+def test_whole_file_window(log_file):
+    window = read_window(str(log_file))
+
+    assert window.text == log_file.read_text()
+    assert (window.first_line, window.last_line, window.total_lines) == (1, 1001, 1001)
+    assert window.clipped is False
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+
+    assert read_window(str(path), start_line=3) == FileWindow("", 0, 0, 0, 1, 0, 0)
+
+def test_line_window_across_scan_chunks(log_file):
+    # A tiny scan chunk makes every lookup cross chunk boundaries
+    with patch("tree_climber_mcp.lineindex.FILE_SCAN_CHUNK", 7):
+        window = read_window(str(log_file), start_line=500, end_line=501)
+
+    assert window.text == "entry 500\nentry 501\n"
+    assert (window.first_line, window.last_line, window.total_lines) == (500, 501, 1001)
+
+def test_line_window_to_end_of_file(log_file):
+    window = read_window(str(log_file), start_line=1000)
+
+    assert window.text == "entry 1000\npartial"
+    assert window.end == window.size
+
+def test_byte_window_reports_lines_it_touches(log_file):
+    start = log_file.read_bytes().index(b"entry 10\n")
+
+    window = read_window(str(log_file), offset=start + 6, length=8)
+
+    assert window.text == "10\nentry"
+    assert (window.first_line, window.last_line) == (10, 11)
+
+def test_byte_window_keeps_characters_whole(tmp_path):
+    path = tmp_path / "utf8.txt"
+    path.write_text("aé€b", encoding="utf-8")
+
+    # Offsets 2 and 4 fall inside "é" and "€"
+    window = read_window(str(path), offset=2, length=3)
+
+    assert window.text == ""
+    assert read_window(str(path), offset=1, length=4).text == "é"
+    assert read_window(str(path), offset=3, length=4).text == "€b"
+
+def test_line_window_clipped_at_a_line_boundary(log_file):
+    window = read_window(str(log_file), start_line=1, end_line=5, limit=25)
+
+    assert window.text == "entry 1\nentry 2\nentry 3\n"
+    assert window.clipped is True
+
+def test_rejects_mixed_ranges(log_file):
+    with pytest.raises(ValueError, match="Use either"):
+        read_window(str(log_file), length=5, end_line=2)
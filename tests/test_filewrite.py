@@ -0,0 +1,90 @@
+import os
+import re
+import stat
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.filewrite import write_atomic, write_in_place
+
+def test_atomic_write_replaces_file_and_keeps_its_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    path.chmod(0o750)
+
+    result = write_atomic(str(path), "new contents")
+
+    assert path.read_text() == "new contents"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o750
+    assert (result.written, result.size) == (12, 12)
+    assert result.mtime_ns == path.stat().st_mtime_ns
+    assert os.listdir(tmp_path) == ["script.sh"]
+
+def test_atomic_write_in_chunks(tmp_path):
+    path = tmp_path / "big.txt"
+    content = "ab€" * 1000
+
+    # A tiny chunk makes the write take many encode-and-write rounds
+    with patch("tree_climber_mcp.filewrite.WRITE_CHUNK", 7):
+        result = write_atomic(str(path), content)
+
+    assert path.read_text(encoding="utf-8") == content
+    assert result.written == len(content.encode("utf-8"))
+
+def test_failed_atomic_write_leaves_original_and_no_temp_file(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("original")
+
+    with pytest.raises(UnicodeEncodeError):
+        write_atomic(str(path), "bad \ud800 surrogate")
+
+    assert path.read_text() == "original"
+    assert os.listdir(tmp_path) == ["a.txt"]
+
+def test_atomic_write_over_directory_cleans_up(tmp_path):
+    (tmp_path / "dir").mkdir()
+
+    with pytest.raises(OSError):
+        write_atomic(str(tmp_path / "dir"), "x")
+
+    assert os.listdir(tmp_path) == ["dir"]
+
+def test_append_creates_and_extends(tmp_path):
+    path = tmp_path / "logs" / "app.log"
+
+    write_in_place(str(path), "one\n")
+    result = write_in_place(str(path), "two\n")
+
+    assert path.read_text() == "one\ntwo\n"
+    assert (result.written, result.size) == (4, 8)
+
+def test_offset_write_overwrites_without_truncating(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("0123456789")
+
+    with patch("tree_climber_mcp.filewrite.WRITE_CHUNK", 2):
+        result = write_in_place(str(path), "abcde", offset=3)
+
+    assert path.read_text() == "012abcde89"
+    assert (result.written, result.size) == (5, 10)
+
+def test_offset_write_may_extend_from_end(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("abc")
+
+    write_in_place(str(path), "def", offset=3)
+
+    assert path.read_text() == "abcdef"
+
+@pytest.mark.parametrize("offset, message", [
+    (4, "'offset' 4 is past the end of the file (3 bytes)."),
+    (-1, "'offset' must be a non-negative integer."),
+    (True, "'offset' must be a non-negative integer."),
+])
+def test_offset_write_rejects_bad_offsets(tmp_path, offset, message):
+    path = tmp_path / "a.txt"
+    path.write_text("abc")
+
+    with pytest.raises(ValueError, match=re.escape(message)):
+        write_in_place(str(path), "x", offset=offset)
+
+    assert path.read_text() == "abc"
@@ -0,0 +1,99 @@
+import hashlib
+import os
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.fingerprint import DigestCache, Fingerprint, fingerprint, unchanged_since
+
+@pytest.fixture
+def settled(tmp_path):
+    # Old enough that its digest may be cached
+    path = tmp_path / "settled.txt"
+    path.write_text("hello\n")
+    os.utime(path, ns=(1_000_000_000_000, 1_000_000_000_000))
+    return path
+
+def test_tag_round_trips():
+    value = Fingerprint(0x1F, 6, 123456789, "ab" * 16)
+
+    assert value.tag == f"1f-6-75bcd15-{'ab' * 16}"
+    assert Fingerprint.parse(value.tag) == value
+    assert Fingerprint.parse("1f-6-75bcd15") == Fingerprint(0x1F, 6, 123456789)
+
+@pytest.mark.parametrize("tag", ["", "1-2", "1-2-3-", "x-2-3", "1-2-3-4-5", None])
+def test_parse_rejects_other_strings(tag):
+    with pytest.raises(ValueError, match="fingerprint returned by an earlier read"):
+        Fingerprint.parse(tag)
+
+def test_fingerprint_uses_stat_and_blake2b(settled):
+    stat = os.stat(settled)
+
+    value = fingerprint(str(settled), stat, with_digest=True, cache=DigestCache())
+
+    assert (value.inode, value.size, value.mtime_ns) == (stat.st_ino, 6, stat.st_mtime_ns)
+    assert value.digest == hashlib.blake2b(b"hello\n", digest_size=16).hexdigest()
+    assert fingerprint(str(settled), stat).digest is None
+
+def test_cache_never_rehashes_an_unchanged_file(settled):
+    cache = DigestCache()
+    stat = os.stat(settled)
+    first = cache.digest(str(settled), stat)
+
+    with patch("tree_climber_mcp.fingerprint._hash_file", side_effect=AssertionError("rehashed")):
+        assert cache.digest(str(settled), stat) == first
+    assert len(cache) == 1
+
+def test_cache_skips_recently_modified_files(tmp_path):
+    path = tmp_path / "fresh.txt"
+    path.write_text("new")
+    cache = DigestCache()
+
+    cache.digest(str(path), os.stat(path))
+
+    assert len(cache) == 0
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = DigestCache(size=2)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name
+        path.write_text(name)
+        os.utime(path, ns=(1_000_000_000_000, 1_000_000_000_000))
+        paths.append(path)
+        cache.digest(str(path), os.stat(path))
+
+    assert len(cache) == 2
+    assert all(key[0] != str(paths[0]) for key in cache._entries)
+
+def test_unchanged_by_stat_without_hashing(settled):
+    tag = fingerprint(str(settled), os.stat(settled)).tag
+
+    with patch("tree_climber_mcp.fingerprint._hash_file", side_effect=AssertionError("hashed")):
+        assert unchanged_since(str(settled), os.stat(settled), tag).tag == tag
+
+def test_digest_matches_after_rewrite_with_same_bytes(settled, tmp_path):
+    tag = fingerprint(str(settled), os.stat(settled), with_digest=True, cache=DigestCache()).tag
+    # A new inode and mtime, as after an atomic write
+    replacement = tmp_path / "replacement"
+    replacement.write_text("hello\n")
+    os.replace(replacement, settled)
+
+    current = unchanged_since(str(settled), os.stat(settled), tag, cache=DigestCache())
+
+    assert current is not None and current.tag != tag
+    assert current.digest == Fingerprint.parse(tag).digest
+
+def test_changed_file_does_not_match(settled):
+    stat_tag = fingerprint(str(settled), os.stat(settled)).tag
+    digest_tag = fingerprint(str(settled), os.stat(settled), with_digest=True, cache=DigestCache()).tag
+    settled.write_text("HELLO\n")
+
+    assert unchanged_since(str(settled), os.stat(settled), stat_tag) is None
+    assert unchanged_since(str(settled), os.stat(settled), digest_tag, cache=DigestCache()) is None
+
+def test_resized_file_is_not_hashed(settled):
+    tag = fingerprint(str(settled), os.stat(settled), with_digest=True, cache=DigestCache()).tag
+    settled.write_text("longer contents\n")
+
+    with patch("tree_climber_mcp.fingerprint._hash_file", side_effect=AssertionError("hashed")):
+        assert unchanged_since(str(settled), os.stat(settled), tag) is None
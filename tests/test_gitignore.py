@@ -0,0 +1,74 @@
+import re
+
+import pytest
+from tree_climber_mcp.gitignore import IgnoreRules, enclosing_rules, glob_to_regex, parse_ignore_file
+
+def matches(glob, path):
+    return re.fullmatch(glob_to_regex(glob), path) is not None
+
+@pytest.mark.parametrize("glob, path, expected", [
+    ("*.py", "mod.py", True),
+    ("*.py", "pkg/mod.py", False),
+    ("src/**/test_*.py", "src/test_a.py", True),
+    ("src/**/test_*.py", "src/a/b/test_a.py", True),
+    ("build/**", "build/x/y", True),
+    ("build/**", "build", False),
+    ("?.txt", "a.txt", True),
+    ("[!a]b", "cb", True),
+    ("[!a]b", "ab", False),
+    ("\\*literal", "*literal", True),
+    ("[unclosed", "[unclosed", True),
+])
+def test_glob_to_regex(glob, path, expected):
+    assert matches(glob, path) is expected
+
+def rules(text):
+    return IgnoreRules(parse_ignore_file(text))
+
+def test_unanchored_rules_match_at_any_depth():
+    ignore = rules("# comment\n\n*.log\nbuild/\n")
+
+    assert ignore.ignored("app.log", False)
+    assert ignore.ignored("deep/er/app.log", False)
+    assert ignore.ignored("src/build", True)
+    # Directory-only rules leave files of the same name alone
+    assert not ignore.ignored("src/build", False)
+
+def test_anchored_rules_match_from_the_file_directory():
+    ignore = rules("/dist\ndocs/_build\n")
+
+    assert ignore.ignored("dist", True)
+    assert not ignore.ignored("pkg/dist", True)
+    assert ignore.ignored("docs/_build", True)
+
+def test_last_matching_rule_wins():
+    ignore = rules("*.log\n!keep.log\n")
+
+    assert ignore.ignored("drop.log", False)
+    assert not ignore.ignored("keep.log", False)
+
+def test_deeper_files_take_precedence():
+    top = rules("*.gen\n")
+    nested = IgnoreRules(parse_ignore_file("!special.gen\nlocal\n"), "pkg", top)
+
+    assert nested.ignored("pkg/other.gen", False)
+    assert not nested.ignored("pkg/special.gen", False)
+    assert nested.ignored("pkg/local", False)
+    # Nested rules are relative to their own directory
+    assert not nested.ignored("local", False)
+
+def test_enclosing_rules_come_from_the_repository_above(tmp_path):
+    (tmp_path / ".git" / "info").mkdir(parents=True)
+    (tmp_path / ".git" / "info" / "exclude").write_text("*.swp\n")
+    (tmp_path / ".gitignore").write_text("/sub/generated\n*.pyc\n")
+    (tmp_path / "sub" / "generated").mkdir(parents=True)
+
+    ignore = enclosing_rules(str(tmp_path / "sub"))
+
+    assert ignore.ignored("generated", True)
+    assert ignore.ignored("x/y.pyc", False)
+    assert ignore.ignored("a.swp", False)
+    assert not ignore.ignored("other", True)
+
+def test_no_enclosing_rules_outside_a_repository(tmp_path):
+    assert enclosing_rules(str(tmp_path)) is None
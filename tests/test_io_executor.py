@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+from tree_climber_mcp.io_executor import IOExecutor, IOStats, IOTimeoutError
+
+@pytest.fixture
+def executor():
+    executor = IOExecutor(workers=1, timeout=5)
+    yield executor
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_the_event_loop(executor):
+    loop_thread = threading.get_ident()
+
+    thread = await executor.run(threading.get_ident)
+
+    assert thread != loop_thread
+    assert executor.stats() == IOStats(1, 0, 0, 1, 0, 1)
+
+@pytest.mark.asyncio
+async def test_run_propagates_exceptions(executor):
+    with pytest.raises(FileNotFoundError):
+        await executor.run(open, "/nonexistent/file")
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_while_workers_block(executor):
+    release = threading.Event()
+    blocked = asyncio.create_task(executor.run(release.wait))
+
+    # The loop keeps serving other work while the only worker is stuck
+    await asyncio.sleep(0.01)
+    assert executor.stats().running == 1
+    release.set()
+    assert await blocked is True
+
+@pytest.mark.asyncio
+async def test_timeout_drops_a_queued_call(executor):
+    release = threading.Event()
+    started = []
+    blocker = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(IOTimeoutError, match="timed out after 0.05s"):
+        await executor.run(started.append, "queued", timeout=0.05)
+
+    release.set()
+    await blocker
+    stats = executor.stats()
+    assert started == []
+    assert (stats.queued, stats.timed_out, stats.peak_queued) == (0, 1, 1)
+
+@pytest.mark.asyncio
+async def test_timeout_lets_a_running_call_finish(executor):
+    release = threading.Event()
+
+    with pytest.raises(IOTimeoutError):
+        await executor.run(release.wait, timeout=0.05)
+
+    assert executor.stats().running == 1
+    release.set()
+    assert await executor.run(lambda: "next") == "next"
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_drops_its_queued_call(executor):
+    release = threading.Event()
+    started = []
+    blocker = asyncio.create_task(executor.run(release.wait))
+    waiting = asyncio.create_task(executor.run(started.append, "queued"))
+    await asyncio.sleep(0.01)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    release.set()
+    await blocker
+
+    assert started == []
+    assert executor.stats().queued == 0
+
+@pytest.mark.parametrize("workers, timeout", [(0, 1), (1, 0)])
+def test_rejects_invalid_settings(workers, timeout):
+    with pytest.raises(ValueError):
+        IOExecutor(workers, timeout)
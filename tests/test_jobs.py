@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from tree_climber_mcp.jobs import JobManager, OutputRingBuffer
+
+# --- OutputRingBuffer Tests ---
+
+def test_ring_buffer_reads_from_offset():
+    buffer = OutputRingBuffer(capacity=16)
+    buffer.write(b"hello ")
+    buffer.write(b"world")
+
+    assert buffer.total == 11
+    assert buffer.read(0, 100) == (0, b"hello world")
+    assert buffer.read(6, 3) == (6, b"wor")
+
+def test_ring_buffer_wraps_and_keeps_latest_bytes():
+    buffer = OutputRingBuffer(capacity=8)
+    buffer.write(b"0123456789")
+    buffer.write(b"abc")
+
+    assert buffer.total == 13
+    assert buffer.start == 5
+    assert buffer.read(5, 100) == (5, b"56789abc")
+
+def test_ring_buffer_skips_dropped_offsets():
+    buffer = OutputRingBuffer(capacity=4)
+    buffer.write(b"abcdefgh")
+
+    # Bytes before the retained window are gone, so reading restarts at the window
+    assert buffer.read(0, 100) == (4, b"efgh")
+
+def test_ring_buffer_memory_is_bounded():
+    buffer = OutputRingBuffer(capacity=1024)
+    for _ in range(1000):
+        buffer.write(b"x" * 1000)
+
+    assert buffer.total == 1_000_000
+    assert len(buffer._buffer) == 1024
+
+def test_ring_buffer_clamps_offset_past_end():
+    buffer = OutputRingBuffer(capacity=8)
+    buffer.write(b"abc")
+
+    assert buffer.read(100, 10) == (3, b"")
+
+def test_ring_buffer_spills_dropped_bytes_to_file():
+    buffer = OutputRingBuffer(capacity=4, spill_limit=6)
+    buffer.write(b"abcdefgh")
+
+    assert buffer.spilled == 6
+    assert buffer.read(0, 100) == (0, b"abcdef")
+    # Beyond the spill limit only the in-memory window remains
+    assert buffer.read(6, 100) == (6, b"gh")
+    buffer.close()
+
+def test_ring_buffer_tail_lines():
+    buffer = OutputRingBuffer(capacity=64)
+    buffer.write(b"one\ntwo\nthree\n")
+
+    assert buffer.tail(2, 1000) == (4, b"two\nthree\n")
+    assert buffer.tail(10, 1000) == (0, b"one\ntwo\nthree\n")
+
+def test_ring_buffer_tail_respects_max_bytes():
+    buffer = OutputRingBuffer(capacity=64)
+    buffer.write(b"one\ntwo\nthree\n")
+
+    assert buffer.tail(3, 6) == (8, b"three\n")
+
+# --- JobManager Tests ---
+
+@pytest.fixture
+def use_sh():
+    """Run jobs with /bin/sh so the tests don't pay xonsh's start-up time."""
+    real_exec = asyncio.create_subprocess_exec
+
+    async def fake_exec(program, *args, **kwargs):
+        return await real_exec("sh", *args, **kwargs)
+
+    with patch("tree_climber_mcp.jobs.asyncio.create_subprocess_exec", side_effect=fake_exec) as mock_exec:
+        yield mock_exec
+
+@pytest.mark.asyncio
+async def test_job_captures_output_and_exit_code(use_sh, tmp_path):
+    manager = JobManager(buffer_size=1024)
+    job = await manager.start("echo hello; pwd; exit 3", str(tmp_path))
+
+    assert use_sh.call_args.args[:3] == ("xonsh", "-c", "echo hello; pwd; exit 3")
+    await job.reader
+
+    assert job.status == "exited"
+    assert job.exit_code == 3
+    assert job.output.read(0, 1000)[1] == f"hello\n{tmp_path}\n".encode()
+
+@pytest.mark.asyncio
+async def test_job_output_memory_is_bounded(use_sh, tmp_path):
+    manager = JobManager(buffer_size=1000)
+    job = await manager.start("yes line | head -n 100000", str(tmp_path))
+    await job.reader
+
+    assert job.output.total == 500_000
+    assert job.output.read(0, 10_000) == (499_000, b"line\n" * 200)
+
+@pytest.mark.asyncio
+async def test_cancel_stops_running_job(use_sh, tmp_path):
+    manager = JobManager()
+    job = await manager.start("sleep 30", str(tmp_path))
+
+    await manager.cancel(job.job_id, grace=5)
+
+    assert job.status == "cancelled"
+    assert job.exit_code is not None
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_evicted(use_sh, tmp_path):
+    manager = JobManager(retain_finished=1)
+    first = await manager.start("true", str(tmp_path))
+    await first.reader
+    second = await manager.start("true", str(tmp_path))
+    await second.reader
+    third = await manager.start("true", str(tmp_path))
+
+    assert manager.get(first.job_id) is None
+    assert manager.get(second.job_id) is second
+    assert manager.get(third.job_id) is third
+    await third.reader
+
+@pytest.mark.asyncio
+async def test_cleanup_cancels_running_jobs(use_sh, tmp_path):
+    manager = JobManager()
+    job = await manager.start("sleep 30", str(tmp_path))
+
+    await manager.cleanup()
+
+    assert job.status == "cancelled"
+    assert manager.jobs() == []
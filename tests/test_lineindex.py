@@ -0,0 +1,136 @@
+import mmap
+import os
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.filewindow import read_window
+from tree_climber_mcp.lineindex import LineIndex, LineIndexCache
+
+LINES = [f"row {i} " + "x" * (i % 13) + "\n" for i in range(1, 301)]
+
+@pytest.fixture(autouse=True)
+def small_blocks():
+    # Many blocks and chunks even for a few kilobytes of text
+    with (patch("tree_climber_mcp.lineindex.LINE_INDEX_BLOCK", 64),
+          patch("tree_climber_mcp.lineindex.FILE_SCAN_CHUNK", 256)):
+        yield
+
+def mapped(path):
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        return stat, mmap.mmap(file.fileno(), stat.st_size, access=mmap.ACCESS_READ)
+
+def line_starts(text):
+    starts = [0]
+    for line in text.splitlines(keepends=True):
+        starts.append(starts[-1] + len(line.encode()))
+    return starts
+
+def test_index_matches_a_full_scan(tmp_path):
+    path = tmp_path / "rows.txt"
+    text = "".join(LINES) + "no newline"
+    path.write_text(text)
+    stat, view = mapped(path)
+
+    index = LineIndex.build(view, stat.st_size, stat.st_mtime_ns)
+
+    starts = line_starts(text)
+    assert index.newlines == len(LINES)
+    for line in range(1, len(starts) + 2):
+        expected = starts[line - 1] if line <= len(LINES) + 1 else stat.st_size
+        assert index.line_start(view, line) == expected
+    for offset in range(0, stat.st_size + 1, 7):
+        assert index.newlines_before(view, offset) == text.encode()[:offset].count(b"\n")
+    view.close()
+
+def test_cache_reuses_index_for_unchanged_file(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_text("".join(LINES))
+    cache = LineIndexCache()
+    stat, view = mapped(path)
+
+    first = cache.get(str(path), stat, view)
+
+    assert cache.get(str(path), stat, view) is first
+    view.close()
+
+def test_cache_extends_index_after_append(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_text("".join(LINES[:100]))
+    cache = LineIndexCache()
+    stat, view = mapped(path)
+    cache.get(str(path), stat, view)
+    view.close()
+
+    with open(path, "a") as file:
+        file.write("".join(LINES[100:]))
+    stat, view = mapped(path)
+    with patch.object(LineIndex, "build", side_effect=AssertionError("rebuilt")):
+        index = cache.get(str(path), stat, view)
+
+    assert index.newlines == len(LINES)
+    assert index.line_start(view, 250) == line_starts("".join(LINES))[249]
+    view.close()
+
+def test_cache_rebuilds_index_after_rewrite(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_text("".join(LINES[:100]))
+    cache = LineIndexCache()
+    stat, view = mapped(path)
+    cache.get(str(path), stat, view)
+    view.close()
+
+    # Same inode, longer, but the old end no longer matches
+    path.write_text("\n" * 5000)
+    stat, view = mapped(path)
+    index = cache.get(str(path), stat, view)
+
+    assert index.newlines == 5000
+    view.close()
+
+def test_cache_evicts_least_recently_used_over_budget(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name
+        path.write_text("".join(LINES))
+        paths.append(path)
+    probe_stat, probe_view = mapped(paths[0])
+    size = LineIndex.build(probe_view, probe_stat.st_size, 0).nbytes
+    probe_view.close()
+    cache = LineIndexCache(budget=2 * size)
+
+    for path in paths:
+        stat, view = mapped(path)
+        cache.get(str(path), stat, view)
+        view.close()
+
+    assert len(cache) == 2
+    assert (str(paths[0]), os.stat(paths[0]).st_ino) not in cache._entries
+
+def test_cache_discards_a_path(tmp_path):
+    cache = LineIndexCache()
+    for name in ("a", "b"):
+        path = tmp_path / name
+        path.write_text("".join(LINES))
+        stat, view = mapped(path)
+        cache.get(str(path), stat, view)
+        view.close()
+
+    cache.discard(str(tmp_path / "a"))
+
+    assert [key[0] for key in cache._entries] == [str(tmp_path / "b")]
+    assert cache._bytes == next(iter(cache._entries.values())).nbytes
+
+def test_read_window_uses_index_for_large_files(tmp_path):
+    path = tmp_path / "rows.txt"
+    path.write_text("".join(LINES))
+    cache = LineIndexCache()
+
+    with patch("tree_climber_mcp.filewindow.LINE_INDEX_MIN_SIZE", 1):
+        window = read_window(str(path), start_line=200, end_line=201, index_cache=cache)
+        unindexed = read_window(str(path), start_line=200, end_line=201, index_cache=None)
+
+    assert len(cache) == 1
+    assert window == unindexed
+    assert window.text == LINES[199] + LINES[200]
+    assert window.total_lines == len(LINES)
@@ -0,0 +1,28 @@
+import pytest
+from tree_climber_mcp.literals import required_literals
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"nmap\s+", ["nmap"]),
+    (r"(shutdown|reboot)", ["shutdown", "reboot"]),
+    (r"\bTODO(\(\w+\))?:", ["todo"]),
+    (r"a.b", None),
+])
+def test_required_literals(pattern, expected):
+    assert required_literals(pattern) == expected
+
+def test_required_literals_can_keep_case():
+    assert required_literals(r"unset\s+HISTFILE", fold=False) == ["HISTFILE"]
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"\x41BCD", ["bcd"]),
+    (r"\u0041BCD", ["bcd"]),
+    (r"\U00000041BCD", ["bcd"]),
+    (r"\101BCD", ["bcd"]),
+    (r"\0101BCD", ["1bcd"]),
+    (r"\N{LATIN CAPITAL LETTER A}BCD", ["bcd"]),
+    (r"(a)\1BCD", ["bcd"]),
+    (r"rm\x20-rf", ["-rf"]),
+    (r"[\x41-\x5d]xyz|ab\x7cd", ["xyz", "ab"]),
+])
+def test_required_literals_skip_whole_escapes(pattern, expected):
+    assert required_literals(pattern) == expected
@@ -11,6 +11,16 @@ def test_parse_args_defaults_to_restricted_cwd():
 
     assert args.allow_all_paths is False
     assert args.filesystem_root is None
+    assert args.shell_pool_size == 1
+    assert args.shell_max_waiters == 8
+    assert args.job_spill_limit == 0
+    assert args.command_output_limit == 4 * 1024 * 1024
+    assert args.policy_file is None
+    assert args.filesystem_workers == 16
+    assert args.filesystem_timeout == 30
+    assert args.search_workers == 4
+    assert args.directory_index is False
+    assert args.directory_index_budget == 256 * 1024 * 1024
 
 
 def test_parse_args_accepts_allow_all_paths():
@@ -27,6 +37,51 @@ def test_parse_args_accepts_filesystem_root():
     assert args.filesystem_root == "../shared"
 
 
+def test_parse_args_accepts_shell_pool_options():
+    args = __main__.parse_args(["--shell-pool-size", "3", "--shell-max-waiters", "0"])
+
+    assert args.shell_pool_size == 3
+    assert args.shell_max_waiters == 0
+
+
+def test_parse_args_accepts_job_spill_limit():
+    args = __main__.parse_args(["--job-spill-limit", "1048576"])
+
+    assert args.job_spill_limit == 1048576
+
+
+def test_parse_args_accepts_command_output_limit():
+    args = __main__.parse_args(["--command-output-limit", "65536"])
+
+    assert args.command_output_limit == 65536
+
+
+def test_parse_args_accepts_filesystem_io_options():
+    args = __main__.parse_args(["--filesystem-workers", "4", "--filesystem-timeout", "2.5"])
+
+    assert args.filesystem_workers == 4
+    assert args.filesystem_timeout == 2.5
+
+
+def test_parse_args_accepts_search_workers():
+    args = __main__.parse_args(["--search-workers", "0"])
+
+    assert args.search_workers == 0
+
+
+def test_parse_args_accepts_directory_index():
+    args = __main__.parse_args(["--directory-index", "--directory-index-budget", "1048576"])
+
+    assert args.directory_index is True
+    assert args.directory_index_budget == 1048576
+
+
+def test_parse_args_accepts_policy_file():
+    args = __main__.parse_args(["--policy-file", "policy.toml"])
+
+    assert args.policy_file == "policy.toml"
+
+
 def test_parse_args_rejects_conflicting_filesystem_flags():
     with pytest.raises(SystemExit) as exc_info:
         __main__.parse_args(["--allow-all-paths", "--filesystem-root", "/tmp"])
@@ -50,6 +105,16 @@ async def test_main_passes_resolved_filesystem_root_to_server():
         logger,
         allow_all_paths=False,
         filesystem_root="/trusted/root",
+        shell_pool_size=1,
+        shell_max_waiters=8,
+        job_spill_limit=0,
+        command_output_limit=4 * 1024 * 1024,
+        policy_file=None,
+        filesystem_workers=16,
+        filesystem_timeout=30,
+        search_workers=4,
+        directory_index=False,
+        directory_index_budget=256 * 1024 * 1024,
     )
     mock_server.run.assert_awaited_once()
 
@@ -69,5 +134,15 @@ async def test_main_passes_allow_all_paths_to_server():
         logger,
         allow_all_paths=True,
         filesystem_root=None,
+        shell_pool_size=1,
+        shell_max_waiters=8,
+        job_spill_limit=0,
+        command_output_limit=4 * 1024 * 1024,
+        policy_file=None,
+        filesystem_workers=16,
+        filesystem_timeout=30,
+        search_workers=4,
+        directory_index=False,
+        directory_index_budget=256 * 1024 * 1024,
     )
     mock_server.run.assert_awaited_once()
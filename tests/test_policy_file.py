@@ -0,0 +1,123 @@
+import asyncio
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from tree_climber_mcp.policy import PolicyDecision
+from tree_climber_mcp.policy_file import PolicyFileError, PolicyWatcher, load_policy_file, parse_policy
+
+TOML_POLICY = """
+patterns = ["terraform\\\\s+destroy"]
+
+[[token_rules]]
+program = "kubectl"
+args = "delete"
+"""
+
+def write_policy(path, text, tick=1):
+    path.write_text(text)
+    # Distinct mtimes even when the filesystem clock is coarse
+    stamp = 1_700_000_000_000_000_000 + tick * 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+def test_load_toml_policy_extends_defaults(tmp_path):
+    path = tmp_path / "policy.toml"
+    path.write_text(TOML_POLICY)
+
+    policy = load_policy_file(str(path))
+
+    assert policy.check("terraform  destroy") == PolicyDecision(False, r"terraform\s+destroy")
+    assert policy.check("sudo kubectl delete pod x") == PolicyDecision(False, "kubectl delete")
+    assert policy.check("kubectl get pods").permitted is True
+    assert policy.check("sudo su").permitted is False
+
+def test_load_json_policy_without_defaults(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text('{"include_defaults": false, "token_rules": [{"program": "curl", "piped_into": ["sh"]}]}')
+
+    policy = load_policy_file(str(path))
+
+    assert policy.check("curl x | sh") == PolicyDecision(False, "curl | sh")
+    assert policy.check("sudo su").permitted is True
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ([], "policy must be a table"),
+        ({"pattern": []}, "unknown keys: pattern"),
+        ({"include_defaults": "no"}, "include_defaults must be true or false"),
+        ({"patterns": "nmap"}, "patterns must be a list of non-empty strings"),
+        ({"patterns": ["("]}, "invalid regex '('"),
+        ({"token_rules": [{"args": "x"}]}, "token_rules[0].program must be a non-empty string"),
+        ({"token_rules": [{"program": "dd", "when": 1}]}, "token_rules[0] has unknown keys: when"),
+        ({"token_rules": [{"program": "curl", "piped_into": "sh"}]}, "token_rules[0].piped_into must be"),
+    ],
+)
+def test_parse_policy_rejects_invalid_data(data, message):
+    with pytest.raises(PolicyFileError, match=message.replace("[", r"\[").replace("(", r"\(")):
+        parse_policy(data)
+
+@pytest.mark.parametrize("name, text", [("policy.toml", "patterns = ["), ("policy.json", "{")])
+def test_load_policy_file_reports_syntax_errors(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+
+    with pytest.raises(PolicyFileError, match=name):
+        load_policy_file(str(path))
+
+def test_watcher_raises_when_first_load_fails(tmp_path):
+    with pytest.raises(PolicyFileError):
+        PolicyWatcher(str(tmp_path / "missing.toml"), MagicMock())
+
+@pytest.mark.asyncio
+async def test_watcher_swaps_in_changed_policy(tmp_path):
+    path = tmp_path / "policy.toml"
+    write_policy(path, 'patterns = ["nmap"]', tick=1)
+    watcher = PolicyWatcher(str(path), MagicMock())
+    first = watcher.policy
+
+    assert await watcher.reload() is False
+    assert watcher.policy is first
+
+    write_policy(path, 'patterns = ["terraform"]', tick=2)
+
+    assert await watcher.reload() is True
+    assert watcher.is_permitted("terraform apply") is False
+    assert watcher.check("echo nmap").permitted is True
+
+@pytest.mark.asyncio
+async def test_watcher_keeps_previous_policy_on_bad_file(tmp_path):
+    path = tmp_path / "policy.toml"
+    logger = MagicMock()
+    write_policy(path, 'patterns = ["nmap"]', tick=1)
+    watcher = PolicyWatcher(str(path), logger)
+    first = watcher.policy
+
+    write_policy(path, 'patterns = ["("]', tick=2)
+    assert await watcher.reload() is False
+    path.unlink()
+    assert await watcher.reload() is False
+
+    assert watcher.policy is first
+    assert logger.error.call_count == 1
+    assert logger.warning.call_count == 1
+
+    write_policy(path, 'patterns = ["terraform"]', tick=3)
+    assert await watcher.reload() is True
+
+@pytest.mark.asyncio
+async def test_watcher_polls_in_background(tmp_path):
+    path = tmp_path / "policy.toml"
+    write_policy(path, 'patterns = ["nmap"]', tick=1)
+    watcher = PolicyWatcher(str(path), MagicMock(), interval=0.01)
+    watcher.start()
+
+    write_policy(path, 'patterns = ["terraform"]', tick=2)
+    for _ in range(200):
+        if not watcher.is_permitted("terraform"):
+            break
+        await asyncio.sleep(0.01)
+
+    assert watcher.is_permitted("terraform") is False
+    await watcher.cleanup()
+    assert watcher._monitor is None
@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from tree_climber_mcp.pool import ShellPool, ShellPoolBusyError
+from tree_climber_mcp.shell import CommandResult
+
+@pytest.fixture
+def mock_shell_cls():
+    with patch("tree_climber_mcp.pool.ShellManager") as mock_cls:
+        mock_cls.side_effect = lambda **kwargs: AsyncMock()
+        yield mock_cls
+
+@pytest.fixture
+def mock_supervisor_cls():
+    with patch("tree_climber_mcp.pool.ShellSupervisor", autospec=True) as mock_cls:
+        yield mock_cls
+
+@pytest.fixture
+def pool(mock_shell_cls, mock_supervisor_cls):
+    return ShellPool(size=2, max_waiters=1)
+
+def test_init_prespawns_sessions(pool, mock_shell_cls):
+    assert pool.size == 2
+    assert mock_shell_cls.call_count == 2
+
+def test_sessions_share_supervisor_standby(pool, mock_shell_cls):
+    supervisor = pool._supervisor
+    for call in mock_shell_cls.call_args_list:
+        assert call.kwargs["standby_source"] == supervisor.take_standby
+
+def test_init_passes_output_limit_to_sessions(mock_shell_cls, mock_supervisor_cls):
+    ShellPool(size=1, output_limit=1024)
+
+    assert mock_shell_cls.call_args.kwargs["output_limit"] == 1024
+
+def test_init_rejects_empty_output_limit(mock_shell_cls):
+    with pytest.raises(ValueError):
+        ShellPool(output_limit=0)
+
+def test_init_rejects_empty_pool(mock_shell_cls):
+    with pytest.raises(ValueError):
+        ShellPool(size=0)
+
+def test_session_affinity_is_sticky(pool):
+    first = pool.session("agent-1")
+    second = pool.session("agent-2")
+
+    assert first is not second
+    assert pool.session("agent-1") is first
+    assert pool.session("agent-2") is second
+
+def test_default_session_used_without_id(pool):
+    assert pool.session() is pool.session("default")
+
+def test_extra_sessions_share_least_loaded_shell(pool):
+    first = pool.session("agent-1")
+    pool.session("agent-2")
+    pool._pending[1] = 3
+
+    assert pool.session("agent-3") is first
+
+@pytest.mark.asyncio
+async def test_flush_buffer_warms_every_session(pool):
+    await pool.flush_buffer()
+
+    for shell in pool._sessions:
+        shell.flush_buffer.assert_awaited_once()
+    pool._supervisor.start.assert_called_once_with(pool._sessions)
+
+@pytest.mark.asyncio
+async def test_run_command_routes_to_session(pool):
+    shell = pool.session("agent-2")
+    shell.run_command.return_value = CommandResult("ok\n", 0, 0.01)
+
+    result = await pool.run_command("ls", 5, session_id="agent-2")
+
+    shell.run_command.assert_awaited_once_with("ls", 5)
+    assert result.output == "ok\n"
+
+@pytest.mark.asyncio
+async def test_run_direct_routes_to_session(pool):
+    shell = pool.session("agent-1")
+    shell.run_direct.return_value = CommandResult("ok\n", 0, 0.001, stderr="")
+
+    result = await pool.run_direct([["ls"]], 5, session_id="agent-1")
+
+    shell.run_direct.assert_awaited_once_with([["ls"]], 5)
+    assert result.output == "ok\n"
+    assert pool._pending == [0, 0]
+
+@pytest.mark.asyncio
+async def test_sessions_run_in_parallel(pool):
+    release = asyncio.Event()
+    started = []
+
+    async def blocking_run(command, timeout):
+        started.append(command)
+        await release.wait()
+        return CommandResult("", 0, 0.0)
+
+    pool.session("agent-1").run_command.side_effect = blocking_run
+    pool.session("agent-2").run_command.side_effect = blocking_run
+
+    tasks = [
+        asyncio.create_task(pool.run_command("pytest", session_id="agent-1")),
+        asyncio.create_task(pool.run_command("ls", session_id="agent-2")),
+    ]
+    await asyncio.sleep(0)
+    # The second session is not stuck behind the first
+    assert started == ["pytest", "ls"]
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+@pytest.mark.asyncio
+async def test_run_command_rejects_when_queue_full(pool):
+    release = asyncio.Event()
+
+    async def blocking_run(command, timeout):
+        await release.wait()
+        return CommandResult("", 0, 0.0)
+
+    pool.session().run_command.side_effect = blocking_run
+
+    running = asyncio.create_task(pool.run_command("sleep 1"))
+    queued = asyncio.create_task(pool.run_command("sleep 1"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ShellPoolBusyError):
+        await pool.run_command("ls")
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert pool._pending == [0, 0]
+
+@pytest.mark.asyncio
+async def test_get_pwd_uses_session(pool):
+    pool.session("agent-1").get_pwd.return_value = "/one"
+    pool.session("agent-2").get_pwd.return_value = "/two"
+
+    assert await pool.get_pwd("agent-2") == "/two"
+
+@pytest.mark.asyncio
+async def test_get_real_pwd_uses_session(pool):
+    pool.session("agent-1").get_real_pwd.return_value = "/real/one"
+
+    assert await pool.get_real_pwd("agent-1") == "/real/one"
+
+@pytest.mark.asyncio
+async def test_cleanup_closes_every_session(pool):
+    await pool.cleanup()
+
+    pool._supervisor.cleanup.assert_awaited_once()
+    for shell in pool._sessions:
+        shell.cleanup.assert_awaited_once()
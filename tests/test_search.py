@@ -0,0 +1,158 @@
+import re
+from unittest.mock import patch
+
+import pytest
+from tree_climber_mcp.search import (
+    FileMatches,
+    SearchMatch,
+    SearchPool,
+    clip_line,
+    compile_pattern,
+    search_file,
+    search_tree,
+)
+
+@pytest.fixture
+def tree(tmp_path):
+    files = {
+        "a.py": "import os\nvalue = os.getcwd()\n",
+        "pkg/b.py": "# TODO: one\nx = 1\n# todo: two\n",
+        "pkg/c.txt": "nothing here\n",
+        "build/d.py": "import os\n",
+        "image.png": "import os\0binary",
+    }
+    for path, text in files.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(text)
+    (tmp_path / ".gitignore").write_text("build/\n")
+    return tmp_path
+
+def test_search_file_reports_line_column_and_context(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("zero\none\ntwo ümlaut two\nthree\nfour\n")
+
+    found = search_file(str(path), "f.txt", compile_pattern("two"), context=1)
+
+    assert found == FileMatches("f.txt", [SearchMatch(3, 1, "two ümlaut two", ("one",), ("three",))])
+    # Columns count characters, not bytes
+    found = search_file(str(path), "f.txt", compile_pattern("laut"))
+    assert found.matches[0].column == 7
+
+def test_search_file_caps_matches_and_spans_chunks(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+
+    with patch("tree_climber_mcp.search.FILE_SCAN_CHUNK", 100):
+        found = search_file(str(path), "f.txt", compile_pattern(r"^line \d*7$"), max_matches=5)
+
+    assert [match.line for match in found.matches] == [7, 17, 27, 37, 47]
+    assert found.more
+
+def test_search_file_skips_binary_and_empty_files(tmp_path):
+    (tmp_path / "bin").write_bytes(b"match\0")
+    (tmp_path / "empty").write_bytes(b"")
+
+    assert search_file(str(tmp_path / "bin"), "bin", compile_pattern("match")) is None
+    assert search_file(str(tmp_path / "empty"), "empty", compile_pattern("match")) is None
+
+def test_compile_pattern_options():
+    assert compile_pattern("a.b", literal=True).regex.search(b"axb") is None
+    assert compile_pattern("todo", ignore_case=True).regex.search(b"TODO")
+    with pytest.raises(ValueError):
+        compile_pattern("")
+    with pytest.raises(re.error):
+        compile_pattern("(")
+
+def test_compile_pattern_keeps_required_literals():
+    assert compile_pattern(r"[Ff]robnicate_\d+").literals == (b"robnicate_",)
+    assert compile_pattern("a.b", literal=True).literals == (b"a.b",)
+    assert compile_pattern(r"get|set").literals == (b"get", b"set")
+    # Literals would miss differently cased text
+    assert compile_pattern("Todo", ignore_case=True).literals == ()
+    assert compile_pattern("(?i)Todo").literals == ()
+    assert compile_pattern(r"\w+").literals == ()
+
+def test_literals_skip_chunks_without_them(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 1001)) + "Frobnicate_1\n")
+
+    with patch("tree_climber_mcp.search.FILE_SCAN_CHUNK", 100):
+        found = search_file(str(path), "f.txt", compile_pattern(r"[Ff]robnicate_\d"))
+
+    assert found.matches == [SearchMatch(1001, 1, "Frobnicate_1")]
+
+@pytest.mark.parametrize("pattern, lines", [
+    (r"value\s+result", [3]),
+    (r"\s+result", [2, 3]),
+    (r"[v]alue\s+result", [3]),
+])
+def test_matches_stay_within_one_line(tmp_path, pattern, lines):
+    path = tmp_path / "f.txt"
+    path.write_text("value\n  result\nvalue  result\n")
+
+    found = search_file(str(path), "f.txt", compile_pattern(pattern))
+
+    assert [match.line for match in found.matches] == lines
+
+@pytest.mark.parametrize("pattern, line", [
+    (r"\x41BCD", "ABCD"),
+    (r"foo\x2Dbar", "foo-bar"),
+    (r"\x41\x42CD", "ABCD"),
+    (r"\101BCD", "ABCD"),
+    (r"foo\055bar", "foo-bar"),
+])
+def test_escaped_patterns_find_what_the_regex_matches(tmp_path, pattern, line):
+    path = tmp_path / "f.txt"
+    path.write_text(f"before\n{line}\nafter\n")
+
+    found = search_file(str(path), "f.txt", compile_pattern(pattern))
+
+    assert re.search(pattern, line)
+    assert found.matches == [SearchMatch(2, 1, line)]
+
+def test_clip_line_keeps_the_match_in_view():
+    text = "x" * 500 + "needle" + "y" * 500
+
+    clipped = clip_line(text, 501, width=100)
+
+    assert "needle" in clipped
+    assert clipped.startswith("…") and clipped.endswith("…")
+    assert clip_line("short", 1, width=100) == "short"
+
+def test_search_tree_skips_ignored_and_binary_files(tree):
+    result = search_tree(str(tree), compile_pattern("import os"), pool=None)
+
+    assert [file.path for file in result.files] == ["a.py"]
+    assert not result.truncated
+
+def test_search_tree_filters_by_include(tree):
+    result = search_tree(str(tree), compile_pattern("todo", ignore_case=True), include="*.py", pool=None)
+
+    assert [(file.path, [m.line for m in file.matches]) for file in result.files] == [("pkg/b.py", [1, 3])]
+
+def test_search_tree_stops_at_the_limit(tree):
+    result = search_tree(str(tree), compile_pattern("."), limit=3, pool=None)
+
+    assert sum(len(file.matches) for file in result.files) == 3
+    assert result.truncated
+
+def test_search_tree_with_worker_processes(tree):
+    for index in range(100):
+        (tree / "many" / f"f{index:03d}.txt").parent.mkdir(exist_ok=True)
+        (tree / "many" / f"f{index:03d}.txt").write_text(f"hit {index}\n")
+    pool = SearchPool(2)
+    try:
+        with patch("tree_climber_mcp.search.SEARCH_BATCH_FILES", 8):
+            result = search_tree(str(tree), compile_pattern("hit"), pool=pool)
+    finally:
+        pool.shutdown()
+
+    # Batches come back in walk order whichever process searched them
+    assert [file.path for file in result.files] == [f"many/f{index:03d}.txt" for index in range(100)]
+    assert result.files_searched == 105
+
+def test_search_file_does_not_follow_a_symlink(tmp_path):
+    (tmp_path / "target").write_text("match\n")
+    (tmp_path / "link").symlink_to(tmp_path / "target")
+
+    assert search_file(str(tmp_path / "link"), "link", compile_pattern("match")) is None
@@ -1,17 +1,36 @@
 import pytest
+from contextlib import ExitStack
 from unittest.mock import AsyncMock, MagicMock, patch
+from tree_climber_mcp.security import COMMAND_POLICY
 from tree_climber_mcp.server import TreeClimberServer
 from mcp.types import Tool, TextContent
 
 @pytest.fixture
 def mock_dependencies():
-    with (patch("tree_climber_mcp.server.Server") as mock_server_cls,
-          patch("tree_climber_mcp.server.CommandTool") as mock_cli_tool_cls,
-          patch("tree_climber_mcp.server.ReadFileTool") as mock_read_tool_cls,
-          patch("tree_climber_mcp.server.WriteFileTool") as mock_write_tool_cls,
-          patch("tree_climber_mcp.server.ListDirectoryTool") as mock_list_tool_cls,
-          patch("tree_climber_mcp.server.ShellManager") as mock_shell_cls,
-          patch("tree_climber_mcp.server.stdio_server") as mock_stdio):
+    with ExitStack() as stack:
+        mock_server_cls = stack.enter_context(patch("tree_climber_mcp.server.Server"))
+        mock_cli_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.CommandTool"))
+        mock_batch_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.BatchCommandTool"))
+        mock_read_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.ReadFileTool"))
+        mock_read_many_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.ReadManyFilesTool"))
+        mock_write_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.WriteFileTool"))
+        mock_edit_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.EditFileTool"))
+        mock_list_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.ListDirectoryTool"))
+        mock_find_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.FindFilesTool"))
+        mock_search_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.SearchFilesTool"))
+        mock_snapshot_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.SnapshotTool"))
+        mock_changes_tool_cls = stack.enter_context(patch("tree_climber_mcp.server.ChangesSinceTool"))
+        mock_job_start_cls = stack.enter_context(patch("tree_climber_mcp.server.StartJobTool"))
+        mock_job_status_cls = stack.enter_context(patch("tree_climber_mcp.server.JobStatusTool"))
+        mock_job_output_cls = stack.enter_context(patch("tree_climber_mcp.server.JobOutputTool"))
+        mock_job_cancel_cls = stack.enter_context(patch("tree_climber_mcp.server.CancelJobTool"))
+        mock_status_cls = stack.enter_context(patch("tree_climber_mcp.server.ServerStatusTool"))
+        mock_shell_cls = stack.enter_context(patch("tree_climber_mcp.server.ShellPool"))
+        mock_jobs_cls = stack.enter_context(patch("tree_climber_mcp.server.JobManager"))
+        mock_io_cls = stack.enter_context(patch("tree_climber_mcp.server.IOExecutor"))
+        mock_search_pool_cls = stack.enter_context(patch("tree_climber_mcp.server.SearchPool"))
+        mock_index_cls = stack.enter_context(patch("tree_climber_mcp.server.DirectoryIndex"))
+        mock_stdio = stack.enter_context(patch("tree_climber_mcp.server.stdio_server"))
          
         mock_server_instance = MagicMock()
         mock_server_cls.return_value = mock_server_instance
@@ -27,20 +46,43 @@ def mock_dependencies():
         
         mock_shell_instance = AsyncMock()
         mock_shell_cls.return_value = mock_shell_instance
+        mock_jobs_instance = AsyncMock()
+        mock_jobs_cls.return_value = mock_jobs_instance
 
         # Setup mock tools
         mocks = {
             "cli": mock_cli_tool_cls,
+            "batch": mock_batch_tool_cls,
             "read": mock_read_tool_cls,
+            "read_many": mock_read_many_tool_cls,
             "write": mock_write_tool_cls,
+            "edit": mock_edit_tool_cls,
             "list": mock_list_tool_cls,
+            "find": mock_find_tool_cls,
+            "search": mock_search_tool_cls,
+            "snapshot": mock_snapshot_tool_cls,
+            "changes": mock_changes_tool_cls,
+            "job_start": mock_job_start_cls,
+            "job_status": mock_job_status_cls,
+            "job_output": mock_job_output_cls,
+            "job_cancel": mock_job_cancel_cls,
+            "status": mock_status_cls,
             "server": mock_server_instance,
             "shell": mock_shell_instance,
+            "shell_cls": mock_shell_cls,
+            "jobs": mock_jobs_instance,
+            "jobs_cls": mock_jobs_cls,
+            "io": mock_io_cls.return_value,
+            "io_cls": mock_io_cls,
+            "search_pool": mock_search_pool_cls.return_value,
+            "search_pool_cls": mock_search_pool_cls,
+            "index": mock_index_cls.return_value,
+            "index_cls": mock_index_cls,
             "stdio": mock_stdio
         }
 
         # Ensure tools return valid tool definitions
-        for key in ["cli", "read", "write", "list"]:
+        for key in ["cli", "batch", "read", "read_many", "write", "edit", "list", "find", "search", "snapshot", "changes", "job_start", "job_status", "job_output", "job_cancel", "status"]:
              tool_instance = MagicMock()
              tool_instance.get_tool.return_value = Tool(name=f"{key}_tool", description="desc", inputSchema={})
              # Make call_tool async
@@ -57,18 +99,58 @@ def server(mock_dependencies):
 def test_init(server, mock_dependencies):
     mocks = mock_dependencies
     
-    # Check ShellManager created
-    assert server._shell_manager == mocks["shell"]
+    # Check ShellPool created with the default size
+    assert server._shell_pool == mocks["shell"]
+    mocks["shell_cls"].assert_called_once_with(1, 8, 4 * 1024 * 1024)
     
     # Check tools registered
-    assert len(server._tools) == 4
+    assert len(server._tools) == 16
     assert "cli_tool" in server._tools
+    assert "batch_tool" in server._tools
+    mocks["cli"].assert_called_once_with(mocks["shell"], COMMAND_POLICY)
+    mocks["batch"].assert_called_once_with(mocks["shell"], COMMAND_POLICY)
     assert "read_tool" in server._tools
     assert "write_tool" in server._tools
     assert "list_tool" in server._tools
-    mocks["read"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None)
-    mocks["write"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None)
-    mocks["list"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None)
+    mocks["read"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"])
+    assert "read_many_tool" in server._tools
+    mocks["read_many"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"])
+    mocks["write"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"])
+    assert "edit_tool" in server._tools
+    mocks["edit"].assert_called_once_with(mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"])
+    mocks["list"].assert_called_once_with(
+        mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"], directory_index=None
+    )
+    assert "find_tool" in server._tools
+    mocks["find"].assert_called_once_with(
+        mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"], directory_index=None
+    )
+    assert "search_tool" in server._tools
+    mocks["search"].assert_called_once_with(
+        mocks["shell"],
+        allow_all_paths=False,
+        filesystem_root=None,
+        io_executor=mocks["io"],
+        search_pool=mocks["search_pool"],
+        directory_index=None,
+    )
+    mocks["search_pool_cls"].assert_called_once_with(4)
+    assert "snapshot_tool" in server._tools
+    assert "changes_tool" in server._tools
+    for key in ("snapshot", "changes"):
+        mocks[key].assert_called_once_with(
+            mocks["shell"], allow_all_paths=False, filesystem_root=None, io_executor=mocks["io"], directory_index=None
+        )
+    mocks["index_cls"].assert_not_called()
+    mocks["jobs_cls"].assert_called_once_with(spill_limit=0)
+    mocks["io_cls"].assert_called_once_with(16, 30)
+    mocks["job_start"].assert_called_once_with(mocks["jobs"], mocks["shell"], COMMAND_POLICY)
+    for key in ["job_start", "job_status", "job_output", "job_cancel"]:
+        assert f"{key}_tool" in server._tools
+    for key in ["job_status", "job_output", "job_cancel"]:
+        mocks[key].assert_called_once_with(mocks["jobs"], mocks["shell"])
+    assert "status_tool" in server._tools
+    mocks["status"].assert_called_once_with(mocks["shell"], io_executor=mocks["io"], directory_index=None)
 
 def test_init_with_custom_filesystem_policy(mock_dependencies):
     logger = MagicMock()
@@ -77,30 +159,72 @@ def test_init_with_custom_filesystem_policy(mock_dependencies):
         filesystem_root="/trusted/root",
     )
 
-    assert server._shell_manager == mock_dependencies["shell"]
+    assert server._shell_pool == mock_dependencies["shell"]
     mock_dependencies["read"].assert_called_once_with(
         mock_dependencies["shell"],
         allow_all_paths=False,
         filesystem_root="/trusted/root",
+        io_executor=mock_dependencies["io"],
     )
     mock_dependencies["write"].assert_called_once_with(
         mock_dependencies["shell"],
         allow_all_paths=False,
         filesystem_root="/trusted/root",
+        io_executor=mock_dependencies["io"],
     )
     mock_dependencies["list"].assert_called_once_with(
         mock_dependencies["shell"],
         allow_all_paths=False,
         filesystem_root="/trusted/root",
+        io_executor=mock_dependencies["io"],
+        directory_index=None,
     )
 
+def test_init_with_custom_shell_pool(mock_dependencies):
+    TreeClimberServer(MagicMock(), shell_pool_size=4, shell_max_waiters=2, command_output_limit=1024)
+
+    mock_dependencies["shell_cls"].assert_called_once_with(4, 2, 1024)
+
+def test_init_with_policy_file(mock_dependencies, tmp_path):
+    policy_file = tmp_path / "policy.toml"
+    policy_file.write_text("patterns = ['terraform\\s+destroy']\n")
+
+    server = TreeClimberServer(MagicMock(), policy_file=str(policy_file))
+
+    watcher = server._policy_watcher
+    assert watcher.is_permitted("terraform destroy") is False
+    mock_dependencies["cli"].assert_called_once_with(mock_dependencies["shell"], watcher)
+    mock_dependencies["job_start"].assert_called_once_with(
+        mock_dependencies["jobs"], mock_dependencies["shell"], watcher
+    )
+
+@pytest.mark.asyncio
+async def test_directory_index_is_shared_started_and_closed(mock_dependencies):
+    mocks = mock_dependencies
+    logger = MagicMock()
+    server = TreeClimberServer(logger, filesystem_root="/trusted/root", directory_index=True, directory_index_budget=1024)
+    mocks["stdio"].return_value.__aenter__.return_value = (AsyncMock(), AsyncMock())
+    mocks["server"].run = AsyncMock()
+    mocks["server"].get_capabilities.return_value = {"tools": {}}
+
+    await server.run()
+
+    mocks["index_cls"].assert_called_once_with("/trusted/root", logger, 1024)
+    for key in ("list", "find", "search", "snapshot", "changes", "status"):
+        assert mocks[key].call_args.kwargs["directory_index"] is mocks["index"]
+    mocks["index"].start.assert_called_once()
+    mocks["index"].close.assert_called_once()
+
 @pytest.mark.asyncio
 async def test_cleanup(server, mock_dependencies):
     mocks = mock_dependencies
     
     await server._cleanup()
     
+    mocks["jobs"].cleanup.assert_called_once()
     mocks["shell"].cleanup.assert_called_once()
+    mocks["io"].shutdown.assert_called_once()
+    mocks["search_pool"].shutdown.assert_called_once()
     
 @pytest.mark.asyncio
 async def test_run_success(server, mock_dependencies):
@@ -1,90 +1,528 @@
+import asyncio
+import io
+import json
+import os
 import pytest
-from unittest.mock import MagicMock, patch
-from tree_climber_mcp.config import COMMAND_TIMEOUT, SHELL_PROMPT
-from tree_climber_mcp.shell import ShellManager
+from unittest.mock import AsyncMock, MagicMock, patch
+from tree_climber_mcp.capture import CappedOutput
+from tree_climber_mcp.config import COMMAND_OUTPUT_LIMIT, SHELL_PROMPT
+from tree_climber_mcp.direct import PipelineTimeout
+from tree_climber_mcp.shell import (
+    FRAME_HELPER,
+    INLINE_COMMAND_LIMIT,
+    RESTORE_HELPER,
+    CommandResult,
+    SNAPSHOT_COMMAND,
+    ShellManager,
+)
 import pexpect
-from unittest.mock import PropertyMock
+
+TOKEN = "tok"
 
 @pytest.fixture
 def mock_pexpect_spawn():
     with patch("pexpect.spawn") as mock_spawn:
         yield mock_spawn
 
+class FakePty:
+    """A pipe standing in for the xonsh pty that framed output is read from."""
+
+    def __init__(self, proc):
+        self.read_fd, self.write_fd = os.pipe()
+        proc.child_fd = self.read_fd
+        proc.buffer = ""
+        proc.buffer_type = io.StringIO
+
+    def write(self, text):
+        os.write(self.write_fd, text.encode())
+
+    def hang_up(self):
+        # The reader sees EOF, as when xonsh exits
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+            self.write_fd = None
+
+    def close(self):
+        self.hang_up()
+        os.close(self.read_fd)
+
 @pytest.fixture
-def shell_manager(mock_pexpect_spawn):
+def fake_pty():
+    ptys = []
+
+    def attach(proc):
+        proc.pty = FakePty(proc)
+        ptys.append(proc.pty)
+        return proc.pty
+
+    yield attach
+    for pty in ptys:
+        pty.close()
+
+@pytest.fixture
+def shell_manager(mock_pexpect_spawn, fake_pty):
     # Setup the mock process instance returned by spawn
     mock_proc = MagicMock()
+    mock_proc.expect_exact = AsyncMock()
+    fake_pty(mock_proc)
     mock_pexpect_spawn.return_value = mock_proc
-    
-    # Initialize manager
-    manager = ShellManager()
-    return manager, mock_proc
+
+    # Use a fixed token so the expected markers are predictable
+    with patch("tree_climber_mcp.shell.secrets.token_hex", return_value=TOKEN):
+        manager = ShellManager()
+        manager._ready = True
+        yield manager, mock_proc
+
+def script_befores(mock_proc, befores):
+    """Make each expect_exact call expose the next scripted `before` text.
+
+    Like pexpect, text left in the buffer by the framed reader comes first.
+    """
+    remaining = list(befores)
+
+    async def fake_expect(*args, **kwargs):
+        mock_proc.before = mock_proc.buffer + remaining.pop(0)
+        mock_proc.buffer = ""
+
+    mock_proc.expect_exact.side_effect = fake_expect
+
+def framed(output, exit_code=0, cwd="/home/user"):
+    # echoed input, begin marker, output, end marker with status, prompt
+    return (
+        f"echoed input\r\n<<tc:{TOKEN}:begin>>\r\n{output}"
+        f"<<tc:{TOKEN}:end:{exit_code}:{cwd}:{TOKEN}>>\r\n{SHELL_PROMPT}"
+    )
 
 @pytest.mark.asyncio
-async def test_init(shell_manager):
+async def test_init(shell_manager, mock_pexpect_spawn):
     manager, mock_proc = shell_manager
     assert manager._xonsh_proc == mock_proc
-    assert mock_proc.delaybeforesend == 2
+    # No fixed delay before each send
+    assert mock_proc.delaybeforesend is None
+    assert mock_pexpect_spawn.call_args.kwargs["env"]["TERM"] == "dumb"
 
 @pytest.mark.asyncio
 async def test_flush_buffer(shell_manager):
     manager, mock_proc = shell_manager
-    
-    # Configure mock to simulate buffer behavior
-    # First call to buffer returns "some output", second returns "" (empty)
-    type(mock_proc).buffer = PropertyMock(side_effect=["some output", ""])
-    
+    manager._ready = False
+    script_befores(mock_proc, ["welcome banner", "/home/user", "\r\n"])
+
     await manager.flush_buffer()
-    
-    # Verify prompt was set
-    expected_set_prompt = f'$PROMPT = "{SHELL_PROMPT}"'
-    mock_proc.sendline.assert_called_with(expected_set_prompt)
-    
-    # Verify we waited for prompt
-    assert mock_proc.expect_exact.call_count >= 1
-    mock_proc.expect_exact.assert_called_with(SHELL_PROMPT)
+
+    setup = mock_proc.sendline.call_args.args[0]
+    assert f'$PROMPT = "{SHELL_PROMPT}"' in setup
+    assert FRAME_HELPER in setup
+    # The ready marker is split in the sent line so its echo cannot match
+
+    assert f"<<tc:{TOKEN}:ready:" not in setup
+
+    mock_proc.expect_exact.assert_any_await(f"<<tc:{TOKEN}:ready:", timeout=-1, async_=True)
+    mock_proc.expect_exact.assert_awaited_with(SHELL_PROMPT, timeout=-1, async_=True)
+    assert manager._ready is True
+    assert await manager.get_pwd() == "/home/user"
 
 @pytest.mark.asyncio
 async def test_run_command_success(shell_manager):
     manager, mock_proc = shell_manager
-    
+    mock_proc.pty.write(framed("hello\r\n"))
+
     cmd = "echo hello"
-    expected_output = "hello\r\n"
-    
-    full_output = f"{cmd}\r\n{expected_output}"
-    type(mock_proc).before = PropertyMock(return_value=full_output)
-    
     result = await manager.run_command(cmd)
-    
-    mock_proc.sendline.assert_called_with(cmd)
-    mock_proc.expect_exact.assert_called_with(SHELL_PROMPT, timeout=COMMAND_TIMEOUT)
-    
-    assert result == expected_output
+
+    mock_proc.sendline.assert_called_with(f"{FRAME_HELPER}('{TOKEN}', 'echo hello')")
+    # The exchange is read from the pty directly, not through pexpect
+    mock_proc.expect_exact.assert_not_awaited()
+
+    assert result.output == "hello\n"
+    assert result.exit_code == 0
+    assert result.duration >= 0
+    assert result.output_bytes == len("hello\n")
+    assert result.omitted_bytes == 0
+
+@pytest.mark.asyncio
+async def test_run_command_output_split_across_reads(shell_manager):
+    manager, mock_proc = shell_manager
+    frame = framed("hello\r\n")
+    mock_proc.pty.write(frame[:30])
+    asyncio.get_running_loop().call_later(0.01, mock_proc.pty.write, frame[30:])
+
+    result = await manager.run_command("echo hello")
+
+    assert result.output == "hello\n"
+    assert mock_proc.buffer == ""
+
+@pytest.mark.asyncio
+async def test_run_command_truncates_large_output(shell_manager):
+    manager, mock_proc = shell_manager
+    manager._output_limit = 8
+    mock_proc.pty.write(framed("head" + "x" * 1000 + "tail"))
+
+    result = await manager.run_command("big")
+
+    assert result.output == "head\n[... 1000 bytes omitted ...]\ntail"
+    assert result.output_bytes == 1008
+    assert result.omitted_bytes == 1000
+    assert result.exit_code == 0
 
 @pytest.mark.asyncio
 async def test_run_command_success_with_regex_characters(shell_manager):
     manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed("[a-z]+\r\n"))
 
-    cmd = "echo [a-z]+"
-    full_output = f"{cmd}\r\n[a-z]+\r\n"
-    type(mock_proc).before = PropertyMock(return_value=full_output)
+    result = await manager.run_command("echo [a-z]+")
 
-    result = await manager.run_command(cmd)
+    assert result.output == "[a-z]+\n"
 
-    assert result == "[a-z]+\r\n"
+@pytest.mark.asyncio
+async def test_run_command_output_containing_prompt(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed(f"{SHELL_PROMPT}\r\nmore\r\n"))
+
+    result = await manager.run_command(f"echo '{SHELL_PROMPT}'; echo more")
+
+    assert result.output == f"{SHELL_PROMPT}\nmore\n"
 
 @pytest.mark.asyncio
-async def test_run_command_timeout(shell_manager):
+async def test_run_command_reports_exit_status(shell_manager):
     manager, mock_proc = shell_manager
-    
-    cmd = "sleep 100"
-    
-    # Simulate TIMEOUT exception
+    mock_proc.pty.write(framed("ls: missing\r\n", exit_code=2))
+
+    result = await manager.run_command("ls missing")
+
+    assert result.output == "ls: missing\n"
+    assert result.exit_code == 2
+
+@pytest.mark.asyncio
+async def test_run_command_without_trailing_newline(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed("hi"))
+
+    result = await manager.run_command("printf hi")
+
+    assert result.output == "hi"
+
+@pytest.mark.asyncio
+async def test_run_command_passes_long_commands_through_file(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed("ok\r\n"))
+    cmd = "echo " + "a" * INLINE_COMMAND_LIMIT
+
+    await manager.run_command(cmd)
+
+    sent = mock_proc.sendline.call_args.args[0]
+    assert len(sent) < INLINE_COMMAND_LIMIT
+    path = eval(sent[sent.index("None, ") + len("None, "):-1])
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == cmd
+    os.unlink(path)
+
+@pytest.mark.asyncio
+async def test_run_command_timeout_interrupts_and_resyncs(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(f"echoed input\r\n<<tc:{TOKEN}:begin>>\r\npartial output\r\n")
+    # after the interrupt the frame helper still prints its end marker
+    script_befores(mock_proc, ["^C\r\n", "-2:/home/user", "\r\n"])
+
+    result = await manager.run_command("sleep 100", 0.05)
+
+    mock_proc.sendintr.assert_called_once()
+    assert result.timed_out is True
+    assert result.recovery == "interrupted"
+    assert result.recovery_duration >= 0
+    # Output read before the timeout is joined with what the interrupt flushed
+    assert result.output == "partial output\n^C\n"
+    assert result.exit_code == -2
+
+@pytest.mark.asyncio
+async def test_run_command_timeout_before_begin_marker(shell_manager):
+    manager, mock_proc = shell_manager
+    script_befores(mock_proc, [f"echoed input\r\n<<tc:{TOKEN}:begin>>\r\n^C\r\n", "1:/home/user", "\r\n"])
+
+    result = await manager.run_command("sleep 100", 0.05)
+
+    assert result.output == "^C\n"
+    assert result.recovery == "interrupted"
+
+@pytest.mark.asyncio
+async def test_run_command_timeout_respawns_unresponsive_shell(shell_manager, mock_pexpect_spawn):
+    manager, mock_proc = shell_manager
+    manager._track_cwd("/tmp")
     mock_proc.expect_exact.side_effect = pexpect.exceptions.TIMEOUT("Timeout")
-    
-    result = await manager.run_command(cmd)
-    
-    assert result == "Timed out waiting for command to run..."
+    mock_proc.before = "\r\ntrapped\r\n"
+
+    fresh_proc = MagicMock()
+    fresh_proc.expect_exact = AsyncMock()
+    fresh_proc.buffer = ""
+    mock_pexpect_spawn.return_value = fresh_proc
+    script_befores(fresh_proc, ["banner", "/tmp", "\r\n"])
+
+    result = await manager.run_command("trap '' INT; sleep 100", 0.05)
+
+    mock_proc.sendintr.assert_called_once()
+    mock_proc.close.assert_called_once_with(force=True)
+    # The fresh shell starts where the old one was
+    assert mock_pexpect_spawn.call_args.kwargs["cwd"] == "/tmp"
+    assert manager._xonsh_proc is fresh_proc
+    assert manager._ready is True
+    assert result.recovery == "respawned"
+    assert result.output == "trapped\n"
+    assert result.exit_code is None
+
+@pytest.mark.asyncio
+async def test_run_command_timeout_reports_failed_respawn(shell_manager, mock_pexpect_spawn):
+    manager, mock_proc = shell_manager
+    mock_proc.expect_exact.side_effect = pexpect.exceptions.TIMEOUT("Timeout")
+    mock_proc.before = ""
+
+    fresh_proc = MagicMock()
+    fresh_proc.expect_exact = AsyncMock(side_effect=pexpect.exceptions.EOF("EOF"))
+    mock_pexpect_spawn.return_value = fresh_proc
+
+    result = await manager.run_command("sleep 100", 0.05)
+
+    assert result.recovery == "failed"
+    assert manager._ready is False
+
+@pytest.mark.asyncio
+async def test_run_command_eof(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.hang_up()
+    # and the replacement shell does not come up either
+    mock_proc.expect_exact.side_effect = pexpect.exceptions.EOF("EOF")
+
+    result = await manager.run_command("echo hi")
+
+    assert result.output == "Unknown exception caused shell instance to close..."
+    assert manager._ready is False
+
+@pytest.fixture
+def standby(fake_pty):
+    """A bootstrapped standby shell handed out by a supervisor."""
+    standby_proc = MagicMock()
+    standby_proc.expect_exact = AsyncMock()
+    fake_pty(standby_proc)
+    standby_shell = MagicMock()
+    standby_shell._xonsh_proc = standby_proc
+    standby_shell._ready = True
+    return standby_shell, standby_proc
+
+@pytest.mark.asyncio
+async def test_run_command_eof_fails_over_to_standby(shell_manager, standby):
+    manager, mock_proc = shell_manager
+    standby_shell, standby_proc = standby
+    manager._standby_source = AsyncMock(return_value=standby_shell)
+    manager._track_cwd("/tmp/project")
+    manager._env = {"FOO": "bar"}
+    mock_proc.pty.hang_up()
+    standby_proc.pty.write(framed("", cwd="/tmp/project"))
+
+    result = await manager.run_command("kill -9 $$")
+
+    mock_proc.close.assert_called_once_with(force=True)
+    assert manager._xonsh_proc is standby_proc
+    assert result.recovery == "standby"
+    assert result.recovery_duration >= 0
+    # The old session's cwd and environment are replayed into the standby
+    replay = f"{RESTORE_HELPER}('/tmp/project', {json.dumps({'FOO': 'bar'})!r})"
+    standby_proc.sendline.assert_called_once_with(f"{FRAME_HELPER}('{TOKEN}', {replay!r})")
+    assert await manager.get_pwd() == "/tmp/project"
+
+@pytest.mark.asyncio
+async def test_exit_fails_over_after_returning_output(shell_manager, standby):
+    manager, mock_proc = shell_manager
+    standby_shell, standby_proc = standby
+    manager._standby_source = AsyncMock(return_value=standby_shell)
+    # The end marker arrives, then the shell exits instead of prompting
+    mock_proc.pty.write(framed("bye\r\n")[: -len(SHELL_PROMPT)])
+    mock_proc.pty.hang_up()
+    standby_proc.pty.write(framed("", cwd="/home/user"))
+
+    result = await manager.run_command("echo bye; exit")
+
+    assert result.output == "bye\n"
+    assert result.exit_code == 0
+    assert result.recovery == "standby"
+    assert manager._xonsh_proc is standby_proc
+
+@pytest.mark.asyncio
+async def test_run_command_replaces_shell_that_died_between_commands(shell_manager, standby):
+    manager, mock_proc = shell_manager
+    standby_shell, standby_proc = standby
+    manager._standby_source = AsyncMock(return_value=standby_shell)
+    mock_proc.isalive.return_value = False
+    standby_proc.pty.write(framed("hi\r\n"))
+
+    result = await manager.run_command("echo hi")
+
+    # Nothing to replay, so the command itself is the first thing the standby runs
+    standby_proc.sendline.assert_called_once_with(f"{FRAME_HELPER}('{TOKEN}', 'echo hi')")
+    assert result.output == "hi\n"
+
+@pytest.mark.asyncio
+async def test_health_check_refreshes_session_snapshot(shell_manager):
+    manager, mock_proc = shell_manager
+    snapshot = {"env": {"FOO": "bar"}, "aliases": {"ll": ["ls", "-l"]}, "names": ["x"]}
+    mock_proc.pty.write(framed(json.dumps(snapshot) + "\r\n") + framed(""))
+
+    assert await manager.health_check() is True
+    mock_proc.sendline.assert_called_with(f"{FRAME_HELPER}('{TOKEN}', {SNAPSHOT_COMMAND!r})")
+    assert manager._env == {"FOO": "bar"}
+    assert manager._aliases == {"ll": ["ls", "-l"]}
+    assert manager._names == {"x"}
+
+    # Nothing ran since, so the next check is a plain probe
+    assert await manager.health_check() is True
+    mock_proc.sendline.assert_called_with(f"{FRAME_HELPER}('{TOKEN}', '')")
+
+@pytest.mark.asyncio
+async def test_health_check_skips_busy_session(shell_manager):
+    manager, mock_proc = shell_manager
+
+    async with manager._lock:
+        assert await manager.health_check() is True
+
+    mock_proc.sendline.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_health_check_replaces_dead_shell(shell_manager, standby):
+    manager, mock_proc = shell_manager
+    standby_shell, standby_proc = standby
+    manager._standby_source = AsyncMock(return_value=standby_shell)
+    mock_proc.isalive.return_value = False
+
+    assert await manager.health_check() is False
+    assert manager._xonsh_proc is standby_proc
+
+@pytest.fixture
+def direct_session(shell_manager, tmp_path):
+    """A session with a fresh snapshot and the pipeline runner mocked out."""
+    manager, mock_proc = shell_manager
+    manager._track_cwd(str(tmp_path))
+    manager._env = {"PATH": os.environ["PATH"]}
+    manager._aliases = {"ls": ["ls", "--color=auto"], "cd": None}
+    manager._names = frozenset({"print", "x"})
+    manager._snapshot_stale = False
+    with patch("tree_climber_mcp.shell.run_pipeline", new_callable=AsyncMock) as mock_run:
+        stdout, stderr = CappedOutput(), CappedOutput()
+        stdout.write(b"out\n")
+        stderr.write(b"err\n")
+        mock_run.return_value = (stdout, stderr, 0)
+        yield manager, mock_proc, mock_run
+
+@pytest.mark.asyncio
+async def test_run_direct_expands_plain_alias(direct_session, tmp_path):
+    manager, mock_proc, mock_run = direct_session
+
+    result = await manager.run_direct([["ls", "-la"], ["wc", "-l"]], 5)
+
+    mock_run.assert_awaited_once_with(
+        [["ls", "--color=auto", "-la"], ["wc", "-l"]], str(tmp_path), manager._env, 5, COMMAND_OUTPUT_LIMIT
+    )
+    mock_proc.sendline.assert_not_called()
+    assert result.output == "out\n"
+    assert result.stderr == "err\n"
+    assert result.exit_code == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "pipeline",
+    [
+        [["cd", "/tmp"]],
+        [["print"]],
+        [["x", "-1"]],
+        [["tree-climber-no-such-program"]],
+        [["ls"], ["./not-here"]],
+    ],
+)
+async def test_run_direct_declines_what_xonsh_would_not_exec(direct_session, pipeline):
+    manager, mock_proc, mock_run = direct_session
+
+    assert await manager.run_direct(pipeline, 5) is None
+    mock_run.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_run_direct_refreshes_stale_snapshot(direct_session):
+    manager, mock_proc, mock_run = direct_session
+    manager._snapshot_stale = True
+    snapshot = {"env": {"PATH": os.environ["PATH"], "FOO": "bar"}, "aliases": {}, "names": []}
+    mock_proc.pty.write(framed(json.dumps(snapshot) + "\r\n", cwd="/tmp"))
+
+    await manager.run_direct([["env"]], 5)
+
+    mock_proc.sendline.assert_called_once_with(f"{FRAME_HELPER}('{TOKEN}', {SNAPSHOT_COMMAND!r})")
+    mock_run.assert_awaited_once_with([["env"]], "/tmp", snapshot["env"], 5, COMMAND_OUTPUT_LIMIT)
+
+@pytest.mark.asyncio
+async def test_run_direct_keeps_snapshot_fresh(direct_session):
+    manager, mock_proc, mock_run = direct_session
+
+    await manager.run_direct([["git", "status"]], 5)
+    await manager.run_direct([["git", "status"]], 5)
+
+    # External programs cannot change the session, so no snapshot is taken
+    mock_proc.sendline.assert_not_called()
+    assert manager._snapshot_stale is False
+
+@pytest.mark.asyncio
+async def test_run_direct_timeout_reports_kill(direct_session):
+    manager, mock_proc, mock_run = direct_session
+    stdout, stderr = CappedOutput(COMMAND_OUTPUT_LIMIT), CappedOutput(COMMAND_OUTPUT_LIMIT)
+    stdout.write(b"partial\n")
+    stderr.write(b"warning\n")
+    mock_run.side_effect = PipelineTimeout(stdout, stderr, 0.05)
+
+    result = await manager.run_direct([["sleep", "100"]], 1)
+
+    assert result.timed_out is True
+    assert result.recovery == "killed"
+    assert result.exit_code is None
+    assert (result.output, result.stderr, result.output_bytes) == ("partial\n", "warning\n", 8)
+    assert result.recovery_duration == 0.05
+
+@pytest.mark.asyncio
+async def test_run_command_marks_snapshot_stale(direct_session):
+    manager, mock_proc, mock_run = direct_session
+    mock_proc.pty.write(framed(""))
+
+    await manager.run_command("$FOO = 'bar'")
+
+    assert manager._snapshot_stale is True
+
+@pytest.mark.asyncio
+async def test_run_command_does_not_block_event_loop(shell_manager):
+    manager, mock_proc = shell_manager
+
+    task = asyncio.create_task(manager.run_command("sleep 5"))
+    # Other coroutines keep running while the command is in flight
+    await asyncio.sleep(0.01)
+    assert not task.done()
+    mock_proc.pty.write(framed(""))
+
+    assert (await task).output == ""
+
+@pytest.mark.asyncio
+async def test_run_command_serializes_exchanges(shell_manager):
+    manager, mock_proc = shell_manager
+
+    in_flight = 0
+    max_in_flight = 0
+
+    def reply():
+        nonlocal in_flight
+        in_flight -= 1
+        mock_proc.pty.write(framed(""))
+
+    def tracking_send(line):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        asyncio.get_running_loop().call_soon(reply)
+
+    mock_proc.sendline.side_effect = tracking_send
+
+    await asyncio.gather(manager.run_command("a"), manager.run_command("b"))
+
+    assert max_in_flight == 1
 
 @pytest.mark.asyncio
 async def test_cleanup(shell_manager):
@@ -95,25 +533,73 @@ async def test_cleanup(shell_manager):
 @pytest.mark.asyncio
 async def test_get_pwd(shell_manager):
     manager, mock_proc = shell_manager
-    
-    # Mock output: command echo + newline + path + newline
-    # The parsing logic splits lines and ignores the command line.
-    mock_output = "print($PWD)\r\n/users/test/dir\r\n"
-    type(mock_proc).before = PropertyMock(return_value=mock_output)
-    
+    mock_proc.pty.write(framed("", cwd="/users/test/dir"))
+
     pwd = await manager.get_pwd()
-    
-    mock_proc.sendline.assert_called_with("print($PWD)")
-    mock_proc.expect_exact.assert_called_with(SHELL_PROMPT, timeout=COMMAND_TIMEOUT)
-    
+
+    # Nothing tracked yet, so an empty framed command reports the cwd
+    mock_proc.sendline.assert_called_once_with(f"{FRAME_HELPER}('{TOKEN}', '')")
     assert pwd == "/users/test/dir"
 
+@pytest.mark.asyncio
+async def test_get_pwd_uses_cache_after_commands(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed("", cwd="/tmp/project"))
+
+    await manager.run_command("cd /tmp/project")
+    mock_proc.sendline.reset_mock()
+
+    assert await manager.get_pwd() == "/tmp/project"
+    mock_proc.sendline.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_pwd_does_not_wait_for_running_command(shell_manager):
+    manager, mock_proc = shell_manager
+    manager._track_cwd("/tmp/project")
+
+    async with manager._lock:
+        # A command holds the session, but the cached cwd is still served
+        assert await manager.get_pwd() == "/tmp/project"
+
+@pytest.mark.asyncio
+async def test_cwd_cache_follows_directory_changes(shell_manager):
+    manager, mock_proc = shell_manager
+    mock_proc.pty.write(framed("", cwd="/tmp") + framed("", cwd="/var"))
+
+    await manager.run_command("cd /tmp")
+    assert await manager.get_pwd() == "/tmp"
+    await manager.run_command("cd /var")
+    assert await manager.get_pwd() == "/var"
+
+@pytest.mark.asyncio
+async def test_get_real_pwd_resolves_symlinks_once(shell_manager):
+    manager, mock_proc = shell_manager
+    with patch("tree_climber_mcp.shell.os.path.realpath", return_value="/real/dir") as mock_realpath:
+        manager._track_cwd("/link/dir")
+        manager._track_cwd("/link/dir")
+
+        assert await manager.get_real_pwd() == "/real/dir"
+        assert await manager.get_real_pwd() == "/real/dir"
+
+    mock_realpath.assert_called_once_with("/link/dir")
+
+@pytest.mark.asyncio
+async def test_eof_invalidates_cwd_cache(shell_manager):
+    manager, mock_proc = shell_manager
+    manager._track_cwd("/tmp")
+    mock_proc.pty.hang_up()
+    mock_proc.expect_exact.side_effect = pexpect.exceptions.EOF("EOF")
+
+    await manager.run_command("exit")
+
+    assert manager._cwd is None
+
 @pytest.mark.asyncio
 async def test_get_pwd_error(shell_manager):
     manager, mock_proc = shell_manager
-    
-    # Simulate exception during expect
-    mock_proc.expect_exact.side_effect = Exception("Boom")
-    
+
+    # Simulate an unexpected failure talking to the shell
+    mock_proc.sendline.side_effect = Exception("Boom")
+
     pwd = await manager.get_pwd()
     assert pwd == ""
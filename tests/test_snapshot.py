@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from tree_climber_mcp.snapshot import SnapshotStore, changes_since, take_snapshot
+
+@pytest.fixture
+def tree(tmp_path):
+    for path in ("a/b/c.txt", "a.txt", "a-b/d.txt", "z.txt", "build/out.o", "node_modules/m.js"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    (tmp_path / ".gitignore").write_text("build/\n")
+    (tmp_path / "link").symlink_to("a")
+    return tmp_path
+
+def _paths(snapshot):
+    return [snapshot.path(index) for index in range(len(snapshot))]
+
+def test_snapshot_records_files_in_component_order(tree):
+    snapshot = take_snapshot(1, str(tree))
+
+    # "a/b/c.txt" sorts before "a-b" and "a.txt" by component, though "/" > "-" and "."
+    assert _paths(snapshot) == [".gitignore", "a/b/c.txt", "a-b/d.txt", "a.txt", "link", "z.txt"]
+    stat = os.lstat(tree / "a.txt")
+    assert snapshot.stat(3) == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+def test_snapshot_can_include_ignored_paths(tree):
+    snapshot = take_snapshot(1, str(tree), gitignore=False)
+
+    assert {"build/out.o", "node_modules/m.js"} <= set(_paths(snapshot))
+
+def test_snapshot_is_array_backed(tree):
+    snapshot = take_snapshot(1, str(tree))
+
+    paths = sum(len(os.fsencode(path)) for path in _paths(snapshot))
+    assert snapshot.nbytes == paths + 32 * len(snapshot)
+
+def test_snapshot_limit(tree):
+    with pytest.raises(ValueError, match="holds more than 2 files"):
+        take_snapshot(1, str(tree), limit=2)
+
+def test_changes_merge_walk(tree):
+    snapshot = take_snapshot(1, str(tree))
+    (tree / "a" / "b" / "c.txt").unlink()
+    (tree / "a" / "b" / "new.txt").write_text("")
+    (tree / "a.txt").write_text("grown")
+    (tree / "z.txt").unlink()
+    (tree / "zz").mkdir()
+    (tree / "zz" / "e.txt").write_text("")
+    (tree / "build" / "ignored.o").write_text("")
+
+    changes = changes_since(snapshot)
+
+    assert changes.added == ["a/b/new.txt", "zz/e.txt"]
+    assert changes.removed == ["a/b/c.txt", "z.txt"]
+    assert changes.modified == ["a.txt"]
+    assert (changes.files, changes.snapshot) == (6, None)
+
+def test_replaced_file_of_same_size_is_modified(tree):
+    snapshot = take_snapshot(1, str(tree))
+    replacement = tree / "replacement"
+    replacement.write_text("a-b/d.txt")
+    os.utime(replacement, ns=(os.stat(tree / "a-b" / "d.txt").st_mtime_ns,) * 2)
+    os.replace(replacement, tree / "a-b" / "d.txt")
+
+    assert changes_since(snapshot).modified == ["a-b/d.txt"]
+
+def test_renew_records_the_current_state(tree):
+    snapshot = take_snapshot(4, str(tree))
+    (tree / "new.txt").write_text("")
+
+    changes = changes_since(snapshot, renew=True)
+
+    assert changes.added == ["new.txt"]
+    assert changes.snapshot.snapshot_id == 4
+    assert len(changes_since(changes.snapshot)) == 0
+
+def test_store_evicts_least_recently_used(tree):
+    first = take_snapshot(1, str(tree))
+    store = SnapshotStore(budget=2 * first.nbytes)
+    store.put(first)
+    store.put(take_snapshot(2, str(tree)))
+
+    assert store.get(1) is first
+    store.put(take_snapshot(3, str(tree)))
+
+    assert store.get(2) is None and store.get(1) is first
+    assert (len(store), store.next_id()) == (2, 1)
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from tree_climber_mcp.supervisor import ShellSupervisor
+import pexpect
+
+@pytest.fixture
+def mock_shell_cls():
+    with patch("tree_climber_mcp.supervisor.ShellManager") as mock_cls:
+        def make_shell():
+            shell = AsyncMock()
+            shell.is_alive = MagicMock(return_value=True)
+            return shell
+        mock_cls.side_effect = make_shell
+        yield mock_cls
+
+@pytest.mark.asyncio
+async def test_start_warms_a_standby(mock_shell_cls):
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    await supervisor._refill
+
+    assert mock_shell_cls.call_count == 1
+    supervisor._standby.flush_buffer.assert_awaited_once()
+    await supervisor.cleanup()
+
+@pytest.mark.asyncio
+async def test_take_standby_hands_over_and_refills(mock_shell_cls):
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    await supervisor._refill
+    first = supervisor._standby
+
+    assert await supervisor.take_standby() is first
+    await supervisor._refill
+
+    assert supervisor._standby is not None
+    assert supervisor._standby is not first
+    await supervisor.cleanup()
+
+@pytest.mark.asyncio
+async def test_take_standby_waits_for_bootstrap_in_progress(mock_shell_cls):
+    release = asyncio.Event()
+    shell = AsyncMock()
+    shell.is_alive = MagicMock(return_value=True)
+    shell.flush_buffer.side_effect = release.wait
+    mock_shell_cls.side_effect = lambda: shell
+
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    taking = asyncio.create_task(supervisor.take_standby())
+    await asyncio.sleep(0)
+    assert not taking.done()
+
+    release.set()
+    assert await taking is shell
+    await supervisor.cleanup()
+
+@pytest.mark.asyncio
+async def test_take_standby_discards_dead_standby(mock_shell_cls):
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    await supervisor._refill
+    dead = supervisor._standby
+    dead.is_alive.return_value = False
+
+    assert await supervisor.take_standby() is None
+    dead.cleanup.assert_awaited_once()
+    await supervisor.cleanup()
+
+@pytest.mark.asyncio
+async def test_take_standby_without_start_returns_none(mock_shell_cls):
+    supervisor = ShellSupervisor(interval=0)
+
+    assert await supervisor.take_standby() is None
+    mock_shell_cls.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_failed_bootstrap_leaves_no_standby(mock_shell_cls):
+    shell = AsyncMock()
+    shell.flush_buffer.side_effect = pexpect.exceptions.EOF("EOF")
+    mock_shell_cls.side_effect = lambda: shell
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    await supervisor._refill
+
+    assert supervisor._standby is None
+    shell.cleanup.assert_awaited_once()
+    await supervisor.cleanup()
+
+@pytest.mark.asyncio
+async def test_monitor_health_checks_sessions(mock_shell_cls):
+    session = AsyncMock()
+    checked = asyncio.Event()
+    session.health_check.side_effect = lambda: checked.set()
+    supervisor = ShellSupervisor(interval=0.01)
+    supervisor.start([session])
+
+    await asyncio.wait_for(checked.wait(), 1)
+    await supervisor.cleanup()
+
+    assert supervisor._monitor is None
+
+@pytest.mark.asyncio
+async def test_cleanup_closes_standby(mock_shell_cls):
+    supervisor = ShellSupervisor(interval=0)
+    supervisor.start([])
+    await supervisor._refill
+    standby = supervisor._standby
+
+    await supervisor.cleanup()
+
+    standby.cleanup.assert_awaited_once()
+    assert supervisor._standby is None
@@ -1,17 +1,20 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from tree_climber_mcp.shell import ShellManager
-from tree_climber_mcp.tools.command import CommandTool
+from tree_climber_mcp.pool import ShellPool, ShellPoolBusyError
+from tree_climber_mcp.shell import CommandResult
+from tree_climber_mcp.tools.command import BatchCommandTool, CommandTool
 from mcp.types import TextContent
 
 @pytest.fixture
-def mock_shell_manager():
-    mock = AsyncMock(spec=ShellManager)
+def mock_shell_pool():
+    mock = AsyncMock(spec=ShellPool)
+    # The session declines the direct path unless a test says otherwise
+    mock.run_direct.return_value = None
     return mock
 
 @pytest.fixture
-def cli_tool(mock_shell_manager):
-    return CommandTool(mock_shell_manager)
+def cli_tool(mock_shell_pool):
+    return CommandTool(mock_shell_pool)
 
 def test_get_tool(cli_tool):
     tool = cli_tool.get_tool()
@@ -30,25 +33,227 @@ async def test_call_tool_banned_command(cli_tool):
     result = await cli_tool.call_tool({"bash_command": "rm -rf /"})
     assert len(result) == 1
     assert "banned command" in result[0].text
+    assert "matched rule: rm\\s+-rf" in result[0].text
 
 @pytest.mark.asyncio
-async def test_call_tool_valid_command(cli_tool, mock_shell_manager):
+async def test_call_tool_valid_command(cli_tool, mock_shell_pool):
     # Setup mock return for run_command
-    mock_shell_manager.run_command.return_value = "file.txt"
+    mock_shell_pool.run_command.return_value = CommandResult("file.txt\n", 0, 0.0123)
     
     cmd = "ls"
     result = await cli_tool.call_tool({"bash_command": cmd})
     
     # Verify ShellManager was used
-    mock_shell_manager.run_command.assert_called_with(cmd, 10) # default timeout
+    mock_shell_pool.run_command.assert_called_with(cmd, 10, session_id=None) # default timeout
     
     assert len(result) == 1
-    assert result[0].text == "file.txt"
+    assert result[0].text == "file.txt\n[exit status: 0, duration: 0.012s]"
 
 @pytest.mark.asyncio
-async def test_call_tool_custom_timeout(cli_tool, mock_shell_manager):
-    mock_shell_manager.run_command.return_value = "ok"
+async def test_call_tool_reports_failure_status(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("no such file", 2, 0.5)
+
+    result = await cli_tool.call_tool({"bash_command": "cat missing"})
+
+    assert result[0].text == "no such file\n[exit status: 2, duration: 0.500s]"
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_unknown_status_on_timeout(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult(
+        "partial\n", None, 10.0, timed_out=True, recovery="respawned", recovery_duration=2.5
+    )
+
+    result = await cli_tool.call_tool({"bash_command": "sleep 100"})
+
+    assert result[0].text == (
+        "partial\n[exit status: unknown, duration: 10.000s; timed out, "
+        "shell ignored the interrupt and was respawned in 2.500s]"
+    )
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_interrupt_recovery(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult(
+        "^C\n", -2, 10.0, timed_out=True, recovery="interrupted", recovery_duration=0.004
+    )
+
+    result = await cli_tool.call_tool({"bash_command": "sleep 100"})
+
+    assert result[0].text.endswith(
+        "[exit status: -2, duration: 10.000s; timed out, "
+        "command interrupted and session resynchronised in 0.004s]"
+    )
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_failover(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult(
+        "", 0, 0.01, recovery="standby", recovery_duration=0.02
+    )
+
+    result = await cli_tool.call_tool({"bash_command": "exit"})
+
+    assert result[0].text == (
+        "[exit status: 0, duration: 0.010s; shell exited, "
+        "switched to the warm standby shell in 0.020s]"
+    )
+
+@pytest.mark.asyncio
+async def test_call_tool_runs_plain_pipeline_directly(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_direct.return_value = CommandResult("3\n", 0, 0.002, stderr="")
+
+    result = await cli_tool.call_tool({"bash_command": "ls -la | wc -l", "session_id": "agent-1"})
+
+    mock_shell_pool.run_direct.assert_awaited_once_with(
+        [["ls", "-la"], ["wc", "-l"]], 10, session_id="agent-1"
+    )
+    mock_shell_pool.run_command.assert_not_awaited()
+    assert result[0].text == "3\n[exit status: 0, duration: 0.002s]"
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_direct_stderr(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_direct.return_value = CommandResult(
+        "", 2, 0.001, stderr="cat: missing: No such file or directory\n"
+    )
+
+    result = await cli_tool.call_tool({"bash_command": "cat missing"})
+
+    assert result[0].text == (
+        "[stderr]\ncat: missing: No such file or directory\n[exit status: 2, duration: 0.001s]"
+    )
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_truncated_output(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult(
+        "head\n[... 900 bytes omitted ...]\ntail\n", 0, 0.5, output_bytes=1000, omitted_bytes=900
+    )
+
+    result = await cli_tool.call_tool({"bash_command": "cat big.log; echo $?"})
+
+    assert result[0].text.endswith(
+        "tail\n[exit status: 0, duration: 0.500s; output truncated, 900 of 1000 bytes omitted]"
+    )
+
+@pytest.mark.asyncio
+async def test_call_tool_shell_syntax_skips_direct_path(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("", 0, 0.0)
+
+    await cli_tool.call_tool({"bash_command": "cd /tmp && ls $HOME"})
+
+    mock_shell_pool.run_direct.assert_not_awaited()
+    mock_shell_pool.run_command.assert_awaited_once_with("cd /tmp && ls $HOME", 10, session_id=None)
+
+@pytest.mark.asyncio
+async def test_call_tool_falls_back_when_session_declines(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("", 0, 0.0)
+
+    await cli_tool.call_tool({"bash_command": "cd /tmp"})
+
+    mock_shell_pool.run_direct.assert_awaited_once()
+    mock_shell_pool.run_command.assert_awaited_once_with("cd /tmp", 10, session_id=None)
+
+@pytest.mark.asyncio
+async def test_call_tool_custom_timeout(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("ok\n", 0, 0.0)
     
     await cli_tool.call_tool({"bash_command": "echo hi", "timeout": 30})
     
-    mock_shell_manager.run_command.assert_called_with("echo hi", 30)
+    mock_shell_pool.run_command.assert_called_with("echo hi", 30, session_id=None)
+
+@pytest.mark.asyncio
+async def test_call_tool_passes_session_id(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("ok\n", 0, 0.0)
+
+    await cli_tool.call_tool({"bash_command": "pwd", "session_id": "agent-2"})
+
+    mock_shell_pool.run_command.assert_called_with("pwd", 10, session_id="agent-2")
+
+@pytest.mark.asyncio
+async def test_call_tool_reports_busy_session(cli_tool, mock_shell_pool):
+    mock_shell_pool.run_command.side_effect = ShellPoolBusyError("Shell session 'default' is busy with 9 queued commands.")
+
+    result = await cli_tool.call_tool({"bash_command": "ls"})
+
+    assert result[0].text == "Error: Shell session 'default' is busy with 9 queued commands."
+
+# --- BatchCommandTool Tests ---
+
+@pytest.fixture
+def batch_tool(mock_shell_pool):
+    return BatchCommandTool(mock_shell_pool)
+
+def test_batch_get_tool(batch_tool):
+    tool = batch_tool.get_tool()
+    assert tool.name == "batch_command_line_interface_tool"
+    assert tool.inputSchema["required"] == ["bash_commands"]
+
+@pytest.mark.asyncio
+async def test_batch_runs_commands_in_order(batch_tool, mock_shell_pool):
+    mock_shell_pool.run_direct.side_effect = [CommandResult("/repo\n", 0, 0.002, stderr=""), None]
+    mock_shell_pool.run_command.return_value = CommandResult("", 0, 0.01)
+
+    result = await batch_tool.call_tool(
+        {"bash_commands": ["pwd", "cd src"], "session_id": "agent-1", "timeout": 5}
+    )
+
+    assert [content.text for content in result] == [
+        "[1/2] $ pwd\n/repo\n[exit status: 0, duration: 0.002s]",
+        "[2/2] $ cd src\n[exit status: 0, duration: 0.010s]",
+    ]
+    mock_shell_pool.run_direct.assert_any_await([["pwd"]], 5, session_id="agent-1")
+    mock_shell_pool.run_command.assert_awaited_once_with("cd src", 5, session_id="agent-1")
+
+@pytest.mark.asyncio
+async def test_batch_rejects_whole_batch_with_banned_command(batch_tool, mock_shell_pool):
+    result = await batch_tool.call_tool({"bash_commands": ["ls", "rm -rf /"]})
+
+    assert len(result) == 1
+    assert result[0].text == (
+        "Error: banned commands, nothing was run: rm -rf / (matched rule: rm\\s+-rf\\s+/(\\*|$))"
+    )
+    mock_shell_pool.run_direct.assert_not_awaited()
+    mock_shell_pool.run_command.assert_not_awaited()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "args",
+    [{}, {"bash_commands": []}, {"bash_commands": "ls"}, {"bash_commands": ["ls", ""]}, {"bash_commands": ["ls"] * 33}],
+)
+async def test_batch_rejects_invalid_command_lists(batch_tool, mock_shell_pool, args):
+    result = await batch_tool.call_tool(args)
+
+    assert len(result) == 1
+    assert result[0].text.startswith("Error:")
+    mock_shell_pool.run_command.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_batch_continues_after_failure_by_default(batch_tool, mock_shell_pool):
+    mock_shell_pool.run_command.side_effect = [
+        CommandResult("", 1, 0.0),
+        CommandResult("ok\n", 0, 0.0),
+    ]
+
+    result = await batch_tool.call_tool({"bash_commands": ["false; x", "echo ok; y"]})
+
+    assert len(result) == 2
+    assert "[exit status: 1" in result[0].text
+    assert "ok\n[exit status: 0" in result[1].text
+
+@pytest.mark.asyncio
+async def test_batch_stop_on_failure_skips_rest(batch_tool, mock_shell_pool):
+    mock_shell_pool.run_command.return_value = CommandResult("", None, 1.0, timed_out=True, recovery="interrupted")
+
+    result = await batch_tool.call_tool(
+        {"bash_commands": ["sleep 100; x", "echo a; y", "echo b; z"], "stop_on_failure": True}
+    )
+
+    assert len(result) == 2
+    assert "timed out" in result[0].text
+    assert result[1].text == "[stopped after command 1 failed; 2 not run]"
+    assert mock_shell_pool.run_command.await_count == 1
+
+@pytest.mark.asyncio
+async def test_batch_reports_busy_session_per_command(batch_tool, mock_shell_pool):
+    mock_shell_pool.run_command.side_effect = ShellPoolBusyError("Shell session 'default' is busy")
+
+    result = await batch_tool.call_tool({"bash_commands": ["a; b"], "stop_on_failure": True})
+
+    assert result[0].text == "[1/1] $ a; b\nError: Shell session 'default' is busy"
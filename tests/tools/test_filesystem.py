@@ -1,62 +1,107 @@
+import functools
+import os
+import time
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch, mock_open
-from tree_climber_mcp.shell import ShellManager
-from tree_climber_mcp.tools.filesystem import ListDirectoryTool, ReadFileTool, WriteFileTool
+from unittest.mock import AsyncMock, MagicMock, patch
+from tree_climber_mcp.filewindow import FileWindow
+from tree_climber_mcp.io_executor import IOTimeoutError
+from tree_climber_mcp.pool import ShellPool
+from tree_climber_mcp.search import SearchPool
+from tree_climber_mcp.snapshot import SnapshotStore
+from tree_climber_mcp.tools.filesystem import (
+    EditFileTool,
+    FindFilesTool,
+    ListDirectoryTool,
+    ReadFileTool,
+    ReadManyFilesTool,
+    SearchFilesTool,
+    SnapshotTool,
+    ChangesSinceTool,
+    WriteFileTool,
+)
 from mcp.types import TextContent
 
+def patch_read_window(text):
+    window = FileWindow(text, 0, len(text), len(text), 1, 1, 1)
+    return patch("tree_climber_mcp.tools.filesystem.read_window", return_value=window)
+
 @pytest.fixture
-def mock_shell_manager():
-    mock = AsyncMock(spec=ShellManager)
-    mock.get_pwd.return_value = "/mock/cwd"
+def mock_shell_pool():
+    mock = AsyncMock(spec=ShellPool)
+    mock.get_real_pwd.return_value = "/mock/cwd"
     return mock
 
 @pytest.fixture
-def list_tool(mock_shell_manager):
-    return ListDirectoryTool(mock_shell_manager)
+def list_tool(mock_shell_pool):
+    return ListDirectoryTool(mock_shell_pool)
 
 @pytest.fixture
-def read_tool(mock_shell_manager):
-    return ReadFileTool(mock_shell_manager)
+def read_tool(mock_shell_pool):
+    return ReadFileTool(mock_shell_pool)
 
 @pytest.fixture
-def write_tool(mock_shell_manager):
-    return WriteFileTool(mock_shell_manager)
+def write_tool(mock_shell_pool):
+    return WriteFileTool(mock_shell_pool)
 
 @pytest.fixture
-def unrestricted_read_tool(mock_shell_manager):
-    return ReadFileTool(mock_shell_manager, allow_all_paths=True)
+def unrestricted_read_tool(mock_shell_pool):
+    return ReadFileTool(mock_shell_pool, allow_all_paths=True)
 
 @pytest.fixture
-def rooted_read_tool(mock_shell_manager):
-    return ReadFileTool(mock_shell_manager, filesystem_root="/trusted/root")
+def rooted_read_tool(mock_shell_pool):
+    return ReadFileTool(mock_shell_pool, filesystem_root="/trusted/root")
 
 # --- ListDirectoryTool Tests ---
 
 @pytest.mark.asyncio
-async def test_list_directory_success(list_tool, mock_shell_manager):
-    with (patch("os.path.exists") as mock_exists, 
-          patch("os.path.isdir") as mock_isdir, 
-          patch("os.listdir") as mock_listdir):
-        
-        mock_exists.return_value = True
-        mock_isdir.return_value = True
-        mock_listdir.return_value = ["file1.txt", "dir1"]
-        
-        # Mock checks for individual items to append '/'
-        def isdir_side_effect(path):
-            if path.endswith("dir1"): return True
-            if path.startswith("/mock/cwd"): return True # target path
-            return False
-        mock_isdir.side_effect = isdir_side_effect
-
-        result = await list_tool.call_tool({})
-        
-        assert len(result) == 1
-        assert "dir1/" in result[0].text
-        assert "file1.txt" in result[0].text
-        
-        # Verify default path used CWD
-        mock_shell_manager.get_pwd.assert_called()
+async def test_list_directory_success(list_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "file1.txt").write_text("x")
+    (tmp_path / "dir1").mkdir()
+
+    result = await list_tool.call_tool({})
+
+    assert len(result) == 1
+    assert result[0].text == "dir1/\nfile1.txt"
+    # Verify default path used CWD
+    mock_shell_pool.get_real_pwd.assert_called()
+
+@pytest.mark.asyncio
+async def test_list_directory_recursive_with_filters_and_details(list_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("12345")
+    (tmp_path / "src" / "notes.txt").write_text("")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "index.py").write_text("")
+    os.utime(tmp_path / "src" / "pkg" / "mod.py", (0, 0))
+
+    result = await list_tool.call_tool(
+        {"depth": 3, "pattern": "*.py", "exclude": ["node_modules"], "details": True}
+    )
+
+    mtime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(0))
+    assert result[0].text == f"           5  {mtime}  src/pkg/mod.py"
+
+@pytest.mark.asyncio
+async def test_list_directory_pages_with_cursor(list_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("")
+
+    first = await list_tool.call_tool({"limit": 2})
+    second = await list_tool.call_tool({"limit": 2, "cursor": "b"})
+
+    assert first[0].text == 'a\nb\n[2 entries shown; more follow, continue with cursor="b"]'
+    assert second[0].text == "c"
+
+@pytest.mark.asyncio
+async def test_list_directory_rejects_bad_depth(list_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+
+    result = await list_tool.call_tool({"depth": 0})
+
+    assert result[0].text == "Error: 'depth' must be an integer of at least 1."
 
 @pytest.mark.asyncio
 async def test_list_directory_not_found(list_tool):
@@ -74,13 +119,195 @@ async def test_list_directory_rejects_absolute_path_outside_cwd(list_tool):
     result = await list_tool.call_tool({"path": "/tmp"})
     assert "outside the current working directory" in result[0].text
 
+# --- FindFilesTool Tests ---
+
+@pytest.fixture
+def find_tool(mock_shell_pool):
+    return FindFilesTool(mock_shell_pool)
+
+@pytest.mark.asyncio
+async def test_find_files_skips_ignored_paths(find_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / ".gitignore").write_text("dist/\n")
+    for path in ("src/app.py", "dist/app.py", "node_modules/x.py"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text("")
+
+    result = await find_tool.call_tool({"pattern": "*.py"})
+    everything = await find_tool.call_tool({"pattern": "*.py", "include_ignored": True})
+
+    assert result[0].text == "src/app.py"
+    assert everything[0].text == "dist/app.py\nnode_modules/x.py\nsrc/app.py"
+
+@pytest.mark.asyncio
+async def test_find_files_filters_by_modification_time(find_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "old.txt").write_text("")
+    (tmp_path / "new.txt").write_text("")
+    os.utime(tmp_path / "old.txt", (0, 0))
+
+    result = await find_tool.call_tool({"modified_after": "2000-01-01"})
+    bad = await find_tool.call_tool({"modified_after": "yesterday"})
+
+    assert result[0].text == "new.txt"
+    assert bad[0].text == "Error: 'modified_after' must be an ISO 8601 date or date-time."
+
+@pytest.mark.asyncio
+async def test_find_files_reports_the_limit(find_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("")
+
+    result = await find_tool.call_tool({"limit": 2})
+    empty = await find_tool.call_tool({"pattern": "*.none"})
+
+    assert result[0].text == "a\nb\n[2 matches shown; more exist, narrow the search or raise 'limit']"
+    assert empty[0].text == "No matches under '.'."
+
+@pytest.mark.asyncio
+async def test_find_files_rejects_path_outside_cwd(find_tool):
+    result = await find_tool.call_tool({"path": "/tmp"})
+    assert "outside the current working directory" in result[0].text
+
+# --- SearchFilesTool Tests ---
+
+@pytest.fixture
+def search_tool(mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("def main():\n    run()\n    return 0\n\n\n\ndef run():\n    pass\n")
+    (tmp_path / "notes.txt").write_text("run the tests\n")
+    # Searched in the calling thread, without worker processes
+    return SearchFilesTool(mock_shell_pool, search_pool=SearchPool(0))
+
+@pytest.mark.asyncio
+async def test_search_files_reports_path_line_and_column(search_tool):
+    result = await search_tool.call_tool({"pattern": r"run\(\)"})
+
+    assert result[0].text == "src/app.py:2:5:    run()\nsrc/app.py:7:5:def run():"
+
+@pytest.mark.asyncio
+async def test_search_files_with_context_and_include(search_tool):
+    result = await search_tool.call_tool({"pattern": "run", "include": "*.py", "context": 1})
+
+    assert result[0].text == "\n".join([
+        "src/app.py-1-def main():",
+        "src/app.py:2:5:    run()",
+        "src/app.py-3-    return 0",
+        "--",
+        "src/app.py-6-",
+        "src/app.py:7:5:def run():",
+        "src/app.py-8-    pass",
+    ])
+
+@pytest.mark.asyncio
+async def test_search_files_reports_caps(search_tool):
+    capped = await search_tool.call_tool({"pattern": "run", "literal": True, "max_per_file": 1})
+    limited = await search_tool.call_tool({"pattern": "run", "limit": 1})
+
+    assert capped[0].text == (
+        "notes.txt:1:1:run the tests\nsrc/app.py:2:5:    run()\n"
+        "[1 files had more than 1 matching lines; raise 'max_per_file' to see them]"
+    )
+    assert limited[0].text == (
+        "notes.txt:1:1:run the tests\n[1 matches in 1 files; limit reached, narrow the search or raise 'limit']"
+    )
+
+@pytest.mark.asyncio
+async def test_search_files_errors(search_tool):
+    missing = await search_tool.call_tool({})
+    invalid = await search_tool.call_tool({"pattern": "("})
+    empty = await search_tool.call_tool({"pattern": "absent"})
+    outside = await search_tool.call_tool({"pattern": "x", "path": "/tmp"})
+
+    assert missing[0].text == "Error: 'pattern' argument is required."
+    assert invalid[0].text.startswith("Error: invalid pattern: missing ), unterminated subpattern")
+    assert empty[0].text == "No matches in 2 files under '.'."
+    assert "outside the current working directory" in outside[0].text
+
+@pytest.mark.asyncio
+async def test_search_files_skips_symlinks_out_of_the_root(search_tool, tmp_path, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    (outside / "creds").write_text("SECRET=hunter2\n")
+    (tmp_path / "link").symlink_to(outside / "creds")
+
+    result = await search_tool.call_tool({"pattern": "SECRET"})
+
+    assert result[0].text == "No matches in 2 files under '.'."
+
+# --- SnapshotTool and ChangesSinceTool Tests ---
+
+@pytest.fixture
+def snapshot_tools(mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('app')\n")
+    (tmp_path / "src" / "old.py").write_text("")
+    (tmp_path / "README.md").write_text("readme\n")
+    store = SnapshotStore()
+    return SnapshotTool(mock_shell_pool, snapshot_store=store), ChangesSinceTool(mock_shell_pool, snapshot_store=store)
+
+@pytest.mark.asyncio
+async def test_changes_since_lists_added_modified_and_removed(snapshot_tools, tmp_path):
+    snapshot_tool, changes_tool = snapshot_tools
+
+    taken = await snapshot_tool.call_tool({})
+    (tmp_path / "src" / "app.py").write_text("print('changed')\n")
+    (tmp_path / "src" / "old.py").unlink()
+    (tmp_path / "src" / "gen").mkdir()
+    (tmp_path / "src" / "gen" / "schema.py").write_text("")
+    result = await changes_tool.call_tool({"snapshot_id": 1})
+
+    assert taken[0].text.startswith("Snapshot 1 of '.': 3 files as of ")
+    lines = result[0].text.splitlines()
+    assert lines[0].startswith(f"Changes under '{tmp_path}' since snapshot 1 (")
+    assert lines[0].endswith("): 1 added, 1 modified, 1 removed, 3 files now.")
+    assert lines[1:] == ["M src/app.py", "A src/gen/schema.py", "D src/old.py"]
+
+@pytest.mark.asyncio
+async def test_changes_since_renew_and_limit(snapshot_tools, tmp_path):
+    snapshot_tool, changes_tool = snapshot_tools
+    await snapshot_tool.call_tool({})
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("")
+
+    limited = await changes_tool.call_tool({"snapshot_id": 1, "limit": 2, "renew": True})
+    after = await changes_tool.call_tool({"snapshot_id": 1})
+
+    assert limited[0].text.splitlines()[1:] == ["A a", "A b", "[1 more changes not shown; raise 'limit' to see them]"]
+    assert "Snapshot 1 now records the current state." in limited[0].text
+    assert after[0].text.startswith(f"No changes under '{tmp_path}' since snapshot 1 (")
+
+@pytest.mark.asyncio
+async def test_snapshot_and_changes_since_errors(snapshot_tools):
+    snapshot_tool, changes_tool = snapshot_tools
+
+    outside = await snapshot_tool.call_tool({"path": "/tmp"})
+    missing = await snapshot_tool.call_tool({"path": "nope"})
+    unknown = await changes_tool.call_tool({"snapshot_id": 7})
+    malformed = await changes_tool.call_tool({"snapshot_id": "1"})
+
+    assert "outside the current working directory" in outside[0].text
+    assert missing[0].text == "Error: Directory 'nope' does not exist."
+    assert unknown[0].text == "Error: Snapshot 7 does not exist or has been evicted; take a new one."
+    assert malformed[0].text == "Error: 'snapshot_id' must be an id returned by the snapshot tool."
+
+@pytest.mark.asyncio
+async def test_snapshot_defaults_to_the_filesystem_root(mock_shell_pool, tmp_path):
+    (tmp_path / "file").write_text("")
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path / "elsewhere")
+
+    result = await SnapshotTool(mock_shell_pool, filesystem_root=str(tmp_path), snapshot_store=SnapshotStore()).call_tool({})
+
+    assert result[0].text.startswith(f"Snapshot 1 of '{tmp_path}': 1 file as of ")
+
 # --- ReadFileTool Tests ---
 
 @pytest.mark.asyncio
-async def test_read_file_success(read_tool, mock_shell_manager):
+async def test_read_file_success(read_tool, mock_shell_pool):
     with (patch("os.path.exists", return_value=True), 
           patch("os.path.isfile", return_value=True), 
-          patch("builtins.open", mock_open(read_data="content"))):
+          patch_read_window("content")):
         
         result = await read_tool.call_tool({"path": "test.txt"})
         
@@ -88,7 +315,34 @@ async def test_read_file_success(read_tool, mock_shell_manager):
         assert result[0].text == "content"
         
         # Check path resolution
-        mock_shell_manager.get_pwd.assert_called()
+        mock_shell_pool.get_real_pwd.assert_called()
+
+@pytest.mark.asyncio
+async def test_read_file_resolves_against_session_cwd(read_tool, mock_shell_pool):
+    with (patch("os.path.exists", return_value=True),
+          patch("os.path.isfile", return_value=True),
+          patch_read_window("content")):
+        await read_tool.call_tool({"path": "test.txt", "session_id": "agent-2"})
+
+    mock_shell_pool.get_real_pwd.assert_called_with("agent-2")
+
+@pytest.mark.asyncio
+async def test_resolve_path_reads_cached_cwd_once(read_tool, mock_shell_pool):
+    target = await read_tool._resolve_path("sub/file.txt")
+
+    assert target == "/mock/cwd/sub/file.txt"
+    # Working directory and trusted root both come from the cached value
+    assert mock_shell_pool.get_real_pwd.await_count == 2
+    mock_shell_pool.get_pwd.assert_not_called()
+    mock_shell_pool.run_command.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_resolve_path_falls_back_to_process_cwd(read_tool, mock_shell_pool):
+    mock_shell_pool.get_real_pwd.return_value = ""
+    with patch("os.getcwd", return_value="/process/cwd"):
+        target = await read_tool._resolve_path("file.txt")
+
+    assert target == "/process/cwd/file.txt"
 
 @pytest.mark.asyncio
 async def test_read_file_missing_arg(read_tool):
@@ -99,7 +353,7 @@ async def test_read_file_missing_arg(read_tool):
 async def test_read_file_allows_absolute_path_within_cwd(read_tool):
     with (patch("os.path.exists", return_value=True),
           patch("os.path.isfile", return_value=True),
-          patch("builtins.open", mock_open(read_data="content"))):
+          patch_read_window("content")):
         result = await read_tool.call_tool({"path": "/mock/cwd/test.txt"})
         assert result[0].text == "content"
 
@@ -117,7 +371,7 @@ async def test_read_file_rejects_absolute_path_outside_cwd(read_tool):
 async def test_read_file_allows_absolute_path_outside_cwd_when_all_paths_enabled(unrestricted_read_tool):
     with (patch("os.path.exists", return_value=True),
           patch("os.path.isfile", return_value=True),
-          patch("builtins.open", mock_open(read_data="content"))):
+          patch_read_window("content")):
         result = await unrestricted_read_tool.call_tool({"path": "/etc/hosts"})
         assert result[0].text == "content"
 
@@ -125,7 +379,7 @@ async def test_read_file_allows_absolute_path_outside_cwd_when_all_paths_enabled
 async def test_read_file_allows_absolute_path_within_configured_root(rooted_read_tool):
     with (patch("os.path.exists", return_value=True),
           patch("os.path.isfile", return_value=True),
-          patch("builtins.open", mock_open(read_data="content"))):
+          patch_read_window("content")):
         result = await rooted_read_tool.call_tool({"path": "/trusted/root/file.txt"})
         assert result[0].text == "content"
 
@@ -134,20 +388,331 @@ async def test_read_file_rejects_path_outside_configured_root(rooted_read_tool):
     result = await rooted_read_tool.call_tool({"path": "/etc/hosts"})
     assert "outside the allowed filesystem root" in result[0].text
 
+@pytest.fixture
+def numbered_file(tmp_path, mock_shell_pool):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    path = tmp_path / "numbered.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 11)))
+    return path
+
+@pytest.mark.asyncio
+async def test_read_file_line_range(read_tool, numbered_file):
+    result = await read_tool.call_tool({"path": "numbered.txt", "start_line": 3, "end_line": 4})
+
+    assert result[0].text == "line 3\nline 4\n[bytes 14-28 of 71, lines 3-4 of 10]"
+
+@pytest.mark.asyncio
+async def test_read_file_byte_range(read_tool, numbered_file):
+    result = await read_tool.call_tool({"path": "numbered.txt", "offset": 63, "length": 100})
+
+    assert result[0].text == "line 10\n[bytes 63-71 of 71, lines 10-10 of 10]"
+
+@pytest.mark.asyncio
+async def test_read_file_past_the_end(read_tool, numbered_file):
+    result = await read_tool.call_tool({"path": "numbered.txt", "start_line": 50})
+
+    assert result[0].text == "[bytes 71-71 of 71, no lines (file has 10)]"
+
+@pytest.mark.asyncio
+async def test_read_file_clips_to_window_limit(read_tool, numbered_file):
+    read_tool._read_file = functools.partial(read_tool._read_file, limit=20)
+
+    whole = await read_tool.call_tool({"path": "numbered.txt"})
+    lines = await read_tool.call_tool({"path": "numbered.txt", "start_line": 2})
+
+    assert whole[0].text == (
+        "line 1\nline 2\nline 3\n[bytes 0-20 of 71, lines 1-3 of 10; "
+        "window limit reached, continue with offset=20]"
+    )
+    assert lines[0].text == (
+        "line 2\nline 3\n[bytes 7-21 of 71, lines 2-3 of 10; "
+        "window limit reached, continue with start_line=4]"
+    )
+
+@pytest.mark.asyncio
+async def test_read_file_clipped_inside_a_long_line_continues_by_offset(read_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "long.txt").write_text("short\n" + "x" * 50 + "\nend\n")
+    read_tool._read_file = functools.partial(read_tool._read_file, limit=20)
+
+    first = await read_tool.call_tool({"path": "long.txt", "start_line": 2})
+    rest = await read_tool.call_tool({"path": "long.txt", "offset": 26, "length": 20})
+
+    assert first[0].text == (
+        "x" * 20 + "\n[bytes 6-26 of 61, lines 2-2 of 3; "
+        "window limit reached, continue with offset=26 (line 2 continues)]"
+    )
+    assert rest[0].text.startswith("x" * 20 + "\n[bytes 26-46 of 61, lines 2-2 of 3")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        ({"offset": 0, "start_line": 1}, "Use either"),
+        ({"start_line": 5, "end_line": 2}, "'end_line' must not be before 'start_line'"),
+        ({"offset": -1}, "'offset' must be an integer of at least 0"),
+        ({"length": "10"}, "'length' must be an integer of at least 1"),
+    ],
+)
+async def test_read_file_rejects_bad_ranges(read_tool, numbered_file, args, message):
+    result = await read_tool.call_tool({"path": "numbered.txt", **args})
+
+    assert result[0].text.startswith("Error: ")
+    assert message in result[0].text
+
+@pytest.mark.asyncio
+async def test_read_file_reports_undecodable_file(read_tool, numbered_file):
+    numbered_file.write_bytes(b"\xff\xfe")
+
+    result = await read_tool.call_tool({"path": "numbered.txt"})
+
+    assert result[0].text.startswith("Error reading file: ")
+
+@pytest.mark.asyncio
+async def test_read_file_with_fingerprint_and_if_none_match(read_tool, numbered_file):
+    stat = os.stat(numbered_file)
+    tag = f"{stat.st_ino:x}-47-{stat.st_mtime_ns:x}"
+
+    first = await read_tool.call_tool({"path": "numbered.txt", "fingerprint": "stat"})
+    again = await read_tool.call_tool({"path": "numbered.txt", "if_none_match": tag})
+    numbered_file.write_text("changed\n")
+    changed = await read_tool.call_tool({"path": "numbered.txt", "if_none_match": tag})
+
+    assert first[0].text.endswith(f"line 10\n[bytes 0-71 of 71, lines 1-10 of 10; fingerprint {tag}]")
+    assert again[0].text == f"[unchanged; fingerprint {tag}]"
+    assert changed[0].text.startswith("changed\n[bytes 0-8 of 8, lines 1-1 of 1; fingerprint ")
+
+@pytest.mark.asyncio
+async def test_read_file_digest_survives_identical_rewrite(read_tool, write_tool, numbered_file):
+    first = await read_tool.call_tool({"path": "numbered.txt", "start_line": 2, "end_line": 2, "fingerprint": "digest"})
+    tag = first[0].text.rsplit("fingerprint ", 1)[1].rstrip("]")
+    await write_tool.call_tool({"path": "numbered.txt", "content": numbered_file.read_text()})
+
+    again = await read_tool.call_tool({"path": "numbered.txt", "start_line": 2, "end_line": 2, "if_none_match": tag})
+
+    assert tag.endswith("@s2e2") and len(tag.split("-")) == 4
+    assert again[0].text.startswith("[unchanged; fingerprint ")
+    assert again[0].text != f"[unchanged; fingerprint {tag}]"
+
+@pytest.mark.asyncio
+async def test_read_file_if_none_match_applies_to_its_own_window(read_tool, numbered_file):
+    first = await read_tool.call_tool({"path": "numbered.txt", "start_line": 1, "end_line": 2, "fingerprint": "stat"})
+    tag = first[0].text.rsplit("fingerprint ", 1)[1].rstrip("]")
+
+    same = await read_tool.call_tool({"path": "numbered.txt", "start_line": 1, "end_line": 2, "if_none_match": tag})
+    other = await read_tool.call_tool({"path": "numbered.txt", "start_line": 3, "end_line": 4, "if_none_match": tag})
+    whole = await read_tool.call_tool({"path": "numbered.txt", "if_none_match": tag})
+
+    assert same[0].text == f"[unchanged; fingerprint {tag}]"
+    assert other[0].text.startswith("line 3\nline 4\n[bytes 14-28 of 71, lines 3-4 of 10; fingerprint ")
+    assert other[0].text.endswith("@s3e4]")
+    assert whole[0].text.startswith("line 1\n")
+    assert not whole[0].text.endswith("@s1e2]")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "args, message",
+    [
+        ({"fingerprint": "sha1"}, "Error: 'fingerprint' must be 'stat' or 'digest'."),
+        ({"if_none_match": "abc"}, "Error: 'if_none_match' must be a fingerprint returned by an earlier read."),
+        ({"start_line": 2, "if_none_match": "abc@s1"}, "Error: 'if_none_match' must be a fingerprint returned by an earlier read."),
+    ],
+)
+async def test_read_file_rejects_bad_fingerprints(read_tool, numbered_file, args, message):
+    result = await read_tool.call_tool({"path": "numbered.txt", **args})
+
+    assert result[0].text == message
+
+@pytest.mark.asyncio
+async def test_filesystem_tools_report_io_timeouts(mock_shell_pool):
+    executor = MagicMock()
+    executor.run = AsyncMock(side_effect=IOTimeoutError("filesystem operation timed out after 30s"))
+    tools = [
+        (ListDirectoryTool(mock_shell_pool, io_executor=executor), {"path": "."}),
+        (ReadFileTool(mock_shell_pool, io_executor=executor), {"path": "a.txt"}),
+        (WriteFileTool(mock_shell_pool, io_executor=executor), {"path": "a.txt", "content": "x"}),
+        (EditFileTool(mock_shell_pool, io_executor=executor), {"path": "a.txt", "patch": "@@ -1 +1 @@\n-a\n+b\n"}),
+        (ReadManyFilesTool(mock_shell_pool, io_executor=executor), {"files": ["a.txt"]}),
+    ]
+
+    for tool, args in tools:
+        result = await tool.call_tool(args)
+
+        assert result[0].text == "Error: filesystem operation timed out after 30s."
+
+# --- EditFileTool Tests ---
+
+@pytest.fixture
+def edit_tool(mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "app.py").write_text("".join(f"line {i}\n" for i in range(1, 31)))
+    return EditFileTool(mock_shell_pool)
+
+@pytest.mark.asyncio
+async def test_edit_file_replaces_text(edit_tool, tmp_path):
+    result = await edit_tool.call_tool({
+        "path": "app.py",
+        "edits": [{"old_text": "line 3\n", "new_text": "line 3\nline 3.5\n"}, {"old_text": "line 20", "new_text": "LINE 20"}],
+    })
+
+    lines = result[0].text.split("\n")
+    assert lines[0].startswith("Edited 'app.py': 2 hunks, +2 -1 lines; wrote ")
+    assert lines[1:] == ["@@ -3,0 +4,1 @@", "@@ -20,1 +21,1 @@"]
+    assert (tmp_path / "app.py").read_text().splitlines()[2:4] == ["line 3", "line 3.5"]
+
+@pytest.mark.asyncio
+async def test_edit_file_applies_patch(edit_tool, tmp_path):
+    result = await edit_tool.call_tool({
+        "path": "app.py",
+        "patch": "--- a/app.py\n+++ b/app.py\n@@ -10,3 +10,2 @@\n line 10\n-line 11\n line 12\n",
+    })
+
+    assert result[0].text.startswith("Edited 'app.py': 1 hunk, +0 -1 lines; ")
+    assert result[0].text.endswith("\n@@ -11,1 +10,0 @@")
+    assert "line 11\n" not in (tmp_path / "app.py").read_text()
+
+@pytest.mark.asyncio
+async def test_edit_file_summary_is_capped(edit_tool, tmp_path):
+    with patch("tree_climber_mcp.tools.filesystem.EDIT_SUMMARY_HUNKS", 2):
+        result = await edit_tool.call_tool({"path": "app.py", "edits": [{"old_text": "line", "new_text": "row", "replace_all": True}]})
+
+    lines = result[0].text.split("\n")
+    assert lines[0].startswith("Edited 'app.py': 30 hunks, +30 -30 lines; ")
+    assert lines[1:] == ["@@ -1,1 +1,1 @@", "@@ -2,1 +2,1 @@", "[28 more hunks not shown]"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args, message", [
+    ({"path": "app.py"}, "Error: Send either 'edits' or 'patch'."),
+    ({"path": "app.py", "edits": [], "patch": ""}, "Error: Send either 'edits' or 'patch'."),
+    ({"path": "app.py", "edits": [{"old_text": "line 99", "new_text": "x"}]}, "Error: The 'old_text' of edit 1 was not found; the file may have changed."),
+    ({"path": "missing.py", "patch": "@@ -1 +1 @@\n-a\n+b\n"}, "Error: File 'missing.py' does not exist."),
+    ({"path": ".", "patch": "@@ -1 +1 @@\n-a\n+b\n"}, "Error: '.' is not a file."),
+    ({"path": "../app.py", "patch": "@@ -1 +1 @@\n-a\n+b\n"}, None),
+])
+async def test_edit_file_errors(edit_tool, tmp_path, args, message):
+    before = (tmp_path / "app.py").read_bytes()
+
+    result = await edit_tool.call_tool(args)
+
+    if message is None:
+        assert "outside the current working directory" in result[0].text
+    else:
+        assert result[0].text == message
+    assert (tmp_path / "app.py").read_bytes() == before
+
+@pytest.mark.asyncio
+async def test_edit_file_reports_no_change(edit_tool):
+    result = await edit_tool.call_tool({"path": "app.py", "edits": [{"old_text": "line 1\n", "new_text": "line 1\n"}]})
+
+    assert result[0].text == "No changes to 'app.py'; the edits match its current contents."
+
+# --- ReadManyFilesTool Tests ---
+
+@pytest.fixture
+def read_many_tool(mock_shell_pool):
+    return ReadManyFilesTool(mock_shell_pool)
+
+@pytest.fixture
+def project(tmp_path, mock_shell_pool):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "a.txt").write_text("alpha\n")
+    (tmp_path / "b.txt").write_text("".join(f"b{i}\n" for i in range(1, 6)))
+    (tmp_path / "sub").mkdir()
+    return tmp_path
+
+@pytest.mark.asyncio
+async def test_read_many_files_returns_one_block_per_file(read_many_tool, project, mock_shell_pool):
+    result = await read_many_tool.call_tool({
+        "files": ["a.txt", {"path": "b.txt", "start_line": 2, "end_line": 3}, "missing.txt", "sub", "../x"],
+        "session_id": "agent-2",
+    })
+
+    assert [content.text for content in result] == [
+        "[1/5] a.txt\nalpha\n",
+        "[2/5] b.txt\nb2\nb3\n[bytes 3-9 of 15, lines 2-3 of 5]",
+        "[3/5] missing.txt\nError: File 'missing.txt' does not exist.",
+        "[4/5] sub\nError: 'sub' is not a file.",
+        "[5/5] ../x\nError: Access to '../x' is outside the current working directory.",
+    ]
+    # One working directory snapshot for the whole batch
+    assert mock_shell_pool.get_real_pwd.await_count == 2
+    mock_shell_pool.get_real_pwd.assert_awaited_with("agent-2")
+
+@pytest.mark.asyncio
+async def test_read_many_files_shares_the_byte_budget(read_many_tool, project):
+    with patch("tree_climber_mcp.tools.filesystem.READ_MANY_BUDGET", 12):
+        result = await read_many_tool.call_tool({"files": ["b.txt", "a.txt"]})
+
+    assert result[0].text == (
+        "[1/2] b.txt\nb1\nb2\n[bytes 0-6 of 15, lines 1-2 of 5; "
+        "window limit reached, continue with offset=6]"
+    )
+    assert result[1].text == "[2/2] a.txt\nalpha\n"
+
+@pytest.mark.asyncio
+async def test_read_many_files_skips_unchanged_files(read_many_tool, project):
+    first = await read_many_tool.call_tool({"files": [{"path": "a.txt", "fingerprint": "stat"}, "b.txt"]})
+    tag = first[0].text.rsplit("fingerprint ", 1)[1].rstrip("]")
+
+    again = await read_many_tool.call_tool({"files": [{"path": "a.txt", "if_none_match": tag}, "b.txt"]})
+
+    assert first[0].text.startswith("[1/2] a.txt\nalpha\n[bytes 0-6 of 6, lines 1-1 of 1; fingerprint ")
+    assert again[0].text == f"[1/2] a.txt\n[unchanged; fingerprint {tag}]"
+    assert again[1].text == first[1].text
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "files, message",
+    [
+        (None, "Error: 'files' argument is required."),
+        ([], "Error: 'files' argument is required."),
+        (["a.txt", {"start_line": 1}], "Error: every entry needs a non-empty 'path'."),
+        (["a.txt"] * 65, "Error: at most 64 files can be read at once."),
+    ],
+)
+async def test_read_many_files_validates_entries(read_many_tool, files, message):
+    result = await read_many_tool.call_tool({"files": files})
+
+    assert result[0].text == message
+
 # --- WriteFileTool Tests ---
 
 @pytest.mark.asyncio
-async def test_write_file_success(write_tool, mock_shell_manager):
-    m_open = mock_open()
-    with (patch("os.makedirs"), 
-          patch("builtins.open", m_open)):
-        
-        result = await write_tool.call_tool({"path": "new.txt", "content": "hello"})
-        
-        assert "Successfully wrote" in result[0].text
-        m_open.assert_called()
-        handle = m_open()
-        handle.write.assert_called_with("hello")
+async def test_write_file_success(write_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+
+    result = await write_tool.call_tool({"path": "sub/new.txt", "content": "héllo"})
+
+    assert result[0].text.startswith("Successfully wrote 6 bytes to 'sub/new.txt'; it is now 6 bytes, modified ")
+    assert (tmp_path / "sub" / "new.txt").read_text(encoding="utf-8") == "héllo"
+    assert os.listdir(tmp_path / "sub") == ["new.txt"]
+
+@pytest.mark.asyncio
+async def test_write_file_appends_and_writes_at_offset(write_tool, mock_shell_pool, tmp_path):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "log.txt").write_text("one\n")
+
+    appended = await write_tool.call_tool({"path": "log.txt", "content": "two\n", "append": True})
+    patched = await write_tool.call_tool({"path": "log.txt", "content": "ONE", "offset": 0})
+
+    assert appended[0].text.startswith("Successfully wrote 4 bytes to 'log.txt'; it is now 8 bytes")
+    assert patched[0].text.startswith("Successfully wrote 3 bytes to 'log.txt'; it is now 8 bytes")
+    assert (tmp_path / "log.txt").read_text() == "ONE\ntwo\n"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args, message", [
+    ({"append": True, "offset": 0}, "Error: 'append' cannot be combined with 'offset'."),
+    ({"offset": 10}, "Error: 'offset' 10 is past the end of the file (3 bytes)."),
+    ({"offset": -1}, "Error: 'offset' must be a non-negative integer."),
+])
+async def test_write_file_rejects_bad_modes(write_tool, mock_shell_pool, tmp_path, args, message):
+    mock_shell_pool.get_real_pwd.return_value = str(tmp_path)
+    (tmp_path / "a.txt").write_text("abc")
+
+    result = await write_tool.call_tool({"path": "a.txt", "content": "x", **args})
+
+    assert result[0].text == message
+    assert (tmp_path / "a.txt").read_text() == "abc"
 
 @pytest.mark.asyncio
 async def test_write_file_missing_args(write_tool):
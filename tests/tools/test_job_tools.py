@@ -0,0 +1,186 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from tree_climber_mcp.jobs import Job, JobManager, OutputRingBuffer
+from tree_climber_mcp.policy import CommandPolicy
+from tree_climber_mcp.pool import ShellPool
+from tree_climber_mcp.tools.jobs import CancelJobTool, JobOutputTool, JobStatusTool, StartJobTool
+
+def make_job(job_id=1, output=b"", capacity=1024, finished=None, exit_code=None):
+    buffer = OutputRingBuffer(capacity)
+    buffer.write(output)
+    process = MagicMock(pid=4242)
+    return Job(job_id, "make build", "/mock/cwd", process, buffer,
+               started=0.0, finished=finished, exit_code=exit_code)
+
+@pytest.fixture
+def mock_job_manager():
+    return AsyncMock(spec=JobManager)
+
+@pytest.fixture
+def mock_shell_pool():
+    mock = AsyncMock(spec=ShellPool)
+    mock.get_pwd.return_value = "/mock/cwd"
+    return mock
+
+# --- StartJobTool Tests ---
+
+@pytest.mark.asyncio
+async def test_start_job(mock_job_manager, mock_shell_pool):
+    mock_job_manager.start.return_value = make_job(job_id=7)
+    tool = StartJobTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"bash_command": "make build", "session_id": "agent-2"})
+
+    mock_shell_pool.get_pwd.assert_called_once_with("agent-2")
+    mock_job_manager.start.assert_called_once_with("make build", "/mock/cwd")
+    assert result[0].text == "Started job 7 (pid 4242) in /mock/cwd."
+
+@pytest.mark.asyncio
+async def test_start_job_rejects_banned_command(mock_job_manager, mock_shell_pool):
+    tool = StartJobTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"bash_command": "rm -rf /"})
+
+    assert result[0].text.startswith("Error: rm -rf / is a banned command (matched rule: ")
+    mock_job_manager.start.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_start_job_names_the_matched_rule(mock_job_manager, mock_shell_pool):
+    policy = CommandPolicy([r"make\s+deploy"])
+    tool = StartJobTool(mock_job_manager, mock_shell_pool, policy=policy)
+
+    result = await tool.call_tool({"bash_command": "make deploy"})
+
+    assert result[0].text == "Error: make deploy is a banned command (matched rule: make\\s+deploy)."
+    mock_job_manager.start.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_start_job_missing_arg(mock_job_manager, mock_shell_pool):
+    tool = StartJobTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({})
+
+    assert "Error: bash_command parameter is required" in result[0].text
+
+# --- JobStatusTool Tests ---
+
+@pytest.mark.asyncio
+async def test_job_status_running(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(output=b"abc"))
+    tool = JobStatusTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1})
+
+    assert "Job 1 (pid 4242): running for" in result[0].text
+    assert "3 bytes of output" in result[0].text
+
+@pytest.mark.asyncio
+async def test_job_status_exited(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(finished=2.5, exit_code=1))
+    tool = JobStatusTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1})
+
+    assert "exited with status 1 after 2.5s" in result[0].text
+
+@pytest.mark.asyncio
+async def test_job_status_lists_all_jobs(mock_job_manager, mock_shell_pool):
+    mock_job_manager.jobs = MagicMock(return_value=[make_job(1), make_job(2)])
+    tool = JobStatusTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({})
+
+    assert "Job 1" in result[0].text
+    assert "Job 2" in result[0].text
+
+@pytest.mark.asyncio
+async def test_job_status_unknown_job(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=None)
+    tool = JobStatusTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 99})
+
+    assert result[0].text == "Error: Job 99 does not exist."
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tool_class", [JobStatusTool, JobOutputTool, CancelJobTool])
+@pytest.mark.parametrize("job_id", ["abc", 1.5, True, [1]])
+async def test_job_tools_reject_non_integer_ids(mock_job_manager, mock_shell_pool, tool_class, job_id):
+    mock_job_manager.get = MagicMock(return_value=make_job())
+    tool = tool_class(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": job_id})
+
+    assert result[0].text == f"Error: 'job_id' must be an integer, not {job_id!r}."
+    mock_job_manager.get.assert_not_called()
+
+# --- JobOutputTool Tests ---
+
+@pytest.mark.asyncio
+async def test_job_output_from_offset(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(output=b"line1\nline2\n"))
+    tool = JobOutputTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1, "offset": 6})
+
+    assert result[0].text == "[job 1 running, bytes 6-12 of 12, next offset 12]\nline2\n"
+
+@pytest.mark.asyncio
+async def test_job_output_reports_dropped_bytes(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(output=b"0123456789", capacity=4))
+    tool = JobOutputTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1})
+
+    assert "bytes 6-10 of 10" in result[0].text
+    assert "[6 bytes before offset 6 were dropped from the buffer]" in result[0].text
+    assert result[0].text.endswith("\n6789")
+
+@pytest.mark.asyncio
+async def test_job_output_tail_lines(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(output=b"a\nb\nc\n"))
+    tool = JobOutputTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1, "tail_lines": 1})
+
+    assert result[0].text == "[job 1 running, bytes 4-6 of 6, next offset 6]\nc\n"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("args, message", [
+    ({"offset": "10"}, "Error: 'offset' must be an integer of at least 0."),
+    ({"offset": -5}, "Error: 'offset' must be an integer of at least 0."),
+    ({"tail_lines": -1}, "Error: 'tail_lines' must be an integer of at least 0."),
+    ({"tail_lines": 2.5}, "Error: 'tail_lines' must be an integer of at least 0."),
+    ({"max_bytes": 0}, "Error: 'max_bytes' must be an integer of at least 1."),
+    ({"max_bytes": "all"}, "Error: 'max_bytes' must be an integer of at least 1."),
+    ({"max_bytes": True}, "Error: 'max_bytes' must be an integer of at least 1."),
+])
+async def test_job_output_rejects_bad_ranges(mock_job_manager, mock_shell_pool, args, message):
+    mock_job_manager.get = MagicMock(return_value=make_job(output=b"line1\nline2\n"))
+    tool = JobOutputTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1, **args})
+
+    assert result[0].text == message
+
+# --- CancelJobTool Tests ---
+
+@pytest.mark.asyncio
+async def test_cancel_job(mock_job_manager, mock_shell_pool):
+    job = make_job()
+    mock_job_manager.get = MagicMock(return_value=job)
+    tool = CancelJobTool(mock_job_manager, mock_shell_pool)
+
+    await tool.call_tool({"job_id": 1})
+
+    mock_job_manager.cancel.assert_called_once_with(1)
+
+@pytest.mark.asyncio
+async def test_cancel_finished_job(mock_job_manager, mock_shell_pool):
+    mock_job_manager.get = MagicMock(return_value=make_job(finished=1.0, exit_code=0))
+    tool = CancelJobTool(mock_job_manager, mock_shell_pool)
+
+    result = await tool.call_tool({"job_id": 1})
+
+    assert "already finished" in result[0].text
+    mock_job_manager.cancel.assert_not_called()
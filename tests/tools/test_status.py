@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from tree_climber_mcp.dirindex import DirectoryIndex, IndexStats
+from tree_climber_mcp.io_executor import IOExecutor, IOStats
+from tree_climber_mcp.pool import ShellPool
+from tree_climber_mcp.tools.status import ServerStatusTool
+
+def make_index(state="ready", reason=None, root="/repo"):
+    index = MagicMock(spec=DirectoryIndex)
+    index.root = root
+    index.stats.return_value = IndexStats(state, reason, 1200, 34000, 5 * 1024 * 1024, 0.25, 17, 90, 3)
+    return index
+
+IO_LINE = "Filesystem I/O: 3 of 16 workers busy, 1 calls queued (peak 5); 1,250 calls completed, 2 timed out (limit 30s)."
+
+@pytest.fixture
+def mock_io_executor():
+    executor = MagicMock(spec=IOExecutor)
+    executor.timeout = 30
+    executor.stats.return_value = IOStats(16, 1, 3, 1250, 2, 5)
+    return executor
+
+@pytest.fixture
+def mock_shell_pool():
+    mock = AsyncMock(spec=ShellPool)
+    mock.get_real_pwd.return_value = "/repo/src"
+    return mock
+
+@pytest.mark.asyncio
+async def test_status_reports_io_load_and_the_directory_index(mock_shell_pool, mock_io_executor):
+    tool = ServerStatusTool(mock_shell_pool, io_executor=mock_io_executor, directory_index=make_index())
+
+    result = await tool.call_tool({"session_id": "agent-2"})
+
+    mock_shell_pool.get_real_pwd.assert_called_once_with("agent-2")
+    assert result[0].text == IO_LINE + "\n" + (
+        "Directory index: ready, root /repo, 1,200 directories, 34,000 entries, about 5.0 MiB, "
+        "built in 0.25s; 90 lookups from memory, 3 from disk, 17 inotify events."
+    )
+
+@pytest.mark.asyncio
+async def test_status_notes_a_working_directory_outside_the_index(mock_shell_pool, mock_io_executor):
+    mock_shell_pool.get_real_pwd.return_value = "/elsewhere"
+    tool = ServerStatusTool(mock_shell_pool, io_executor=mock_io_executor, directory_index=make_index())
+
+    result = await tool.call_tool({})
+
+    assert result[0].text.endswith(
+        "\nThe working directory /elsewhere is outside the index root, so walks there read the disk."
+    )
+
+@pytest.mark.asyncio
+async def test_status_reports_a_disabled_or_missing_index(mock_shell_pool, mock_io_executor):
+    index = make_index("disabled", "inotify is not available")
+    disabled = ServerStatusTool(mock_shell_pool, io_executor=mock_io_executor, directory_index=index)
+    missing = ServerStatusTool(mock_shell_pool, io_executor=mock_io_executor)
+
+    assert (await disabled.call_tool({}))[0].text.endswith(
+        "\nDirectory index: disabled, inotify is not available; walks read the disk."
+    )
+    assert (await missing.call_tool({}))[0].text.endswith(
+        "\nDirectory index: off; start the server with --directory-index to enable it."
+    )
+
+@pytest.mark.asyncio
+async def test_status_reads_a_live_io_executor(mock_shell_pool):
+    executor = IOExecutor(2, 5)
+    try:
+        await executor.run(sum, [1, 2])
+        tool = ServerStatusTool(mock_shell_pool, io_executor=executor)
+
+        result = await tool.call_tool({})
+    finally:
+        executor.shutdown()
+
+    assert result[0].text.startswith(
+        "Filesystem I/O: 0 of 2 workers busy, 0 calls queued (peak 1); 1 calls completed, 0 timed out (limit 5s).\n"
+    )